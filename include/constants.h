@@ -468,6 +468,53 @@
  */
 #define DEFAULT_PATCH_LINE_THRESHOLD 5000
 
+/*
+ * Default number of open ELF objects kept in the ELF handle cache
+ */
+#define DEFAULT_ELF_CACHE_SIZE 128
+
+/*
+ * Number of calls batched in to one Koji multiCall request
+ */
+#define KOJI_MULTICALL_SIZE 100
+
+/*
+ * Default number of packages downloaded at the same time
+ */
+#define DEFAULT_DOWNLOAD_JOBS 4
+
+/*
+ * Subdirectory of the working directory holding payload file
+ * contents shared between the extracted packages
+ */
+#define PAYLOAD_OBJECTS_DIR "objects"
+
+/*
+ * Subdirectory of the cache directory holding recorded inspection
+ * results
+ */
+#define CACHE_RESULTS_DIR "results"
+
+/*
+ * Default maximum size of the cache directory, in megabytes
+ */
+#define DEFAULT_CACHE_SIZE 1024
+
+/*
+ * Subdirectory of the cache directory holding downloaded packages
+ */
+#define CACHE_ARTIFACTS_DIR "artifacts"
+
+/*
+ * Default maximum size of the downloaded package cache, in megabytes
+ */
+#define DEFAULT_ARTIFACT_CACHE_SIZE 10240
+
+/*
+ * Lock file held while a cache directory is being trimmed
+ */
+#define CACHE_LOCK_FILE ".lock"
+
 /*
  * Default message digest to use internally.  The definition comes
  * from an enum in rpminspect.h
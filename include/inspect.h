@@ -72,6 +72,22 @@
  */
 bool foreach_peer_file(struct rpminspect *ri, const char *inspection, foreach_peer_file_func check_fn);
 
+/**
+ * @brief Iterate over each file in each package in a build using
+ * multiple threads.
+ *
+ * Same as foreach_peer_file(), but up to ri->jobs files are checked
+ * at once.  Results are reported in the same order as
+ * foreach_peer_file().  The callback must be safe to run from more
+ * than one thread at a time.
+ *
+ * @param ri Pointer to the struct rpminspect used for the program.
+ * @param inspection Name of the currently running inspection.
+ * @param callback Callback function to iterate over each file.
+ * @return True if the check_fn passed for each file, false otherwise.
+ */
+bool foreach_peer_file_parallel(struct rpminspect *ri, const char *inspection, foreach_peer_file_func check_fn);
+
 /**
  * @brief Return inspection ID given its name string.
  *
@@ -99,6 +115,24 @@ const char *inspection_desc(const uint64_t id);
  */
 const char *inspection_header_to_desc(const char *header);
 
+/**
+ * @brief Return the classes of payload files the selected inspections
+ * read.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @return FILE_CLASS_* bits needed by the selected inspections.
+ */
+unsigned int inspection_file_classes(const struct rpminspect *ri);
+
+/**
+ * @brief Return the classes of build artifacts the selected
+ * inspections look at.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @return ARTIFACT_* bits needed by the selected inspections.
+ */
+unsigned int inspection_artifact_classes(const struct rpminspect *ri);
+
 /** @} */
 
 /**
@@ -43,6 +43,12 @@ Elf *get_elf_archive(const char *, int *);
 GElf_Half get_elf_type(Elf *);
 GElf_Half get_elf_machine(Elf *);
 bool is_elf(const char *);
+void set_elf_cache_size(const size_t);
+Elf *borrow_elf(const char *, const Elf_Kind, int *);
+void return_elf(Elf *, const int);
+void free_elf_cache(void);
+Elf_Kind get_elf_kind(const char *, int *, GElf_Half *);
+bool is_elf_file(const rpmfile_entry_t *);
 bool is_elf_shared_library(const char *);
 bool have_elf_section(Elf *, int64_t, const char *);
 string_list_t *get_elf_section_names(Elf *elf, size_t start);
@@ -61,4 +67,36 @@ string_list_t *get_elf_exported_functions(Elf *, bool (*)(const char *));
 typedef bool (*elf_ar_action)(Elf *, string_list_t **);
 void elf_archive_iterate(int, Elf *, elf_ar_action, string_list_t **);
 
+/*
+ * What the inspections want to know about an ELF object, gathered in
+ * a single pass over its section headers, dynamic section, symbol
+ * tables, and program headers by get_elf_summary().  The lists are
+ * NULL when the object has no such entries.  execstack is true if the
+ * object has a PT_GNU_STACK program header (ET_EXEC and ET_DYN) or a
+ * .note.GNU-stack section (ET_REL), and execstack_flags holds the
+ * p_flags or sh_flags from it.
+ */
+typedef struct _elf_summary_t {
+    GElf_Half type;
+    GElf_Half machine;
+    string_list_t *sections;    /* section names */
+    string_list_t *needed;      /* DT_NEEDED entries */
+    string_list_t *rpath;       /* DT_RPATH entries */
+    string_list_t *runpath;     /* DT_RUNPATH entries */
+    char *soname;               /* the DT_SONAME, if exactly one */
+    GElf_Xword flags;           /* DT_FLAGS */
+    GElf_Xword flags_1;         /* DT_FLAGS_1 */
+    string_list_t *imported;    /* symbols in .dynsym */
+    string_list_t *exported;    /* symbols in .symtab */
+    bool textrel;               /* DT_TEXTREL or DF_TEXTREL */
+    bool bind_now;              /* DT_BIND_NOW or DF_BIND_NOW */
+    bool relro;                 /* PT_GNU_RELRO present */
+    bool executable;            /* has SHF_EXECINSTR PROGBITS */
+    bool execstack;
+    uint64_t execstack_flags;
+} elf_summary_t;
+
+elf_summary_t *get_elf_summary(rpmfile_entry_t *, Elf *);
+void free_elf_summary(elf_summary_t *);
+
 #endif
@@ -28,6 +28,7 @@
 #include <signal.h>
 #include <regex.h>
 #include <rpm/header.h>
+#include <openssl/evp.h>
 
 #ifdef _WITH_LIBCAP
 #include <sys/capability.h>
@@ -109,19 +110,6 @@ enum {
  */
 enum { BEFORE_BUILD, AFTER_BUILD };
 
-/*
- * Supported checksum types.
- */
-enum checksum {
-    NULLSUM,
-    MD5SUM,
-    SHA1SUM,
-    SHA224SUM,
-    SHA256SUM,
-    SHA384SUM,
-    SHA512SUM
-};
-
 /* Common functions */
 
 /* init.c */
@@ -212,8 +200,16 @@ const char *strtype(const mode_t mode);
 char *strshorten(const char *s, size_t width);
 
 /* badwords.c */
+badwords_t *compile_badwords(const string_list_t *);
+void free_badwords(badwords_t *);
+bool scan_bad_words(const char *, const badwords_t *);
 bool has_bad_word(const char *, const string_list_t *);
 
+/* codepoints.c */
+codepoints_t *compile_codepoints(const UChar32_list_t *);
+void free_codepoints(codepoints_t *);
+bool scan_codepoints(const codepoints_t *, const unsigned char *, const size_t, codepoint_callback, void *);
+
 /* copyfile.c */
 int copyfile(const char *, const char *, bool, bool);
 
@@ -230,11 +226,13 @@ char *get_rpm_header_value(const rpmfile_entry_t *file, rpmTag tag);
 /* peers.c */
 rpmpeer_t *init_rpmpeer(void);
 void free_rpmpeer(rpmpeer_t *);
-void add_peer(rpmpeer_t **, int, bool, const char *, Header);
+void add_peer(struct rpminspect *, int, bool, const char *, Header);
+void start_extract(struct rpminspect *, const char *, Header, const unsigned int);
+bool extract_peers(struct rpminspect *, const unsigned int);
 
 /* files.c */
 void free_files(rpmfile_t *files);
-rpmfile_t * extract_rpm(const char *, Header, char **output_dir);
+rpmfile_t * extract_rpm(const char *, Header, char **output_dir, const unsigned int, const char *);
 bool process_file_path(const rpmfile_entry_t *, regex_t *, regex_t *);
 void find_file_peers(rpmfile_t *, rpmfile_t *);
 bool is_debug_or_build_path(const char *);
@@ -248,6 +246,20 @@ results_t *init_results(void);
 void free_results(results_t *);
 void add_result_entry(results_t **, struct result_params *);
 void add_result(struct rpminspect *, struct result_params *);
+void append_results(struct rpminspect *, results_t *);
+results_t **capture_results(results_t **);
+
+/* cache.c */
+bool cacheable(const struct rpminspect *, const char *);
+void set_cache_salt(const char *, const char *);
+char *get_command_identity(const char *);
+bool get_cached_results(const struct rpminspect *, const char *, rpmfile_entry_t *, results_t **, bool *);
+void put_cached_results(const struct rpminspect *, const char *, rpmfile_entry_t *, const results_t *, const bool);
+bool get_cached_artifact(const struct rpminspect *, const char *, const char *);
+void put_cached_artifact(const struct rpminspect *, const char *, const char *);
+char *get_cached_metadata(const struct rpminspect *, const char *, size_t *);
+void put_cached_metadata(const struct rpminspect *, const char *, const char *, const size_t);
+void close_cache(const struct rpminspect *);
 
 /* output.c */
 const char *format_desc(unsigned int);
@@ -268,14 +280,26 @@ void output_summary(const results_t *results, const char *dest, const severity_t
 int unpack_archive(const char *, const char *, const bool);
 
 /* magic.c */
+void free_magic(void);
 char *mime_type(const char *);
 char *get_mime_type(rpmfile_entry_t *);
+void get_mime_types(struct rpminspect *, rpmfile_entry_t **, const size_t);
 bool is_text_file(rpmfile_entry_t *);
 
 /* checksums.c */
+bool compute_checksums(const char *, mode_t *, const enum checksum *, const size_t, char **);
 char *compute_checksum(const char *, mode_t *, enum checksum);
+enum checksum get_digest_type(const char *);
+const EVP_MD *get_evp_md(const enum checksum);
+enum checksum get_header_digest_type(Header);
+void get_checksums(rpmfile_entry_t *, const enum checksum *, const size_t);
+char *get_checksum(rpmfile_entry_t *, const enum checksum);
 char *checksum(rpmfile_entry_t *);
 
+/* classify.c */
+void classify_file(rpmfile_entry_t *file);
+void classify_files(struct rpminspect *ri);
+
 /* runcmd.c */
 char *run_cmd_vpe(int *exitcode, const char *workdir, char **argv);
 char *run_cmd(int *, const char *, const char *, ...) __attribute__((__sentinel__));
@@ -284,9 +308,9 @@ char **build_argv(const char *cmd);
 void free_argv(char **argv);
 
 /* fileinfo.c */
-bool match_fileinfo_mode(struct rpminspect *, const rpmfile_entry_t *, const char *, const char *);
-bool match_fileinfo_owner(struct rpminspect *, const rpmfile_entry_t *, const char *, const char *, const char *, const char *);
-bool match_fileinfo_group(struct rpminspect *, const rpmfile_entry_t *, const char *, const char *, const char *, const char *);
+bool match_fileinfo_mode(struct rpminspect *, rpmfile_entry_t *, const char *, const char *);
+bool match_fileinfo_owner(struct rpminspect *, rpmfile_entry_t *, const char *, const char *, const char *, const char *);
+bool match_fileinfo_group(struct rpminspect *, rpmfile_entry_t *, const char *, const char *, const char *, const char *);
 caps_filelist_entry_t *get_caps_entry(struct rpminspect *, const char *, const char *);
 
 /* flags.c */
@@ -375,18 +399,20 @@ const char *get_before_debuginfo_path(struct rpminspect *ri, const char *binarch
  */
 const char *get_after_debuginfo_path(struct rpminspect *ri, const char *binarch, const char *subpkg);
 bool usable_path(const char *path);
-bool match_path(const char *pattern, const char *root, const char *needle);
+bool match_path(const char *pattern, const char *needle);
+void compile_ignores(struct rpminspect *ri);
+void free_ignores(ignore_matcher_t *matcher);
 
 /**
  * @brief Given a path and struct rpminspect, determine if the path
  * should be ignored or not.
  *
- * @param ri The struct rpminspect for the program.  @param path The
- * relative path to check (i.e., localpath).  @param root The root
- * directory, optional (pass NULL to use '/').  @return True if path
- * should be ignored, false otherwise.
+ * @param ri The struct rpminspect for the program.  @param
+ * inspection The name of the inspection currently running.  @param
+ * path The relative path to check (i.e., localpath).  @return True if
+ * path should be ignored, false otherwise.
  */
-bool ignore_path(const struct rpminspect *ri, const char *inspection, const char *path, const char *root);
+bool ignore_path(const struct rpminspect *ri, const char *inspection, const char *path);
 
 /* rebase.c */
 /**
@@ -423,8 +449,12 @@ char *abspath(const char *path);
 /* diags.c */
 string_list_t *gather_diags(struct rpminspect *ri, const char *progname, const char *progver);
 
+/* scheduler.c */
+void run_parallel(const unsigned int nthreads, const size_t ntasks, void (*task)(size_t, void *), void *data);
+bool run_inspections(struct rpminspect *ri);
+
 /* secrule.c */
-severity_t get_secrule_result_severity(struct rpminspect *ri, const rpmfile_entry_t *file, const int type);
+severity_t get_secrule_result_severity(struct rpminspect *ri, rpmfile_entry_t *file, const int type);
 
 /* deprules.c */
 deprule_list_t *gather_deprules(Header hdr);
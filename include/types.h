@@ -30,6 +30,7 @@
 #include <rpm/rpmlib.h>
 #include <rpm/rpmfi.h>
 #include <unicode/utypes.h>
+#include <libelf.h>
 
 #ifdef _WITH_LIBKMOD
 #include <libkmod.h>
@@ -77,6 +78,21 @@ typedef struct _pair_entry_t {
 
 typedef TAILQ_HEAD(pair_entry_s, _pair_entry_t) pair_list_t;
 
+/*
+ * Supported checksum types.
+ */
+enum checksum {
+    NULLSUM,
+    MD5SUM,
+    SHA1SUM,
+    SHA224SUM,
+    SHA256SUM,
+    SHA384SUM,
+    SHA512SUM
+};
+
+#define NUM_CHECKSUMS (SHA512SUM + 1)
+
 /*
  * A file is information about a file in an RPM payload.
  *
@@ -102,14 +118,34 @@ typedef TAILQ_HEAD(pair_entry_s, _pair_entry_t) pair_list_t;
  *
  * cap is the getcap() value for the file.
  *
- * checksum is a string containing the human-readable checksum digest
+ * checksums holds the human-readable digests computed so far for the
+ * file, indexed by enum checksum.  Entries not computed yet are NULL.
  *
  * moved_path is true if the file moved path locations between the
  * before and after build, false otherwise
  *
  * moved_subpackage is true if the file moved between subpackages
  * between the before and after build, false otherwise.
+ *
+ * classified is true once classify_file() has filled in type, the
+ * default checksum, text, compression, and the elf_* members.  Those
+ * members are only meaningful when classified is true.  elf_kind is
+ * ELF_K_ELF for ELF objects, ELF_K_AR for static libraries, and
+ * ELF_K_NONE for anything else.  elf_class and elf_type are only set
+ * for ELF_K_ELF.
+ *
+ * elf_summary is filled in by get_elf_summary() the first time an
+ * inspection asks for it.
  */
+typedef enum _compression_t {
+    COMPRESSION_NONE = 0,
+    COMPRESSION_GZIP = 1,
+    COMPRESSION_BZIP2 = 2,
+    COMPRESSION_XZ = 3,
+    COMPRESSION_LZMA = 4,
+    COMPRESSION_ZSTD = 5
+} compression_t;
+
 typedef struct _rpmfile_entry_t {
     Header rpm_header;
     char *fullpath;
@@ -117,7 +153,7 @@ typedef struct _rpmfile_entry_t {
     struct stat st;
     int idx;
     char *type;
-    char *checksum;
+    char *checksums[NUM_CHECKSUMS];
 #ifdef _WITH_LIBCAP
     cap_t cap;
 #endif
@@ -125,6 +161,16 @@ typedef struct _rpmfile_entry_t {
     struct _rpmfile_entry_t *peer_file;
     bool moved_path;
     bool moved_subpackage;
+    bool classified;
+    bool text;
+    compression_t compression;
+    Elf_Kind elf_kind;
+    int elf_class;
+    uint16_t elf_type;
+    struct _elf_summary_t *elf_summary;
+    ino_t object;
+    struct _security_entry_t *secrule;  /* see get_secrule_by_path() */
+    bool secrule_resolved;
     TAILQ_ENTRY(_rpmfile_entry_t) items;
 } rpmfile_entry_t;
 
@@ -198,6 +244,9 @@ typedef struct _rpmpeer_entry_t {
     rpmfile_t *after_files;           /* list of files in the payload of the after RPM */
     deprule_list_t *before_deprules;  /* dependency rules for the before RPM */
     deprule_list_t *after_deprules;   /* dependency rules for the after RPM */
+    char *key;                        /* name, arch, and source flag */
+    UT_hash_handle before_hh;         /* in before_peers if before_rpm set */
+    UT_hash_handle after_hh;          /* in after_peers if after_rpm set */
     TAILQ_ENTRY(_rpmpeer_entry_t) items;
 } rpmpeer_entry_t;
 
@@ -277,6 +326,29 @@ typedef enum _koji_build_type_t {
     KOJI_BUILD_WIN = 5         /* not supported */
 } koji_build_type_t;
 
+/*
+ * Koji build states, builds do not change once complete
+ */
+typedef enum _koji_build_state_t {
+    KOJI_BUILD_BUILDING = 0,
+    KOJI_BUILD_COMPLETE = 1,
+    KOJI_BUILD_DELETED = 2,
+    KOJI_BUILD_FAILED = 3,
+    KOJI_BUILD_CANCELED = 4
+} koji_build_state_t;
+
+/*
+ * Koji task states, tasks do not change once closed
+ */
+typedef enum _koji_task_state_t {
+    KOJI_TASK_FREE = 0,
+    KOJI_TASK_OPEN = 1,
+    KOJI_TASK_CLOSED = 2,
+    KOJI_TASK_CANCELED = 3,
+    KOJI_TASK_ASSIGNED = 4,
+    KOJI_TASK_FAILED = 5
+} koji_task_state_t;
+
 /*
  * fileinfo for a product release. Used by some of the inspections.
  */
@@ -358,11 +430,26 @@ typedef struct _politics_entry_t {
     char *pattern;
     char *digest;
     bool allowed;
+    enum checksum type;           /* type of digest, NULLSUM for "*" */
+    size_t order;                 /* line order, later entries win */
     TAILQ_ENTRY(_politics_entry_t) items;
 } politics_entry_t;
 
 typedef TAILQ_HEAD(politics_entry_s, _politics_entry_t) politics_list_t;
 
+/*
+ * Politics entries indexed by path.  Entries with a literal pattern
+ * are keyed by the pattern and entries with a glob(7) pattern are
+ * keyed by the directory part of the pattern that comes before the
+ * first wildcard.
+ */
+typedef struct _politics_index_t {
+    char *key;
+    politics_entry_t **entries;   /* in line order */
+    size_t count;
+    UT_hash_handle hh;
+} politics_index_t;
+
 typedef enum _politics_field_t {
     PATTERN = 0,
     DIGEST = 1,
@@ -394,6 +481,18 @@ typedef struct _string_list_map_t {
     UT_hash_handle hh;
 } string_list_map_t;
 
+/* Compiled ignore lists, see compile_ignores() in paths.c. */
+typedef struct _ignore_matcher_t ignore_matcher_t;
+
+/* Compiled bad words, see compile_badwords() in badwords.c. */
+typedef struct _badwords_t badwords_t;
+
+/* Compiled forbidden code points, see compile_codepoints() in codepoints.c. */
+typedef struct _codepoints_t codepoints_t;
+
+/* Called by scan_codepoints() with the code point, line, and column. */
+typedef void (*codepoint_callback)(const UChar32, const long int, const long int, void *);
+
 /*
  * Security rule actions hash table
  * There is one of these for each row in the vendor security
@@ -416,11 +515,26 @@ typedef struct _security_entry_t {
     char *ver;
     char *rel;
     secrule_t *rules;
+    size_t order;                 /* line order, earlier entries win */
     TAILQ_ENTRY(_security_entry_t) items;
 } security_entry_t;
 
 typedef TAILQ_HEAD(security_entry_s, _security_entry_t) security_list_t;
 
+/*
+ * Security entries indexed by package name and then by the directory
+ * part of the path pattern before the first wildcard.  Entries with a
+ * package name pattern are under the empty package name key.  Only
+ * the second level carries entries.
+ */
+typedef struct _security_index_t {
+    char *key;
+    security_entry_t **entries;       /* in line order */
+    size_t count;
+    struct _security_index_t *paths;  /* path prefixes for a package */
+    UT_hash_handle hh;
+} security_index_t;
+
 /*
  * Configuration and state instance for librpminspect run.
  * Applications using librpminspect should initialize the
@@ -433,6 +547,11 @@ struct rpminspect {
     char *workdir;             /* full path to working directory */
     char *profiledir;          /* full path to profiles directory */
     char *worksubdir;          /* within workdir, where these builds go */
+    size_t elf_cache_size;     /* max open ELF objects to cache */
+    bool dedup_payloads;       /* share identical payload files between packages */
+    char *cache_dir;           /* persistent results cache, NULL if not used */
+    size_t cache_size;         /* max size of the results cache in megabytes */
+    size_t artifact_cache_size; /* max size of the download cache in megabytes */
 
     /* Commands */
     struct command_paths commands;
@@ -450,8 +569,11 @@ struct rpminspect {
     string_list_t *rebaseable;
     char *rebaseable_filename;
     politics_list_t *politics;
+    politics_index_t *politics_paths;   /* literal politics patterns */
+    politics_index_t *politics_globs;   /* wildcard politics patterns */
     char *politics_filename;
     security_list_t *security;
+    security_index_t *security_index;
     char *security_filename;
     bool security_initialized;
     string_list_t *icons;
@@ -466,6 +588,7 @@ struct rpminspect {
     string_list_t *badwords;   /* Space-delimited list of words prohibited
                                 * from certain package strings.
                                 */
+    badwords_t *badwords_matcher;  /* badwords compiled for scanning */
     char *vendor;              /* Required vendor string */
 
     /* Required subdomain for buildhosts -- multiple subdomains allowed */
@@ -624,6 +747,9 @@ struct rpminspect {
      */
     string_list_map_t *inspection_ignores;
 
+    /* the global and per-inspection ignores compiled for ignore_path() */
+    ignore_matcher_t *ignore_matcher;
+
     /* Optional list of expected RPMs with empty payloads */
     string_list_t *expected_empty_rpms;
 
@@ -640,6 +766,9 @@ struct rpminspect {
     char *after;               /* after build ID arg given on cmdline */
     uint64_t tests;            /* which tests to run (default: ALL) */
     bool verbose;              /* verbose inspection output? */
+    unsigned int jobs;         /* max inspections to run at once
+                                  (default 1) */
+    unsigned int download_jobs; /* max packages to download at once */
     bool rebase_detection;     /* Is rebase detection enabled for
                                   builds? (default true) */
 
@@ -647,6 +776,10 @@ struct rpminspect {
     severity_t threshold;
     severity_t worst_result;
 
+    /* Remote packages not downloaded because no inspection needed them */
+    size_t skipped_packages;
+    long long int skipped_bytes;
+
     /* The product release we are inspecting against */
     char *product_release;
 
@@ -661,6 +794,8 @@ struct rpminspect {
 
     /* accumulated data of the build set */
     rpmpeer_t *peers;               /* list of packages */
+    rpmpeer_entry_t *before_peers;  /* peers with a before package by key */
+    rpmpeer_entry_t *after_peers;   /* peers with an after package by key */
     header_cache_t *header_cache;   /* RPM header cache */
     char *before_rel;               /* before Release w/o %{?dist} */
     char *after_rel;                /* after Release w/o ${?dist} */
@@ -687,6 +822,29 @@ struct format {
     void (*driver)(const results_t *, const char *, const severity_t);
 };
 
+/*
+ * Classes of payload files.  Inspections declare which classes of
+ * files they read the contents of so only those are extracted.  A
+ * file is classified from its RPM header color and file(1) class, so
+ * this is available before the payload is read.
+ */
+#define FILE_CLASS_NONE  0           /* no file contents needed */
+#define FILE_CLASS_ELF   (1 << 0)    /* ELF objects and static libraries */
+#define FILE_CLASS_OTHER (1 << 1)    /* everything else */
+#define FILE_CLASS_ALL   (FILE_CLASS_ELF | FILE_CLASS_OTHER)
+
+/*
+ * Classes of build artifacts.  Inspections declare which artifacts
+ * they look at so remote builds are only partly downloaded when the
+ * selected inspections do not need all of them.
+ */
+#define ARTIFACT_NONE      0           /* nothing from the build */
+#define ARTIFACT_SRPM      (1 << 0)    /* the source package */
+#define ARTIFACT_BINARY    (1 << 1)    /* binary packages */
+#define ARTIFACT_DEBUGINFO (1 << 2)    /* debuginfo and debugsource packages */
+#define ARTIFACT_MODULE    (1 << 3)    /* per-arch module metadata */
+#define ARTIFACT_ALL       (ARTIFACT_SRPM | ARTIFACT_BINARY | ARTIFACT_DEBUGINFO)
+
 /*
  * Definition for an inspection.  Inspections are assigned a flag (see
  * inspect.h), a short name, and a function pointer to the driver.  The
@@ -711,6 +869,30 @@ struct inspect {
      */
     bool single_build;
 
+    /*
+     * Can this inspection run at the same time as other inspections
+     * when more than one job is requested?  Inspections that change
+     * process-wide state (the current working directory, RPM macros,
+     * library global state) must set this to false and are run by
+     * themselves.
+     */
+    bool concurrent;
+
+    /*
+     * The FILE_CLASS_* bits for the payload files this inspection
+     * reads the contents of.  Files outside of the classes needed by
+     * the selected inspections are listed but not extracted and have
+     * a NULL fullpath.
+     */
+    unsigned int file_classes;
+
+    /*
+     * The ARTIFACT_* bits for the build artifacts this inspection
+     * looks at.  Packages in other classes are not downloaded from
+     * remote builds unless a selected inspection needs them.
+     */
+    unsigned int artifact_classes;
+
     /* the driver function for the inspection */
     bool (*driver)(struct rpminspect *);
 };
@@ -725,6 +907,7 @@ typedef struct _koji_rpmlist_entry_t {
     char *release;
     int epoch;
     long long int size;
+    char *payloadhash;
     TAILQ_ENTRY(_koji_rpmlist_entry_t) items;
 } koji_rpmlist_entry_t;
 
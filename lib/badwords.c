@@ -28,6 +28,7 @@
  */
 
 #include <stdbool.h>
+#include <stdlib.h>
 #include <ctype.h>
 #include <string.h>
 #include <sys/types.h>
@@ -35,67 +36,273 @@
 #include "queue.h"
 #include "rpminspect.h"
 
+/*
+ * The bad words compiled in to a case-insensitive Aho-Corasick
+ * automaton.  Input bytes are folded to lower case and mapped to a
+ * character class so the transition table only needs a column for
+ * each distinct character used in the bad words.  Class 0 is every
+ * other character.
+ */
+struct _badwords_t {
+    bool empty;                    /* the list has an empty word */
+    size_t nwords;                 /* number of distinct words */
+    size_t *lengths;               /* length of each word */
+    unsigned char classes[256];    /* lower case byte -> class */
+    size_t nclasses;               /* number of classes */
+    size_t nstates;                /* number of states, 0 is the root */
+    unsigned int *delta;           /* nstates * nclasses transitions */
+    long int *word;                /* word ending at each state, -1 if none */
+    unsigned int *dict;            /* next state with a word on the failure chain */
+};
+
+/*
+ * Add a new state to the automaton and return it.
+ */
+static unsigned int add_state(badwords_t *bw)
+{
+    bw->delta = realloc(bw->delta, (bw->nstates + 1) * bw->nclasses * sizeof(*bw->delta));
+    assert(bw->delta != NULL);
+    memset(bw->delta + (bw->nstates * bw->nclasses), 0, bw->nclasses * sizeof(*bw->delta));
+
+    bw->word = realloc(bw->word, (bw->nstates + 1) * sizeof(*bw->word));
+    assert(bw->word != NULL);
+    bw->word[bw->nstates] = -1;
+
+    return bw->nstates++;
+}
+
 /**
- * @brief Check the given string for any defined bad words, return
- * true if found.
+ * @brief Compile a list of bad words for scan_bad_words().
  *
- * Given a list of bad words, check the specified string for any of
- * those bad words and return true on a match.  The search is
- * conducted with **strcasestr(3)** as well as checking for a preceeding
- * space to ensure it avoids substrings in the middle of a word.  For
- * example, if the badwords list contains `flag' then this function
- * will match ` flag' and ` flagging' but not ` conflagration'.  If
- * the list of bad words provided is empty, the function returns
- * false.
+ * @param badwords List of bad words, may be NULL.
+ * @return The compiled bad words, free with free_badwords().
+ */
+badwords_t *compile_badwords(const string_list_t *badwords)
+{
+    badwords_t *bw = NULL;
+    string_entry_t *badword = NULL;
+    const unsigned char *c = NULL;
+    unsigned int state = 0;
+    unsigned int next = 0;
+    unsigned int *fail = NULL;
+    unsigned int *queue = NULL;
+    size_t head = 0;
+    size_t tail = 0;
+    size_t a = 0;
+
+    bw = calloc(1, sizeof(*bw));
+    assert(bw != NULL);
+    bw->nclasses = 1;
+
+    if (badwords == NULL) {
+        add_state(bw);
+        return bw;
+    }
+
+    /* assign a class to each character used */
+    TAILQ_FOREACH(badword, badwords, items) {
+        for (c = (const unsigned char *) badword->data; *c != '\0'; c++) {
+            if (bw->classes[tolower(*c)] == 0) {
+                bw->classes[tolower(*c)] = bw->nclasses++;
+            }
+        }
+    }
+
+    /* build the trie */
+    add_state(bw);
+
+    TAILQ_FOREACH(badword, badwords, items) {
+        if (*badword->data == '\0') {
+            bw->empty = true;
+            continue;
+        }
+
+        state = 0;
+
+        for (c = (const unsigned char *) badword->data; *c != '\0'; c++) {
+            a = bw->classes[tolower(*c)];
+            next = bw->delta[(state * bw->nclasses) + a];
+
+            if (next == 0) {
+                next = add_state(bw);
+                bw->delta[(state * bw->nclasses) + a] = next;
+            }
+
+            state = next;
+        }
+
+        /* duplicate words share the first one's index */
+        if (bw->word[state] == -1) {
+            bw->lengths = realloc(bw->lengths, (bw->nwords + 1) * sizeof(*bw->lengths));
+            assert(bw->lengths != NULL);
+            bw->lengths[bw->nwords] = strlen(badword->data);
+            bw->word[state] = bw->nwords++;
+        }
+    }
+
+    /* fill in the failure transitions breadth first */
+    fail = calloc(bw->nstates, sizeof(*fail));
+    assert(fail != NULL);
+    queue = calloc(bw->nstates, sizeof(*queue));
+    assert(queue != NULL);
+    bw->dict = calloc(bw->nstates, sizeof(*bw->dict));
+    assert(bw->dict != NULL);
+
+    for (a = 0; a < bw->nclasses; a++) {
+        if ((next = bw->delta[a]) != 0) {
+            queue[tail++] = next;
+        }
+    }
+
+    while (head < tail) {
+        state = queue[head++];
+
+        for (a = 0; a < bw->nclasses; a++) {
+            next = bw->delta[(state * bw->nclasses) + a];
+
+            if (next == 0) {
+                bw->delta[(state * bw->nclasses) + a] = bw->delta[(fail[state] * bw->nclasses) + a];
+                continue;
+            }
+
+            fail[next] = bw->delta[(fail[state] * bw->nclasses) + a];
+            bw->dict[next] = (bw->word[fail[next]] != -1) ? fail[next] : bw->dict[fail[next]];
+            queue[tail++] = next;
+        }
+    }
+
+    free(fail);
+    free(queue);
+
+    return bw;
+}
+
+/**
+ * @brief Free compiled bad words.
+ *
+ * @param bw The compiled bad words, may be NULL.
+ */
+void free_badwords(badwords_t *bw)
+{
+    if (bw == NULL) {
+        return;
+    }
+
+    free(bw->lengths);
+    free(bw->delta);
+    free(bw->word);
+    free(bw->dict);
+    free(bw);
+
+    return;
+}
+
+/**
+ * @brief Scan the given string for compiled bad words, return true
+ * if found.
+ *
+ * The string is scanned once no matter how many bad words there are.
+ * The matching rules are the same as has_bad_word(): the first
+ * occurrence of each bad word, ignoring case, counts if it is at the
+ * beginning or end of the string or is preceded or followed by a
+ * space.
  *
  * @param s NUL-terminated string to scan for bad words.
- * @param badwords List of bad words to look for.
+ * @param bw Compiled bad words from compile_badwords().
  * @return True if a bad word was found in the string, false otherwise.
  */
-bool has_bad_word(const char *s, const string_list_t *badwords) {
-    string_entry_t *badword = NULL;
-    size_t badword_len;
-    char *search;
+bool scan_bad_words(const char *s, const badwords_t *bw)
+{
     bool found = false;
+    bool *seen = NULL;
+    unsigned int state = 0;
+    unsigned int match = 0;
+    const unsigned char *c = NULL;
+    const unsigned char *start = NULL;
+    long int w = 0;
 
     assert(s != NULL);
 
-    if (badwords == NULL) {
+    if (bw == NULL) {
         return false;
     }
 
-    /* check each bad word expression for a match with our string */
-    TAILQ_FOREACH(badword, badwords, items) {
-        /* Do a case insensitive search for the word */
-        search = strcasestr(s, badword->data);
+    /* strcasestr(3) finds an empty word at the beginning */
+    if (bw->empty) {
+        return true;
+    }
+
+    if (bw->nwords == 0) {
+        return false;
+    }
+
+    seen = calloc(bw->nwords, sizeof(*seen));
+    assert(seen != NULL);
+
+    for (c = (const unsigned char *) s; *c != '\0' && !found; c++) {
+        state = bw->delta[(state * bw->nclasses) + bw->classes[tolower(*c)]];
+        match = (bw->word[state] != -1) ? state : bw->dict[state];
+
+        /* every word ending here, longest first */
+        for (; match != 0 && !found; match = bw->dict[match]) {
+            w = bw->word[match];
+
+            /* only the first occurrence of each word is considered */
+            if (seen[w]) {
+                continue;
+            }
+
+            seen[w] = true;
+            start = c + 1 - bw->lengths[w];
 
-        if (search != NULL) {
             /*
              * Only consider this a match if it's at the beginning or end of a word,
              * determined by the match being at the beginning or end of the string,
              * or preceded or followed by a space
              */
-            if (search == s) {
+            if (start == (const unsigned char *) s || isspace(*(start - 1)) || c[1] == '\0' || isspace(c[1])) {
                 found = true;
-                break;
             }
+        }
+    }
 
-            /*
-             * Only check for a preceding space after we're sure that "search"
-             * is not the beginning of the string
-             */
-            if (isspace(*(search - 1))) {
-                found = true;
-                break;
-            }
+    free(seen);
+    return found;
+}
 
-            badword_len = strlen(badword->data);
-            if ((*(search + badword_len) == '\0') || isspace(*(search + badword_len))) {
-                found = true;
-                break;
-            }
-        }
+/**
+ * @brief Check the given string for any defined bad words, return
+ * true if found.
+ *
+ * Given a list of bad words, check the specified string for any of
+ * those bad words and return true on a match.  The search ignores
+ * case and checks for a preceeding space to ensure it avoids
+ * substrings in the middle of a word.  For example, if the badwords
+ * list contains `flag' then this function will match ` flag' and
+ * ` flagging' but not ` conflagration'.  Only the first occurrence of
+ * each bad word is considered.  If the list of bad words provided is
+ * empty, the function returns false.
+ *
+ * This compiles the list on every call.  Use compile_badwords() and
+ * scan_bad_words() to check many strings against the same list.
+ *
+ * @param s NUL-terminated string to scan for bad words.
+ * @param badwords List of bad words to look for.
+ * @return True if a bad word was found in the string, false otherwise.
+ */
+bool has_bad_word(const char *s, const string_list_t *badwords) {
+    bool found = false;
+    badwords_t *bw = NULL;
+
+    assert(s != NULL);
+
+    if (badwords == NULL) {
+        return false;
     }
 
+    bw = compile_badwords(badwords);
+    found = scan_bad_words(s, bw);
+    free_badwords(bw);
+
     return found;
 }
@@ -40,6 +40,9 @@
 #include <signal.h>
 #include <errno.h>
 #include <err.h>
+#include <fcntl.h>
+#include <stdint.h>
+#include <arpa/inet.h>
 #include <rpm/rpmlib.h>
 #include <curl/curl.h>
 #include <yaml.h>
@@ -52,12 +55,45 @@ volatile sig_atomic_t terminal_resized = 0;
 static struct rpminspect *workri = NULL;
 static int whichbuild = BEFORE_BUILD;
 static bool fetch_only = false;
+static unsigned int file_classes = FILE_CLASS_ALL;
+static unsigned int artifact_classes = ARTIFACT_ALL | ARTIFACT_MODULE;
 static int mode = S_IRWXU | S_IRGRP | S_IXGRP | S_IROTH | S_IXOTH;
 static size_t total_width = 0;
 static size_t bar_width = 0;
 static curl_off_t progress_displayed = 0;
 static size_t progress_msg_len = 0;
 
+/* RPM package layout, used to download just the package header */
+#define RPM_LEAD_SIZE 96
+#define RPM_HEADER_INTRO_SIZE 16
+#define RPM_HEADER_ENTRY_SIZE 16
+static const unsigned char rpm_header_magic[] = { 0x8e, 0xad, 0xe8, 0x01 };
+
+/*
+ * A package waiting to be downloaded by run_downloads().  Header-only
+ * downloads take several requests, headers counts how many of the
+ * signature and main header sizes are known and start is where the
+ * next one begins.  size and now are the expected and received byte
+ * counts for the aggregate progress bar.
+ */
+struct download {
+    char *src;
+    char *dst;
+    char *key;
+    bool header_only;
+    int headers;
+    off_t start;
+    curl_off_t size;
+    curl_off_t now;
+    FILE *fp;
+    char *range;
+    CURL *handle;
+    bool done;
+};
+
+static struct download *downloads = NULL;
+static size_t ndownloads = 0;
+
 /* This array holds strings that map to the whichbuild index value. */
 static char *build_desc[] = { "before", "after" };
 
@@ -68,7 +104,11 @@ static void prune_local(const int);
 static int copytree(const char *, const struct stat *, int, struct FTW *);
 static int download_build(const struct rpminspect *, const struct koji_build *);
 static int download_task(const struct rpminspect *, const struct koji_task *);
+static void curl_get(const bool, const char *, const char *, const off_t);
 static void curl_helper(const bool, const char *, const char *);
+static void queue_download(const char *, const char *, const char *, const curl_off_t);
+static void run_downloads(void);
+static int finish_builds(struct rpminspect *);
 
 /*
  * Set the working subdirectory for this particular run based on whether
@@ -130,7 +170,7 @@ static void get_rpm_info(const char *pkg)
         return;
     }
 
-    add_peer(&workri->peers, whichbuild, fetch_only, pkg, h);
+    add_peer(workri, whichbuild, fetch_only, pkg, h);
     return;
 }
 
@@ -239,10 +279,11 @@ static int copytree(const char *fpath, const struct stat *sb, int tflag, struct
 
 /*
  * Called by either the download helper or the progress bar callback
- * on SIGWINCH.  Sets the line up for the progress bar.  NULL input
- * means reposition an in-progress progress bar.
+ * on SIGWINCH.  Sets the line up for the progress bar, labeled with
+ * what is being downloaded.  NULL input means reposition an
+ * in-progress progress bar.
  */
-static void setup_progress_bar(const char *src)
+static void setup_progress_bar(const char *label)
 {
     size_t half_width = 0;
     char *archive = NULL;
@@ -255,12 +296,10 @@ static void setup_progress_bar(const char *src)
     progress_displayed = 0;
 
     /* generate the verbose message string */
-    if (src != NULL) {
-        /* the basename of the source URL, which is the file name */
-        archive = rindex(src, '/') + 1;
-        assert(archive != NULL);
+    if (label != NULL) {
+        archive = (char *) label;
 
-        /* we need to shorten the package basename if too wide */
+        /* we need to shorten the label if too wide */
         if ((strlen(archive) + 4) > bar_width) {
             archive = strshorten(archive, bar_width - 4);
             assert(archive != NULL);
@@ -345,7 +384,7 @@ static int download_progress(__attribute__((unused)) void *p, curl_off_t dltotal
      * display any new hash marks to indicate progress and update our
      * displayed total
      */
-    if (hashes != progress_displayed) {
+    if (hashes > progress_displayed) {
         for (i = 0; i < (hashes - progress_displayed); i++) {
             printf("#");
             fflush(stdout);
@@ -365,13 +404,53 @@ static int legacy_download_progress(void *p, double dltotal, double dlnow, doubl
 #endif
 
 /*
- * Download helper for libcurl
+ * libcurl progress callback for queued downloads.  Updates the byte
+ * counts for this download and draws one progress bar for everything
+ * in the queue.
  */
-static void curl_helper(const bool verbose, const char *src, const char *dst) {
+static int queue_progress(void *p, curl_off_t dltotal, curl_off_t dlnow, __attribute__((unused)) curl_off_t ultotal, __attribute__((unused)) curl_off_t ulnow)
+{
+    size_t i = 0;
+    curl_off_t total = 0;
+    curl_off_t now = 0;
+    struct download *d = p;
+
+    assert(d != NULL);
+
+    /* header-only downloads do not know their size up front */
+    if (!d->header_only && dltotal > d->size) {
+        d->size = dltotal;
+    }
+
+    if (!d->header_only) {
+        d->now = dlnow;
+    }
+
+    for (i = 0; i < ndownloads; i++) {
+        total += downloads[i].size;
+        now += downloads[i].now;
+    }
+
+    return download_progress(NULL, total, now, 0, 0);
+}
+
+#if LIBCURL_VERSION_NUM < 0x072000
+static int legacy_queue_progress(void *p, double dltotal, double dlnow, double ultotal, double ulnow)
+{
+  return queue_progress(p, (curl_off_t) dltotal, (curl_off_t) dlnow, (curl_off_t) ultotal, (curl_off_t) ulnow);
+}
+#endif
+
+/*
+ * Download helper for libcurl.  If length is greater than zero, only
+ * that many bytes from the start of src are requested.
+ */
+static void curl_get(const bool verbose, const char *src, const char *dst, const off_t length) {
     FILE *fp = NULL;
     CURL *c = NULL;
     int r;
     CURLcode cc;
+    char *range = NULL;
 
     /* ignore unusued variable warnings if assert is disabled */
     (void) r;
@@ -398,7 +477,7 @@ static void curl_helper(const bool verbose, const char *src, const char *dst) {
         curl_easy_setopt(c, CURLOPT_PROGRESSFUNCTION, legacy_download_progress);
 #endif
         curl_easy_setopt(c, CURLOPT_NOPROGRESS, 0L);
-        setup_progress_bar(src);
+        setup_progress_bar(rindex(src, '/') + 1);
     }
 
     /* perform the download */
@@ -411,6 +490,11 @@ static void curl_helper(const bool verbose, const char *src, const char *dst) {
     curl_easy_setopt(c, CURLOPT_URL, src);
     curl_easy_setopt(c, CURLOPT_WRITEDATA, fp);
     curl_easy_setopt(c, CURLOPT_FAILONERROR, true);
+
+    if (length > 0) {
+        xasprintf(&range, "0-%jd", (intmax_t) (length - 1));
+        curl_easy_setopt(c, CURLOPT_RANGE, range);
+    }
 #ifdef CURLOPT_TCP_FASTOPEN /* not available on all versions of libcurl (e.g., <= 7.29) */
     curl_easy_setopt(c, CURLOPT_TCP_FASTOPEN, 1);
 #endif
@@ -433,10 +517,407 @@ static void curl_helper(const bool verbose, const char *src, const char *dst) {
     }
 
     curl_easy_cleanup(c);
+    free(range);
+
+    return;
+}
+
+/*
+ * Download helper for libcurl, fetches the entire file.
+ */
+static void curl_helper(const bool verbose, const char *src, const char *dst) {
+    curl_get(verbose, src, dst, 0);
+    return;
+}
+
+/*
+ * Read the header structure intro at offset in the specified RPM file
+ * and return the size of that header structure, including the intro.
+ * Returns 0 if there is no header structure at that offset.
+ */
+static off_t get_header_size(const char *pkg, const off_t offset)
+{
+    int fd = -1;
+    unsigned char intro[RPM_HEADER_INTRO_SIZE];
+    uint32_t il = 0;
+    uint32_t dl = 0;
+
+    assert(pkg != NULL);
+
+    if ((fd = open(pkg, O_RDONLY)) == -1) {
+        return 0;
+    }
+
+    if (pread(fd, intro, sizeof(intro), offset) != sizeof(intro)) {
+        close(fd);
+        return 0;
+    }
+
+    close(fd);
+
+    if (memcmp(intro, rpm_header_magic, sizeof(rpm_header_magic))) {
+        return 0;
+    }
+
+    /* index entry count and data size, both big endian */
+    memcpy(&il, intro + 8, sizeof(il));
+    memcpy(&dl, intro + 12, sizeof(dl));
+
+    return sizeof(intro) + ((off_t) ntohl(il) * RPM_HEADER_ENTRY_SIZE) + ntohl(dl);
+}
+
+/*
+ * Start (or restart) the transfer for a queued download.  Header-only
+ * downloads request just the bytes they know they need so far.
+ */
+static void start_download(CURLM *multi, struct download *d)
+{
+    off_t length = 0;
+
+    assert(multi != NULL);
+    assert(d != NULL);
+
+    DEBUG_PRINT("src=|%s|\ndst=|%s|\n", d->src, d->dst);
+
+    if (d->header_only) {
+        length = d->start;
+
+        if (d->headers < 2) {
+            length += RPM_HEADER_INTRO_SIZE;
+        }
+    }
+
+    if ((d->fp = fopen(d->dst, "wb")) == NULL) {
+        err(RI_PROGRAM_ERROR, "fopen");
+    }
+
+    if (!(d->handle = curl_easy_init())) {
+        errx(RI_PROGRAM_ERROR, "curl_easy_init");
+    }
+
+    curl_easy_setopt(d->handle, CURLOPT_URL, d->src);
+    curl_easy_setopt(d->handle, CURLOPT_WRITEFUNCTION, NULL);
+    curl_easy_setopt(d->handle, CURLOPT_WRITEDATA, d->fp);
+    curl_easy_setopt(d->handle, CURLOPT_FOLLOWLOCATION, 1L);
+    curl_easy_setopt(d->handle, CURLOPT_FAILONERROR, true);
+    curl_easy_setopt(d->handle, CURLOPT_PRIVATE, d);
+
+    free(d->range);
+    d->range = NULL;
+
+    if (length > 0) {
+        xasprintf(&d->range, "0-%jd", (intmax_t) (length - 1));
+        curl_easy_setopt(d->handle, CURLOPT_RANGE, d->range);
+    }
+
+    if (workri->verbose) {
+#if LIBCURL_VERSION_NUM >= 0x072000
+        curl_easy_setopt(d->handle, CURLOPT_XFERINFOFUNCTION, queue_progress);
+        curl_easy_setopt(d->handle, CURLOPT_XFERINFODATA, d);
+#else
+        curl_easy_setopt(d->handle, CURLOPT_PROGRESSFUNCTION, legacy_queue_progress);
+        curl_easy_setopt(d->handle, CURLOPT_PROGRESSDATA, d);
+#endif
+        curl_easy_setopt(d->handle, CURLOPT_NOPROGRESS, 0L);
+    }
+
+#ifdef CURLOPT_TCP_FASTOPEN /* not available on all versions of libcurl (e.g., <= 7.29) */
+    curl_easy_setopt(d->handle, CURLOPT_TCP_FASTOPEN, 1);
+#endif
+#if LIBCURL_VERSION_NUM >= 0x072b00
+    /* wait for a connection that can be multiplexed rather than opening another */
+    curl_easy_setopt(d->handle, CURLOPT_PIPEWAIT, 1L);
+#endif
+#if LIBCURL_VERSION_NUM >= 0x072f00
+    curl_easy_setopt(d->handle, CURLOPT_HTTP_VERSION, CURL_HTTP_VERSION_2TLS);
+#endif
+
+    curl_multi_add_handle(multi, d->handle);
+    return;
+}
+
+/*
+ * Handle a finished transfer.  For header-only downloads, work out
+ * how much more of the package is needed from what has arrived so
+ * far (the lead, then the signature header, then the main header).
+ * Returns true if the download was restarted for more data.
+ */
+static bool finish_download(CURLM *multi, struct download *d, const CURLcode cc)
+{
+    off_t size = 0;
+    struct stat sb;
+
+    assert(multi != NULL);
+    assert(d != NULL);
+
+    curl_multi_remove_handle(multi, d->handle);
+    curl_easy_cleanup(d->handle);
+    d->handle = NULL;
+
+    if (fclose(d->fp) != 0) {
+        err(RI_PROGRAM_ERROR, "fclose");
+    }
+
+    d->fp = NULL;
+
+    /* remove output file if there was a download error (e.g., 404) */
+    if (cc != CURLE_OK) {
+        if (unlink(d->dst)) {
+            warn("unlink");
+        }
+
+        return false;
+    }
+
+    if (d->header_only && d->headers < 2) {
+        /* the server sent everything, we are done */
+        if (stat(d->dst, &sb) == 0 && sb.st_size > (d->start + RPM_HEADER_INTRO_SIZE)) {
+            return false;
+        }
+
+        if ((size = get_header_size(d->dst, d->start)) == 0) {
+            /* not an RPM we understand, get all of it */
+            d->header_only = false;
+        } else {
+            /* the signature header is padded to an 8 byte boundary */
+            if (d->headers == 0) {
+                size += (8 - (size % 8)) % 8;
+            }
+
+            d->start += size;
+            d->headers++;
+        }
+
+        start_download(multi, d);
+        return true;
+    }
+
+    if (!d->header_only) {
+        put_cached_artifact(workri, d->key, d->dst);
+    }
+
+    d->now = d->size = (d->size > d->now) ? d->size : d->now;
+    return false;
+}
+
+/*
+ * Start extracting a downloaded package while the rest of the queue
+ * downloads.  Nothing is extracted when only fetching builds.
+ */
+static void early_extract(const struct download *d)
+{
+    Header h = NULL;
+
+    assert(d != NULL);
+
+    if (fetch_only || access(d->dst, R_OK)) {
+        return;
+    }
+
+    if ((h = get_rpm_header(workri, d->dst)) != NULL) {
+        start_extract(workri, d->dst, h, file_classes);
+    }
+
+    return;
+}
+
+/*
+ * Add a package to the download queue.  When none of the selected
+ * inspections read payload files, only the package header is
+ * downloaded.  If key is not NULL, the package is taken from the
+ * artifact cache when it is there and complete downloads are added
+ * to it.  size is the expected download size or 0 if not known.
+ */
+static void queue_download(const char *src, const char *dst, const char *key, const curl_off_t size)
+{
+    struct download *d = NULL;
+
+    assert(src != NULL);
+    assert(dst != NULL);
+
+    downloads = realloc(downloads, (ndownloads + 1) * sizeof(*downloads));
+    assert(downloads != NULL);
+    d = &downloads[ndownloads++];
+    memset(d, 0, sizeof(*d));
+
+    d->src = strdup(src);
+    d->dst = strdup(dst);
+    assert(d->src != NULL);
+    assert(d->dst != NULL);
+
+    if (key != NULL) {
+        d->key = strdup(key);
+        assert(d->key != NULL);
+    }
+
+    d->header_only = (!fetch_only && file_classes == FILE_CLASS_NONE);
+    d->start = RPM_LEAD_SIZE;
+    d->size = (size > 0 && !d->header_only) ? size : 0;
+    d->done = get_cached_artifact(workri, key, dst);
+
+    return;
+}
+
+/*
+ * Download everything in the queue, up to download_jobs packages at
+ * a time over a shared pool of connections, and then collect the
+ * package headers in the order the packages were queued.  Each
+ * package starts extracting as soon as it has downloaded, so the
+ * payloads are unpacked while the rest of the queue downloads.
+ */
+static void run_downloads(void)
+{
+    size_t i = 0;
+    size_t next = 0;
+    size_t pending = 0;
+    long active = 0;
+    int running = 0;
+    int left = 0;
+    char *label = NULL;
+    CURLM *multi = NULL;
+    CURLMsg *msg = NULL;
+    struct download *d = NULL;
+
+    for (i = 0; i < ndownloads; i++) {
+        if (downloads[i].done) {
+            early_extract(&downloads[i]);
+        } else {
+            pending++;
+        }
+    }
+
+    if (pending > 0) {
+        if ((multi = curl_multi_init()) == NULL) {
+            errx(RI_PROGRAM_ERROR, "curl_multi_init");
+        }
+
+        curl_multi_setopt(multi, CURLMOPT_MAX_HOST_CONNECTIONS, (long) workri->download_jobs);
+#ifdef CURLPIPE_MULTIPLEX
+        curl_multi_setopt(multi, CURLMOPT_PIPELINING, CURLPIPE_MULTIPLEX);
+#endif
+
+        if (workri->verbose) {
+            xasprintf(&label, ngettext("%zu package", "%zu packages", pending), pending);
+            setup_progress_bar(label);
+            free(label);
+        }
+
+        while (next < ndownloads || active > 0) {
+            while (active < (long) workri->download_jobs && next < ndownloads) {
+                d = &downloads[next++];
+
+                if (!d->done) {
+                    start_download(multi, d);
+                    active++;
+                }
+            }
+
+            curl_multi_perform(multi, &running);
+
+            while ((msg = curl_multi_info_read(multi, &left)) != NULL) {
+                if (msg->msg != CURLMSG_DONE) {
+                    continue;
+                }
+
+                curl_easy_getinfo(msg->easy_handle, CURLINFO_PRIVATE, (char **) &d);
+
+                if (!finish_download(multi, d, msg->data.result)) {
+                    d->done = true;
+                    active--;
+                    early_extract(d);
+                }
+            }
+
+            if (active > 0) {
+                curl_multi_wait(multi, NULL, 0, 1000, NULL);
+            }
+        }
+
+        curl_multi_cleanup(multi);
+
+        if (workri->verbose) {
+            printf("\n");
+            fflush(stdout);
+        }
+    }
+
+    /* gather the RPM headers */
+    for (i = 0; i < ndownloads; i++) {
+        get_rpm_info(downloads[i].dst);
+        free(downloads[i].src);
+        free(downloads[i].dst);
+        free(downloads[i].key);
+        free(downloads[i].range);
+    }
+
+    free(downloads);
+    downloads = NULL;
+    ndownloads = 0;
 
     return;
 }
 
+/*
+ * Returns true if none of the selected inspections look at packages
+ * like the named one, which need not be downloaded.  Skipped packages
+ * are counted for the diagnostics output.  size is the package size
+ * or 0 if not known.
+ */
+static bool skip_package(const char *name, const char *arch, const long long int size)
+{
+    unsigned int class = ARTIFACT_BINARY;
+
+    assert(name != NULL);
+    assert(arch != NULL);
+
+    if (!strcmp(arch, SRPM_ARCH_NAME)) {
+        class = ARTIFACT_SRPM;
+    } else if (strsuffix(name, DEBUGINFO_SUFFIX) || strsuffix(name, DEBUGSOURCE_SUFFIX)) {
+        /*
+         * Same test the inspections use to skip debuginfo packages,
+         * so kernel-debuginfo-common-ARCH is downloaded for them.
+         */
+        class = ARTIFACT_DEBUGINFO;
+    }
+
+    if (artifact_classes & class) {
+        return false;
+    }
+
+    workri->skipped_packages++;
+
+    if (size > 0) {
+        workri->skipped_bytes += size;
+    }
+
+    return true;
+}
+
+/*
+ * Same as skip_package() for a task package known only by its file
+ * name, name-version-release.arch.rpm.
+ */
+static bool skip_task_package(const char *pkg, const char *arch)
+{
+    int i = 0;
+    bool skip = false;
+    char *name = NULL;
+    char *dash = NULL;
+
+    assert(pkg != NULL);
+
+    name = strdup(pkg);
+    assert(name != NULL);
+
+    for (i = 0; i < 2 && (dash = strrchr(name, '-')) != NULL; i++) {
+        *dash = '\0';
+    }
+
+    skip = skip_package(name, arch, 0);
+    free(name);
+    return skip;
+}
+
 /*
  * Given a remote artifact specification in a Koji build, download it
  * to our working directory.
@@ -454,6 +935,7 @@ static int download_build(const struct rpminspect *ri, const struct koji_build *
     char *srcfmt = NULL;
     char *dst = NULL;
     char *pkg = NULL;
+    char *key = NULL;
     FILE *fp = NULL;
     yaml_parser_t parser;
     yaml_token_t token;
@@ -624,7 +1106,7 @@ static int download_build(const struct rpminspect *ri, const struct koji_build *
             free(dst);
 
             /* for modules, get the per-arch module metadata */
-            if (workri->buildtype == KOJI_BUILD_MODULE) {
+            if (workri->buildtype == KOJI_BUILD_MODULE && (artifact_classes & ARTIFACT_MODULE)) {
                 if (fetch_only) {
                     xasprintf(&dst, "%s/%s/modulemd.%s.txt", workri->worksubdir, rpm->arch, rpm->arch);
                 } else {
@@ -648,6 +1130,11 @@ static int download_build(const struct rpminspect *ri, const struct koji_build *
                 }
             }
 
+            /* skip packages no selected inspection looks at */
+            if (skip_package(rpm->name, rpm->arch, rpm->size)) {
+                continue;
+            }
+
             /* build path strings */
             xasprintf(&pkg, "%s-%s-%s.%s.rpm", rpm->name, rpm->version, rpm->release, rpm->arch);
 
@@ -673,11 +1160,10 @@ static int download_build(const struct rpminspect *ri, const struct koji_build *
                       rpm->arch,
                       pkg);
 
-            /* download the package */
-            curl_helper(workri->verbose, src, dst);
-
-            /* gather the RPM header */
-            get_rpm_info(dst);
+            /* download the package, cached by its location and contents */
+            xasprintf(&key, "%s %s", src, (rpm->payloadhash == NULL) ? "" : rpm->payloadhash);
+            queue_download(src, dst, key, rpm->size);
+            free(key);
 
             /* start over */
             free(src);
@@ -689,6 +1175,9 @@ static int download_build(const struct rpminspect *ri, const struct koji_build *
         filter = NULL;
     }
 
+    /* download the packages and gather the RPM headers */
+    run_downloads();
+
     return 0;
 }
 
@@ -735,6 +1224,10 @@ static int download_task(const struct rpminspect *ri, const struct koji_task *ta
             TAILQ_FOREACH(entry, descendent->srpms, items) {
                 pkg = basename(entry->data);
 
+                if (skip_task_package(pkg, SRPM_ARCH_NAME)) {
+                    continue;
+                }
+
                 if (fetch_only) {
                     xasprintf(&dst, "%s/src", workri->worksubdir);
                 } else {
@@ -754,11 +1247,7 @@ static int download_task(const struct rpminspect *ri, const struct koji_task *ta
                 assert(dst != NULL);
 
                 xasprintf(&src, "%s/work/%s", workri->kojiursine, entry->data);
-                curl_helper(workri->verbose, src, dst);
-
-                /* gather the RPM header */
-                get_rpm_info(dst);
-
+                queue_download(src, dst, src, 0);
                 free(dst);
                 free(src);
             }
@@ -772,6 +1261,10 @@ static int download_task(const struct rpminspect *ri, const struct koji_task *ta
 
             pkg = basename(entry->data);
 
+            if (skip_task_package(pkg, descendent->task->arch)) {
+                continue;
+            }
+
             if (fetch_only) {
                 xasprintf(&dst, "%s/%s/%s", workri->worksubdir, descendent->task->arch, pkg);
             } else {
@@ -779,16 +1272,15 @@ static int download_task(const struct rpminspect *ri, const struct koji_task *ta
             }
 
             xasprintf(&src, "%s/work/%s", workri->kojiursine, entry->data);
-            curl_helper(workri->verbose, src, dst);
-
-            /* gather the RPM header */
-            get_rpm_info(dst);
-
+            queue_download(src, dst, src, 0);
             free(dst);
             free(src);
         }
     }
 
+    /* download the packages and gather the RPM headers */
+    run_downloads();
+
     return 0;
 }
 
@@ -821,10 +1313,10 @@ static int download_rpm(const char *rpm)
 
     /* download the package */
     xasprintf(&dst, "%s/%s", dstdir, basename(pkg));
-    curl_helper(workri->verbose, rpm, dst);
+    queue_download(rpm, dst, NULL, 0);
 
     /* gather the RPM header */
-    get_rpm_info(dst);
+    run_downloads();
 
     /* clean up */
     free(pkg);
@@ -834,6 +1326,25 @@ static int download_rpm(const char *rpm)
     return 0;
 }
 
+/*
+ * Extract the packages gathered from the builds, unless we are only
+ * fetching them.
+ */
+static int finish_builds(struct rpminspect *ri)
+{
+    assert(ri != NULL);
+
+    if (fetch_only) {
+        return 0;
+    }
+
+    if (!extract_peers(ri, file_classes)) {
+        return -1;
+    }
+
+    return 0;
+}
+
 /* Returns true if the string specifies a task ID, which is just an int */
 static bool is_task_id(const char *id)
 {
@@ -910,6 +1421,16 @@ int gather_builds(struct rpminspect *ri, bool fo)
     workri = ri;
     fetch_only = fo;
 
+    /* only extract the payload files the inspections will read */
+    file_classes = inspection_file_classes(ri);
+
+    /* only download the packages the inspections will look at */
+    if (fetch_only) {
+        artifact_classes = ARTIFACT_ALL | ARTIFACT_MODULE;
+    } else {
+        artifact_classes = inspection_artifact_classes(ri);
+    }
+
     /* process after first so the temp directory gets the NV of that pkg */
     if (ri->after != NULL) {
         whichbuild = AFTER_BUILD;
@@ -965,7 +1486,7 @@ int gather_builds(struct rpminspect *ri, bool fo)
 
     /* did we get a before build specified? */
     if (ri->before == NULL) {
-        return 0;
+        return finish_builds(ri);
     }
 
     whichbuild = BEFORE_BUILD;
@@ -1020,5 +1541,5 @@ int gather_builds(struct rpminspect *ri, bool fo)
      */
     init_arches(ri);
 
-    return 0;
+    return finish_builds(ri);
 }
@@ -0,0 +1,1035 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this program.  If not, see
+ * <https://www.gnu.org/licenses/>.
+ *
+ * SPDX-License-Identifier: LGPL-3.0-or-later
+ */
+
+/**
+ * @file cache.c
+ * @author David Cantrell &lt;dcantrell@redhat.com&gt;
+ * @date 2021
+ * @brief Persistent cache of per-file inspection results.
+ * @copyright LGPL-3.0-or-later
+ *
+ * Results of the per-file inspection drivers are kept between runs in
+ * the directory given with --cache-dir.  Each entry is a small JSON
+ * file named for a digest of everything the results depend on: the
+ * inspection, the configuration, the package name and architecture,
+ * the file path, mode, and contents, the contents of the before
+ * peer, and anything else the inspection adds with set_cache_salt(),
+ * such as the versions of the programs it runs.  Entries are touched
+ * when used and the least recently used ones are removed at the end
+ * of a run once the cache grows past cache_size.
+ *
+ * Packages downloaded from Koji are kept in the same directory, named
+ * for their path on the Koji server and payload hash, so comparing a
+ * new build against one inspected earlier does not download the
+ * older build again.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <string.h>
+#include <assert.h>
+#include <errno.h>
+#include <err.h>
+#include <fcntl.h>
+#include <ftw.h>
+#include <pthread.h>
+#include <unistd.h>
+#include <sys/file.h>
+#include <sys/stat.h>
+#include <openssl/evp.h>
+#include <json.h>
+#include "rpminspect.h"
+#include "inspect.h"
+#include "uthash.h"
+
+/*
+ * Inspections whose per-file results depend only on the file, its
+ * peer, and the configuration.  Inspections that look at other files
+ * in the build (desktop) or at the whole source tree (unicode) cannot
+ * be cached this way.
+ */
+static const char *cached_inspections[] = {
+    NAME_ANNOCHECK,
+    NAME_MANPAGE,
+    NAME_SHELLSYNTAX,
+    NAME_VIRUS,
+    NAME_XML,
+    NULL
+};
+
+/* Protects everything below */
+static pthread_mutex_t cache_lock = PTHREAD_MUTEX_INITIALIZER;
+
+/* Digest of the program version and configuration files */
+static char *config_digest = NULL;
+
+/* Extra key data set by inspections, e.g. the virus database version */
+static string_map_t *salts = NULL;
+
+/* True once a results entry has been written in this run */
+static bool cache_changed = false;
+
+/* True once a downloaded artifact has been added in this run */
+static bool artifacts_changed = false;
+
+/*
+ * One entry found when trimming the cache.
+ */
+struct cache_entry {
+    char *path;
+    off_t size;
+    time_t mtime;
+};
+
+static struct cache_entry *trim_entries = NULL;
+static size_t trim_nentries = 0;
+static off_t trim_total = 0;
+
+/*
+ * Convert a digest to a hex string.  The caller must free it.
+ */
+static char *digest_string(const unsigned char *digest, const unsigned int len)
+{
+    unsigned int i = 0;
+    char *s = NULL;
+
+    s = calloc((len * 2) + 1, sizeof(char));
+    assert(s != NULL);
+
+    for (i = 0; i < len; i++) {
+        sprintf(&s[i * 2], "%02x", (unsigned int) digest[i]);
+    }
+
+    return s;
+}
+
+/*
+ * Add a string, including its terminating NUL so adjacent fields
+ * cannot run together, to a digest.
+ */
+static void digest_add(EVP_MD_CTX *ctx, const char *s)
+{
+    if (s == NULL) {
+        s = "";
+    }
+
+    EVP_DigestUpdate(ctx, s, strlen(s) + 1);
+    return;
+}
+
+/*
+ * Add the contents of a file to a digest.
+ */
+static void digest_file(EVP_MD_CTX *ctx, const char *path)
+{
+    off_t len = 0;
+    void *data = NULL;
+
+    data = read_file_bytes(path, &len);
+
+    if (data != NULL) {
+        EVP_DigestUpdate(ctx, data, len);
+        free(data);
+    }
+
+    digest_add(ctx, path);
+    return;
+}
+
+/*
+ * Finish a digest and return it as a hex string.  The caller must
+ * free it.
+ */
+static char *digest_finish(EVP_MD_CTX *ctx)
+{
+    unsigned int len = 0;
+    unsigned char digest[EVP_MAX_MD_SIZE];
+
+    EVP_DigestFinal_ex(ctx, digest, &len);
+    EVP_MD_CTX_free(ctx);
+    return digest_string(digest, len);
+}
+
+/*
+ * Start a new SHA-256 digest.
+ */
+static EVP_MD_CTX *digest_start(void)
+{
+    EVP_MD_CTX *ctx = NULL;
+
+    ctx = EVP_MD_CTX_new();
+    assert(ctx != NULL);
+
+    if (!EVP_DigestInit_ex(ctx, EVP_sha256(), NULL)) {
+        errx(RI_PROGRAM_ERROR, _("unable to initialize checksum type %d"), SHA256SUM);
+    }
+
+    return ctx;
+}
+
+/*
+ * Return the digest of the program version and configuration files,
+ * computing it the first time.  Call with cache_lock held.
+ */
+static const char *get_config_digest(const struct rpminspect *ri)
+{
+    EVP_MD_CTX *ctx = NULL;
+    string_entry_t *entry = NULL;
+
+    if (config_digest != NULL) {
+        return config_digest;
+    }
+
+    ctx = digest_start();
+    digest_add(ctx, PACKAGE_VERSION);
+
+    if (ri->cfgfiles != NULL) {
+        TAILQ_FOREACH(entry, ri->cfgfiles, items) {
+            digest_file(ctx, entry->data);
+        }
+    }
+
+    config_digest = digest_finish(ctx);
+    return config_digest;
+}
+
+/*
+ * Return the path to the cache entry for the results of an inspection
+ * on a file, or NULL if the file cannot be cached.  The caller must
+ * free the returned string.
+ */
+static char *get_cache_path(const struct rpminspect *ri, const char *inspection, rpmfile_entry_t *file)
+{
+    EVP_MD_CTX *ctx = NULL;
+    char *sum = NULL;
+    char *peersum = NULL;
+    char *mode = NULL;
+    char *key = NULL;
+    char *path = NULL;
+    string_map_t *salt = NULL;
+
+    /* only regular files have contents to key on */
+    sum = checksum(file);
+
+    if (sum == NULL) {
+        return NULL;
+    }
+
+    if (file->peer_file != NULL) {
+        peersum = checksum(file->peer_file);
+    }
+
+    ctx = digest_start();
+    digest_add(ctx, inspection);
+
+    pthread_mutex_lock(&cache_lock);
+    digest_add(ctx, get_config_digest(ri));
+    HASH_FIND_STR(salts, inspection, salt);
+    digest_add(ctx, (salt == NULL) ? NULL : salt->value);
+    pthread_mutex_unlock(&cache_lock);
+
+    digest_add(ctx, headerGetString(file->rpm_header, RPMTAG_NAME));
+    digest_add(ctx, get_rpm_header_arch(file->rpm_header));
+    digest_add(ctx, file->localpath);
+    xasprintf(&mode, "%o", file->st.st_mode);
+    digest_add(ctx, mode);
+    free(mode);
+    digest_add(ctx, sum);
+
+    if (file->peer_file == NULL) {
+        digest_add(ctx, NULL);
+    } else if (peersum == NULL) {
+        digest_add(ctx, strtype(file->peer_file->st.st_mode));
+    } else {
+        digest_add(ctx, peersum);
+    }
+
+    key = digest_finish(ctx);
+
+    /* two levels so no one directory gets too large */
+    xasprintf(&path, "%s/%s/%.2s/%s", ri->cache_dir, CACHE_RESULTS_DIR, key, key + 2);
+    free(key);
+    return path;
+}
+
+/*
+ * Return the string value of a member of a cached result, or NULL.
+ */
+static const char *get_entry_string(struct json_object *jr, const char *key)
+{
+    struct json_object *jv = NULL;
+
+    if (!json_object_object_get_ex(jr, key, &jv)) {
+        return NULL;
+    }
+
+    return json_object_get_string(jv);
+}
+
+/*
+ * Return the integer value of a member of a cached result, or 0.
+ */
+static int get_entry_int(struct json_object *jr, const char *key)
+{
+    struct json_object *jv = NULL;
+
+    if (!json_object_object_get_ex(jr, key, &jv)) {
+        return 0;
+    }
+
+    return json_object_get_int(jv);
+}
+
+/**
+ * @brief Return true if results for the named inspection are cached.
+ *
+ * Results are only cached when a cache directory was given and the
+ * inspection's per-file results depend on nothing but the file, its
+ * before peer, and the configuration.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param inspection Name of the inspection.
+ */
+bool cacheable(const struct rpminspect *ri, const char *inspection)
+{
+    int i = 0;
+
+    assert(ri != NULL);
+
+    if (ri->cache_dir == NULL || inspection == NULL) {
+        return false;
+    }
+
+    for (i = 0; cached_inspections[i] != NULL; i++) {
+        if (!strcmp(inspection, cached_inspections[i])) {
+            return true;
+        }
+    }
+
+    return false;
+}
+
+/**
+ * @brief Add data an inspection's cached results depend on.
+ *
+ * Some inspections depend on more than the configuration files, such
+ * as the version of a signature database.  Anything given here is
+ * made part of the cache key for the inspection's results.  Call this
+ * before the per-file driver runs.
+ *
+ * @param inspection Name of the inspection.
+ * @param salt String to add to the cache key.
+ */
+void set_cache_salt(const char *inspection, const char *salt)
+{
+    string_map_t *entry = NULL;
+
+    assert(inspection != NULL);
+    assert(salt != NULL);
+
+    pthread_mutex_lock(&cache_lock);
+    HASH_FIND_STR(salts, inspection, entry);
+
+    if (entry == NULL) {
+        entry = calloc(1, sizeof(*entry));
+        assert(entry != NULL);
+        entry->key = strdup(inspection);
+        assert(entry->key != NULL);
+        HASH_ADD_KEYPTR(hh, salts, entry->key, strlen(entry->key), entry);
+    } else {
+        free(entry->value);
+    }
+
+    entry->value = strdup(salt);
+    assert(entry->value != NULL);
+    pthread_mutex_unlock(&cache_lock);
+
+    return;
+}
+
+/*
+ * Return the path of the executable a command runs, looking it up in
+ * PATH the way execvp(3) does.  Returns NULL if it is not found.  The
+ * caller must free the returned string.
+ */
+static char *find_command(const char *cmd)
+{
+    char *path = NULL;
+    char *dirs = NULL;
+    char *dir = NULL;
+    char *saveptr = NULL;
+    const char *env = NULL;
+    struct stat sb;
+
+    assert(cmd != NULL);
+
+    if (strchr(cmd, '/') != NULL) {
+        return strdup(cmd);
+    }
+
+    env = getenv("PATH");
+
+    if (env == NULL) {
+        return NULL;
+    }
+
+    dirs = strdup(env);
+    assert(dirs != NULL);
+
+    for (dir = strtok_r(dirs, ":", &saveptr); dir != NULL; dir = strtok_r(NULL, ":", &saveptr)) {
+        xasprintf(&path, "%s/%s", dir, cmd);
+        assert(path != NULL);
+
+        if (stat(path, &sb) == 0 && S_ISREG(sb.st_mode) && access(path, X_OK) == 0) {
+            break;
+        }
+
+        free(path);
+        path = NULL;
+    }
+
+    free(dirs);
+    return path;
+}
+
+/**
+ * @brief Return a string identifying the program a command runs.
+ *
+ * Cached results of inspections that run external programs are only
+ * good for the same version of those programs.  The string holds the
+ * path of the executable found in PATH and the SHA-256 digest of its
+ * contents, so it changes whenever the program is replaced.  Pass it
+ * to set_cache_salt().
+ *
+ * @param cmd The command, either a name to look up in PATH or a path.
+ * @return Newly allocated string the caller must free.
+ */
+char *get_command_identity(const char *cmd)
+{
+    char *path = NULL;
+    char *sum = NULL;
+    char *identity = NULL;
+
+    assert(cmd != NULL);
+
+    path = find_command(cmd);
+
+    if (path != NULL) {
+        sum = compute_checksum(path, NULL, SHA256SUM);
+    }
+
+    xasprintf(&identity, "%s %s %s", cmd, (path == NULL) ? "" : path, (sum == NULL) ? "" : sum);
+    assert(identity != NULL);
+    free(path);
+    free(sum);
+
+    return identity;
+}
+
+/**
+ * @brief Look up cached results of an inspection on a file.
+ *
+ * On a hit the recorded results are returned in a new results_t the
+ * caller must free, along with the result the driver returned, and
+ * the entry is marked as recently used.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param inspection Name of the inspection.
+ * @param file The file the inspection driver would run on.
+ * @param results Set to the recorded results (NULL if there were none).
+ * @param result Set to the recorded driver result.
+ * @return True if cached results were found, false otherwise.
+ */
+bool get_cached_results(const struct rpminspect *ri, const char *inspection, rpmfile_entry_t *file, results_t **results, bool *result)
+{
+    char *path = NULL;
+    char *data = NULL;
+    off_t len = 0;
+    size_t i = 0;
+    bool found = false;
+    struct json_object *j = NULL;
+    struct json_object *jv = NULL;
+    struct json_object *ja = NULL;
+    struct json_object *jr = NULL;
+    struct result_params params;
+
+    assert(ri != NULL);
+    assert(inspection != NULL);
+    assert(file != NULL);
+    assert(results != NULL);
+    assert(result != NULL);
+
+    path = get_cache_path(ri, inspection, file);
+
+    if (path == NULL) {
+        return false;
+    }
+
+    data = read_file_bytes(path, &len);
+
+    if (data == NULL) {
+        free(path);
+        return false;
+    }
+
+    j = json_tokener_parse(data);
+    free(data);
+
+    if (j == NULL || !json_object_object_get_ex(j, "result", &jv) || !json_object_object_get_ex(j, "results", &ja)) {
+        goto done;
+    }
+
+    *result = json_object_get_boolean(jv);
+    *results = NULL;
+
+    for (i = 0; i < json_object_array_length(ja); i++) {
+        jr = json_object_array_get_idx(ja, i);
+
+        init_result_params(&params);
+        params.severity = get_entry_int(jr, "severity");
+        params.waiverauth = get_entry_int(jr, "waiverauth");
+        params.header = inspection;
+        params.msg = (char *) get_entry_string(jr, "msg");
+        params.details = (char *) get_entry_string(jr, "details");
+        params.remedy = (char *) get_entry_string(jr, "remedy");
+        params.verb = get_entry_int(jr, "verb");
+        params.noun = get_entry_string(jr, "noun");
+        params.arch = get_entry_string(jr, "arch");
+        params.file = get_entry_string(jr, "file");
+        add_result_entry(results, &params);
+    }
+
+    /* mark the entry as recently used */
+    (void) utimensat(AT_FDCWD, path, NULL, 0);
+    found = true;
+
+done:
+    if (j != NULL) {
+        json_object_put(j);
+    }
+
+    free(path);
+    return found;
+}
+
+/**
+ * @brief Record the results of an inspection on a file.
+ *
+ * Results are only recorded if every one of them was reported under
+ * the inspection's own header, otherwise they could not be replayed
+ * the same way.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param inspection Name of the inspection.
+ * @param file The file the inspection driver ran on.
+ * @param results Results the driver reported, may be NULL.
+ * @param result The driver result.
+ */
+void put_cached_results(const struct rpminspect *ri, const char *inspection, rpmfile_entry_t *file, const results_t *results, const bool result)
+{
+    int fd = -1;
+    char *path = NULL;
+    char *tmp = NULL;
+    char *dir = NULL;
+    const char *s = NULL;
+    struct json_object *j = NULL;
+    struct json_object *ja = NULL;
+    struct json_object *jr = NULL;
+    results_entry_t *entry = NULL;
+
+    assert(ri != NULL);
+    assert(inspection != NULL);
+    assert(file != NULL);
+
+    if (results != NULL) {
+        TAILQ_FOREACH(entry, results, items) {
+            if (entry->header == NULL || strcmp(entry->header, inspection)) {
+                return;
+            }
+        }
+    }
+
+    path = get_cache_path(ri, inspection, file);
+
+    if (path == NULL) {
+        return;
+    }
+
+    j = json_object_new_object();
+    ja = json_object_new_array();
+    json_object_object_add(j, "result", json_object_new_boolean(result));
+
+    if (results != NULL) {
+        TAILQ_FOREACH(entry, results, items) {
+            jr = json_object_new_object();
+            json_object_object_add(jr, "severity", json_object_new_int(entry->severity));
+            json_object_object_add(jr, "waiverauth", json_object_new_int(entry->waiverauth));
+            json_object_object_add(jr, "verb", json_object_new_int(entry->verb));
+
+            if (entry->msg != NULL) {
+                json_object_object_add(jr, "msg", json_object_new_string(entry->msg));
+            }
+
+            if (entry->details != NULL) {
+                json_object_object_add(jr, "details", json_object_new_string(entry->details));
+            }
+
+            if (entry->remedy != NULL) {
+                json_object_object_add(jr, "remedy", json_object_new_string(entry->remedy));
+            }
+
+            if (entry->noun != NULL) {
+                json_object_object_add(jr, "noun", json_object_new_string(entry->noun));
+            }
+
+            if (entry->arch != NULL) {
+                json_object_object_add(jr, "arch", json_object_new_string(entry->arch));
+            }
+
+            if (entry->file != NULL) {
+                json_object_object_add(jr, "file", json_object_new_string(entry->file));
+            }
+
+            json_object_array_add(ja, jr);
+        }
+    }
+
+    json_object_object_add(j, "results", ja);
+    s = json_object_to_json_string_ext(j, JSON_C_TO_STRING_PLAIN);
+
+    /* write a temporary file and move it in place so readers never see part of an entry */
+    dir = strdup(path);
+    assert(dir != NULL);
+    *strrchr(dir, '/') = '\0';
+
+    if (mkdirp(dir, S_IRWXU | S_IRGRP | S_IXGRP | S_IROTH | S_IXOTH)) {
+        warn("mkdirp");
+        goto done;
+    }
+
+    xasprintf(&tmp, "%s.XXXXXX", path);
+    fd = mkstemp(tmp);
+
+    if (fd == -1) {
+        warn("mkstemp");
+        goto done;
+    }
+
+    if (write(fd, s, strlen(s)) != (ssize_t) strlen(s)) {
+        warn("write");
+        close(fd);
+        unlink(tmp);
+        goto done;
+    }
+
+    if (close(fd) == -1 || rename(tmp, path) == -1) {
+        warn("rename");
+        unlink(tmp);
+        goto done;
+    }
+
+    pthread_mutex_lock(&cache_lock);
+    cache_changed = true;
+    pthread_mutex_unlock(&cache_lock);
+
+done:
+    json_object_put(j);
+    free(dir);
+    free(tmp);
+    free(path);
+    return;
+}
+
+/*
+ * nftw() callback to collect the entries in a cache directory.
+ */
+static int collect_entry(const char *fpath, const struct stat *sb, int tflag, struct FTW *ftwbuf)
+{
+    if (tflag != FTW_F || !strcmp(fpath + ftwbuf->base, CACHE_LOCK_FILE)) {
+        return 0;
+    }
+
+    trim_entries = realloc(trim_entries, (trim_nentries + 1) * sizeof(*trim_entries));
+    assert(trim_entries != NULL);
+    trim_entries[trim_nentries].path = strdup(fpath);
+    assert(trim_entries[trim_nentries].path != NULL);
+    trim_entries[trim_nentries].size = sb->st_size;
+    trim_entries[trim_nentries].mtime = sb->st_mtime;
+    trim_nentries++;
+    trim_total += sb->st_size;
+
+    return 0;
+}
+
+/*
+ * qsort() comparison putting the least recently used entries first.
+ */
+static int cmp_entries(const void *a, const void *b)
+{
+    const struct cache_entry *x = a;
+    const struct cache_entry *y = b;
+
+    if (x->mtime < y->mtime) {
+        return -1;
+    } else if (x->mtime > y->mtime) {
+        return 1;
+    }
+
+    return 0;
+}
+
+/*
+ * Remove the least recently used entries in a cache directory until
+ * it is no larger than megabytes.  Other rpminspect processes may be
+ * using the same directory, so only one of them trims it at a time
+ * and the rest leave that to it.
+ */
+static void trim_cache_dir(const char *dir, const size_t megabytes)
+{
+    int fd = -1;
+    size_t i = 0;
+    char *lock = NULL;
+    off_t max = (off_t) megabytes * 1024 * 1024;
+
+    assert(dir != NULL);
+
+    xasprintf(&lock, "%s/%s", dir, CACHE_LOCK_FILE);
+    assert(lock != NULL);
+    fd = open(lock, O_RDWR | O_CREAT | O_CLOEXEC, S_IRUSR | S_IWUSR | S_IRGRP | S_IROTH);
+    free(lock);
+
+    if (fd == -1) {
+        warn("open");
+        return;
+    }
+
+    if (flock(fd, LOCK_EX | LOCK_NB) == -1) {
+        close(fd);
+        return;
+    }
+
+    if (nftw(dir, collect_entry, FOPEN_MAX, FTW_PHYS) == -1) {
+        warn("nftw");
+    }
+
+    if (trim_total > max) {
+        qsort(trim_entries, trim_nentries, sizeof(*trim_entries), cmp_entries);
+
+        for (i = 0; i < trim_nentries && trim_total > max; i++) {
+            if (unlink(trim_entries[i].path) == 0) {
+                trim_total -= trim_entries[i].size;
+            }
+        }
+    }
+
+    for (i = 0; i < trim_nentries; i++) {
+        free(trim_entries[i].path);
+    }
+
+    free(trim_entries);
+    trim_entries = NULL;
+    trim_nentries = 0;
+    trim_total = 0;
+
+    /* closing the descriptor releases the lock */
+    close(fd);
+    return;
+}
+
+/*
+ * Return the path in the artifact cache for key, or NULL if there is
+ * no cache directory.  The caller must free the returned string.
+ */
+static char *get_artifact_path(const struct rpminspect *ri, const char *key)
+{
+    EVP_MD_CTX *ctx = NULL;
+    char *sum = NULL;
+    char *path = NULL;
+
+    if (ri->cache_dir == NULL || key == NULL) {
+        return NULL;
+    }
+
+    ctx = digest_start();
+    digest_add(ctx, key);
+    sum = digest_finish(ctx);
+
+    xasprintf(&path, "%s/%s/%.2s/%s", ri->cache_dir, CACHE_ARTIFACTS_DIR, sum, sum + 2);
+    free(sum);
+    return path;
+}
+
+/**
+ * @brief Copy a downloaded artifact out of the artifact cache.
+ *
+ * Downloads from Koji are kept in the cache directory, named for a
+ * key that identifies the artifact, such as its path on the Koji
+ * server and payload hash.  If the artifact is there, it is hard
+ * linked (or copied, if the link fails) to dst and marked as
+ * recently used.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param key String identifying the artifact.
+ * @param dst Destination path for the artifact.
+ * @return True if dst was created from the cache, false otherwise.
+ */
+bool get_cached_artifact(const struct rpminspect *ri, const char *key, const char *dst)
+{
+    bool found = false;
+    char *path = NULL;
+
+    assert(ri != NULL);
+    assert(dst != NULL);
+
+    path = get_artifact_path(ri, key);
+
+    if (path == NULL) {
+        return false;
+    }
+
+    if (link(path, dst) == 0) {
+        found = true;
+    } else if (errno == EXDEV && access(path, R_OK) == 0 && copyfile(path, dst, true, false) == 0) {
+        found = true;
+    }
+
+    if (found) {
+        (void) utimensat(AT_FDCWD, path, NULL, 0);
+    }
+
+    free(path);
+    return found;
+}
+
+/**
+ * @brief Add a downloaded artifact to the artifact cache.
+ *
+ * The artifact at src is hard linked in to the cache, or copied to a
+ * temporary file and renamed in place if it cannot be linked, so
+ * other processes never see a partial file.  If another process
+ * already added the same artifact, the cache is left alone.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param key String identifying the artifact.
+ * @param src Path to the downloaded artifact.
+ */
+void put_cached_artifact(const struct rpminspect *ri, const char *key, const char *src)
+{
+    int fd = -1;
+    char *path = NULL;
+    char *dir = NULL;
+    char *tmp = NULL;
+    bool added = false;
+
+    assert(ri != NULL);
+    assert(src != NULL);
+
+    path = get_artifact_path(ri, key);
+
+    if (path == NULL || access(src, R_OK) != 0) {
+        free(path);
+        return;
+    }
+
+    dir = strdup(path);
+    assert(dir != NULL);
+    *strrchr(dir, '/') = '\0';
+
+    if (mkdirp(dir, S_IRWXU | S_IRGRP | S_IXGRP | S_IROTH | S_IXOTH)) {
+        warn("mkdirp");
+        goto done;
+    }
+
+    if (link(src, path) == 0) {
+        added = true;
+    } else if (errno == EXDEV) {
+        xasprintf(&tmp, "%s.XXXXXX", path);
+        fd = mkstemp(tmp);
+
+        if (fd == -1) {
+            warn("mkstemp");
+            goto done;
+        }
+
+        close(fd);
+
+        if (copyfile(src, tmp, true, false) == 0 && rename(tmp, path) == 0) {
+            added = true;
+        } else {
+            unlink(tmp);
+        }
+    }
+
+    if (added) {
+        pthread_mutex_lock(&cache_lock);
+        artifacts_changed = true;
+        pthread_mutex_unlock(&cache_lock);
+    }
+
+done:
+    free(tmp);
+    free(dir);
+    free(path);
+    return;
+}
+
+/**
+ * @brief Look up build system metadata in the artifact cache.
+ *
+ * Only metadata that can never change, such as the packages in a
+ * completed build, should be cached.  The caller must free the
+ * returned data.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param key String identifying the metadata.
+ * @param len Returns the length of the data.
+ * @return The cached data, nul terminated, or NULL if not cached.
+ */
+char *get_cached_metadata(const struct rpminspect *ri, const char *key, size_t *len)
+{
+    off_t size = 0;
+    char *data = NULL;
+    char *path = NULL;
+
+    assert(ri != NULL);
+    assert(len != NULL);
+
+    path = get_artifact_path(ri, key);
+
+    if (path == NULL) {
+        return NULL;
+    }
+
+    if ((data = read_file_bytes(path, &size)) != NULL) {
+        *len = size;
+        (void) utimensat(AT_FDCWD, path, NULL, 0);
+    }
+
+    free(path);
+    return data;
+}
+
+/**
+ * @brief Add build system metadata to the artifact cache.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param key String identifying the metadata.
+ * @param data The metadata.
+ * @param len Length of the metadata.
+ */
+void put_cached_metadata(const struct rpminspect *ri, const char *key, const char *data, const size_t len)
+{
+    int fd = -1;
+    char *path = NULL;
+    char *dir = NULL;
+    char *tmp = NULL;
+
+    assert(ri != NULL);
+    assert(data != NULL);
+
+    path = get_artifact_path(ri, key);
+
+    if (path == NULL) {
+        return;
+    }
+
+    /* write a temporary file and move it in place so readers never see part of an entry */
+    dir = strdup(path);
+    assert(dir != NULL);
+    *strrchr(dir, '/') = '\0';
+
+    if (mkdirp(dir, S_IRWXU | S_IRGRP | S_IXGRP | S_IROTH | S_IXOTH)) {
+        warn("mkdirp");
+        goto done;
+    }
+
+    xasprintf(&tmp, "%s.XXXXXX", path);
+    fd = mkstemp(tmp);
+
+    if (fd == -1) {
+        warn("mkstemp");
+        goto done;
+    }
+
+    if (write(fd, data, len) != (ssize_t) len) {
+        warn("write");
+        close(fd);
+        unlink(tmp);
+        goto done;
+    }
+
+    if (close(fd) == -1 || rename(tmp, path) == -1) {
+        warn("rename");
+        unlink(tmp);
+        goto done;
+    }
+
+    pthread_mutex_lock(&cache_lock);
+    artifacts_changed = true;
+    pthread_mutex_unlock(&cache_lock);
+
+done:
+    free(dir);
+    free(tmp);
+    free(path);
+    return;
+}
+
+/**
+ * @brief Trim the cache directory and release cache state.
+ *
+ * If any results or artifacts were added in this run and either part
+ * of the cache is now larger than its limit (cache_size and
+ * artifact_cache_size megabytes), the least recently used entries are
+ * removed until it fits.  Call this once before exiting.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ */
+void close_cache(const struct rpminspect *ri)
+{
+    char *dir = NULL;
+
+    assert(ri != NULL);
+
+    if (ri->cache_dir != NULL && cache_changed) {
+        xasprintf(&dir, "%s/%s", ri->cache_dir, CACHE_RESULTS_DIR);
+        assert(dir != NULL);
+        trim_cache_dir(dir, ri->cache_size);
+        free(dir);
+    }
+
+    if (ri->cache_dir != NULL && artifacts_changed) {
+        xasprintf(&dir, "%s/%s", ri->cache_dir, CACHE_ARTIFACTS_DIR);
+        assert(dir != NULL);
+        trim_cache_dir(dir, ri->artifact_cache_size);
+        free(dir);
+    }
+
+    free(config_digest);
+    config_digest = NULL;
+    free_string_map(salts);
+    salts = NULL;
+    cache_changed = false;
+    artifacts_changed = false;
+
+    return;
+}
@@ -24,61 +24,162 @@
  * @author David Cantrell &lt;david.l.cantrell@gmail.com&gt;
  * @author Chris Lumens &lt;chris@bangmoney.org&gt;
  * @author David Shea &lt;david@reallylongword.org&gt;
- * @date 2004-2020
- * @brief Calculate an MD5, SHA-1, SHA-224, SHA-256, SHA-384, or SHA-512 checksum for a file.
+ * @date 2004-2021
+ * @brief Calculate MD5, SHA-1, SHA-224, SHA-256, SHA-384, and SHA-512 checksums for a file.
  * @copyright Apache-2.0
  */
 
-/*
- * XXX: temporary until we have support for the OpenSSL 3.0 API
- */
-#define OPENSSL_API_COMPAT 0x101010bfL
-
 #include <stdio.h>
+#include <stdlib.h>
 #include <unistd.h>
 #include <string.h>
+#include <sys/mman.h>
 #include <sys/stat.h>
 #include <sys/types.h>
 #include <fcntl.h>
 #include <errno.h>
 #include <err.h>
 #include <assert.h>
-#include <openssl/md5.h>
-#include <openssl/sha.h>
+#include <pthread.h>
+#include <openssl/evp.h>
+#include <rpm/header.h>
+#include <rpm/rpmpgp.h>
 
 #include "rpminspect.h"
 
+/*
+ * Files are hashed in chunks of this size so every requested digest
+ * is updated while the data is still in cache.
+ */
+#define CHECKSUM_CHUNK_SIZE (1024 * 1024)
+
+/*
+ * Return the OpenSSL message digest for a checksum type.
+ */
+const EVP_MD *get_evp_md(const enum checksum type)
+{
+    switch (type) {
+        case MD5SUM:
+            return EVP_md5();
+        case SHA1SUM:
+            return EVP_sha1();
+        case SHA224SUM:
+            return EVP_sha224();
+        case SHA256SUM:
+            return EVP_sha256();
+        case SHA384SUM:
+            return EVP_sha384();
+        case SHA512SUM:
+            return EVP_sha512();
+        default:
+            return NULL;
+    }
+}
+
+/*
+ * Feed a buffer to each of the digest contexts, one chunk at a time.
+ */
+static void update_digests(EVP_MD_CTX **ctx, const size_t n, const unsigned char *buf, const size_t len)
+{
+    size_t i = 0;
+    size_t off = 0;
+    size_t chunk = 0;
+
+    for (off = 0; off < len; off += chunk) {
+        chunk = ((len - off) < CHECKSUM_CHUNK_SIZE) ? (len - off) : CHECKSUM_CHUNK_SIZE;
+
+        for (i = 0; i < n; i++) {
+            EVP_DigestUpdate(ctx[i], buf + off, chunk);
+        }
+    }
+
+    return;
+}
+
+/*
+ * Read the open file and feed it to the digest contexts.  The file is
+ * mapped if possible, otherwise it is read in large chunks.
+ */
+static bool read_digests(const char *filename, const int fd, const off_t size, EVP_MD_CTX **ctx, const size_t n)
+{
+    void *map = NULL;
+    unsigned char *buf = NULL;
+    ssize_t len = 0;
+
+    if (size > 0) {
+        map = mmap(NULL, size, PROT_READ, MAP_PRIVATE, fd, 0);
+
+        if (map != MAP_FAILED) {
+            (void) madvise(map, size, MADV_SEQUENTIAL);
+            update_digests(ctx, n, map, size);
+            munmap(map, size);
+            return true;
+        }
+    }
+
+    /* could not map it, read it instead */
+    (void) posix_fadvise(fd, 0, 0, POSIX_FADV_SEQUENTIAL);
+    buf = malloc(CHECKSUM_CHUNK_SIZE);
+    assert(buf != NULL);
+
+    while ((len = read(fd, buf, CHECKSUM_CHUNK_SIZE)) > 0) {
+        update_digests(ctx, n, buf, len);
+    }
+
+    free(buf);
+
+    if (len == -1) {
+        warn("read(%s)", filename);
+        return false;
+    }
+
+    return true;
+}
+
 /**
- * @brief Take in a file, return a checksum.
+ * @brief Take in a file, compute several checksums in one pass.
  *
- * Given a file, its **mode_t**, and a valid checksum type, compute
- * the checksum and return the human-readable digest string for that
- * checksum.  This function allocates memory for the string and the
- * caller must free it when done.
+ * Given a file, its **mode_t**, and a list of checksum types, read
+ * the file once and compute every requested checksum.  The
+ * human-readable digest for types[i] is returned in sums[i].  The
+ * caller must free the returned strings.
  *
  * @param filename Filename the function should use.
  * @param st_mode The **mode_t** for the specified file, gathered from **stat(2)**.
- * @param type Which checksum type to calculate.
- * @note Caller must free returned string when done.
- * @return String containing the human-readable checksum digest, or NULL on failure.
+ * @param types Checksum types to calculate.
+ * @param n Number of checksum types.
+ * @param sums Array of n pointers to receive the digest strings.
+ * @return True on success, false on failure in which case sums is
+ *         left filled with NULL.
  */
-char *compute_checksum(const char *filename, mode_t *st_mode, enum checksum type)
+bool compute_checksums(const char *filename, mode_t *st_mode, const enum checksum *types, const size_t n, char **sums)
 {
     struct stat sb;
     mode_t *mode = NULL;
-    unsigned char buf[BUFSIZ];
-    int input, len, i;
-    char *ret = NULL;
-    unsigned char digest[BUFSIZ];
-    MD5_CTX md5c;
-    SHA_CTX sha1c;
-    SHA256_CTX sha256c;
-    SHA512_CTX sha512c;
+    int input = -1;
+    size_t i = 0;
+    unsigned int j = 0;
+    unsigned int len = 0;
+    bool ret = false;
+    unsigned char digest[EVP_MAX_MD_SIZE];
+    EVP_MD_CTX **ctx = NULL;
+
+    assert(filename != NULL);
+    assert(types != NULL);
+    assert(sums != NULL);
+
+    for (i = 0; i < n; i++) {
+        sums[i] = NULL;
+    }
+
+    if (n == 0) {
+        return true;
+    }
 
     /* if the user did not provide a mode_t, get it */
     if (st_mode == NULL) {
         if (lstat(filename, &sb) != 0) {
-            return NULL;
+            return false;
         }
 
         mode = &sb.st_mode;
@@ -90,97 +191,293 @@ char *compute_checksum(const char *filename, mode_t *st_mode, enum checksum type
     if (S_ISCHR(*mode) || S_ISBLK(*mode) ||
         S_ISFIFO(*mode) || S_ISSOCK(*mode)) {
         warnx(_("%s is a FIFO"), filename);
-        return NULL;
+        return false;
     }
 
-    /*
-     * This holds all possible digest type computations.  if any future digest
-     * is larger than BUFSIZ, hopefully we update this and get faster systems.
-     */
-    memset(&buf, '\0', BUFSIZ);
-    memset(&digest, '\0', BUFSIZ);
+    /* Initialize a context for each requested checksum type */
+    ctx = calloc(n, sizeof(*ctx));
+    assert(ctx != NULL);
 
-    /* Initialize the correct context based on the checksum type. */
-    if (type == MD5SUM) {
-        MD5_Init(&md5c);
-    } else if (type == SHA1SUM) {
-        SHA1_Init(&sha1c);
-    } else if (type == SHA224SUM || type == SHA256SUM) {
-        SHA256_Init(&sha256c);
-    } else if (type == SHA384SUM || type == SHA512SUM) {
-        SHA512_Init(&sha512c);
+    for (i = 0; i < n; i++) {
+        ctx[i] = EVP_MD_CTX_new();
+        assert(ctx[i] != NULL);
+
+        if (get_evp_md(types[i]) == NULL || !EVP_DigestInit_ex(ctx[i], get_evp_md(types[i]), NULL)) {
+            warnx(_("unable to initialize checksum type %d"), types[i]);
+            goto cleanup;
+        }
     }
 
-    /* read in the file to generate the requested checksum */
+    /* read in the file to generate the requested checksums */
     if ((input = open(filename, O_RDONLY)) == -1) {
         warn("open");
-        return NULL;
+        goto cleanup;
     }
 
-    if ((len = read(input, buf, sizeof(buf))) == -1) {
-        warn("read");
-        return NULL;
+    if (fstat(input, &sb) != 0) {
+        warn("fstat");
+        goto cleanup;
     }
 
-    while (len > 0) {
-        /* update the correct context based on the checksum type */
-        if (type == MD5SUM) {
-            MD5_Update(&md5c, buf, len);
-        } else if (type == SHA1SUM) {
-            SHA1_Update(&sha1c, buf, len);
-        } else if (type == SHA224SUM || type == SHA256SUM) {
-            SHA256_Update(&sha256c, buf, len);
-        } else if (type == SHA384SUM || type == SHA512SUM) {
-            SHA512_Update(&sha512c, buf, len);
-        }
+    if (!read_digests(filename, input, sb.st_size, ctx, n)) {
+        goto cleanup;
+    }
 
-        if ((len = read(input, buf, sizeof(buf))) == -1) {
-            warn("read");
-            return NULL;
+    /* finalize each context, caller must free the digest strings */
+    for (i = 0; i < n; i++) {
+        EVP_DigestFinal_ex(ctx[i], digest, &len);
+        sums[i] = calloc((len * 2) + 1, sizeof(char));
+        assert(sums[i] != NULL);
+
+        for (j = 0; j < len; j++) {
+            sprintf(&sums[i][j * 2], "%02x", (unsigned int) digest[j]);
         }
     }
 
-    if (close(input) == -1) {
+    ret = true;
+
+cleanup:
+    if (input != -1 && close(input) == -1) {
         warn("close");
+    }
+
+    for (i = 0; i < n; i++) {
+        EVP_MD_CTX_free(ctx[i]);
+    }
+
+    free(ctx);
+    return ret;
+}
+
+/**
+ * @brief Take in a file, return a checksum.
+ *
+ * Given a file, its **mode_t**, and a valid checksum type, compute
+ * the checksum and return the human-readable digest string for that
+ * checksum.  This function allocates memory for the string and the
+ * caller must free it when done.
+ *
+ * @param filename Filename the function should use.
+ * @param st_mode The **mode_t** for the specified file, gathered from **stat(2)**.
+ * @param type Which checksum type to calculate.
+ * @note Caller must free returned string when done.
+ * @return String containing the human-readable checksum digest, or NULL on failure.
+ */
+char *compute_checksum(const char *filename, mode_t *st_mode, enum checksum type)
+{
+    char *sum = NULL;
+
+    (void) compute_checksums(filename, st_mode, &type, 1, &sum);
+    return sum;
+}
+
+/*
+ * Return the checksum type of a hex digest string based on its
+ * length, or NULLSUM if no supported digest has that length.
+ */
+enum checksum get_digest_type(const char *digest)
+{
+    int t = 0;
+    size_t len = 0;
+
+    assert(digest != NULL);
+    len = strlen(digest);
+
+    for (t = MD5SUM; t < NUM_CHECKSUMS; t++) {
+        if (len == (size_t) EVP_MD_size(get_evp_md(t)) * 2) {
+            return t;
+        }
+    }
+
+    return NULLSUM;
+}
+
+/*
+ * Return the checksum type RPM used for the file digests in the
+ * header, or NULLSUM if it is not one we support.  Packages without
+ * RPMTAG_FILEDIGESTALGO use MD5.
+ */
+enum checksum get_header_digest_type(Header h)
+{
+    switch (headerGetNumber(h, RPMTAG_FILEDIGESTALGO)) {
+        case 0:
+        case PGPHASHALGO_MD5:
+            return MD5SUM;
+        case PGPHASHALGO_SHA1:
+            return SHA1SUM;
+        case PGPHASHALGO_SHA224:
+            return SHA224SUM;
+        case PGPHASHALGO_SHA256:
+            return SHA256SUM;
+        case PGPHASHALGO_SHA384:
+            return SHA384SUM;
+        case PGPHASHALGO_SHA512:
+            return SHA512SUM;
+        default:
+            return NULLSUM;
+    }
+}
+
+/*
+ * Return the digest of the given type for the file as recorded in
+ * RPMTAG_FILEDIGESTS, or NULL if the header does not carry that type
+ * of digest for the file.  The payload is extracted unmodified, so
+ * this matches what hashing the extracted file would give.  Caller
+ * must free the returned string.
+ */
+static char *get_header_digest(const rpmfile_entry_t *file, const enum checksum type)
+{
+    char *digest = NULL;
+
+    if (file->rpm_header == NULL || file->idx < 0 || !S_ISREG(file->st.st_mode)) {
         return NULL;
     }
 
-    /* finalize the correct context type and determine the loop length */
-    if (type == MD5SUM) {
-        MD5_Final(digest, &md5c);
-    } else if (type == SHA1SUM) {
-        SHA1_Final(digest, &sha1c);
-    } else if (type == SHA224SUM || type == SHA256SUM) {
-        SHA256_Final(digest, &sha256c);
-    } else if (type == SHA384SUM || type == SHA512SUM) {
-        SHA512_Final(digest, &sha512c);
-    }
-
-    if (type == MD5SUM) {
-        len = MD5_DIGEST_LENGTH;
-    } else if (type == SHA1SUM) {
-        len = SHA_DIGEST_LENGTH;
-    } else if (type == SHA224SUM) {
-        len = SHA224_DIGEST_LENGTH;
-    } else if (type == SHA256SUM) {
-        len = SHA256_DIGEST_LENGTH;
-    } else if (type == SHA384SUM) {
-        len = SHA384_DIGEST_LENGTH;
-    } else if (type == SHA512SUM) {
-        len = SHA512_DIGEST_LENGTH;
-    }
-
-    /* this is our human readable digest, caller must free */
-    if ((ret = calloc(len + 1, sizeof(char *))) == NULL) {
-        warn("calloc");
+    if (get_header_digest_type(file->rpm_header) != type) {
         return NULL;
     }
 
-    for (i = 0; i < len; ++i) {
-        sprintf(&ret[i*2], "%02x", (unsigned int) digest[i]);
+    digest = get_rpm_header_value(file, RPMTAG_FILEDIGESTS);
+
+    if (digest != NULL && *digest == '\0') {
+        free(digest);
+        digest = NULL;
     }
 
-    return ret;
+    return digest;
+}
+
+/*
+ * Protects the cached checksums in rpmfile_entry_t when inspections
+ * run concurrently.
+ */
+static pthread_mutex_t checksum_lock = PTHREAD_MUTEX_INITIALIZER;
+
+/**
+ * @brief Compute and cache several checksums of an **rpmfile_entry_t**.
+ *
+ * Any of the requested types not already cached in the
+ * **rpmfile_entry_t** are taken from the RPM header if it carries
+ * file digests of that type, otherwise they are computed together in
+ * a single pass over the file.  Either way they are cached.
+ *
+ * @param file The **rpmfile_entry_t** specifying the file to use.
+ * @param types Checksum types wanted.
+ * @param n Number of checksum types.
+ */
+void get_checksums(rpmfile_entry_t *file, const enum checksum *types, const size_t n)
+{
+    size_t i = 0;
+    size_t j = 0;
+    size_t nwant = 0;
+    size_t nhash = 0;
+    bool found = false;
+    enum checksum want[NUM_CHECKSUMS];
+    enum checksum hash[NUM_CHECKSUMS];
+    char *sums[NUM_CHECKSUMS];
+    char *hashed[NUM_CHECKSUMS];
+
+    assert(file != NULL);
+    assert(types != NULL);
+
+    /* figure out which ones are missing */
+    pthread_mutex_lock(&checksum_lock);
+
+    for (i = 0; i < n; i++) {
+        assert(types[i] > NULLSUM && types[i] < NUM_CHECKSUMS);
+
+        if (file->checksums[types[i]] != NULL) {
+            continue;
+        }
+
+        found = false;
+
+        for (j = 0; j < nwant; j++) {
+            if (want[j] == types[i]) {
+                found = true;
+                break;
+            }
+        }
+
+        if (!found) {
+            want[nwant++] = types[i];
+        }
+    }
+
+    pthread_mutex_unlock(&checksum_lock);
+
+    if (nwant == 0) {
+        return;
+    }
+
+    /* use the digest from the RPM header where it is the right type */
+    for (i = 0; i < nwant; i++) {
+        sums[i] = get_header_digest(file, want[i]);
+
+        if (sums[i] == NULL) {
+            hash[nhash++] = want[i];
+        }
+    }
+
+    /* hash the file for the rest, if it was extracted */
+    if (nhash > 0 && file->fullpath != NULL && compute_checksums(file->fullpath, &file->st.st_mode, hash, nhash, hashed)) {
+        for (i = 0, j = 0; i < nwant; i++) {
+            if (sums[i] == NULL) {
+                sums[i] = hashed[j++];
+            }
+        }
+    }
+
+    /* another inspection may have cached some while we were working */
+    pthread_mutex_lock(&checksum_lock);
+
+    for (i = 0; i < nwant; i++) {
+        if (file->checksums[want[i]] == NULL) {
+            file->checksums[want[i]] = sums[i];
+        } else {
+            free(sums[i]);
+        }
+    }
+
+    pthread_mutex_unlock(&checksum_lock);
+    return;
+}
+
+/**
+ * @brief Return a checksum string of the given **rpmfile_entry_t**.
+ *
+ * Returns the cached checksum of the requested type, computing and
+ * caching it first if needed.
+ *
+ * @param file The **rpmfile_entry_t** specifying the file to use.
+ * @param type Which checksum type to return.
+ * @note Do not free the result returned, that is handled by
+ *       **free_files()**.
+ * @return String containing the human-readable checksum digest, or
+ *         NULL on failure.
+ */
+char *get_checksum(rpmfile_entry_t *file, const enum checksum type)
+{
+    char *sum = NULL;
+
+    assert(file != NULL);
+    assert(type > NULLSUM && type < NUM_CHECKSUMS);
+
+    pthread_mutex_lock(&checksum_lock);
+    sum = file->checksums[type];
+    pthread_mutex_unlock(&checksum_lock);
+
+    if (sum) {
+        return sum;
+    }
+
+    get_checksums(file, &type, 1);
+
+    pthread_mutex_lock(&checksum_lock);
+    sum = file->checksums[type];
+    pthread_mutex_unlock(&checksum_lock);
+
+    return sum;
 }
 
 /**
@@ -189,7 +486,8 @@ char *compute_checksum(const char *filename, mode_t *st_mode, enum checksum type
  * The **rpmfile_entry_t** will contain a cached checksum string or
  * not.  If it does, this function returns the cached string.  If the
  * string is NULL, this function calculates the checksum, caches it,
- * and returns the string.
+ * and returns the string.  The checksum type is
+ * DEFAULT_MESSAGE_DIGEST.
  *
  * @param file The **rpmfile_entry_t** specifying the file to use.
  * @note Do not free the result returned, that is handled by
@@ -199,12 +497,5 @@ char *compute_checksum(const char *filename, mode_t *st_mode, enum checksum type
  */
 char *checksum(rpmfile_entry_t *file)
 {
-    assert(file != NULL);
-
-    if (file->checksum) {
-        return file->checksum;
-    }
-
-    file->checksum = compute_checksum(file->fullpath, &file->st.st_mode, DEFAULT_MESSAGE_DIGEST);
-    return file->checksum;
+    return get_checksum(file, DEFAULT_MESSAGE_DIGEST);
 }
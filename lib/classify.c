@@ -0,0 +1,205 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this program.  If not, see
+ * <https://www.gnu.org/licenses/>.
+ *
+ * SPDX-License-Identifier: LGPL-3.0-or-later
+ */
+
+/**
+ * @file classify.c
+ * @author David Cantrell &lt;dcantrell@redhat.com&gt;
+ * @date 2021
+ * @brief Classify payload files once before the inspections run.
+ * @copyright LGPL-3.0-or-later
+ */
+
+#include <stdlib.h>
+#include <stdbool.h>
+#include <string.h>
+#include <assert.h>
+#include <sys/stat.h>
+#include <libelf.h>
+#include <gelf.h>
+#include "queue.h"
+#include "readelf.h"
+#include "rpminspect.h"
+
+/*
+ * MIME types for each compression format.  Some versions of libmagic
+ * report the x- form, newer ones report the registered form.
+ */
+static const struct {
+    const char *type;
+    compression_t compression;
+} compression_types[] = {
+    { "application/gzip", COMPRESSION_GZIP },
+    { "application/x-gzip", COMPRESSION_GZIP },
+    { "application/bzip2", COMPRESSION_BZIP2 },
+    { "application/x-bzip2", COMPRESSION_BZIP2 },
+    { "application/xz", COMPRESSION_XZ },
+    { "application/x-xz", COMPRESSION_XZ },
+    { "application/x-lzma", COMPRESSION_LZMA },
+    { "application/zstd", COMPRESSION_ZSTD },
+    { "application/x-zstd", COMPRESSION_ZSTD },
+    { NULL, COMPRESSION_NONE }
+};
+
+/*
+ * Map a MIME type to a compression_t.  libmagic sometimes reports
+ * compressed files as application/octet-stream, so fall back to the
+ * file name suffix for those.
+ */
+static compression_t get_compression(const char *type, const char *path)
+{
+    int i = 0;
+
+    if (type == NULL) {
+        return COMPRESSION_NONE;
+    }
+
+    for (i = 0; compression_types[i].type != NULL; i++) {
+        if (!strcmp(type, compression_types[i].type)) {
+            return compression_types[i].compression;
+        }
+    }
+
+    if (!strcmp(type, "application/octet-stream") && path != NULL) {
+        if (strsuffix(path, ".gz")) {
+            return COMPRESSION_GZIP;
+        } else if (strsuffix(path, ".bz2")) {
+            return COMPRESSION_BZIP2;
+        } else if (strsuffix(path, ".xz")) {
+            return COMPRESSION_XZ;
+        }
+    }
+
+    return COMPRESSION_NONE;
+}
+
+/**
+ * @brief Classify a single payload file.
+ *
+ * Determines the MIME type, checksum, compression format, and ELF
+ * kind, class, and type of the file and caches them in the
+ * rpmfile_entry_t so inspections do not have to open and read the
+ * file again for the same information.  Files that were not unpacked
+ * are marked as classified with nothing filled in.  Calling this
+ * more than once on the same file is harmless.
+ *
+ * @param file The rpmfile_entry_t to classify.
+ */
+void classify_file(rpmfile_entry_t *file)
+{
+    char *type = NULL;
+    GElf_Half elf_type = ET_NONE;
+
+    assert(file != NULL);
+
+    if (file->classified) {
+        return;
+    }
+
+    if (file->fullpath == NULL) {
+        file->classified = true;
+        return;
+    }
+
+    type = get_mime_type(file);
+    file->text = strprefix(type, "text/");
+    file->compression = get_compression(type, file->localpath);
+
+    if (S_ISREG(file->st.st_mode)) {
+        (void) checksum(file);
+        file->elf_kind = get_elf_kind(file->fullpath, &file->elf_class, &elf_type);
+        file->elf_type = elf_type;
+    }
+
+    file->classified = true;
+    return;
+}
+
+/*
+ * run_parallel() task to classify one file.
+ */
+static void classify_task(size_t n, void *data)
+{
+    rpmfile_entry_t **files = data;
+
+    assert(files != NULL);
+    classify_file(files[n]);
+    return;
+}
+
+/*
+ * Add every file in the list to the array of files to classify.
+ */
+static void collect_files(rpmfile_t *list, rpmfile_entry_t ***files, size_t *nfiles)
+{
+    rpmfile_entry_t *file = NULL;
+
+    if (list == NULL) {
+        return;
+    }
+
+    TAILQ_FOREACH(file, list, items) {
+        *files = realloc(*files, (*nfiles + 1) * sizeof(**files));
+        assert(*files != NULL);
+        (*files)[*nfiles] = file;
+        (*nfiles)++;
+    }
+
+    return;
+}
+
+/**
+ * @brief Classify every payload file in the before and after builds.
+ *
+ * This is run once before the inspections so the MIME type, checksum,
+ * and ELF details of each file are computed in a single pass rather
+ * than separately by every inspection that needs them.  Files are
+ * classified on up to ri->jobs threads.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ */
+void classify_files(struct rpminspect *ri)
+{
+    size_t nfiles = 0;
+    rpmfile_entry_t **files = NULL;
+    rpmpeer_entry_t *peer = NULL;
+
+    assert(ri != NULL);
+
+    if (ri->peers == NULL) {
+        return;
+    }
+
+    TAILQ_FOREACH(peer, ri->peers, items) {
+        collect_files(peer->before_files, &files, &nfiles);
+        collect_files(peer->after_files, &files, &nfiles);
+    }
+
+    /* MIME types first, as a batch so each thread loads libmagic once */
+    get_mime_types(ri, files, nfiles);
+
+    /* initialize libelf before any threads use it */
+    (void) elf_version(EV_CURRENT);
+
+    run_parallel(ri->jobs, nfiles, classify_task, files);
+    free(files);
+
+    return;
+}
@@ -0,0 +1,314 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this program.  If not, see
+ * <https://www.gnu.org/licenses/>.
+ *
+ * SPDX-License-Identifier: LGPL-3.0-or-later
+ */
+
+/**
+ * @file codepoints.c
+ * @author David Cantrell &lt;dcantrell@redhat.com&gt;
+ * @date 2021
+ * @brief Find forbidden Unicode code points in UTF-8 text.
+ * @copyright LGPL-3.0-or-later
+ */
+
+#include <stdbool.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <limits.h>
+#include <assert.h>
+#include "queue.h"
+#include "rpminspect.h"
+
+/* highest Unicode code point and the substitute for invalid UTF-8 */
+#define UNICODE_MAX_CODEPOINT 0x10FFFF
+#define UNICODE_REPLACEMENT 0xFFFD
+
+/*
+ * The forbidden code points compiled in to a bitmap of every code
+ * point and a table of the bytes that end a run of plain ASCII
+ * characters while scanning.
+ */
+struct _codepoints_t {
+    UChar32 *order;                /* code points in list order */
+    size_t count;                  /* number of code points in order */
+    uint8_t *map;                  /* bitmap of the forbidden code points */
+    bool stop[UCHAR_MAX + 1];      /* bytes the ASCII fast path stops at */
+};
+
+/* a forbidden code point found on a line */
+struct line_hit {
+    UChar32 c;
+    long int colnum;
+};
+
+/*
+ * Returns true if the code point is what we consider a line ending.
+ *
+ * This function contains code adapted from this blog post about
+ * Unicode with the ICU library:
+ *
+ * https://begriffs.com/posts/2019-05-23-unicode-icu.html
+ */
+static bool end_of_line(const UChar32 c)
+{
+    if ((c >= 0xA && c <= 0xD) || c == 0x85 || c == 0x2028 || c == 0x2029) {
+        return true;
+    }
+
+    return false;
+}
+
+/*
+ * Returns true if the code point is in the forbidden list.
+ */
+static bool is_forbidden(const codepoints_t *cp, const UChar32 c)
+{
+    if (c < 0 || c > UNICODE_MAX_CODEPOINT) {
+        return false;
+    }
+
+    return (cp->map[c / CHAR_BIT] & (1 << (c % CHAR_BIT))) != 0;
+}
+
+/*
+ * Decode the UTF-8 sequence at s in to a code point.  Returns the
+ * number of bytes used.  An invalid sequence decodes to U+FFFD and
+ * uses the bytes up to the first one that does not fit the sequence,
+ * the same substitution ICU's UTF-8 converter makes.
+ */
+static size_t decode_utf8(const unsigned char *s, const unsigned char *end, UChar32 *c)
+{
+    size_t i = 0;
+    size_t n = 0;
+    unsigned char lo = 0x80;
+    unsigned char hi = 0xBF;
+
+    assert(s < end);
+    assert(c != NULL);
+
+    if (*s < 0x80) {
+        *c = *s;
+        return 1;
+    } else if (*s >= 0xC2 && *s <= 0xDF) {
+        n = 1;
+        *c = *s & 0x1F;
+    } else if (*s >= 0xE0 && *s <= 0xEF) {
+        /* no overlong forms or surrogates */
+        n = 2;
+        *c = *s & 0x0F;
+        lo = (*s == 0xE0) ? 0xA0 : 0x80;
+        hi = (*s == 0xED) ? 0x9F : 0xBF;
+    } else if (*s >= 0xF0 && *s <= 0xF4) {
+        /* no overlong forms or code points past U+10FFFF */
+        n = 3;
+        *c = *s & 0x07;
+        lo = (*s == 0xF0) ? 0x90 : 0x80;
+        hi = (*s == 0xF4) ? 0x8F : 0xBF;
+    } else {
+        *c = UNICODE_REPLACEMENT;
+        return 1;
+    }
+
+    for (i = 1; i <= n; i++) {
+        if (s + i >= end || s[i] < lo || s[i] > hi) {
+            *c = UNICODE_REPLACEMENT;
+            return i;
+        }
+
+        *c = (*c << 6) | (s[i] & 0x3F);
+        lo = 0x80;
+        hi = 0xBF;
+    }
+
+    return n + 1;
+}
+
+/*
+ * Report the forbidden code points found on one line, in the order
+ * they appear in the forbidden list.  Each one is reported at the
+ * column of its first occurrence on the line.
+ */
+static void report_line(const codepoints_t *cp, const struct line_hit *hits, const size_t nhits, const long int linenum, codepoint_callback callback, void *cbdata)
+{
+    size_t i = 0;
+    size_t j = 0;
+
+    for (i = 0; i < cp->count && nhits > 0; i++) {
+        for (j = 0; j < nhits; j++) {
+            if (hits[j].c == cp->order[i]) {
+                callback(hits[j].c, linenum, hits[j].colnum, cbdata);
+                break;
+            }
+        }
+    }
+
+    return;
+}
+
+/**
+ * @brief Compile a list of forbidden code points for
+ * scan_codepoints().
+ *
+ * @param forbidden List of forbidden code points, may be NULL.
+ * @return The compiled code points, free with free_codepoints().
+ */
+codepoints_t *compile_codepoints(const UChar32_list_t *forbidden)
+{
+    int c = 0;
+    codepoints_t *cp = NULL;
+    UChar32_entry_t *entry = NULL;
+
+    cp = calloc(1, sizeof(*cp));
+    assert(cp != NULL);
+
+    cp->map = calloc(1, (UNICODE_MAX_CODEPOINT / CHAR_BIT) + 1);
+    assert(cp->map != NULL);
+
+    if (forbidden != NULL) {
+        TAILQ_FOREACH(entry, forbidden, items) {
+            if (entry->data < 0 || entry->data > UNICODE_MAX_CODEPOINT) {
+                continue;
+            }
+
+            cp->order = realloc(cp->order, (cp->count + 1) * sizeof(*cp->order));
+            assert(cp->order != NULL);
+            cp->order[cp->count++] = entry->data;
+            cp->map[entry->data / CHAR_BIT] |= 1 << (entry->data % CHAR_BIT);
+        }
+    }
+
+    for (c = 0; c <= UCHAR_MAX; c++) {
+        cp->stop[c] = (c > 0x7F) || end_of_line(c) || is_forbidden(cp, c);
+    }
+
+    return cp;
+}
+
+/**
+ * @brief Free compiled forbidden code points.
+ *
+ * @param cp Compiled code points from compile_codepoints().
+ */
+void free_codepoints(codepoints_t *cp)
+{
+    if (cp == NULL) {
+        return;
+    }
+
+    free(cp->order);
+    free(cp->map);
+    free(cp);
+    return;
+}
+
+/**
+ * @brief Scan UTF-8 text for forbidden code points.
+ *
+ * The callback is called for each forbidden code point found on a
+ * line, at the end of the line, in the order of the forbidden list
+ * and with the column of its first occurrence on the line.  Lines
+ * are numbered from 1 and columns are counted in UTF-16 code units
+ * from 0, so a supplementary code point takes two columns.  CR LF
+ * ends a single line.  Invalid UTF-8 is read as U+FFFD and a NUL
+ * byte is an ordinary character, so neither hides what follows it
+ * on the line.
+ *
+ * @param cp Compiled code points from compile_codepoints().
+ * @param data The text to scan.
+ * @param len Length of data in bytes.
+ * @param callback Called for each forbidden code point found.
+ * @param cbdata Passed to the callback.
+ * @return True if no forbidden code point was found.
+ */
+bool scan_codepoints(const codepoints_t *cp, const unsigned char *data, const size_t len, codepoint_callback callback, void *cbdata)
+{
+    bool result = true;
+    const unsigned char *p = data;
+    const unsigned char *end = data + len;
+    const unsigned char *run = NULL;
+    UChar32 c = 0;
+    size_t i = 0;
+    size_t nhits = 0;
+    size_t hitsz = 0;
+    struct line_hit *hits = NULL;
+    long int linenum = 1;
+    long int colnum = 0;
+
+    assert(cp != NULL);
+    assert(callback != NULL);
+
+    if (data == NULL) {
+        return true;
+    }
+
+    while (p < end) {
+        /* skip the plain ASCII run */
+        for (run = p; p < end && !cp->stop[*p]; p++)
+            ;
+
+        colnum += p - run;
+
+        if (p == end) {
+            break;
+        }
+
+        p += decode_utf8(p, end, &c);
+
+        if (end_of_line(c)) {
+            /* eat newline if terminated by a carriage return */
+            if (c == 0xD && p < end && *p == 0xA) {
+                p++;
+            }
+
+            report_line(cp, hits, nhits, linenum, callback, cbdata);
+            result = result && (nhits == 0);
+            nhits = 0;
+            linenum++;
+            colnum = 0;
+            continue;
+        }
+
+        if (is_forbidden(cp, c)) {
+            /* only the first occurrence on the line is reported */
+            for (i = 0; i < nhits && hits[i].c != c; i++)
+                ;
+
+            if (i == nhits) {
+                if (nhits == hitsz) {
+                    hitsz = (hitsz == 0) ? 8 : hitsz * 2;
+                    hits = realloc(hits, hitsz * sizeof(*hits));
+                    assert(hits != NULL);
+                }
+
+                hits[nhits].c = c;
+                hits[nhits].colnum = colnum;
+                nhits++;
+            }
+        }
+
+        /* supplementary code points are two UTF-16 code units */
+        colnum += (c > 0xFFFF) ? 2 : 1;
+    }
+
+    report_line(cp, hits, nhits, linenum, callback, cbdata);
+    result = result && (nhits == 0);
+    free(hits);
+
+    return result;
+}
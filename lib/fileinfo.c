@@ -41,7 +41,7 @@
  *               file is found.
  * @return True if the file is on the fileinfo list, false otherwise.
  */
-bool match_fileinfo_mode(struct rpminspect *ri, const rpmfile_entry_t *file, const char *header, const char *remedy)
+bool match_fileinfo_mode(struct rpminspect *ri, rpmfile_entry_t *file, const char *header, const char *remedy)
 {
     fileinfo_entry_t *fientry = NULL;
     mode_t interesting = S_ISUID | S_ISGID | S_ISVTX | S_IRWXU | S_IRWXG | S_IRWXO;
@@ -124,7 +124,7 @@ bool match_fileinfo_mode(struct rpminspect *ri, const rpmfile_entry_t *file, con
  * @param fname The filename of the data package file to update.
  * @return True if the file is on the fileinfo list, false otherwise.
  */
-bool match_fileinfo_owner(struct rpminspect *ri, const rpmfile_entry_t *file, const char *owner, const char *header, const char *remedy, const char *fname)
+bool match_fileinfo_owner(struct rpminspect *ri, rpmfile_entry_t *file, const char *owner, const char *header, const char *remedy, const char *fname)
 {
     fileinfo_entry_t *fientry = NULL;
     const char *pkg = NULL;
@@ -196,7 +196,7 @@ bool match_fileinfo_owner(struct rpminspect *ri, const rpmfile_entry_t *file, co
  * @param fname The filename of the data package file to update.
  * @return True if the file is on the fileinfo list, false otherwise.
  */
-bool match_fileinfo_group(struct rpminspect *ri, const rpmfile_entry_t *file, const char *group, const char *header, const char *remedy, const char *fname)
+bool match_fileinfo_group(struct rpminspect *ri, rpmfile_entry_t *file, const char *group, const char *header, const char *remedy, const char *fname)
 {
     fileinfo_entry_t *fientry = NULL;
     const char *pkg = NULL;
@@ -35,7 +35,9 @@
 #include <regex.h>
 #include <ctype.h>
 #include <stdio.h>
+#include <inttypes.h>
 #include <string.h>
+#include <strings.h>
 #include <sys/stat.h>
 #include <sys/types.h>
 #include <unistd.h>
@@ -51,6 +53,7 @@
 
 #include <archive.h>
 #include <archive_entry.h>
+#include <openssl/evp.h>
 
 #include "rpminspect.h"
 #include "uthash.h"
@@ -68,6 +71,32 @@ struct file_data {
     UT_hash_handle hh;           /* makes this structure hashable */
 };
 
+/*
+ * hash table of candidate peers, the items are indexes in to the
+ * files array of struct peer_index in list order
+ */
+struct peer_candidates {
+    char *key;                   /* "arch basename" or "arch generic path" */
+    size_t *items;               /* ascending indexes of after files */
+    size_t count;                /* number of items */
+    UT_hash_handle hh;           /* makes this structure hashable */
+};
+
+/*
+ * Index of the after build files used by find_one_peer() to look for
+ * files that moved without walking the entire after list for every
+ * before file.  Built once per find_file_peers() call.
+ */
+struct peer_index {
+    rpmfile_entry_t **files;     /* after files in list order */
+    char **generic;              /* version-generic path of each after file */
+    size_t count;                /* number of after files */
+    struct peer_candidates *basenames;
+    struct peer_candidates *generics;
+    regex_t num_regex;           /* matches version number segments */
+    bool have_regex;             /* num_regex compiled */
+};
+
 /**
  * @brief Given an RPM Header and index, return the RPMTAG_FILEFLAGS
  * entry.
@@ -107,6 +136,75 @@ static rpmfileAttrs get_rpmtag_fileflags(const Header h, const int i)
     return flags;
 }
 
+/*
+ * Return the FILE_CLASS_* bit for each file in the RPM header, indexed
+ * the same as RPMTAG_FILENAMES.  rpmbuild records a color for ELF
+ * objects and the file(1) description of each file, so this does not
+ * need the payload.  Files in packages without that information are
+ * put in every class.  The caller must free the returned array.
+ */
+static unsigned int *get_file_classes(Header hdr, const rpm_count_t count)
+{
+    rpm_count_t i = 0;
+    bool have_dict = false;
+    uint32_t *color = NULL;
+    uint32_t *classidx = NULL;
+    const char *desc = NULL;
+    unsigned int *classes = NULL;
+    rpmtd colors = NULL;
+    rpmtd fileclass = NULL;
+    rpmtd dict = NULL;
+    rpmFlags flags = HEADERGET_MINMEM;
+
+    assert(hdr != NULL);
+
+    classes = calloc(count, sizeof(*classes));
+    assert(classes != NULL);
+
+    colors = rpmtdNew();
+    fileclass = rpmtdNew();
+    dict = rpmtdNew();
+
+    if (headerGet(hdr, RPMTAG_FILECOLORS, colors, flags) != 1 || rpmtdCount(colors) != count) {
+        for (i = 0; i < count; i++) {
+            classes[i] = FILE_CLASS_ALL;
+        }
+
+        goto done;
+    }
+
+    have_dict = (headerGet(hdr, RPMTAG_FILECLASS, fileclass, flags) == 1 &&
+                 headerGet(hdr, RPMTAG_CLASSDICT, dict, flags) == 1 &&
+                 rpmtdCount(fileclass) == count);
+
+    for (i = 0; i < count; i++) {
+        classes[i] = FILE_CLASS_OTHER;
+
+        /* rpm only colors ELF objects */
+        if (rpmtdSetIndex(colors, i) != -1 && (color = rpmtdGetUint32(colors)) != NULL && *color != 0) {
+            classes[i] = FILE_CLASS_ELF;
+            continue;
+        }
+
+        /* static libraries have no color */
+        if (have_dict && rpmtdSetIndex(fileclass, i) != -1 && (classidx = rpmtdGetUint32(fileclass)) != NULL &&
+            rpmtdSetIndex(dict, *classidx) != -1 && (desc = rpmtdGetString(dict)) != NULL &&
+            (strstr(desc, "ELF") || strstr(desc, "ar archive"))) {
+            classes[i] = FILE_CLASS_ELF;
+        }
+    }
+
+done:
+    rpmtdFreeData(colors);
+    rpmtdFreeData(fileclass);
+    rpmtdFreeData(dict);
+    rpmtdFree(colors);
+    rpmtdFree(fileclass);
+    rpmtdFree(dict);
+
+    return classes;
+}
+
 /**
  * @brief Free rpmfile_t memory.
  *
@@ -118,6 +216,7 @@ static rpmfileAttrs get_rpmtag_fileflags(const Header h, const int i)
  */
 void free_files(rpmfile_t *files)
 {
+    int i = 0;
     rpmfile_entry_t *entry;
 
     if (files == NULL) {
@@ -130,31 +229,327 @@ void free_files(rpmfile_t *files)
         free(entry->fullpath);
         free(entry->localpath);
         free(entry->type);
-        free(entry->checksum);
+
+        for (i = 0; i < NUM_CHECKSUMS; i++) {
+            free(entry->checksums[i]);
+        }
+
+        free_elf_summary(entry->elf_summary);
         free(entry);
     }
 
     free(files);
 }
 
+/*
+ * Build the rpmfile_t list for a package from its RPM header without
+ * reading the payload.  The list matches what extract_rpm() returns
+ * when nothing is extracted: every file except %ghost entries, which
+ * are not in the payload, with a NULL fullpath.
+ */
+static rpmfile_t *list_header_files(Header hdr, rpmtd filenames)
+{
+    rpm_count_t i = 0;
+    const char *path = NULL;
+    rpmfile_entry_t *file_entry = NULL;
+    rpmfile_t *file_list = NULL;
+    rpmtd modes = NULL;
+    rpmtd sizes = NULL;
+    rpmtd mtimes = NULL;
+    rpmtd fileflags = NULL;
+    rpmFlags flags = HEADERGET_MINMEM;
+    bool have_sizes = false;
+    bool have_mtimes = false;
+
+    assert(hdr != NULL);
+    assert(filenames != NULL);
+
+    modes = rpmtdNew();
+    sizes = rpmtdNew();
+    mtimes = rpmtdNew();
+    fileflags = rpmtdNew();
+
+    if (headerGet(hdr, RPMTAG_FILEMODES, modes, flags) != 1 || headerGet(hdr, RPMTAG_FILEFLAGS, fileflags, flags) != 1) {
+        warnx(_("*** missing file modes or flags in RPM header"));
+        goto done;
+    }
+
+    have_sizes = (headerGet(hdr, RPMTAG_LONGFILESIZES, sizes, flags) == 1 || headerGet(hdr, RPMTAG_FILESIZES, sizes, flags) == 1);
+    have_mtimes = (headerGet(hdr, RPMTAG_FILEMTIMES, mtimes, flags) == 1);
+
+    file_list = calloc(1, sizeof(*file_list));
+    assert(file_list != NULL);
+    TAILQ_INIT(file_list);
+
+    for (i = 0; i < rpmtdCount(filenames); i++) {
+        if (rpmtdSetIndex(filenames, i) == -1 || rpmtdSetIndex(modes, i) == -1 || rpmtdSetIndex(fileflags, i) == -1) {
+            warnx(_("*** file index %u is out of bounds in RPM header"), i);
+            free_files(file_list);
+            file_list = NULL;
+            goto done;
+        }
+
+        /* ghost files are not in the payload */
+        if (rpmtdGetNumber(fileflags) & RPMFILE_GHOST) {
+            continue;
+        }
+
+        path = rpmtdGetString(filenames);
+        assert(path != NULL);
+
+        file_entry = calloc(1, sizeof(*file_entry));
+        assert(file_entry != NULL);
+
+        file_entry->rpm_header = hdr;
+        file_entry->idx = i;
+        file_entry->localpath = strdup(path);
+        assert(file_entry->localpath != NULL);
+        file_entry->flags = rpmtdGetNumber(fileflags);
+        file_entry->st.st_mode = rpmtdGetNumber(modes);
+
+        if (have_sizes && rpmtdSetIndex(sizes, i) != -1) {
+            file_entry->st.st_size = rpmtdGetNumber(sizes);
+        }
+
+        if (have_mtimes && rpmtdSetIndex(mtimes, i) != -1) {
+            file_entry->st.st_mtime = rpmtdGetNumber(mtimes);
+        }
+
+        TAILQ_INSERT_TAIL(file_list, file_entry, items);
+    }
+
+done:
+    rpmtdFreeData(modes);
+    rpmtdFreeData(sizes);
+    rpmtdFreeData(mtimes);
+    rpmtdFreeData(fileflags);
+    rpmtdFree(modes);
+    rpmtdFree(sizes);
+    rpmtdFree(mtimes);
+    rpmtdFree(fileflags);
+
+    return file_list;
+}
+
+/*
+ * Return the header digest of a payload file, or NULL if there is
+ * none.  Do not free the returned string.
+ */
+static const char *get_header_digest(rpmtd digests, const int idx)
+{
+    const char *digest = NULL;
+
+    if (digests == NULL || rpmtdSetIndex(digests, idx) == -1) {
+        return NULL;
+    }
+
+    digest = rpmtdGetString(digests);
+
+    if (digest == NULL || *digest == '\0') {
+        return NULL;
+    }
+
+    return digest;
+}
+
+/*
+ * Return the path in object_dir for the contents of a payload file.
+ * Objects are named for the digest of the contents and the
+ * permissions the file is extracted with, so every file linked to an
+ * object is identical on disk.  The caller must free the returned
+ * string.
+ */
+static char *get_object_path(const char *object_dir, const uint64_t algo, const char *digest, const mode_t perm)
+{
+    char *path = NULL;
+
+    assert(object_dir != NULL);
+    assert(digest != NULL);
+
+    xasprintf(&path, "%s/%" PRIu64 "-%s-%04o", object_dir, algo, digest, (unsigned int) (perm & 07777));
+    return path;
+}
+
+/*
+ * Hard link a payload file to an existing shared object rather than
+ * keeping its own copy.  The link is made by libarchive so the
+ * destination gets the same path checks as an extracted file.
+ * Returns true if the link was made.
+ */
+static bool link_object(struct archive *disk, struct archive_entry *entry, const char *object)
+{
+    bool linked = false;
+    struct archive_entry *link = NULL;
+
+    assert(disk != NULL);
+    assert(entry != NULL);
+    assert(object != NULL);
+
+    link = archive_entry_clone(entry);
+    assert(link != NULL);
+    archive_entry_set_hardlink(link, object);
+    archive_entry_set_size(link, 0);
+
+    if (archive_write_header(disk, link) == ARCHIVE_OK && archive_write_finish_entry(disk) == ARCHIVE_OK) {
+        linked = true;
+    }
+
+    archive_entry_free(link);
+    return linked;
+}
+
+/*
+ * Write the data of the current payload entry to disk and return the
+ * digest of the bytes written as a hex string, computed with md while
+ * the data is copied.  Returns NULL if the file could not be written.
+ * The caller must free the returned string.
+ */
+static char *write_entry_data(struct archive *archive, struct archive *disk, struct archive_entry *entry, const EVP_MD *md)
+{
+    static const unsigned char zeros[BUFSIZ];
+    const void *buf = NULL;
+    size_t size = 0;
+    int64_t offset = 0;
+    int64_t pos = 0;
+    size_t gap = 0;
+    int r = 0;
+    unsigned int i = 0;
+    unsigned int len = 0;
+    unsigned char digest[EVP_MAX_MD_SIZE];
+    char *sum = NULL;
+    EVP_MD_CTX *ctx = NULL;
+
+    assert(md != NULL);
+
+    if (archive_write_header(disk, entry) != ARCHIVE_OK) {
+        return NULL;
+    }
+
+    ctx = EVP_MD_CTX_new();
+    assert(ctx != NULL);
+
+    if (!EVP_DigestInit_ex(ctx, md, NULL)) {
+        EVP_MD_CTX_free(ctx);
+        return NULL;
+    }
+
+    while ((r = archive_read_data_block(archive, &buf, &size, &offset)) == ARCHIVE_OK) {
+        /* holes in sparse entries read as zeros */
+        while (pos < offset) {
+            gap = ((offset - pos) < (int64_t) sizeof(zeros)) ? (size_t) (offset - pos) : sizeof(zeros);
+            EVP_DigestUpdate(ctx, zeros, gap);
+            pos += gap;
+        }
+
+        EVP_DigestUpdate(ctx, buf, size);
+        pos += size;
+
+        if (archive_write_data_block(disk, buf, size, offset) != ARCHIVE_OK) {
+            break;
+        }
+    }
+
+    if (r != ARCHIVE_EOF || archive_write_finish_entry(disk) != ARCHIVE_OK) {
+        EVP_MD_CTX_free(ctx);
+        return NULL;
+    }
+
+    EVP_DigestFinal_ex(ctx, digest, &len);
+    EVP_MD_CTX_free(ctx);
+
+    sum = calloc((len * 2) + 1, sizeof(char));
+    assert(sum != NULL);
+
+    for (i = 0; i < len; i++) {
+        sprintf(&sum[i * 2], "%02x", (unsigned int) digest[i]);
+    }
+
+    return sum;
+}
+
+/*
+ * Write a regular payload file and share it through object_dir.  The
+ * contents are hashed while they are written and the file is only
+ * shared if they match the digest in the header, so a package whose
+ * header does not describe its payload never gets another file's
+ * contents.  If an object with the same contents exists, the file is
+ * replaced with a hard link to it, otherwise the file becomes the
+ * object.  Returns false if the file could not be written.
+ */
+static bool write_shared_file(struct archive *archive, struct archive *disk, struct archive_entry *entry, const EVP_MD *md, const char *digest, const char *object, rpmfile_entry_t *file)
+{
+    char *sum = NULL;
+    struct stat sb;
+
+    assert(file != NULL);
+    assert(file->fullpath != NULL);
+
+    sum = write_entry_data(archive, disk, entry, md);
+
+    if (sum == NULL) {
+        return false;
+    }
+
+    if (strcasecmp(sum, digest)) {
+        /* the header digest does not match, keep the file to itself */
+        free(sum);
+        return true;
+    }
+
+    free(sum);
+
+    if (access(object, F_OK) == 0) {
+        /* identical contents are already on disk */
+        if (unlink(file->fullpath) == -1 || !link_object(disk, entry, object)) {
+            return false;
+        }
+    } else if (link(file->fullpath, object) == -1 && errno != EEXIST) {
+        warn("link");
+    }
+
+    if (stat(file->fullpath, &sb) == 0 && sb.st_nlink > 1) {
+        file->object = sb.st_ino;
+    }
+
+    return true;
+}
+
 /**
  * @brief Extract the RPM package specified to a working directory.
  *
  * Given a path to an RPM package and its Header, construct an
- * extraction path and extract all of the payload members to that
- * directory.  The function reads the payload member information from
- * the Header and uses libarchive to perform the actual payload
- * extraction.  Returns an rpmfile_t list of all the payload members.
- * The caller is responsible for freeing this returned list.
+ * extraction path and extract the payload members to that directory.
+ * The function reads the payload member information from the Header
+ * and uses libarchive to perform the actual payload extraction.
+ * Only members in one of the specified FILE_CLASS_* classes are
+ * written to disk, the rest are listed with a NULL fullpath.  If no
+ * classes are specified the payload is not read at all and the list
+ * comes from the Header, so the package file may be just the header
+ * with the payload left out.  If object_dir is not NULL, regular
+ * files whose contents match their header digest are kept once in
+ * that directory and hard linked in to the extraction path, so an
+ * identical file in another package extracted with the same
+ * object_dir shares the same copy on disk.  Returns an rpmfile_t
+ * list of all the payload members.  The caller is responsible for
+ * freeing this returned list.
  *
  * @param pkg Path to the RPM package to extract.
  * @param hdr RPM Header for the specified package.
+ * @param output_dir Set to the extraction path.
+ * @param file_classes FILE_CLASS_* bits of the members to extract.
+ * @param object_dir Directory of shared payload files, or NULL.
  * @return rpmfile_t list of all payload members.  The caller is
  *                   responsible for freeing this list.
  */
-rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
+rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir, const unsigned int file_classes, const char *object_dir)
 {
     rpmtd td = NULL;
+    rpmtd digests = NULL;
+    uint64_t digest_algo = 0;
+    const EVP_MD *md = NULL;
+    const char *digest = NULL;
+    struct archive *disk = NULL;
+    char *object = NULL;
 
     const char *rpm_path;
     struct file_data *path_table = NULL;
@@ -169,6 +564,7 @@ rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
     int archive_result;
 
     int i;
+    unsigned int *classes = NULL;
     rpmfile_entry_t *file_entry;
     rpmfile_t *file_list = NULL;
 
@@ -210,6 +606,12 @@ rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
         goto cleanup;
     }
 
+    /* Nothing needs the file contents, skip the payload */
+    if (file_classes == FILE_CLASS_NONE) {
+        file_list = list_header_files(hdr, td);
+        goto cleanup;
+    }
+
     /*
      * Populate the hash table, and allocate an array of ints to store the index data
      * that the hash table entries will point to.
@@ -229,6 +631,29 @@ rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
         HASH_ADD_KEYPTR(hh, path_table, path_entry->path, strlen(path_entry->path), path_entry);
     }
 
+    /* Classify the files if only some of them are needed */
+    if (file_classes != FILE_CLASS_ALL) {
+        classes = get_file_classes(hdr, rpmtdCount(td));
+    }
+
+    /* Regular files are shared by digest if there is an object store */
+    if (object_dir != NULL) {
+        digests = rpmtdNew();
+        assert(digests != NULL);
+
+        md = get_evp_md(get_header_digest_type(hdr));
+
+        if (md != NULL && headerGet(hdr, RPMTAG_FILEDIGESTS, digests, HEADERGET_MINMEM) == 1) {
+            digest_algo = headerGetNumber(hdr, RPMTAG_FILEDIGESTALGO);
+
+            disk = archive_write_disk_new();
+            assert(disk != NULL);
+            archive_write_disk_set_options(disk, archive_flags);
+        } else {
+            digests = rpmtdFree(digests);
+        }
+    }
+
     /* Open the file with libarchive */
     archive = archive_read_new();
     assert(archive != NULL);
@@ -291,7 +716,6 @@ rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
 
         file_entry->flags = get_rpmtag_fileflags(hdr, file_entry->idx);
         file_entry->type = NULL;
-        file_entry->checksum = NULL;
 #ifdef _WITH_LIBCAP
         file_entry->cap = NULL;
 #endif
@@ -303,6 +727,11 @@ rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
             continue;
         }
 
+        /* Do any of the inspections need this file? */
+        if (classes != NULL && !(classes[file_entry->idx] & file_classes)) {
+            continue;
+        }
+
         /* Prepend output_dir to the path name */
         xasprintf(&file_entry->fullpath, "%s/%s", *output_dir, archive_path);
         archive_entry_set_pathname(entry, file_entry->fullpath);
@@ -325,6 +754,29 @@ rpmfile_t *extract_rpm(const char *pkg, Header hdr, char **output_dir)
             free(hardlinkpath);
         }
 
+        /* Share regular files with identical ones already on disk */
+        if (disk != NULL && S_ISREG(file_entry->st.st_mode) && archive_entry_nlink(entry) <= 1) {
+            digest = get_header_digest(digests, file_entry->idx);
+        } else {
+            digest = NULL;
+        }
+
+        if (digest != NULL) {
+            object = get_object_path(object_dir, digest_algo, digest, archive_perm);
+
+            if (!write_shared_file(archive, disk, entry, md, digest, object, file_entry)) {
+                warn("write_shared_file");
+                free(object);
+                free_files(file_list);
+                file_list = NULL;
+                goto cleanup;
+            }
+
+            free(object);
+            object = NULL;
+            continue;
+        }
+
         /* Write the file to disk */
         if (archive_read_extract(archive, entry, archive_flags) != ARCHIVE_OK) {
             warn("archive_read_extract");
@@ -345,6 +797,12 @@ cleanup:
         archive_read_free(archive);
     }
 
+    if (disk != NULL) {
+        archive_write_free(disk);
+    }
+
+    free(classes);
+    rpmtdFree(digests);
     rpmtdFree(td);
 
     return file_list;
@@ -453,19 +911,18 @@ static void set_peer(rpmfile_entry_t *file, struct file_data *fentry)
  *
  * @param s The string containing version substrings to convert.
  * @param ignore Optional string specifying a token string to ignore.
+ * @param num_regex Compiled regular expression matching number
+ * segments, see build_peer_index().
  * @return The newly created string with generic version number
  * substrings.  This string must be freed by the caller.
  */
-static char *comparable_version_substrings(const char *s, const char *ignore)
+static char *comparable_version_substrings(const char *s, const char *ignore, regex_t *num_regex)
 {
     char *orig = NULL;
     char *inner_orig = NULL;
     char *outer_orig = NULL;
-    int reg_result = 0;
     char *outer_token = NULL;
     char *inner_token = NULL;
-    regex_t num_regex;
-    char reg_error[BUFSIZ];
     char *result = NULL;
     int ignore_result = false;
     size_t i = 0;
@@ -473,15 +930,7 @@ static char *comparable_version_substrings(const char *s, const char *ignore)
     bool same = true;
 
     assert(s != NULL);
-
-    /* match number segments of the tail using a regex */
-    reg_result = regcomp(&num_regex, "^[0-9_-]+$", REG_EXTENDED);
-
-    if (reg_result != 0) {
-        regerror(reg_result, &num_regex, reg_error, sizeof(reg_error));
-        warn("regcomp: %s", reg_error);
-        return NULL;
-    }
+    assert(num_regex != NULL);
 
     /* make a copy of the input */
     orig = outer_orig = strdup(s);
@@ -501,7 +950,7 @@ static char *comparable_version_substrings(const char *s, const char *ignore)
         }
 
         /* the outer tokens are directory parts, see if there's a versioned one */
-        if (!regexec(&num_regex, outer_token, 0, NULL, 0) || strcmp(outer_token, "lib64")) {
+        if (!regexec(num_regex, outer_token, 0, NULL, 0) || strcmp(outer_token, "lib64")) {
             inner_orig = strdup(outer_token);
 
             /* there is, break down this token in to version number parts */
@@ -523,7 +972,7 @@ static char *comparable_version_substrings(const char *s, const char *ignore)
                 /* make the version substring generic */
                 same = true;
 
-                if (!regexec(&num_regex, inner_token, 0, NULL, 0) || (strcmp(inner_token, DEBUG_SUBSTRING) && ignore_result)) {
+                if (!regexec(num_regex, inner_token, 0, NULL, 0) || (strcmp(inner_token, DEBUG_SUBSTRING) && ignore_result)) {
                     for (i = 0; i < strlen(inner_token); i++) {
                         if (isdigit(inner_token[i])) {
                             inner_token[i] = '?';
@@ -552,11 +1001,258 @@ static char *comparable_version_substrings(const char *s, const char *ignore)
 
     /* clean up */
     free(orig);
-    regfree(&num_regex);
 
     return result;
 }
 
+/*
+ * Add after file n to the candidate table under the given key.
+ */
+static void add_peer_candidate(struct peer_candidates **table, const char *arch, const char *path, const size_t n)
+{
+    char *key = NULL;
+    struct peer_candidates *entry = NULL;
+
+    assert(table != NULL);
+    assert(arch != NULL);
+    assert(path != NULL);
+
+    xasprintf(&key, "%s %s", arch, path);
+    assert(key != NULL);
+    HASH_FIND_STR(*table, key, entry);
+
+    if (entry == NULL) {
+        entry = calloc(1, sizeof(*entry));
+        assert(entry != NULL);
+        entry->key = key;
+        HASH_ADD_KEYPTR(hh, *table, entry->key, strlen(entry->key), entry);
+    } else {
+        free(key);
+    }
+
+    entry->items = realloc(entry->items, (entry->count + 1) * sizeof(*entry->items));
+    assert(entry->items != NULL);
+    entry->items[entry->count++] = n;
+
+    return;
+}
+
+/*
+ * Return the candidate table entry for the given arch and path, or
+ * NULL if there is none.
+ */
+static struct peer_candidates *find_peer_candidates(struct peer_candidates *table, const char *arch, const char *path)
+{
+    char *key = NULL;
+    struct peer_candidates *entry = NULL;
+
+    if (table == NULL || path == NULL) {
+        return NULL;
+    }
+
+    xasprintf(&key, "%s %s", arch, path);
+    assert(key != NULL);
+    HASH_FIND_STR(table, key, entry);
+    free(key);
+
+    return entry;
+}
+
+/*
+ * Index the after build files for find_one_peer().  Files are indexed
+ * by build architecture and basename, which covers every file that
+ * could end with the path of a before file, and libraries and kernel
+ * modules are also indexed by their version-generic path.
+ */
+static void build_peer_index(struct peer_index *index, rpmfile_t *after)
+{
+    int reg_result = 0;
+    char reg_error[BUFSIZ];
+    size_t n = 0;
+    const char *arch = NULL;
+    const char *base = NULL;
+    rpmfile_entry_t *after_file = NULL;
+
+    assert(index != NULL);
+    assert(after != NULL);
+
+    memset(index, 0, sizeof(*index));
+
+    /* match number segments of the tail using a regex */
+    reg_result = regcomp(&index->num_regex, "^[0-9_-]+$", REG_EXTENDED);
+
+    if (reg_result != 0) {
+        regerror(reg_result, &index->num_regex, reg_error, sizeof(reg_error));
+        warn("regcomp: %s", reg_error);
+    } else {
+        index->have_regex = true;
+    }
+
+    TAILQ_FOREACH(after_file, after, items) {
+        index->count++;
+    }
+
+    index->files = calloc(index->count, sizeof(*index->files));
+    assert(index->files != NULL);
+    index->generic = calloc(index->count, sizeof(*index->generic));
+    assert(index->generic != NULL);
+
+    TAILQ_FOREACH(after_file, after, items) {
+        index->files[n] = after_file;
+        arch = get_rpm_header_arch(after_file->rpm_header);
+        assert(arch != NULL);
+
+        base = strrchr(after_file->localpath, '/');
+        add_peer_candidate(&index->basenames, arch, (base == NULL) ? after_file->localpath : base + 1, n);
+
+        if (index->have_regex && (strstr(after_file->localpath, ELF_LIB_EXTENSION) || strstr(after_file->localpath, KERNEL_MODULES_DIR))) {
+            index->generic[n] = comparable_version_substrings(after_file->localpath, arch, &index->num_regex);
+
+            if (index->generic[n] != NULL) {
+                add_peer_candidate(&index->generics, arch, index->generic[n], n);
+            }
+        }
+
+        n++;
+    }
+
+    return;
+}
+
+/*
+ * Free a candidate table.
+ */
+static void free_peer_candidates(struct peer_candidates *table)
+{
+    struct peer_candidates *entry = NULL;
+    struct peer_candidates *tmp_entry = NULL;
+
+    HASH_ITER(hh, table, entry, tmp_entry) {
+        HASH_DEL(table, entry);
+        free(entry->key);
+        free(entry->items);
+        free(entry);
+    }
+
+    return;
+}
+
+/*
+ * Free everything build_peer_index() allocated.
+ */
+static void free_peer_index(struct peer_index *index)
+{
+    size_t n = 0;
+
+    assert(index != NULL);
+
+    for (n = 0; n < index->count; n++) {
+        free(index->generic[n]);
+    }
+
+    free(index->generic);
+    free(index->files);
+    free_peer_candidates(index->basenames);
+    free_peer_candidates(index->generics);
+
+    if (index->have_regex) {
+        regfree(&index->num_regex);
+    }
+
+    return;
+}
+
+/*
+ * Collect the after files that could be a moved peer of the given
+ * before file in list order.  These are the files with the same
+ * basename and the files with the same version-generic path.  A
+ * before file with no directory part could be the suffix of any
+ * after file, so every after file is a candidate.  The returned array
+ * must be freed by the caller.
+ */
+static size_t *get_peer_candidates(struct peer_index *index, const rpmfile_entry_t *file, const char *arch, const char *generic, size_t *count)
+{
+    size_t *items = NULL;
+    size_t b = 0;
+    size_t g = 0;
+    size_t n = 0;
+    const char *base = NULL;
+    struct peer_candidates *basenames = NULL;
+    struct peer_candidates *generics = NULL;
+
+    assert(index != NULL);
+    assert(file != NULL);
+    assert(count != NULL);
+
+    base = strrchr(file->localpath, '/');
+
+    if (base == NULL) {
+        items = calloc(index->count, sizeof(*items));
+        assert(items != NULL);
+
+        for (n = 0; n < index->count; n++) {
+            items[n] = n;
+        }
+
+        *count = index->count;
+        return items;
+    }
+
+    basenames = find_peer_candidates(index->basenames, arch, base + 1);
+    generics = find_peer_candidates(index->generics, arch, generic);
+    *count = 0;
+
+    if (basenames == NULL && generics == NULL) {
+        return NULL;
+    }
+
+    items = calloc((basenames ? basenames->count : 0) + (generics ? generics->count : 0), sizeof(*items));
+    assert(items != NULL);
+
+    /* merge the two ascending lists, dropping duplicates */
+    while ((basenames && b < basenames->count) || (generics && g < generics->count)) {
+        if (generics == NULL || g == generics->count || (basenames && b < basenames->count && basenames->items[b] < generics->items[g])) {
+            n = basenames->items[b++];
+        } else if (basenames == NULL || b == basenames->count || generics->items[g] < basenames->items[b]) {
+            n = generics->items[g++];
+        } else {
+            n = basenames->items[b++];
+            g++;
+        }
+
+        items[(*count)++] = n;
+    }
+
+    return items;
+}
+
+/*
+ * Return true if two files are the same type of file.  Compares MIME
+ * types for extracted files and the file(1) description rpmbuild
+ * stored in the header for files that were not extracted.
+ */
+static bool same_file_type(rpmfile_entry_t *a, rpmfile_entry_t *b)
+{
+    bool same = false;
+    char *aclass = NULL;
+    char *bclass = NULL;
+
+    assert(a != NULL);
+    assert(b != NULL);
+
+    if (a->fullpath != NULL && b->fullpath != NULL) {
+        return !strcmp(get_mime_type(a), get_mime_type(b));
+    }
+
+    aclass = get_rpm_header_value(a, RPMTAG_FILECLASS);
+    bclass = get_rpm_header_value(b, RPMTAG_FILECLASS);
+    same = (aclass != NULL && bclass != NULL && !strcmp(aclass, bclass));
+    free(aclass);
+    free(bclass);
+
+    return same;
+}
+
 /**
  * @brief For the given file from "before", attempt to find a matching
  * file in "after".
@@ -575,11 +1271,16 @@ static char *comparable_version_substrings(const char *s, const char *ignore)
  * if it moved or not between builds.  This helps with the reporting
  * messages.
  *
+ * Files that moved are only compared with the after files the
+ * peer_index lists as candidates for them, in after list order.
+ * Every other after file could not match.
+ *
  * @param file rpmfile_entry_t with missing peer_file.
  * @param after After build rpmfile_t list.
  * @param after_table Hash table of after build rpmfile_t localpaths.
+ * @param index Index of the after build files.
  */
-static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_data *after_table)
+static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_data *after_table, struct peer_index *index)
 {
     struct file_data *entry = NULL;
     rpmfile_entry_t *after_file = NULL;
@@ -593,10 +1294,15 @@ static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_d
     char *search_path = NULL;
     const char *arch = NULL;
     const char *after_arch = NULL;
+    char *generic = NULL;
+    size_t *candidates = NULL;
+    size_t ncandidates = 0;
+    size_t n = 0;
 
     assert(file != NULL);
     assert(after != NULL);
     assert(after_table != NULL);
+    assert(index != NULL);
 
     /* used in a number of matching checks below */
     after_file = TAILQ_FIRST(after);
@@ -665,8 +1371,17 @@ static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_d
         arch = get_rpm_header_arch(file->rpm_header);
         assert(arch != NULL);
 
+        /* create generic version number path */
+        if (index->have_regex && (strstr(file->localpath, ELF_LIB_EXTENSION) || strstr(file->localpath, KERNEL_MODULES_DIR))) {
+            generic = comparable_version_substrings(file->localpath, arch, &index->num_regex);
+        }
+
         /* look for a possible match for files that move locations */
-        TAILQ_FOREACH(after_file, after, items) {
+        candidates = get_peer_candidates(index, file, arch, generic, &ncandidates);
+
+        for (n = 0; n < ncandidates; n++) {
+            after_file = index->files[candidates[n]];
+
             /* skip files with peers */
             if (after_file->peer_file) {
                 continue;
@@ -682,7 +1397,7 @@ static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_d
 
             /* match files that move between subpackages */
             if (strsuffix(after_file->localpath, file->localpath) &&
-                !strcmp(get_mime_type(file), get_mime_type(after_file)) &&
+                same_file_type(file, after_file) &&
                 strcmp(headerGetString(file->rpm_header, RPMTAG_NAME), headerGetString(after_file->rpm_header, RPMTAG_NAME))) {
                 /*
                  * This is a best guess that checks the following:
@@ -700,6 +1415,8 @@ static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_d
                     DEBUG_PRINT("moved subpackage\n");
                     file->moved_subpackage = true;
                     file->peer_file->moved_subpackage = true;
+                    free(candidates);
+                    free(generic);
                     return;
                 }
             } else if ((S_ISREG(file->st.st_mode) && S_ISREG(after_file->st.st_mode)) ||
@@ -715,16 +1432,12 @@ static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_d
                  * Also try to match kernel modules between builds.
                  */
                 if (!(strstr(file->localpath, ELF_LIB_EXTENSION) && strstr(after_file->localpath, ELF_LIB_EXTENSION)) &&
-                    !(strstr(file->fullpath, KERNEL_MODULES_DIR) && strstr(after_file->fullpath, KERNEL_MODULES_DIR))) {
+                    !(strstr(file->localpath, KERNEL_MODULES_DIR) && strstr(after_file->localpath, KERNEL_MODULES_DIR))) {
                     continue;
                 }
 
-                /* create generic version number paths */
-                before_tmp = comparable_version_substrings(file->localpath, arch);
-                after_tmp = comparable_version_substrings(after_file->localpath, arch);
-
-                /* see if these generic paths match */
-                if (!strcmp(before_tmp, after_tmp)) {
+                /* see if the generic version number paths match */
+                if (generic != NULL && index->generic[candidates[n]] != NULL && !strcmp(generic, index->generic[candidates[n]])) {
                     DEBUG_PRINT("%s probably replaced by %s\n", file->localpath, after_file->localpath);
                     HASH_FIND_STR(after_table, after_file->localpath, entry);
 
@@ -732,11 +1445,11 @@ static void find_one_peer(rpmfile_entry_t *file, rpmfile_t *after, struct file_d
                         set_peer(file, entry);
                     }
                 }
-
-                free(before_tmp);
-                free(after_tmp);
             }
         }
+
+        free(candidates);
+        free(generic);
     }
 
     return;
@@ -762,6 +1475,7 @@ void find_file_peers(rpmfile_t *before, rpmfile_t *after)
     struct file_data *entry = NULL;
     struct file_data *tmp_entry = NULL;
     rpmfile_entry_t *before_entry = NULL;
+    struct peer_index index;
 
     assert(before != NULL);
     assert(after != NULL);
@@ -775,11 +1489,16 @@ void find_file_peers(rpmfile_t *before, rpmfile_t *after)
     after_table = files_to_table(after);
     assert(after_table);
 
+    /* Index the after list for files that moved */
+    build_peer_index(&index, after);
+
     /* Match peers */
     TAILQ_FOREACH(before_entry, before, items) {
-        find_one_peer(before_entry, after, after_table);
+        find_one_peer(before_entry, after, after_table, &index);
     }
 
+    free_peer_index(&index);
+
     /* Clean up the hash table */
     HASH_ITER(hh, after_table, entry, tmp_entry) {
         HASH_DEL(after_table, entry);
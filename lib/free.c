@@ -102,7 +102,13 @@ void free_rpminspect(struct rpminspect *ri) {
     header_cache_t *hentry = NULL;
     header_cache_t *tmp_hentry = NULL;
     politics_entry_t *pentry = NULL;
+    politics_index_t *ientry = NULL;
+    politics_index_t *tmp_ientry = NULL;
     security_entry_t *sentry = NULL;
+    security_index_t *pkgentry = NULL;
+    security_index_t *tmp_pkgentry = NULL;
+    security_index_t *pathentry = NULL;
+    security_index_t *tmp_pathentry = NULL;
     secrule_t *srentry = NULL;
     secrule_t *tmp_srentry = NULL;
 
@@ -117,6 +123,7 @@ void free_rpminspect(struct rpminspect *ri) {
     free(ri->kojiursine);
     free(ri->kojimbs);
     free(ri->worksubdir);
+    free(ri->cache_dir);
 
     free(ri->vendor_data_dir);
     free(ri->licensedb);
@@ -182,6 +189,20 @@ void free_rpminspect(struct rpminspect *ri) {
         free(ri->politics);
     }
 
+    HASH_ITER(hh, ri->politics_paths, ientry, tmp_ientry) {
+        HASH_DEL(ri->politics_paths, ientry);
+        free(ientry->key);
+        free(ientry->entries);
+        free(ientry);
+    }
+
+    HASH_ITER(hh, ri->politics_globs, ientry, tmp_ientry) {
+        HASH_DEL(ri->politics_globs, ientry);
+        free(ientry->key);
+        free(ientry->entries);
+        free(ientry);
+    }
+
     free(ri->politics_filename);
 
     if (ri->security) {
@@ -207,8 +228,23 @@ void free_rpminspect(struct rpminspect *ri) {
         free(ri->security);
     }
 
+    HASH_ITER(hh, ri->security_index, pkgentry, tmp_pkgentry) {
+        HASH_DEL(ri->security_index, pkgentry);
+
+        HASH_ITER(hh, pkgentry->paths, pathentry, tmp_pathentry) {
+            HASH_DEL(pkgentry->paths, pathentry);
+            free(pathentry->key);
+            free(pathentry->entries);
+            free(pathentry);
+        }
+
+        free(pkgentry->key);
+        free(pkgentry);
+    }
+
     free(ri->security_filename);
     list_free(ri->badwords, free);
+    free_badwords(ri->badwords_matcher);
     list_free(ri->icons, free);
     free(ri->icons_filename);
 
@@ -278,12 +314,15 @@ void free_rpminspect(struct rpminspect *ri) {
     list_free(ri->runpath_allowed_origin_paths, free);
     list_free(ri->runpath_origin_prefix_trim, free);
     free_string_list_map(ri->inspection_ignores);
+    free_ignores(ri->ignore_matcher);
     list_free(ri->expected_empty_rpms, free);
     free_regex(ri->unicode_exclude);
     list_free(ri->unicode_excluded_mime_types, free);
     list_free(ri->unicode_forbidden_codepoints, free);
     free_deprule_ignore_map(ri->deprules_ignore);
 
+    HASH_CLEAR(before_hh, ri->before_peers);
+    HASH_CLEAR(after_hh, ri->after_peers);
     free_rpmpeer(ri->peers);
 
     HASH_ITER(hh, ri->header_cache, hentry, tmp_hentry) {
@@ -298,6 +337,7 @@ void free_rpminspect(struct rpminspect *ri) {
     free_pair(ri->macros);
 
     free_results(ri->results);
+    free_magic();
 
     return;
 }
@@ -26,6 +26,8 @@
 #include <assert.h>
 #include <errno.h>
 #include <err.h>
+#include <fnmatch.h>
+#include <pthread.h>
 #include <yaml.h>
 #include "rpminspect.h"
 #include "queue.h"
@@ -944,6 +946,41 @@ static int read_cfgfile(struct rpminspect *ri, const char *filename)
                         } else if (!strcmp(key, "profiledir")) {
                             free(ri->profiledir);
                             ri->profiledir = strdup(t);
+                        } else if (!strcmp(key, "elf_cache_size")) {
+                            errno = 0;
+                            ri->elf_cache_size = strtoul(t, 0, 10);
+
+                            if (ri->elf_cache_size == ULONG_MAX && errno == ERANGE) {
+                                warn("strtoul");
+                                ri->elf_cache_size = DEFAULT_ELF_CACHE_SIZE;
+                            }
+                        } else if (!strcmp(key, "dedup_payloads")) {
+                            if (!strcasecmp(t, "on")) {
+                                ri->dedup_payloads = true;
+                            } else if (!strcasecmp(t, "off")) {
+                                ri->dedup_payloads = false;
+                            } else {
+                                warnx(_("*** dedup_payloads must be 'on' or 'off', ignoring"));
+                            }
+                        } else if (!strcmp(key, "cache_dir")) {
+                            free(ri->cache_dir);
+                            ri->cache_dir = strdup(t);
+                        } else if (!strcmp(key, "cache_size")) {
+                            errno = 0;
+                            ri->cache_size = strtoul(t, 0, 10);
+
+                            if (ri->cache_size == ULONG_MAX && errno == ERANGE) {
+                                warn("strtoul");
+                                ri->cache_size = DEFAULT_CACHE_SIZE;
+                            }
+                        } else if (!strcmp(key, "artifact_cache_size")) {
+                            errno = 0;
+                            ri->artifact_cache_size = strtoul(t, 0, 10);
+
+                            if (ri->artifact_cache_size == ULONG_MAX && errno == ERANGE) {
+                                warn("strtoul");
+                                ri->artifact_cache_size = DEFAULT_ARTIFACT_CACHE_SIZE;
+                            }
                         }
                     } else if (block == BLOCK_KOJI) {
                         if (!strcmp(key, "hub")) {
@@ -1347,7 +1384,7 @@ static int read_cfgfile(struct rpminspect *ri, const char *filename)
  * Initialize the fileinfo list for the given product release.  If the
  * file cannot be found, return false.
  */
-bool init_fileinfo(struct rpminspect *ri)
+static bool load_fileinfo(struct rpminspect *ri)
 {
     string_list_t *contents = NULL;
     string_entry_t *entry = NULL;
@@ -1459,7 +1496,7 @@ bool init_fileinfo(struct rpminspect *ri)
  * Initialize the caps list for the given product release.  If the
  * file cannot be found, return false.
  */
-bool init_caps(struct rpminspect *ri)
+static bool load_caps(struct rpminspect *ri)
 {
     char *line = NULL;
     char *token = NULL;
@@ -1568,7 +1605,7 @@ bool init_caps(struct rpminspect *ri)
  * cache it.  Return the cached list.  If the file cannot be found,
  * return false.
  */
-bool init_rebaseable(struct rpminspect *ri)
+static bool load_rebaseable(struct rpminspect *ri)
 {
     string_list_t *contents = NULL;
     string_entry_t *entry = NULL;
@@ -1625,11 +1662,130 @@ bool init_rebaseable(struct rpminspect *ri)
     return true;
 }
 
+/*
+ * Return the length of the part of a fnmatch(3) pattern before the
+ * first wildcard.  Patterns are matched with FNM_NOESCAPE and extmatch
+ * says whether FNM_EXTMATCH is used.
+ */
+static size_t literal_len(const char *pattern, const bool extmatch)
+{
+    const char *p = NULL;
+
+    assert(pattern != NULL);
+
+    for (p = pattern; *p != '\0'; p++) {
+        if (*p == '*' || *p == '?' || *p == '[') {
+            break;
+        }
+
+        if (extmatch && (*p == '+' || *p == '@' || *p == '!') && p[1] == '(') {
+            break;
+        }
+    }
+
+    return p - pattern;
+}
+
+/*
+ * Return the length of the directory part of the literal prefix of a
+ * fnmatch(3) pattern, including the trailing slash.
+ */
+static size_t literal_dir_len(const char *pattern, const size_t len)
+{
+    const char *slash = NULL;
+
+    assert(pattern != NULL);
+
+    slash = memrchr(pattern, '/', len);
+    return (slash == NULL) ? 0 : (size_t) (slash - pattern) + 1;
+}
+
+/*
+ * Add a politics entry to an index table under the given key.
+ */
+static void add_politics_index(politics_index_t **table, const char *key, const size_t len, politics_entry_t *pentry)
+{
+    politics_index_t *ientry = NULL;
+
+    assert(table != NULL);
+    assert(key != NULL);
+    assert(pentry != NULL);
+
+    HASH_FIND(hh, *table, key, len, ientry);
+
+    if (ientry == NULL) {
+        ientry = calloc(1, sizeof(*ientry));
+        assert(ientry != NULL);
+        ientry->key = strndup(key, len);
+        assert(ientry->key != NULL);
+        HASH_ADD_KEYPTR(hh, *table, ientry->key, len, ientry);
+    }
+
+    ientry->entries = realloc(ientry->entries, (ientry->count + 1) * sizeof(*ientry->entries));
+    assert(ientry->entries != NULL);
+    ientry->entries[ientry->count++] = pentry;
+
+    return;
+}
+
+/*
+ * Index the politics entries so the politics inspection only has to
+ * look at the entries that can match a given path.  Malformed entries
+ * and entries with an unknown digest type are reported here and left
+ * out of the index.
+ */
+static void index_politics(struct rpminspect *ri)
+{
+    size_t order = 0;
+    size_t len = 0;
+    bool extmatch = false;
+    politics_entry_t *pentry = NULL;
+
+    assert(ri != NULL);
+    assert(ri->politics != NULL);
+
+#ifdef FNM_EXTMATCH
+    /* the politics inspection uses extended patterns where available */
+    extmatch = true;
+#endif
+
+    TAILQ_FOREACH(pentry, ri->politics, items) {
+        pentry->order = order++;
+
+        /* malformatted lines */
+        if (pentry->pattern == NULL || pentry->digest == NULL) {
+            warnx(_("invalid politics entry with pattern=%s and digest=%s"), pentry->pattern, pentry->digest);
+            continue;
+        }
+
+        /* get the type of digest string */
+        if (strcmp(pentry->digest, "*")) {
+            pentry->type = get_digest_type(pentry->digest);
+
+            if (pentry->type == NULLSUM) {
+                warnx(_("unknown digest type for pattern %s: %s"), pentry->pattern, pentry->digest);
+                continue;
+            }
+        }
+
+        len = literal_len(pentry->pattern, extmatch);
+
+        if (pentry->pattern[len] == '\0') {
+            add_politics_index(&ri->politics_paths, pentry->pattern, len, pentry);
+        } else {
+            /* key wildcard entries by the directory they start in */
+            add_politics_index(&ri->politics_globs, pentry->pattern, literal_dir_len(pentry->pattern, len), pentry);
+        }
+    }
+
+    return;
+}
+
 /*
  * Initialize the politics list for the given product release.  If the
  * file cannot be found, return false.
  */
-bool init_politics(struct rpminspect *ri)
+static bool load_politics(struct rpminspect *ri)
 {
     string_list_t *contents = NULL;
     string_entry_t *entry = NULL;
@@ -1721,15 +1877,74 @@ bool init_politics(struct rpminspect *ri)
     }
 
     list_free(contents, free);
+    index_politics(ri);
 
     return true;
 }
 
+/*
+ * Add a security entry to an index table under the given key.
+ */
+static security_index_t *add_security_index(security_index_t **table, const char *key, const size_t len, security_entry_t *sentry)
+{
+    security_index_t *ientry = NULL;
+
+    assert(table != NULL);
+    assert(key != NULL);
+
+    HASH_FIND(hh, *table, key, len, ientry);
+
+    if (ientry == NULL) {
+        ientry = calloc(1, sizeof(*ientry));
+        assert(ientry != NULL);
+        ientry->key = strndup(key, len);
+        assert(ientry->key != NULL);
+        HASH_ADD_KEYPTR(hh, *table, ientry->key, len, ientry);
+    }
+
+    if (sentry != NULL) {
+        ientry->entries = realloc(ientry->entries, (ientry->count + 1) * sizeof(*ientry->entries));
+        assert(ientry->entries != NULL);
+        ientry->entries[ientry->count++] = sentry;
+    }
+
+    return ientry;
+}
+
+/*
+ * Index the security entries for get_secrule_by_path().  Entries are
+ * keyed by package name, or the empty string when the package is a
+ * pattern, and then by the directory part of the path before the
+ * first wildcard.
+ */
+static void index_security(struct rpminspect *ri)
+{
+    size_t order = 0;
+    size_t len = 0;
+    security_index_t *pkgentry = NULL;
+    security_entry_t *sentry = NULL;
+
+    assert(ri != NULL);
+    assert(ri->security != NULL);
+
+    TAILQ_FOREACH(sentry, ri->security, items) {
+        sentry->order = order++;
+
+        len = literal_len(sentry->pkg, false);
+        pkgentry = add_security_index(&ri->security_index, sentry->pkg, (sentry->pkg[len] == '\0') ? len : 0, NULL);
+
+        len = literal_len(sentry->path, false);
+        add_security_index(&pkgentry->paths, sentry->path, literal_dir_len(sentry->path, len), sentry);
+    }
+
+    return;
+}
+
 /*
  * Initialize the security list for the given product release.  If the
  * file cannot be found, return false.
  */
-bool init_security(struct rpminspect *ri)
+static bool load_security(struct rpminspect *ri)
 {
     int pos = 0;
     char *line = NULL;
@@ -1929,6 +2144,7 @@ bool init_security(struct rpminspect *ri)
     }
 
     list_free(contents, free);
+    index_security(ri);
     ri->security_initialized = true;
 
     return true;
@@ -1939,7 +2155,7 @@ bool init_security(struct rpminspect *ri)
  * it.  Return the cached list.  If the file cannot be found, return
  * false.
  */
-bool init_icons(struct rpminspect *ri)
+static bool load_icons(struct rpminspect *ri)
 {
     string_list_t *contents = NULL;
     string_entry_t *entry = NULL;
@@ -1996,6 +2212,56 @@ bool init_icons(struct rpminspect *ri)
     return true;
 }
 
+/*
+ * The vendor data lists above are read on first use, which may happen
+ * from several inspections at the same time.  Serialize the loaders
+ * so each list is only read and allocated once.
+ */
+static pthread_mutex_t vendor_data_lock = PTHREAD_MUTEX_INITIALIZER;
+
+static bool locked_load(bool (*loader)(struct rpminspect *), struct rpminspect *ri)
+{
+    bool result = false;
+
+    assert(loader != NULL);
+
+    pthread_mutex_lock(&vendor_data_lock);
+    result = loader(ri);
+    pthread_mutex_unlock(&vendor_data_lock);
+
+    return result;
+}
+
+bool init_fileinfo(struct rpminspect *ri)
+{
+    return locked_load(load_fileinfo, ri);
+}
+
+bool init_caps(struct rpminspect *ri)
+{
+    return locked_load(load_caps, ri);
+}
+
+bool init_rebaseable(struct rpminspect *ri)
+{
+    return locked_load(load_rebaseable, ri);
+}
+
+bool init_politics(struct rpminspect *ri)
+{
+    return locked_load(load_politics, ri);
+}
+
+bool init_security(struct rpminspect *ri)
+{
+    return locked_load(load_security, ri);
+}
+
+bool init_icons(struct rpminspect *ri)
+{
+    return locked_load(load_icons, ri);
+}
+
 /*
  * Initialize a struct rpminspect.  Called by applications using
  * librpminspect before they began calling library functions.  If ri
@@ -2018,6 +2284,10 @@ struct rpminspect *init_rpminspect(struct rpminspect *ri, const char *cfgfile, c
 
         /* Initialize the struct before reading files */
         ri->workdir = strdup(DEFAULT_WORKDIR);
+        ri->elf_cache_size = DEFAULT_ELF_CACHE_SIZE;
+        ri->dedup_payloads = true;
+        ri->cache_size = DEFAULT_CACHE_SIZE;
+        ri->artifact_cache_size = DEFAULT_ARTIFACT_CACHE_SIZE;
         ri->vendor_data_dir = strdup(VENDOR_DATA_DIR);
         ri->favor_release = FAVOR_NEWEST;
         ri->tests = ~0;
@@ -2093,6 +2363,12 @@ struct rpminspect *init_rpminspect(struct rpminspect *ri, const char *cfgfile, c
                 warn(_("*** error reading '%s'"), filename);
                 return NULL;
             }
+
+            /* Store the profile as a config file we read in */
+            cfg = calloc(1, sizeof(*cfg));
+            assert(cfg != NULL);
+            cfg->data = filename;
+            TAILQ_INSERT_TAIL(ri->cfgfiles, cfg, items);
         }
 
         free(tmp);
@@ -2117,6 +2393,14 @@ struct rpminspect *init_rpminspect(struct rpminspect *ri, const char *cfgfile, c
     ri->peers = init_rpmpeer();
     ri->threshold = RESULT_VERIFY;
     ri->worst_result = RESULT_OK;
+    ri->jobs = 1;
+    ri->download_jobs = DEFAULT_DOWNLOAD_JOBS;
+
+    /* match ignores in memory rather than against the filesystem */
+    compile_ignores(ri);
+
+    /* scan strings for all of the bad words at once */
+    ri->badwords_matcher = compile_badwords(ri->badwords);
 
 #if 0
     /* debugging output only to make sure we captured ignores */
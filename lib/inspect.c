@@ -22,6 +22,7 @@
 #include <assert.h>
 #include <stdbool.h>
 #include <stddef.h>
+#include <stdlib.h>
 #include "queue.h"
 #include "rpminspect.h"
 #include "inspect.h"
@@ -40,61 +41,91 @@ struct inspect inspections[] = {
      * { INSPECT_TYPE (add to inspect.h),
      *   "short name",
      *   bool--true if for single build, false if before&after required,
+     *   bool--true if it may run concurrently with other inspections,
+     *   FILE_CLASS_* bits for the payload files it reads,
+     *   ARTIFACT_* bits for the build artifacts it looks at,
      *   &function_pointer },
      *
      * NOTE: long descriptions are inspect.h and returned by inspection_desc()
      */
-    { INSPECT_LICENSE,       "license",       true,  &inspect_license },
-    { INSPECT_EMPTYRPM,      "emptyrpm",      true,  &inspect_emptyrpm },
-    { INSPECT_LOSTPAYLOAD,   "lostpayload",   false, &inspect_lostpayload },
-    { INSPECT_METADATA,      "metadata",      true,  &inspect_metadata },
-    { INSPECT_MANPAGE,       "manpage",       true,  &inspect_manpage },
-    { INSPECT_XML,           "xml",           true,  &inspect_xml },
-    { INSPECT_ELF,           "elf",           true,  &inspect_elf },
-    { INSPECT_DESKTOP,       "desktop",       true,  &inspect_desktop },
-    { INSPECT_DISTTAG,       "disttag",       true,  &inspect_disttag },
-    { INSPECT_SPECNAME,      "specname",      true,  &inspect_specname },
-    { INSPECT_MODULARITY,    "modularity",    true,  &inspect_modularity },
-    { INSPECT_JAVABYTECODE,  "javabytecode",  true,  &inspect_javabytecode },
-    { INSPECT_CHANGEDFILES,  "changedfiles",  false, &inspect_changedfiles },
-    { INSPECT_MOVEDFILES,    "movedfiles",    false, &inspect_movedfiles },
-    { INSPECT_REMOVEDFILES,  "removedfiles",  false, &inspect_removedfiles },
-    { INSPECT_ADDEDFILES,    "addedfiles",    true,  &inspect_addedfiles },
-    { INSPECT_UPSTREAM,      "upstream",      false, &inspect_upstream },
-    { INSPECT_OWNERSHIP,     "ownership",     true,  &inspect_ownership },
-    { INSPECT_SHELLSYNTAX,   "shellsyntax",   true,  &inspect_shellsyntax },
-    { INSPECT_ANNOCHECK,     "annocheck",     true,  &inspect_annocheck },
-    { INSPECT_DSODEPS,       "dsodeps",       false, &inspect_dsodeps },
-    { INSPECT_FILESIZE,      "filesize",      false, &inspect_filesize },
-    { INSPECT_PERMISSIONS,   "permissions",   true,  &inspect_permissions },
+    { INSPECT_LICENSE,       "license",       true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_license },
+    { INSPECT_EMPTYRPM,      "emptyrpm",      true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_emptyrpm },
+    { INSPECT_LOSTPAYLOAD,   "lostpayload",   false, true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_lostpayload },
+    { INSPECT_METADATA,      "metadata",      true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_metadata },
+    { INSPECT_MANPAGE,       "manpage",       true,  false, FILE_CLASS_ALL,  ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_manpage },
+    { INSPECT_XML,           "xml",           true,  true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_xml },
+    { INSPECT_ELF,           "elf",           true,  true,  FILE_CLASS_ELF,  ARTIFACT_ALL,                         &inspect_elf },
+    { INSPECT_DESKTOP,       "desktop",       true,  true,  FILE_CLASS_ALL,  ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_desktop },
+    { INSPECT_DISTTAG,       "disttag",       true,  false, FILE_CLASS_ALL,  ARTIFACT_SRPM,                        &inspect_disttag },
+    { INSPECT_SPECNAME,      "specname",      true,  true,  FILE_CLASS_NONE, ARTIFACT_SRPM,                        &inspect_specname },
+    { INSPECT_MODULARITY,    "modularity",    true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL | ARTIFACT_MODULE,       &inspect_modularity },
+    { INSPECT_JAVABYTECODE,  "javabytecode",  true,  false, FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_javabytecode },
+    { INSPECT_CHANGEDFILES,  "changedfiles",  false, true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_changedfiles },
+    { INSPECT_MOVEDFILES,    "movedfiles",    false, true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_movedfiles },
+    { INSPECT_REMOVEDFILES,  "removedfiles",  false, true,  FILE_CLASS_ALL,  ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_removedfiles },
+    { INSPECT_ADDEDFILES,    "addedfiles",    true,  true,  FILE_CLASS_NONE, ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_addedfiles },
+    { INSPECT_UPSTREAM,      "upstream",      false, true,  FILE_CLASS_ALL,  ARTIFACT_SRPM,                        &inspect_upstream },
+    { INSPECT_OWNERSHIP,     "ownership",     true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_ownership },
+    { INSPECT_SHELLSYNTAX,   "shellsyntax",   true,  true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_shellsyntax },
+    { INSPECT_ANNOCHECK,     "annocheck",     true,  true,  FILE_CLASS_ELF,  ARTIFACT_BINARY | ARTIFACT_DEBUGINFO, &inspect_annocheck },
+    { INSPECT_DSODEPS,       "dsodeps",       false, true,  FILE_CLASS_ELF,  ARTIFACT_ALL,                         &inspect_dsodeps },
+    { INSPECT_FILESIZE,      "filesize",      false, true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_filesize },
+    { INSPECT_PERMISSIONS,   "permissions",   true,  true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_permissions },
 #ifdef _WITH_LIBCAP
-    { INSPECT_CAPABILITIES,  "capabilities",  true,  &inspect_capabilities },
+    { INSPECT_CAPABILITIES,  "capabilities",  true,  true,  FILE_CLASS_NONE, ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_capabilities },
 #endif
 #ifdef _WITH_LIBKMOD
-    { INSPECT_KMOD,          "kmod",          false, &inspect_kmod },
+    { INSPECT_KMOD,          "kmod",          false, true,  FILE_CLASS_ALL,  ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_kmod },
 #endif
-    { INSPECT_ARCH,          "arch",          false, &inspect_arch },
-    { INSPECT_SUBPACKAGES,   "subpackages",   false, &inspect_subpackages },
-    { INSPECT_CHANGELOG,     "changelog",     false, &inspect_changelog },
-    { INSPECT_PATHMIGRATION, "pathmigration", true,  &inspect_pathmigration },
-    { INSPECT_LTO,           "lto",           true,  &inspect_lto },
-    { INSPECT_SYMLINKS,      "symlinks",      true,  &inspect_symlinks },
-    { INSPECT_FILES,         "files",         true,  &inspect_files },
-    { INSPECT_TYPES,         "types",         false, &inspect_types },
-    { INSPECT_ABIDIFF,       "abidiff",       false, &inspect_abidiff },
-    { INSPECT_KMIDIFF,       "kmidiff",       false, &inspect_kmidiff },
-    { INSPECT_CONFIG,        "config",        false, &inspect_config },
-    { INSPECT_DOC,           "doc",           false, &inspect_doc },
-    { INSPECT_PATCHES,       "patches",       true,  &inspect_patches },
-    { INSPECT_VIRUS,         "virus",         true,  &inspect_virus },
-    { INSPECT_POLITICS,      "politics",      true,  &inspect_politics },
-    { INSPECT_BADFUNCS,      "badfuncs",      true,  &inspect_badfuncs },
-    { INSPECT_RUNPATH,       "runpath",       true,  &inspect_runpath },
-    { INSPECT_UNICODE,       "unicode",       true,  &inspect_unicode },
-    { INSPECT_RPMDEPS,       "rpmdeps",       true,  &inspect_rpmdeps },
-    { 0, NULL, false, NULL }
+    { INSPECT_ARCH,          "arch",          false, true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_arch },
+    { INSPECT_SUBPACKAGES,   "subpackages",   false, true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_subpackages },
+    { INSPECT_CHANGELOG,     "changelog",     false, true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_changelog },
+    { INSPECT_PATHMIGRATION, "pathmigration", true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_pathmigration },
+    { INSPECT_LTO,           "lto",           true,  true,  FILE_CLASS_ELF,  ARTIFACT_ALL,                         &inspect_lto },
+    { INSPECT_SYMLINKS,      "symlinks",      true,  false, FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_symlinks },
+    { INSPECT_FILES,         "files",         true,  true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_files },
+    { INSPECT_TYPES,         "types",         false, true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_types },
+    { INSPECT_ABIDIFF,       "abidiff",       false, true,  FILE_CLASS_ALL,  ARTIFACT_BINARY | ARTIFACT_DEBUGINFO, &inspect_abidiff },
+    { INSPECT_KMIDIFF,       "kmidiff",       false, true,  FILE_CLASS_ALL,  ARTIFACT_BINARY | ARTIFACT_DEBUGINFO, &inspect_kmidiff },
+    { INSPECT_CONFIG,        "config",        false, true,  FILE_CLASS_ALL,  ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_config },
+    { INSPECT_DOC,           "doc",           false, true,  FILE_CLASS_ALL,  ARTIFACT_SRPM | ARTIFACT_BINARY,      &inspect_doc },
+    { INSPECT_PATCHES,       "patches",       true,  true,  FILE_CLASS_ALL,  ARTIFACT_SRPM,                        &inspect_patches },
+    { INSPECT_VIRUS,         "virus",         true,  true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_virus },
+    { INSPECT_POLITICS,      "politics",      true,  true,  FILE_CLASS_ALL,  ARTIFACT_ALL,                         &inspect_politics },
+    { INSPECT_BADFUNCS,      "badfuncs",      true,  true,  FILE_CLASS_ELF,  ARTIFACT_ALL,                         &inspect_badfuncs },
+    { INSPECT_RUNPATH,       "runpath",       true,  true,  FILE_CLASS_ELF,  ARTIFACT_ALL,                         &inspect_runpath },
+    { INSPECT_UNICODE,       "unicode",       true,  false, FILE_CLASS_ALL,  ARTIFACT_SRPM,                        &inspect_unicode },
+    { INSPECT_RPMDEPS,       "rpmdeps",       true,  true,  FILE_CLASS_NONE, ARTIFACT_ALL,                         &inspect_rpmdeps },
+    { 0, NULL, false, false, FILE_CLASS_NONE, ARTIFACT_NONE, NULL }
 };
 
+/*
+ * Run check_fn on one file.  For inspections with cached results,
+ * replay the results recorded for the same file in an earlier run or
+ * record the ones check_fn reports now.
+ */
+static bool check_file(struct rpminspect *ri, const char *inspection, foreach_peer_file_func check_fn, rpmfile_entry_t *file)
+{
+    bool result = true;
+    results_t *results = NULL;
+    results_t **captured = NULL;
+
+    if (!cacheable(ri, inspection)) {
+        return check_fn(ri, file);
+    }
+
+    if (!get_cached_results(ri, inspection, file, &results, &result)) {
+        captured = capture_results(&results);
+        result = check_fn(ri, file);
+        capture_results(captured);
+        put_cached_results(ri, inspection, file, results, result);
+    }
+
+    append_results(ri, results);
+    free_results(results);
+    return result;
+}
+
 /**
  * @brief Iterate over each file in each package in a build.
  *
@@ -102,7 +133,10 @@ struct inspect inspections[] = {
  * foreach_peer_file_func returns false for any file, the result will
  * be false.  foreach_peer_file_func is run on each file even if an
  * earlier file fails. This allows for multiple errors to be collected
- * for a single inspection.
+ * for a single inspection.  If a cache directory is in use and the
+ * inspection's results can be cached, files seen in an earlier run
+ * get the results recorded then instead of running
+ * foreach_peer_file_func again.
  *
  * @param ri Pointer to the struct rpminspect used for the program.
  * @param inspection Name of currently running inspection.
@@ -126,11 +160,11 @@ bool foreach_peer_file(struct rpminspect *ri, const char *inspection, foreach_pe
 
         TAILQ_FOREACH(file, peer->after_files, items) {
             /* Ignore files we should be ignoring */
-            if (ignore_path(ri, inspection, file->localpath, peer->after_root)) {
+            if (ignore_path(ri, inspection, file->localpath)) {
                 continue;
             }
 
-            if (!check_fn(ri, file)) {
+            if (!check_file(ri, inspection, check_fn, file)) {
                 result = false;
             }
         }
@@ -139,6 +173,118 @@ bool foreach_peer_file(struct rpminspect *ri, const char *inspection, foreach_pe
     return result;
 }
 
+/*
+ * One file handed to a foreach_peer_file_parallel() worker and what
+ * the callback produced for it.
+ */
+struct file_task {
+    rpmfile_entry_t *file;
+    results_t *results;
+    bool result;
+};
+
+struct file_tasks {
+    struct rpminspect *ri;
+    const char *inspection;
+    foreach_peer_file_func check_fn;
+    struct file_task *tasks;
+};
+
+/*
+ * run_parallel() task for foreach_peer_file_parallel().
+ */
+static void file_task(size_t n, void *data)
+{
+    struct file_tasks *ft = data;
+    struct file_task *task = NULL;
+    results_t **captured = NULL;
+
+    assert(ft != NULL);
+    task = &ft->tasks[n];
+
+    captured = capture_results(&task->results);
+    task->result = check_file(ft->ri, ft->inspection, ft->check_fn, task->file);
+    capture_results(captured);
+
+    return;
+}
+
+/**
+ * @brief Iterate over each file in each package in a build using
+ * multiple threads.
+ *
+ * Same as foreach_peer_file(), but the callback is run on up to
+ * ri->jobs files at the same time.  Results added by the callback
+ * for each file are collected separately and added to the program
+ * results in the same order foreach_peer_file() would produce.  Only
+ * use this for inspections whose callback is safe to run from more
+ * than one thread at once: no writes to file-scope state and no
+ * process-wide changes such as chdir().
+ *
+ * @param ri Pointer to the struct rpminspect used for the program.
+ * @param inspection Name of currently running inspection.
+ * @param callback Callback function to iterate over each file.
+ * @return True if the check_fn passed for each file, false otherwise.
+ */
+bool foreach_peer_file_parallel(struct rpminspect *ri, const char *inspection, foreach_peer_file_func check_fn)
+{
+    rpmpeer_entry_t *peer;
+    rpmfile_entry_t *file;
+    bool result = true;
+    size_t n = 0;
+    size_t ntasks = 0;
+    struct file_tasks ft;
+
+    assert(ri != NULL);
+    assert(check_fn != NULL);
+
+    if (ri->jobs <= 1) {
+        return foreach_peer_file(ri, inspection, check_fn);
+    }
+
+    /* collect the files in the order foreach_peer_file() visits them */
+    ft.ri = ri;
+    ft.inspection = inspection;
+    ft.check_fn = check_fn;
+    ft.tasks = NULL;
+
+    TAILQ_FOREACH(peer, ri->peers, items) {
+        /* Disappearing subpackages are caught by INSPECT_EMPTYRPM */
+        if (peer->after_files == NULL || TAILQ_EMPTY(peer->after_files)) {
+            continue;
+        }
+
+        TAILQ_FOREACH(file, peer->after_files, items) {
+            /* Ignore files we should be ignoring */
+            if (ignore_path(ri, inspection, file->localpath)) {
+                continue;
+            }
+
+            ft.tasks = realloc(ft.tasks, (ntasks + 1) * sizeof(*ft.tasks));
+            assert(ft.tasks != NULL);
+            ft.tasks[ntasks].file = file;
+            ft.tasks[ntasks].results = NULL;
+            ft.tasks[ntasks].result = true;
+            ntasks++;
+        }
+    }
+
+    run_parallel(ri->jobs, ntasks, file_task, &ft);
+
+    /* add the results in file order */
+    for (n = 0; n < ntasks; n++) {
+        if (!ft.tasks[n].result) {
+            result = false;
+        }
+
+        append_results(ri, ft.tasks[n].results);
+        free_results(ft.tasks[n].results);
+    }
+
+    free(ft.tasks);
+    return result;
+}
+
 /**
  * @brief Return inspection ID given its name string.
  *
@@ -458,3 +604,69 @@ const char *inspection_header_to_desc(const char *header)
 
     return inspection_desc(i);
 }
+
+/**
+ * @brief Return the classes of payload files the selected inspections
+ * read.
+ *
+ * Combines the file_classes of each inspection that will run for the
+ * specified builds.  Payload files outside of the returned FILE_CLASS_*
+ * bits do not need to be extracted.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @return FILE_CLASS_* bits needed by the selected inspections.
+ */
+unsigned int inspection_file_classes(const struct rpminspect *ri)
+{
+    int i = 0;
+    unsigned int classes = FILE_CLASS_NONE;
+
+    assert(ri != NULL);
+
+    for (i = 0; inspections[i].name != NULL; i++) {
+        if (!(ri->tests & inspections[i].flag)) {
+            continue;
+        }
+
+        if (ri->before == NULL && !inspections[i].single_build) {
+            continue;
+        }
+
+        classes |= inspections[i].file_classes;
+    }
+
+    return classes;
+}
+
+/**
+ * @brief Return the classes of build artifacts the selected
+ * inspections look at.
+ *
+ * Combines the artifact_classes of each inspection that will run for
+ * the specified builds.  Remote packages outside of the returned
+ * ARTIFACT_* bits do not need to be downloaded.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @return ARTIFACT_* bits needed by the selected inspections.
+ */
+unsigned int inspection_artifact_classes(const struct rpminspect *ri)
+{
+    int i = 0;
+    unsigned int classes = ARTIFACT_NONE;
+
+    assert(ri != NULL);
+
+    for (i = 0; inspections[i].name != NULL; i++) {
+        if (!(ri->tests & inspections[i].flag)) {
+            continue;
+        }
+
+        if (ri->before == NULL && !inspections[i].single_build) {
+            continue;
+        }
+
+        classes |= inspections[i].artifact_classes;
+    }
+
+    return classes;
+}
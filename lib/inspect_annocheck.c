@@ -20,6 +20,7 @@
  */
 
 #include <stdio.h>
+#include <stdlib.h>
 #include <string.h>
 #include <errno.h>
 #include <assert.h>
@@ -123,7 +124,7 @@ static bool annocheck_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     arch = get_rpm_header_arch(file->rpm_header);
 
     /* Only run this check on ELF files */
-    if (!is_elf(file->fullpath) || (!is_elf(file->fullpath) && file->peer_file && !is_elf(file->peer_file->fullpath))) {
+    if (!is_elf_file(file) || (!is_elf_file(file) && file->peer_file && !is_elf_file(file->peer_file))) {
         return result;
     }
 
@@ -253,6 +254,64 @@ static bool annocheck_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 /*
  * Main driver for the 'annocheck' inspection.
  */
+/*
+ * Add the debuginfo packages of one build to the cache salt.
+ */
+static char *salt_debuginfo(char *salt, Header h)
+{
+    char *nevra = NULL;
+    const char *sha1 = NULL;
+
+    if (h == NULL || !strsuffix(headerGetString(h, RPMTAG_NAME), DEBUGINFO_SUFFIX)) {
+        return salt;
+    }
+
+    nevra = get_nevra(h);
+    sha1 = headerGetString(h, RPMTAG_SHA1HEADER);
+    salt = strappend(salt, "\n", (nevra == NULL) ? "" : nevra, " ", (sha1 == NULL) ? "" : sha1, NULL);
+    free(nevra);
+
+    return salt;
+}
+
+/*
+ * Cached annocheck results depend on more than the configuration
+ * files: the annocheck program, the debuginfo packages passed with
+ * --debug-dir, and the security rules for the product release that
+ * set the severity of losing -D_FORTIFY_SOURCE.
+ */
+static void set_annocheck_cache_salt(struct rpminspect *ri)
+{
+    char *salt = NULL;
+    char *rules = NULL;
+    char *sum = NULL;
+    rpmpeer_entry_t *peer = NULL;
+
+    assert(ri != NULL);
+
+    salt = get_command_identity(ri->commands.annocheck);
+
+    if (ri->vendor_data_dir != NULL && ri->product_release != NULL) {
+        xasprintf(&rules, "%s/%s/%s", ri->vendor_data_dir, SECURITY_DIR, ri->product_release);
+        assert(rules != NULL);
+        sum = compute_checksum(rules, NULL, SHA256SUM);
+    }
+
+    salt = strappend(salt, "\n", (ri->product_release == NULL) ? "" : ri->product_release, " ", (sum == NULL) ? "" : sum, NULL);
+    free(rules);
+    free(sum);
+
+    TAILQ_FOREACH(peer, ri->peers, items) {
+        salt = salt_debuginfo(salt, peer->before_hdr);
+        salt = salt_debuginfo(salt, peer->after_hdr);
+    }
+
+    set_cache_salt(NAME_ANNOCHECK, salt);
+    free(salt);
+
+    return;
+}
+
 bool inspect_annocheck(struct rpminspect *ri)
 {
     bool result = true;
@@ -265,8 +324,12 @@ bool inspect_annocheck(struct rpminspect *ri)
         return true;
     }
 
+    if (cacheable(ri, NAME_ANNOCHECK)) {
+        set_annocheck_cache_salt(ri);
+    }
+
     /* run the annocheck tests across all ELF files */
-    result = foreach_peer_file(ri, NAME_ANNOCHECK, annocheck_driver);
+    result = foreach_peer_file_parallel(ri, NAME_ANNOCHECK, annocheck_driver);
 
     /* if everything was fine, just say so */
     if (result) {
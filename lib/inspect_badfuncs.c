@@ -54,6 +54,8 @@ static bool badfuncs_driver(struct rpminspect *ri, rpmfile_entry_t *after)
     Elf *after_elf = NULL;
     int after_elf_fd = -1;
     string_list_t *after_symbols = NULL;
+    const string_list_t *imported = NULL;
+    elf_summary_t *summary = NULL;
     string_list_t *used_symbols = NULL;
     string_list_t *sorted_used = NULL;
     string_entry_t *iter = NULL;
@@ -79,10 +81,10 @@ static bool badfuncs_driver(struct rpminspect *ri, rpmfile_entry_t *after)
     arch = get_rpm_header_arch(after->rpm_header);
 
     /* get an ELF object of some sort, if we can */
-    after_elf = get_elf_archive(after->fullpath, &after_elf_fd);
+    after_elf = borrow_elf(after->fullpath, ELF_K_AR, &after_elf_fd);
 
     if (after_elf == NULL) {
-        after_elf = get_elf(after->fullpath, &after_elf_fd);
+        after_elf = borrow_elf(after->fullpath, ELF_K_ELF, &after_elf_fd);
     }
 
     if (after_elf == NULL) {
@@ -93,11 +95,16 @@ static bool badfuncs_driver(struct rpminspect *ri, rpmfile_entry_t *after)
     /* Don't filter the list -- filtering requires knowledge of the
      * forbidden functions. Since we can't pass custom arguments to
      * the filter, return them all and filter them locally. */
-    after_symbols = get_elf_imported_functions(after_elf, NULL);
-    assert(after_symbols != NULL);
+    if ((summary = get_elf_summary(after, after_elf)) != NULL) {
+        imported = summary->imported;
+    } else {
+        after_symbols = get_elf_imported_functions(after_elf, NULL);
+        assert(after_symbols != NULL);
+        imported = after_symbols;
+    }
 
     /* Get a list of forbidden symbols that we used. */
-    used_symbols = list_intersection(ri->bad_functions, after_symbols);
+    used_symbols = list_intersection(ri->bad_functions, imported);
     if (!used_symbols || TAILQ_EMPTY(used_symbols)) {
         goto cleanup;
     }
@@ -144,8 +151,7 @@ cleanup:
     list_free(sorted_used, NULL);
 
     if (after_elf) {
-        elf_end(after_elf);
-        close(after_elf_fd);
+        return_elf(after_elf, after_elf_fd);
     }
 
     return result;
@@ -149,6 +149,23 @@ static bool changedfiles_driver(struct rpminspect *ri, rpmfile_entry_t *file)
         return true;
     }
 
+    /*
+     * Every check below compares file content, so nothing can be
+     * reported for files with the same digest.  For most packages
+     * these come straight from the RPM headers, and files linked to
+     * the same payload object are the same file on disk.
+     */
+    if (file->object != 0 && file->object == file->peer_file->object) {
+        return true;
+    }
+
+    before_sum = checksum(file->peer_file);
+    after_sum = checksum(file);
+
+    if (before_sum && after_sum && !strcmp(before_sum, after_sum)) {
+        return true;
+    }
+
     /*
      * Determine if we are running on a rebased package or just a
      * package update.
@@ -181,11 +198,12 @@ static bool changedfiles_driver(struct rpminspect *ri, rpmfile_entry_t *file)
         }
     }
 
-    /* Get the MIME type of the file, will need that */
+    /* Get the MIME type and compression of the file, will need those */
+    classify_file(file);
     type = get_mime_type(file);
 
     /* ELF content changing is handled by other inspections */
-    if (is_elf(file->fullpath)) {
+    if (is_elf_file(file)) {
         return true;
     }
 
@@ -233,12 +251,9 @@ static bool changedfiles_driver(struct rpminspect *ri, rpmfile_entry_t *file)
      * build could change the compression ratios or other properties
      * but the uncompressed content would be the same.
      */
-    if ((!strcmp(type, "application/x-gzip") || !strcmp(type, "application/gzip") ||
-         !strcmp(type, "application/x-bzip2") || !strcmp(type, "application/bzip2") ||
-         !strcmp(type, "application/x-xz") || !strcmp(type, "application/xz") ||
-         (!strcmp(type, "application/octet-stream") && (strsuffix(file->localpath, ".gz") ||        /* this is a workaround for bad/old versions of libmagic */
-                                                        strsuffix(file->localpath, ".bz2") ||
-                                                        strsuffix(file->localpath, ".xz")))) &&
+    if ((file->compression == COMPRESSION_GZIP ||
+         file->compression == COMPRESSION_BZIP2 ||
+         file->compression == COMPRESSION_XZ) &&
         (params.waiverauth == WAIVABLE_BY_SECURITY || (ri->tests & INSPECT_CHANGEDFILES))) {
         /* uncompress the files to temporary files for comparison */
         before_uncompressed_file = uncompress_file(ri, file->peer_file->fullpath, NAME_CHANGEDFILES);
@@ -388,7 +388,7 @@ static bool check_bin_rpm_changelog(struct rpminspect *ri, const rpmpeer_entry_t
 
     /* Check for bad words */
     TAILQ_FOREACH(entry, after_changelog, items) {
-        if (has_bad_word(entry->data, ri->badwords)) {
+        if (scan_bad_words(entry->data, ri->badwords_matcher)) {
             xasprintf(&params.msg, "%%changelog entry has unprofessional language in the %s build", after_nevr);
             params.severity = RESULT_BAD;
             params.waiverauth = NOT_WAIVABLE;
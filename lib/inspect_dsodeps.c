@@ -36,14 +36,8 @@ static bool dsodeps_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     int before_fd = -1;
     Elf *after_elf = NULL;
     Elf *before_elf = NULL;
-    GElf_Half after_type;
-    GElf_Half before_type;
-    size_t i;
-    GElf_Dyn *dyn = NULL;
-    size_t sz = 0;
-    GElf_Shdr shdr;
-    string_list_t *after_needed = NULL;
-    string_list_t *before_needed = NULL;
+    elf_summary_t *after_summary = NULL;
+    elf_summary_t *before_summary = NULL;
     string_list_t *removed = NULL;
     string_list_t *added = NULL;
     string_entry_t *entry = NULL;
@@ -82,13 +76,13 @@ static bool dsodeps_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     }
 
     /* If we lack dynamic or shared ELF files, we're done */
-    if ((after_elf = get_elf(file->fullpath, &after_fd)) == NULL) {
+    if ((after_elf = borrow_elf(file->fullpath, ELF_K_ELF, &after_fd)) == NULL) {
         return true;
     }
 
-    after_type = get_elf_type(after_elf);
+    after_summary = get_elf_summary(file, after_elf);
 
-    if (after_type != ET_DYN) {
+    if (after_summary->type != ET_DYN) {
         result = false;
         goto done;
     }
@@ -106,7 +100,7 @@ static bool dsodeps_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     params.arch = arch;
     params.file = file->localpath;
 
-    if ((before_elf = get_elf(file->fullpath, &before_fd)) == NULL) {
+    if ((before_elf = borrow_elf(file->peer_file->fullpath, ELF_K_ELF, &before_fd)) == NULL) {
         xasprintf(&params.msg, _("%s was an ELF file and now is not on %s"), file->localpath, arch);
         params.verb = VERB_CHANGED;
         params.noun = _("ELF file ${FILE} on ${ARCH}");
@@ -116,9 +110,9 @@ static bool dsodeps_driver(struct rpminspect *ri, rpmfile_entry_t *file)
         goto done;
     }
 
-    before_type = get_elf_type(before_elf);
+    before_summary = get_elf_summary(file->peer_file, before_elf);
 
-    if (before_type != ET_EXEC && before_type != ET_DYN) {
+    if (before_summary->type != ET_EXEC && before_summary->type != ET_DYN) {
         xasprintf(&params.msg, _("%s was a dynamic ELF file and now is not on %s"), file->localpath, arch);
         params.verb = VERB_CHANGED;
         params.noun = _("ELF file ${FILE} on ${ARCH}");
@@ -128,38 +122,9 @@ static bool dsodeps_driver(struct rpminspect *ri, rpmfile_entry_t *file)
         goto done;
     }
 
-    /* Gather the DT_NEEDED entries */
-    if (get_dynamic_tags(after_elf, DT_NEEDED, &dyn, &sz, &shdr)) {
-        after_needed = calloc(1, sizeof(*after_needed));
-        assert(after_needed != NULL);
-        TAILQ_INIT(after_needed);
-
-        for (i = 0; i < sz; i++) {
-            entry = calloc(1, sizeof(*entry));
-            entry->data = strdup(elf_strptr(after_elf, shdr.sh_link, (size_t) (dyn[i].d_un.d_ptr)));
-            TAILQ_INSERT_TAIL(after_needed, entry, items);
-        }
-
-        free(dyn);
-    }
-
-    if (get_dynamic_tags(before_elf, DT_NEEDED, &dyn, &sz, &shdr)) {
-        before_needed = calloc(1, sizeof(*before_needed));
-        assert(before_needed != NULL);
-        TAILQ_INIT(before_needed);
-
-        for (i = 0; i < sz; i++) {
-            entry = calloc(1, sizeof(*entry));
-            entry->data = strdup(elf_strptr(before_elf, shdr.sh_link, (size_t) (dyn[i].d_un.d_ptr)));
-            TAILQ_INSERT_TAIL(before_needed, entry, items);
-        }
-
-        free(dyn);
-    }
-
     /* Figure out what symbol changes happened*/
-    removed = list_difference(before_needed, after_needed);
-    added = list_difference(after_needed, before_needed);
+    removed = list_difference(before_summary->needed, after_summary->needed);
+    added = list_difference(after_summary->needed, before_summary->needed);
 
     /* Report out any findings */
     if (removed != NULL && !TAILQ_EMPTY(removed)) {
@@ -198,19 +163,15 @@ static bool dsodeps_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 
 done:
     if (after_elf && after_fd != -1) {
-        elf_end(after_elf);
-        close(after_fd);
+        return_elf(after_elf, after_fd);
     }
 
     if (before_elf && before_fd != -1) {
-        elf_end(before_elf);
-        close(before_fd);
+        return_elf(before_elf, before_fd);
     }
 
     free(removed);
     free(added);
-    list_free(before_needed, free);
-    list_free(after_needed, free);
 
     return result;
 }
@@ -137,6 +137,24 @@ bool has_executable_program(Elf *elf)
     return false;
 }
 
+/*
+ * is_execstack_valid() given the ELF type rather than the object.
+ */
+static bool execstack_valid(GElf_Half type, uint64_t flags)
+{
+    switch (type) {
+        case ET_REL:
+            /* Mask out SHF_EXECINSTR, check that nothing else is set */
+            return !(flags & ~(SHF_EXECINSTR));
+        case ET_EXEC:
+        case ET_DYN:
+            /* PF_W and PF_R must be set, nothing besides those two and PF_X should be set */
+            return ((flags & (PF_W | PF_R)) && !(flags & ~(PF_W | PF_R | PF_X)));
+        default:
+            return false;
+    }
+}
+
 /**
  * @brief Check whether the given object's execstack information makes
  * sense.
@@ -151,14 +169,20 @@ bool has_executable_program(Elf *elf)
  */
 bool is_execstack_valid(Elf *elf, uint64_t flags)
 {
-    switch (get_elf_type(elf)) {
+    return execstack_valid(get_elf_type(elf), flags);
+}
+
+/*
+ * is_stack_executable() given the ELF type rather than the object.
+ */
+static bool stack_executable(GElf_Half type, uint64_t flags)
+{
+    switch (type) {
         case ET_REL:
-            /* Mask out SHF_EXECINSTR, check that nothing else is set */
-            return !(flags & ~(SHF_EXECINSTR));
+            return flags & SHF_EXECINSTR;
         case ET_EXEC:
         case ET_DYN:
-            /* PF_W and PF_R must be set, nothing besides those two and PF_X should be set */
-            return ((flags & (PF_W | PF_R)) && !(flags & ~(PF_W | PF_R | PF_X)));
+            return flags & PF_X;
         default:
             return false;
     }
@@ -174,15 +198,7 @@ bool is_execstack_valid(Elf *elf, uint64_t flags)
  */
 bool is_stack_executable(Elf *elf, uint64_t flags)
 {
-    switch (get_elf_type(elf)) {
-        case ET_REL:
-            return flags & SHF_EXECINSTR;
-        case ET_EXEC:
-        case ET_DYN:
-            return flags & PF_X;
-        default:
-            return false;
-    }
+    return stack_executable(get_elf_type(elf), flags);
 }
 
 /**
@@ -353,8 +369,8 @@ bool is_pic_ok(Elf *elf)
 
 static const char *pflags_to_str(uint64_t flags)
 {
-    /* enough space for RWX?\0 */
-    static char output[5];
+    /* enough space for RWX?\0, one per thread checking files */
+    static __thread char output[5];
     char *current = output;
 
     memset(output, 0, sizeof(output));
@@ -400,7 +416,7 @@ static void add_execstack_flag_str(string_list_t *list, const char *s)
     return;
 }
 
-static bool inspect_elf_execstack(struct rpminspect *ri, Elf *after_elf, Elf *before_elf, rpmfile_entry_t *file, const char *arch)
+static bool inspect_elf_execstack(struct rpminspect *ri, const elf_summary_t *after, const elf_summary_t *before, rpmfile_entry_t *file, const char *arch)
 {
     Elf64_Half elf_type;
     uint64_t execstack_flags;
@@ -411,15 +427,15 @@ static bool inspect_elf_execstack(struct rpminspect *ri, Elf *after_elf, Elf *be
     struct result_params params;
 
     /* If there is no executable code, there is no executable stack */
-    if (!has_executable_program(after_elf)) {
+    if (!after->executable) {
         return true;
     }
 
-    elf_type = get_elf_type(after_elf);
+    elf_type = after->type;
 
     /* If the peer file had an executable stack, turn down the result severity */
-    if (before_elf) {
-        before_execstack = is_stack_executable(before_elf, get_execstack_flags(before_elf));
+    if (before) {
+        before_execstack = stack_executable(before->type, before->execstack_flags);
     }
 
     /* Set up result parameters */
@@ -430,7 +446,7 @@ static bool inspect_elf_execstack(struct rpminspect *ri, Elf *after_elf, Elf *be
     params.file = file->localpath;
 
     /* Check if execstack information is present */
-    if (!is_execstack_present(after_elf)) {
+    if (!after->execstack) {
         params.severity = get_secrule_result_severity(ri, file, SECRULE_EXECSTACK);
 
         if (elf_type == ET_REL) {
@@ -456,9 +472,9 @@ static bool inspect_elf_execstack(struct rpminspect *ri, Elf *after_elf, Elf *be
     }
 
     /* Check that the execstack flags make sense */
-    execstack_flags = get_execstack_flags(after_elf);
+    execstack_flags = after->execstack_flags;
 
-    if (!is_execstack_valid(after_elf, execstack_flags)) {
+    if (!execstack_valid(elf_type, execstack_flags)) {
         if (elf_type == ET_REL) {
             flaglist = calloc(1, sizeof(*flaglist));
             assert(flaglist != NULL);
@@ -519,7 +535,7 @@ static bool inspect_elf_execstack(struct rpminspect *ri, Elf *after_elf, Elf *be
     }
 
     /* Check that the stack is not marked as executable */
-    if (is_stack_executable(after_elf, execstack_flags)) {
+    if (stack_executable(elf_type, execstack_flags)) {
         params.severity = get_secrule_result_severity(ri, file, SECRULE_EXECSTACK);
 
         if (elf_type == ET_REL) {
@@ -550,13 +566,13 @@ static bool inspect_elf_execstack(struct rpminspect *ri, Elf *after_elf, Elf *be
     return result;
 }
 
-static bool check_relro(struct rpminspect *ri, Elf *before_elf, Elf *after_elf, const rpmfile_entry_t *file, const char *arch)
+static bool check_relro(struct rpminspect *ri, const elf_summary_t *before, const elf_summary_t *after, rpmfile_entry_t *file, const char *arch)
 {
     bool r = true;
-    bool before_relro = has_relro(before_elf);
-    bool before_bind_now = has_bind_now(before_elf);
-    bool after_relro = has_relro(after_elf);
-    bool after_bind_now = has_bind_now(after_elf);
+    bool before_relro = before->relro;
+    bool before_bind_now = before->bind_now;
+    bool after_relro = after->relro;
+    bool after_bind_now = after->bind_now;
     struct result_params params;
 
     init_result_params(&params);
@@ -707,7 +723,7 @@ bool find_all(Elf *elf, string_list_t **all_list)
     return true;
 }
 
-static bool elf_archive_tests(struct rpminspect *ri, Elf *after_elf, int after_elf_fd, Elf *before_elf, int before_elf_fd, const rpmfile_entry_t *file, const char *arch, const char *name)
+static bool elf_archive_tests(struct rpminspect *ri, Elf *after_elf, int after_elf_fd, Elf *before_elf, int before_elf_fd, rpmfile_entry_t *file, const char *arch, const char *name)
 {
     string_list_t *after_no_pic = NULL;
     string_list_t *before_pic = NULL;
@@ -820,7 +836,7 @@ static bool elf_archive_tests(struct rpminspect *ri, Elf *after_elf, int after_e
     return result;
 }
 
-static bool elf_regular_tests(struct rpminspect *ri, Elf *after_elf, Elf *before_elf, rpmfile_entry_t *file, const char *arch, const char *name)
+static bool elf_regular_tests(struct rpminspect *ri, const elf_summary_t *after, const elf_summary_t *before, rpmfile_entry_t *file, const char *arch, const char *name)
 {
     bool result = true;
     struct result_params params;
@@ -835,21 +851,21 @@ static bool elf_regular_tests(struct rpminspect *ri, Elf *after_elf, Elf *before
     params.noun = _("TEXTREL relocations in ${FILE} on ${ARCH}");
 
     /* skip kernel eBPF machine type objects */
-    if (get_elf_machine(after_elf) == EM_BPF) {
+    if (after->machine == EM_BPF) {
         DEBUG_PRINT("eBPF object encountered (%s), skipping\n", file->localpath);
         return true;
     }
 
-    if (!inspect_elf_execstack(ri, after_elf, before_elf, file, arch)) {
+    if (!inspect_elf_execstack(ri, after, before, file, arch)) {
         result = false;
     }
 
-    if (has_textrel(after_elf)) {
+    if (after->textrel) {
         /* Only complain for baseline (no before), or for gaining TEXTREL between before and after. */
-        if (before_elf && !has_textrel(before_elf)) {
+        if (before && !before->textrel) {
             xasprintf(&params.msg, _("%s in %s acquired TEXTREL relocations on %s"), file->localpath, name, arch);
             params.verb = VERB_ADDED;
-        } else if (!before_elf) {
+        } else if (!before) {
             xasprintf(&params.msg, _("%s in %s has TEXTREL relocations on %s"), file->localpath, name, arch);
             params.verb = VERB_FAILED;
         }
@@ -862,9 +878,9 @@ static bool elf_regular_tests(struct rpminspect *ri, Elf *after_elf, Elf *before
         free(params.msg);
     }
 
-    if (before_elf) {
+    if (before) {
         /* Check if we lost GNU_RELRO */
-        if (!check_relro(ri, before_elf, after_elf, file, arch)) {
+        if (!check_relro(ri, before, after, file, arch)) {
             result = false;
         }
     }
@@ -880,6 +896,7 @@ static bool elf_driver(struct rpminspect *ri, rpmfile_entry_t *after)
     Elf *before_elf = NULL;
     int after_elf_fd = -1;
     int before_elf_fd = -1;
+    elf_summary_t *before_summary = NULL;
     bool result = true;
 
     /* Skip source packages */
@@ -899,28 +916,30 @@ static bool elf_driver(struct rpminspect *ri, rpmfile_entry_t *after)
     name = headerGetString(after->rpm_header, RPMTAG_NAME);
 
     /* Is this an archive or a regular ELF file? */
-    if ((after_elf = get_elf_archive(after->fullpath, &after_elf_fd)) != NULL) {
+    if ((after_elf = borrow_elf(after->fullpath, ELF_K_AR, &after_elf_fd)) != NULL) {
         if (after->peer_file != NULL) {
-            before_elf = get_elf_archive(after->peer_file->fullpath, &before_elf_fd);
+            before_elf = borrow_elf(after->peer_file->fullpath, ELF_K_AR, &before_elf_fd);
         }
 
         result = elf_archive_tests(ri, after_elf, after_elf_fd, before_elf, before_elf_fd, after, arch, name);
-    } else if ((after_elf = get_elf(after->fullpath, &after_elf_fd)) != NULL) {
+    } else if ((after_elf = borrow_elf(after->fullpath, ELF_K_ELF, &after_elf_fd)) != NULL) {
         if (after->peer_file != NULL) {
-            before_elf = get_elf(after->peer_file->fullpath, &before_elf_fd);
+            before_elf = borrow_elf(after->peer_file->fullpath, ELF_K_ELF, &before_elf_fd);
+        }
+
+        if (before_elf) {
+            before_summary = get_elf_summary(after->peer_file, before_elf);
         }
 
-        result = elf_regular_tests(ri, after_elf, before_elf, after, arch, name);
+        result = elf_regular_tests(ri, get_elf_summary(after, after_elf), before_summary, after, arch, name);
     }
 
     if (after_elf) {
-        elf_end(after_elf);
-        close(after_elf_fd);
+        return_elf(after_elf, after_elf_fd);
     }
 
     if (before_elf) {
-        elf_end(before_elf);
-        close(before_elf_fd);
+        return_elf(before_elf, before_elf_fd);
     }
 
     return result;
@@ -946,7 +965,7 @@ bool inspect_elf(struct rpminspect *ri)
 
     init_elf_data(ri);
     rip = ri;
-    result = foreach_peer_file(ri, NAME_ELF, elf_driver);
+    result = foreach_peer_file_parallel(ri, NAME_ELF, elf_driver);
 
     if (result) {
         init_result_params(&params);
@@ -176,7 +176,7 @@ static bool kmidiff_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     }
 
     /* skip anything that is not an ELF file */
-    if (!S_ISREG(file->st.st_mode) || !is_elf(file->fullpath)) {
+    if (!S_ISREG(file->st.st_mode) || !is_elf_file(file)) {
         return true;
     }
 
@@ -346,7 +346,7 @@ bool inspect_kmidiff(struct rpminspect *ri)
 
         TAILQ_FOREACH(file, peer->after_files, items) {
             /* Ignore files we should be ignoring */
-            if (ignore_path(ri, NAME_KMIDIFF, file->localpath, peer->after_root)) {
+            if (ignore_path(ri, NAME_KMIDIFF, file->localpath)) {
                 continue;
             }
 
@@ -271,7 +271,6 @@ static bool is_valid_license(struct rpminspect *ri, struct result_params *params
     char *tagcopy = NULL;
     char *token = NULL;
     results_t *rq = NULL;
-    results_entry_t *entry = NULL;
 
     assert(ri != NULL);
     assert(params != NULL);
@@ -340,24 +339,9 @@ static bool is_valid_license(struct rpminspect *ri, struct result_params *params
         free_results(rq);
         return true;
     } else {
-        if (ri->results == NULL) {
-            ri->results = init_results();
-        }
-
-        if (rq && !TAILQ_EMPTY(rq)) {
-            /*
-             * make sure to set the worst result based on queued
-             * license inspection failures.
-             */
-            TAILQ_FOREACH(entry, rq, items) {
-                if (entry->severity > ri->worst_result) {
-                    ri->worst_result = entry->severity;
-                }
-            }
-
-            /* append the queued license inspection failures */
-            TAILQ_CONCAT(ri->results, rq, items);
-        }
+        /* append the queued license inspection failures */
+        append_results(ri, rq);
+        free_results(rq);
 
         return false;
     }
@@ -412,7 +396,7 @@ static int check_peer_license(struct rpminspect *ri, struct result_params *param
         }
 
         /* does the license tag contain bad words? */
-        if (has_bad_word(license, ri->badwords)) {
+        if (scan_bad_words(license, ri->badwords_matcher)) {
             xasprintf(&params->msg, _("License Tag contains unprofessional language in %s: %s"), nevra, license);
             params->severity = RESULT_BAD;
             params->remedy = REMEDY_LICENSE;
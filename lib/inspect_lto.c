@@ -123,6 +123,7 @@ static bool lto_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     Elf *elf = NULL;
     int fd = -1;
     string_list_t *names = NULL;
+    elf_summary_t *summary = NULL;
     string_entry_t *entry = NULL;
     string_entry_t *prefix = NULL;
     const char *arch = NULL;
@@ -135,7 +136,7 @@ static bool lto_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     }
 
     /* Only valid for ELF files */
-    if (!is_elf(file->fullpath) && !strsuffix(file->localpath, STATIC_LIB_FILENAME_EXTENSION)) {
+    if (!is_elf_file(file) && !strsuffix(file->localpath, STATIC_LIB_FILENAME_EXTENSION)) {
         return true;
     }
 
@@ -153,7 +154,7 @@ static bool lto_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     params.file = file->localpath;
     params.noun = _("${FILE} not portable on ${ARCH}");
 
-    if ((elf = get_elf_archive(file->fullpath, &fd)) != NULL) {
+    if ((elf = borrow_elf(file->fullpath, ELF_K_AR, &fd)) != NULL) {
         /* we found an ELF static library */
         elf_archive_iterate(fd, elf, find_lto_symbols, &names);
 
@@ -166,7 +167,7 @@ static bool lto_driver(struct rpminspect *ri, rpmfile_entry_t *file)
             free(badsyms);
             result = false;
         }
-    } else if (((elf = get_elf(file->fullpath, &fd)) != NULL) && (get_elf_type(elf) == ET_REL)) {
+    } else if (((elf = borrow_elf(file->fullpath, ELF_K_ELF, &fd)) != NULL) && ((summary = get_elf_summary(file, elf))->type == ET_REL)) {
         /* we found an ELF relocatable */
         names = get_elf_section_names(elf, SHT_SYMTAB);
 
@@ -187,8 +188,7 @@ static bool lto_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     }
 
     if (elf) {
-        elf_end(elf);
-        close(fd);
+        return_elf(elf, fd);
     }
 
     list_free(names, free);
@@ -104,7 +104,7 @@ static bool valid_peers(struct rpminspect *ri, const Header before_hdr, const He
     }
 
     after_summary = headerGetString(after_hdr, RPMTAG_SUMMARY);
-    if (after_summary && has_bad_word(after_summary, ri->badwords)) {
+    if (after_summary && scan_bad_words(after_summary, ri->badwords_matcher)) {
         xasprintf(&params.msg, _("Package Summary contains unprofessional language in %s"), after_nevra);
         xasprintf(&params.details, _("Summary: %s"), after_summary);
         params.severity = RESULT_BAD;
@@ -121,7 +121,7 @@ static bool valid_peers(struct rpminspect *ri, const Header before_hdr, const He
     }
 
     after_description = headerGetString(after_hdr, RPMTAG_DESCRIPTION);
-    if (after_description && has_bad_word(after_description, ri->badwords)) {
+    if (after_description && scan_bad_words(after_description, ri->badwords_matcher)) {
         xasprintf(&params.msg, _("Package Description contains unprofessional language in %s:"), after_nevra);
         xasprintf(&params.details, "%s", after_description);
         params.severity = RESULT_BAD;
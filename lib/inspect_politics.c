@@ -23,16 +23,60 @@
 #include <assert.h>
 #include <fnmatch.h>
 #include <err.h>
-#include <openssl/md5.h>
-#include <openssl/sha.h>
 #include "rpminspect.h"
 
+/*
+ * Sort politics entries in line order.
+ */
+static int politics_order_cmp(const void *a, const void *b)
+{
+    const politics_entry_t *x = *(politics_entry_t * const *) a;
+    const politics_entry_t *y = *(politics_entry_t * const *) b;
+
+    if (x->order < y->order) {
+        return -1;
+    } else if (x->order > y->order) {
+        return 1;
+    }
+
+    return 0;
+}
+
+/*
+ * Add the entries from an index table entry that match the file to
+ * the candidates array.
+ */
+static void add_candidates(const politics_index_t *ientry, const char *localpath, const int flags, politics_entry_t ***candidates, size_t *ncandidates)
+{
+    size_t i = 0;
+
+    if (ientry == NULL) {
+        return;
+    }
+
+    *candidates = realloc(*candidates, (*ncandidates + ientry->count) * sizeof(**candidates));
+    assert(*candidates != NULL);
+
+    for (i = 0; i < ientry->count; i++) {
+        if (flags == -1 || !fnmatch(ientry->entries[i]->pattern, localpath, flags)) {
+            (*candidates)[(*ncandidates)++] = ientry->entries[i];
+        }
+    }
+
+    return;
+}
+
 static bool politics_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 {
     bool result = true;
-    politics_entry_t *pentry = NULL;
-    int type = 0;
-    char *digest = NULL;
+    politics_entry_t **candidates = NULL;
+    politics_index_t *ientry = NULL;
+    size_t ncandidates = 0;
+    enum checksum *types = NULL;
+    size_t ntypes = 0;
+    size_t i = 0;
+    const char *p = NULL;
+    const char *digest = NULL;
     bool matched = false;
     bool allowed = false;
     int flags = FNM_NOESCAPE | FNM_PERIOD;
@@ -56,76 +100,56 @@ static bool politics_driver(struct rpminspect *ri, rpmfile_entry_t *file)
         return true;
     }
 
-    /* first pass handles the wildcard entries and sees if we have a match */
-    TAILQ_FOREACH(pentry, ri->politics, items) {
-        /* malformatted lines */
-        if (pentry->pattern == NULL || pentry->digest == NULL) {
-            warnx(_("invalid politics entry with pattern=%s and digest=%s"), pentry->pattern, pentry->digest);
-            continue;
-        }
+    /* entries for this exact path always match */
+    HASH_FIND_STR(ri->politics_paths, file->localpath, ientry);
+    add_candidates(ientry, file->localpath, -1, &candidates, &ncandidates);
 
-        /* if we are not looking at a wildcard line, skip */
-        if (strcmp(pentry->digest, "*")) {
-            continue;
-        }
+    /* wildcard entries starting in one of the directories of the path */
+    HASH_FIND(hh, ri->politics_globs, file->localpath, 0, ientry);
+    add_candidates(ientry, file->localpath, flags, &candidates, &ncandidates);
+
+    for (p = strchr(file->localpath, '/'); p != NULL; p = strchr(p + 1, '/')) {
+        HASH_FIND(hh, ri->politics_globs, file->localpath, (size_t) (p - file->localpath) + 1, ientry);
+        add_candidates(ientry, file->localpath, flags, &candidates, &ncandidates);
+    }
 
-        /* the last entry in the file will take effect here */
-        if (!fnmatch(pentry->pattern, file->localpath, flags)) {
+    /* the last entry in the file will take effect */
+    qsort(candidates, ncandidates, sizeof(*candidates), politics_order_cmp);
+
+    /* first pass handles the wildcard entries and sees if we have a match */
+    for (i = 0; i < ncandidates; i++) {
+        if (candidates[i]->type == NULLSUM) {
             matched = true;
-            allowed = pentry->allowed;
+            allowed = candidates[i]->allowed;
+        } else {
+            types = realloc(types, (ntypes + 1) * sizeof(*types));
+            assert(types != NULL);
+            types[ntypes++] = candidates[i]->type;
         }
     }
 
-    /* look for entries */
-    TAILQ_FOREACH(pentry, ri->politics, items) {
-        /* malformatted lines */
-        if (pentry->pattern == NULL || pentry->digest == NULL) {
-            warnx(_("invalid politics entry with pattern=%s and digest=%s"), pentry->pattern, pentry->digest);
-            continue;
-        }
+    /* compute every digest type needed in one pass over the file */
+    if (ntypes > 0) {
+        get_checksums(file, types, ntypes);
+    }
 
-        /* if we are looking at a wildcard line, skip */
-        if (!strcmp(pentry->digest, "*")) {
+    /* then the digest entries */
+    for (i = 0; i < ncandidates; i++) {
+        if (candidates[i]->type == NULLSUM) {
             continue;
         }
 
-        /* the last entry in the file will take effect here */
-        if (!fnmatch(pentry->pattern, file->localpath, flags)) {
-            /* get the type of digest string */
-            if (strlen(pentry->digest) == (MD5_DIGEST_LENGTH * 2)) {
-                type = MD5SUM;
-            } else if (strlen(pentry->digest) == (SHA_DIGEST_LENGTH * 2)) {
-                type = SHA1SUM;
-            } else if (strlen(pentry->digest) == (SHA224_DIGEST_LENGTH * 2)) {
-                type = SHA224SUM;
-            } else if (strlen(pentry->digest) == (SHA256_DIGEST_LENGTH * 2)) {
-                type = SHA256SUM;
-            } else if (strlen(pentry->digest) == (SHA384_DIGEST_LENGTH * 2)) {
-                type = SHA384SUM;
-            } else if (strlen(pentry->digest) == (SHA512_DIGEST_LENGTH * 2)) {
-                type = SHA512SUM;
-            } else {
-                warnx(_("unknown digest type for pattern %s: %s"), pentry->pattern, pentry->digest);
-                continue;
-            }
-
-            /* get the digest */
-            if (type == DEFAULT_MESSAGE_DIGEST && !strcmp(pentry->digest, checksum(file))) {
-                matched = true;
-                allowed = pentry->allowed;
-            } else {
-                digest = compute_checksum(file->fullpath, &file->st.st_mode, type);
-
-                if (!strcmp(pentry->digest, digest)) {
-                    matched = true;
-                    allowed = pentry->allowed;
-                }
-
-                free(digest);
-            }
+        digest = get_checksum(file, candidates[i]->type);
+
+        if (digest != NULL && !strcmp(candidates[i]->digest, digest)) {
+            matched = true;
+            allowed = candidates[i]->allowed;
         }
     }
 
+    free(candidates);
+    free(types);
+
     /* report */
     if (matched) {
         /* use the package name for reporting */
@@ -173,7 +197,7 @@ bool inspect_politics(struct rpminspect *ri)
 
     /* run the politics check on each file */
     if (init_politics(ri)) {
-        result = foreach_peer_file(ri, NAME_POLITICS, politics_driver);
+        result = foreach_peer_file_parallel(ri, NAME_POLITICS, politics_driver);
     }
 
     /* hope the result is always this */
@@ -29,35 +29,6 @@
 
 #include "rpminspect.h"
 
-static string_list_t *get_tag_list(Elf *elf, const Elf64_Sxword tag)
-{
-    GElf_Dyn *dyn = NULL;
-    size_t sz = 0;
-    GElf_Shdr shdr;
-    size_t i = 0;
-    string_list_t *result = NULL;
-    string_entry_t *entry = NULL;
-
-    assert(elf != NULL);
-
-    if (get_dynamic_tags(elf, tag, &dyn, &sz, &shdr)) {
-        result = calloc(1, sizeof(*result));
-        assert(result != NULL);
-        TAILQ_INIT(result);
-
-        for (i = 0; i < sz; i++) {
-            entry = calloc(1, sizeof(*entry));
-            assert(entry != NULL);
-            entry->data = strdup(elf_strptr(elf, shdr.sh_link, (size_t) (dyn[i].d_un.d_ptr)));
-            TAILQ_INSERT_TAIL(result, entry, items);
-        }
-
-        free(dyn);
-    }
-
-    return result;
-}
-
 /*
  * Given a working path, check to see if any packages in our build own
  * that path.  True if we find it, false otherwise.
@@ -231,9 +202,9 @@ static bool runpath_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     bool result = true;
     int fd = -1;
     Elf *elf = NULL;
-    GElf_Half type;
-    string_list_t *rpath = NULL;
-    string_list_t *runpath = NULL;
+    elf_summary_t *summary = NULL;
+    const string_list_t *rpath = NULL;
+    const string_list_t *runpath = NULL;
     const char *arch = NULL;
     struct result_params params;
 
@@ -256,21 +227,21 @@ static bool runpath_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     }
 
     /* If we lack dynamic or shared ELF files, we're done */
-    if ((elf = get_elf(file->fullpath, &fd)) == NULL) {
+    if ((elf = borrow_elf(file->fullpath, ELF_K_ELF, &fd)) == NULL) {
         result = true;
         goto cleanup;
     }
 
-    type = get_elf_type(elf);
+    summary = get_elf_summary(file, elf);
 
-    if (type != ET_EXEC && type != ET_DYN) {
+    if (summary->type != ET_EXEC && summary->type != ET_DYN) {
         result = false;
         goto cleanup;
     }
 
     /* Gather any DT_RPATH and DT_RUNPATH entries */
-    rpath = get_tag_list(elf, DT_RPATH);
-    runpath = get_tag_list(elf, DT_RUNPATH);
+    rpath = summary->rpath;
+    runpath = summary->runpath;
 
     /* No entries to check, just return successfully */
     if ((rpath == NULL || TAILQ_EMPTY(rpath)) && (runpath == NULL || TAILQ_EMPTY(runpath))) {
@@ -311,13 +282,9 @@ static bool runpath_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 
 cleanup:
     if (elf && fd != -1) {
-        elf_end(elf);
-        close(fd);
+        return_elf(elf, fd);
     }
 
-    list_free(rpath, free);
-    list_free(runpath, free);
-
     return result;
 }
 
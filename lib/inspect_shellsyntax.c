@@ -20,6 +20,7 @@
  */
 
 #include <stdio.h>
+#include <stdlib.h>
 #include <string.h>
 #include <errno.h>
 #include <err.h>
@@ -258,11 +259,26 @@ static bool shellsyntax_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 bool inspect_shellsyntax(struct rpminspect *ri)
 {
     bool result;
+    char *salt = NULL;
+    char *identity = NULL;
+    string_entry_t *entry = NULL;
     struct result_params params;
 
     assert(ri != NULL);
 
-    result = foreach_peer_file(ri, NAME_SHELLSYNTAX, shellsyntax_driver);
+    /* cached results are only good for the same shells */
+    if (cacheable(ri, NAME_SHELLSYNTAX) && ri->shells != NULL) {
+        TAILQ_FOREACH(entry, ri->shells, items) {
+            identity = get_command_identity(entry->data);
+            salt = strappend(salt, identity, "\n", NULL);
+            free(identity);
+        }
+
+        set_cache_salt(NAME_SHELLSYNTAX, (salt == NULL) ? "" : salt);
+        free(salt);
+    }
+
+    result = foreach_peer_file_parallel(ri, NAME_SHELLSYNTAX, shellsyntax_driver);
 
     if (result) {
         init_result_params(&params);
@@ -21,18 +21,19 @@
 
 #include <stdlib.h>
 #include <assert.h>
+#include <fcntl.h>
 #include <libgen.h>
 #include <errno.h>
 #include <err.h>
 #include <ftw.h>
 #include <sys/types.h>
+#include <sys/stat.h>
+#include <sys/mman.h>
 #include <sys/wait.h>
 #include <unistd.h>
 #include <rpm/rpmspec.h>
 #include <rpm/rpmbuild.h>
 #include <rpm/rpmlog.h>
-#include <unicode/ustdio.h>
-#include <unicode/ustring.h>
 #include "rpminspect.h"
 
 /* subdirectories to create or link for the rpmbuild structure */
@@ -44,16 +45,27 @@ static char *subdirs[] = { RPMBUILD_BUILDDIR,
                            RPMBUILD_SRPMDIR,
                            NULL };
 
+/* a file in the prepared source tree and what checking it produced */
+struct unicode_task {
+    char *path;
+    results_t *results;
+    bool result;
+};
+
 /* has the SRPM been checked? */
 static bool seen = false;
 
-/* these globals are used by the nftw() helper */
+/* these globals are used by the file checking helpers */
 static char *build = NULL;
 static struct rpminspect *globalri = NULL;
 static bool globalresult = true;
-static UChar32_list_t *forbidden = NULL;
+static codepoints_t *codepoints = NULL;
 static const char *globalarch = NULL;
 
+/* files collected by the nftw() helper */
+static struct unicode_task *tasks = NULL;
+static size_t ntasks = 0;
+
 /*
  * Helper function to create a ~/rpmbuild tree in the working directory.
  */
@@ -358,57 +370,45 @@ static char *manual_prep_source(struct rpminspect *ri, const rpmfile_entry_t *fi
 }
 
 /*
- * Returns true if the UChar is what we consider a line ending.
- *
- * This function contains code adapted from this blog post about
- * Unicode with the ICU library:
- *
- * https://begriffs.com/posts/2019-05-23-unicode-icu.html
+ * scan_codepoints() callback to report a forbidden code point.
  */
-static bool end_of_line(const UChar c)
+static void report_codepoint(__attribute__((unused)) const UChar32 c, const long int linenum, const long int colnum, void *cbdata)
 {
-    if ((c >= 0xA && c <= 0xD) || c == 0x85 || c == 0x2028 || c == 0x2029) {
-        return true;
-    }
+    struct result_params *params = cbdata;
+
+    assert(params != NULL);
+
+    xasprintf(&params->msg, _("A forbidden code point was found in the %s source file on line %ld at column %ld."), params->file, linenum, colnum);
+    add_result(globalri, params);
+    free(params->msg);
+    params->msg = NULL;
 
-    return false;
+    return;
 }
 
 /*
- * nftw() helper used to validate each source file.
- *
- * This function contains code adapted from this blog post about
- * Unicode with the ICU library:
- *
- * https://begriffs.com/posts/2019-05-23-unicode-icu.html
+ * Check a single source file for forbidden code points.  Called for
+ * the files in the SRPM and for each file in the prepared source
+ * tree, possibly from more than one thread at once.  Returns false
+ * if a forbidden code point was found.
  */
-static int validate_file(const char *fpath, __attribute__((unused)) const struct stat *sb, int tflag, __attribute__((unused)) struct FTW *ftwbuf)
+static bool validate_file(const char *fpath)
 {
+    int fd = -1;
+    struct stat sb;
+    void *data = NULL;
+    bool result = true;
     char *type = NULL;
     const char *localpath = fpath;
     string_entry_t *sentry = NULL;
-    UFILE *src = NULL;
-    UChar c;
-    UChar *line = NULL;
-    UChar *line_new = NULL;
-    size_t i = 0;
-    size_t sz = BUFSIZ;
-    UChar *needle = NULL;
-    long int linenum = 0;
-    long int colnum = 0;
-    UChar32_entry_t *uentry = NULL;
     struct result_params params;
 
     assert(globalri != NULL);
-
-    /* Only looking at regular files */
-    if (tflag == FTW_D || tflag == FTW_DNR || tflag == FTW_DP || tflag == FTW_NS) {
-        return 0;
-    }
+    assert(fpath != NULL);
 
     /* check for exclusion by regular expression */
     if ((globalri->unicode_exclude != NULL) && (regexec(globalri->unicode_exclude, fpath, 0, NULL, 0) == 0)) {
-        return 0;
+        return true;
     }
 
     type = mime_type(fpath);
@@ -418,7 +418,7 @@ static int validate_file(const char *fpath, __attribute__((unused)) const struct
         TAILQ_FOREACH(sentry, globalri->unicode_excluded_mime_types, items) {
             if (!strcmp(type, sentry->data)) {
                 free(type);
-                return 0;
+                return true;
             }
         }
     }
@@ -426,7 +426,7 @@ static int validate_file(const char *fpath, __attribute__((unused)) const struct
     /* ignore any non-text files */
     if (!strprefix(type, "text/")) {
         free(type);
-        return 0;
+        return true;
     }
 
     free(type);
@@ -447,14 +447,44 @@ static int validate_file(const char *fpath, __attribute__((unused)) const struct
 
         if (localpath == NULL) {
             warnx(_("empty localpath on %s"), fpath);
-            return 0;
+            return true;
         }
     }
 
-    if (ignore_path(globalri, NAME_UNICODE, localpath, build)) {
-        return 0;
+    if (ignore_path(globalri, NAME_UNICODE, localpath)) {
+        return true;
+    }
+
+    /* map the file, it is read once from start to end */
+    if ((fd = open(fpath, O_RDONLY)) == -1) {
+        warn("open");
+        return true;
     }
 
+    if (fstat(fd, &sb) == -1) {
+        warn("fstat");
+        close(fd);
+        return true;
+    }
+
+    if (sb.st_size == 0) {
+        close(fd);
+        return true;
+    }
+
+    data = mmap(NULL, sb.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+
+    if (close(fd) == -1) {
+        warn("close");
+    }
+
+    if (data == MAP_FAILED) {
+        warn("mmap");
+        return true;
+    }
+
+    (void) madvise(data, sb.st_size, MADV_SEQUENTIAL);
+
     /* initialize reporting results */
     init_result_params(&params);
     params.severity = RESULT_BAD;
@@ -466,70 +496,89 @@ static int validate_file(const char *fpath, __attribute__((unused)) const struct
     params.verb = VERB_FAILED;
     params.remedy = REMEDY_UNICODE;
 
-    /* Read in the file as Unicode data */
-    src = u_fopen(fpath, "r", NULL, NULL);
+    /* check each line for any prohibited code points */
+    result = scan_codepoints(codepoints, data, sb.st_size, report_codepoint, &params);
 
-    if (src == NULL) {
-        warn("u_fopen");
+    if (munmap(data, sb.st_size) == -1) {
+        warn("munmap");
+    }
+
+    return result;
+}
+
+/*
+ * nftw() helper to collect each file in the prepared source tree.
+ */
+static int collect_file(const char *fpath, __attribute__((unused)) const struct stat *sb, int tflag, __attribute__((unused)) struct FTW *ftwbuf)
+{
+    /* Only looking at regular files */
+    if (tflag == FTW_D || tflag == FTW_DNR || tflag == FTW_DP || tflag == FTW_NS) {
         return 0;
     }
 
-    line = calloc(sz, sizeof(*line));
-    assert(line != NULL);
-    linenum = 1;
-
-    while (!u_feof(src)) {
-        /* read in one whole line of text from the file */
-        for (i = 0; (line[i] = u_fgetc(src)) != U_EOF && !end_of_line(line[i]); i++) {
-            /* increase the buffer size if necessary */
-            if (i >= sz) {
-                sz *= 2;
-                errno = 0;
-                line_new = realloc(line, sz * sizeof(*line));
-
-                if (errno == ENOMEM) {
-                    warn("realloc");
-                    free(line);
-                }
-
-                line = line_new;
-
-                if (line == NULL) {
-                    return 0;
-                }
-            }
-        }
+    tasks = realloc(tasks, (ntasks + 1) * sizeof(*tasks));
+    assert(tasks != NULL);
+    tasks[ntasks].path = strdup(fpath);
+    assert(tasks[ntasks].path != NULL);
+    tasks[ntasks].results = NULL;
+    tasks[ntasks].result = true;
+    ntasks++;
 
-        /* eat newline if terminated by a carriage return */
-        if (line[i] == 0xD && (c = u_fgetc(src)) != 0xA) {
-            u_fungetc(c, src);
-        }
+    return 0;
+}
 
-        /* this is either U_EOF or newline, trim it */
-        line[i] = '\0';
+/*
+ * run_parallel() task to check one file in the prepared source tree.
+ */
+static void validate_task(size_t n, void *data)
+{
+    struct unicode_task *t = data;
+    results_t **previous = NULL;
 
-        /* check this line for any prohibited characters */
-        TAILQ_FOREACH(uentry, forbidden, items) {
-            needle = u_strchr32(line, uentry->data);
+    assert(t != NULL);
 
-            if (needle != NULL) {
-                /* forbidden code point found */
-                colnum = u_strlen(line) - u_strlen(needle);
-                xasprintf(&params.msg, _("A forbidden code point was found in the %s source file on line %ld at column %ld."), localpath, linenum, colnum);
-                add_result(globalri, &params);
-                free(params.msg);
-                globalresult = false;
-            }
+    previous = capture_results(&t[n].results);
+    t[n].result = validate_file(t[n].path);
+    capture_results(previous);
+
+    return;
+}
+
+/*
+ * Check each file in the prepared source tree.  The files are
+ * scanned by up to ri->jobs threads and the results are added in the
+ * order nftw() found the files.  Returns false if a forbidden code
+ * point was found.
+ */
+static bool validate_tree(struct rpminspect *ri)
+{
+    bool result = true;
+    size_t n = 0;
+
+    assert(ri != NULL);
+    assert(build != NULL);
+
+    if (nftw(build, collect_file, FOPEN_MAX, FTW_MOUNT|FTW_PHYS) == -1) {
+        warn("nftw");
+    }
+
+    run_parallel(ri->jobs, ntasks, validate_task, tasks);
+
+    for (n = 0; n < ntasks; n++) {
+        if (!tasks[n].result) {
+            result = false;
         }
 
-        /* advance the line counter */
-        linenum++;
+        append_results(ri, tasks[n].results);
+        free_results(tasks[n].results);
+        free(tasks[n].path);
     }
 
-    u_fclose(src);
-    free(line);
+    free(tasks);
+    tasks = NULL;
+    ntasks = 0;
 
-    return 0;
+    return result;
 }
 
 static bool unicode_driver(struct rpminspect *ri, rpmfile_entry_t *file)
@@ -584,9 +633,9 @@ static bool unicode_driver(struct rpminspect *ri, rpmfile_entry_t *file)
             return false;
         }
 
-        /* our tree dive result is saved in 'globalresult', -1 here is an internal error */
-        if (nftw(build, validate_file, FOPEN_MAX, FTW_MOUNT|FTW_PHYS) == -1) {
-            warn("nftw");
+        /* check each file in the prepared source tree */
+        if (!validate_tree(ri)) {
+            globalresult = false;
         }
 
         seen = true;
@@ -594,7 +643,9 @@ static bool unicode_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     }
 
     /* check the individual file */
-    (void) validate_file(file->fullpath, NULL, FTW_F, NULL);
+    if (!validate_file(file->fullpath)) {
+        globalresult = false;
+    }
 
     return globalresult;
 }
@@ -605,6 +656,7 @@ static bool unicode_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 bool inspect_unicode(struct rpminspect *ri)
 {
     bool result = true;
+    UChar32_list_t *forbidden = NULL;
     UChar32_entry_t *entry = NULL;
     string_entry_t *sentry = NULL;
     struct result_params params;
@@ -633,7 +685,10 @@ bool inspect_unicode(struct rpminspect *ri)
             TAILQ_INSERT_TAIL(forbidden, entry, items);
         }
 
-        /* so the nftw() helper can report results */
+        /* compile the list for scanning */
+        codepoints = compile_codepoints(forbidden);
+
+        /* so the file checking helpers can report results */
         globalri = ri;
 
         /* run the inspection */
@@ -647,6 +702,8 @@ bool inspect_unicode(struct rpminspect *ri)
         }
 
         free(forbidden);
+        free_codepoints(codepoints);
+        codepoints = NULL;
     }
 
     /* report */
@@ -31,7 +31,47 @@
 static bool clamav_ready = false;
 static struct cl_engine *engine = NULL;
 static unsigned int sigs = 0;
-static struct result_params params;
+
+/*
+ * Create, load, and compile the clamav engine.  This is done once
+ * before checking files so the engine is only read by the checks,
+ * which may run from several threads at the same time.
+ */
+static void init_clamav_engine(void)
+{
+    int r = 0;
+
+    if (clamav_ready) {
+        return;
+    }
+
+    /* create clamav engine */
+    engine = cl_engine_new();
+
+    if (engine == NULL) {
+        errx(RI_PROGRAM_ERROR, _("cl_engine_new returned NULL, check clamav library"));
+    }
+
+    /* load clamav databases */
+    r = cl_load(cl_retdbdir(), engine, &sigs, CL_DB_STDOPT);
+
+    if (r != CL_SUCCESS) {
+        cl_engine_free(engine);
+        errx(RI_PROGRAM_ERROR, _("cl_load: %s"), cl_strerror(r));
+    }
+
+    /* compile engine */
+    r = cl_engine_compile(engine);
+
+    if (r != CL_SUCCESS) {
+        cl_engine_free(engine);
+        errx(RI_PROGRAM_ERROR, _("cl_engine_compile: %s"), cl_strerror(r));
+    }
+
+    /* remember to not do all this again */
+    clamav_ready = true;
+    return;
+}
 
 static bool virus_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 {
@@ -41,41 +81,13 @@ static bool virus_driver(struct rpminspect *ri, rpmfile_entry_t *file)
     struct cl_scan_options opts;
 #endif
     const char *virus = NULL;
+    struct result_params params;
 
     /* only check regular files */
     if (!S_ISREG(file->st.st_mode)) {
         return true;
     }
 
-    /* initialize clamav if we need to */
-    if (!clamav_ready) {
-        /* create clamav engine */
-        engine = cl_engine_new();
-
-        if (engine == NULL) {
-            errx(RI_PROGRAM_ERROR, _("cl_engine_new returned NULL, check clamav library"));
-        }
-
-        /* load clamav databases */
-        r = cl_load(cl_retdbdir(), engine, &sigs, CL_DB_STDOPT);
-
-        if (r != CL_SUCCESS) {
-            cl_engine_free(engine);
-            errx(RI_PROGRAM_ERROR, _("cl_load: %s"), cl_strerror(r));
-        }
-
-        /* compile engine */
-        r = cl_engine_compile(engine);
-
-        if (r != CL_SUCCESS) {
-            cl_engine_free(engine);
-            errx(RI_PROGRAM_ERROR, _("cl_engine_compile: %s"), cl_strerror(r));
-        }
-
-        /* remember to not do all this again */
-        clamav_ready = true;
-    }
-
 #ifndef CL_SCAN_STDOPT
     /* set up the clamav scan options */
     memset(&opts, 0, sizeof(opts));
@@ -96,6 +108,12 @@ static bool virus_driver(struct rpminspect *ri, rpmfile_entry_t *file)
 #endif
 
     if (r == CL_VIRUS) {
+        init_result_params(&params);
+        params.severity = RESULT_BAD;
+        params.waiverauth = WAIVABLE_BY_ANYONE;
+        params.header = NAME_VIRUS;
+        params.verb = VERB_FAILED;
+        params.noun = _("virus or malware in ${FILE} on ${ARCH}");
         params.arch = get_rpm_header_arch(file->rpm_header);
         params.file = file->localpath;
         params.remedy = REMEDY_VIRUS;
@@ -121,6 +139,7 @@ bool inspect_virus(struct rpminspect *ri)
     struct cl_cvd *cvd = NULL;
     bool result = false;
     int r = 0;
+    struct result_params params;
 
     /* initialize clamav */
     r = cl_init(CL_INIT_DEFAULT);
@@ -186,16 +205,16 @@ bool inspect_virus(struct rpminspect *ri)
     params.file = NULL;
     params.arch = NULL;
     add_result(ri, &params);
+
+    /* cached results are only good for the same signatures */
+    set_cache_salt(NAME_VIRUS, params.details);
+
     free(params.msg);
     free(params.details);
 
     /* run the virus check on each file */
-    params.severity = RESULT_BAD;
-    params.waiverauth = WAIVABLE_BY_ANYONE;
-    params.header = NAME_VIRUS;
-    params.verb = VERB_FAILED;
-    params.noun = _("virus or malware in ${FILE} on ${ARCH}");
-    result = foreach_peer_file(ri, NAME_VIRUS, virus_driver);
+    init_clamav_engine();
+    result = foreach_peer_file_parallel(ri, NAME_VIRUS, virus_driver);
 
     /* hope the result is always this */
     if (result) {
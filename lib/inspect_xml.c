@@ -50,7 +50,8 @@ static void xml_silence_errors(void *ctx __attribute__((unused)), const char *ms
  */
 static bool is_xml_well_formed(const char *path, char **errors)
 {
-    static bool initialized = false;
+    /* libxml2 error handlers are per-thread */
+    static __thread bool initialized = false;
     static xmlGenericErrorFunc silence = xml_silence_errors;
     xmlParserCtxtPtr ctxt;
     xmlDocPtr doc;
@@ -228,7 +229,7 @@ bool inspect_xml(struct rpminspect *ri)
     struct result_params params;
 
     assert(ri != NULL);
-    result = foreach_peer_file(ri, NAME_XML, xml_driver);
+    result = foreach_peer_file_parallel(ri, NAME_XML, xml_driver);
 
     if (result) {
         init_result_params(&params);
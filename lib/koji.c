@@ -186,6 +186,439 @@ static string_list_t *read_koji_descendent_results(xmlrpc_env *env, xmlrpc_value
     return results;
 }
 
+/*
+ * Read the task result struct from 'getTaskResult' in to the
+ * descendent task entry.
+ */
+static void read_koji_task_result(xmlrpc_env *env, xmlrpc_value *result, koji_task_entry_t *descendent)
+{
+    int i = 0;
+    int size = 0;
+    xmlrpc_value *k = NULL;
+    xmlrpc_value *v = NULL;
+    char *key = NULL;
+
+    assert(env != NULL);
+    assert(result != NULL);
+    assert(descendent != NULL);
+
+    size = xmlrpc_struct_size(env, result);
+
+    for (i = 0; i < size; i++) {
+        /* Read the result struct */
+        xmlrpc_struct_read_member(env, result, i, &k, &v);
+        xmlrpc_abort_on_fault(env);
+
+        /* Get the key as a string */
+        xmlrpc_decompose_value(env, k, "s", &key);
+        xmlrpc_abort_on_fault(env);
+        xmlrpc_DECREF(k);
+
+        /* Read the values */
+        if (!strcmp(key, "brootid")) {
+            xmlrpc_decompose_value(env, v, "i", &descendent->brootid);
+            xmlrpc_abort_on_fault(env);
+        } else if (!strcmp(key, "srpms") && xmlrpc_value_type(v) == XMLRPC_TYPE_ARRAY) {
+            descendent->srpms = read_koji_descendent_results(env, v);
+        } else if (!strcmp(key, "rpms")) {
+            descendent->rpms = read_koji_descendent_results(env, v);
+        } else if (!strcmp(key, "logs")) {
+            descendent->logs = read_koji_descendent_results(env, v);
+        }
+
+        xmlrpc_DECREF(v);
+        free(key);
+    }
+
+    return;
+}
+
+/*
+ * Read the array of package structs from 'listBuildRPMs' in to the
+ * build list entry, skipping architectures the user excluded.
+ */
+static void read_koji_build_rpms(struct rpminspect *ri, xmlrpc_env *env, xmlrpc_value *result, koji_buildlist_entry_t *buildentry)
+{
+    int i = 0;
+    int j = 0;
+    int size = 0;
+    int s_sz = 0;
+    xmlrpc_value *element = NULL;
+    xmlrpc_value *k = NULL;
+    xmlrpc_value *value = NULL;
+    char *key = NULL;
+    koji_rpmlist_entry_t *rpm = NULL;
+
+    assert(ri != NULL);
+    assert(env != NULL);
+    assert(result != NULL);
+    assert(buildentry != NULL);
+
+    /* read the values from the result */
+    size = xmlrpc_array_size(env, result);
+    xmlrpc_abort_on_fault(env);
+
+    for (i = 0; i < size; i++) {
+        xmlrpc_array_read_item(env, result, i, &element);
+        xmlrpc_abort_on_fault(env);
+
+        /* each array element is a struct */
+        s_sz = xmlrpc_struct_size(env, element);
+        xmlrpc_abort_on_fault(env);
+
+        /* create a new rpm list entry */
+        rpm = calloc(1, sizeof(*rpm));
+        assert(rpm != NULL);
+
+        for (j = 0; j < s_sz; j++) {
+            xmlrpc_struct_read_member(env, element, j, &k, &value);
+            xmlrpc_abort_on_fault(env);
+
+            /* Get the key as a string */
+            xmlrpc_decompose_value(env, k, "s", &key);
+            xmlrpc_abort_on_fault(env);
+
+            /* Skip nil values */
+            if (xmlrpc_value_type(value) == XMLRPC_TYPE_NIL) {
+                xmlrpc_DECREF(value);
+                xmlrpc_DECREF(k);
+                free(key);
+                key = NULL;
+                continue;
+            }
+
+            /* Grab the values we need */
+            if (!strcmp(key, "arch")) {
+                xmlrpc_decompose_value(env, value, "s", &rpm->arch);
+                xmlrpc_abort_on_fault(env);
+            } else if (!strcmp(key, "name")) {
+                xmlrpc_decompose_value(env, value, "s", &rpm->name);
+                xmlrpc_abort_on_fault(env);
+            } else if (!strcmp(key, "version")) {
+                xmlrpc_decompose_value(env, value, "s", &rpm->version);
+                xmlrpc_abort_on_fault(env);
+            } else if (!strcmp(key, "release")) {
+                xmlrpc_decompose_value(env, value, "s", &rpm->release);
+                xmlrpc_abort_on_fault(env);
+            } else if (!strcmp(key, "epoch")) {
+                xmlrpc_decompose_value(env, value, "i", &rpm->epoch);
+            } else if (!strcmp(key, "payloadhash")) {
+                xmlrpc_decompose_value(env, value, "s", &rpm->payloadhash);
+                xmlrpc_abort_on_fault(env);
+            } else if (!strcmp(key, "size")) {
+                if (xmlrpc_value_type(value) == XMLRPC_TYPE_INT) {
+                    xmlrpc_decompose_value(env, value, "i", &rpm->size);
+                } else if (xmlrpc_value_type(value) == XMLRPC_TYPE_I8) {
+                    xmlrpc_decompose_value(env, value, "I", &rpm->size);
+                } else {
+                    /*
+                     * XXX: have no idea what we got back here, set it
+                     * negative for future debugging
+                     */
+                    rpm->size = -1;
+                }
+            }
+
+            xmlrpc_DECREF(value);
+            xmlrpc_DECREF(k);
+            free(key);
+            key = NULL;
+        }
+
+        /* add this rpm to the list */
+        if (allowed_arch(ri, rpm->arch)) {
+            TAILQ_INSERT_TAIL(buildentry->rpms, rpm, items);
+        } else {
+            free_koji_rpmlist_entry(rpm);
+        }
+
+        xmlrpc_DECREF(element);
+    }
+
+    return;
+}
+
+/*
+ * Key for the result of a Koji call in the metadata cache.
+ */
+static char *get_call_key(const struct rpminspect *ri, const char *method, const char *arg)
+{
+    char *key = NULL;
+
+    xasprintf(&key, "koji %s %s %s", ri->kojihub, method, arg);
+    assert(key != NULL);
+    return key;
+}
+
+/*
+ * Return the cached result of a Koji call, or NULL if it is not in
+ * the metadata cache.
+ */
+static xmlrpc_value *get_cached_call(const struct rpminspect *ri, const char *method, const char *arg)
+{
+    size_t len = 0;
+    char *key = NULL;
+    char *data = NULL;
+    xmlrpc_env env;
+    xmlrpc_value *value = NULL;
+
+    if (ri->cache_dir == NULL) {
+        return NULL;
+    }
+
+    key = get_call_key(ri, method, arg);
+    data = get_cached_metadata(ri, key, &len);
+    free(key);
+
+    if (data == NULL) {
+        return NULL;
+    }
+
+    /* an unreadable entry is treated as a cache miss */
+    xmlrpc_env_init(&env);
+    xmlrpc_parse_value_xml(&env, data, len, &value);
+
+    if (env.fault_occurred) {
+        value = NULL;
+    }
+
+    xmlrpc_env_clean(&env);
+    free(data);
+    return value;
+}
+
+/*
+ * Record the result of a Koji call that can never change in the
+ * metadata cache.
+ */
+static void put_cached_call(const struct rpminspect *ri, const char *method, const char *arg, xmlrpc_value *value)
+{
+    char *key = NULL;
+    xmlrpc_env env;
+    xmlrpc_mem_block *block = NULL;
+
+    if (ri->cache_dir == NULL) {
+        return;
+    }
+
+    xmlrpc_env_init(&env);
+    block = xmlrpc_mem_block_new(&env, 0);
+
+    if (!env.fault_occurred) {
+        xmlrpc_serialize_value(&env, block, value);
+
+        if (!env.fault_occurred) {
+            key = get_call_key(ri, method, arg);
+            put_cached_metadata(ri, key, xmlrpc_mem_block_contents(block), xmlrpc_mem_block_size(block));
+            free(key);
+        }
+
+        xmlrpc_mem_block_free(block);
+    }
+
+    xmlrpc_env_clean(&env);
+    return;
+}
+
+/*
+ * Return the 'state' member of a Koji build or task struct, or -1 if
+ * there is not one.
+ */
+static int get_koji_state(xmlrpc_env *env, xmlrpc_value *result)
+{
+    int state = -1;
+    xmlrpc_value *value = NULL;
+
+    if (xmlrpc_value_type(result) != XMLRPC_TYPE_STRUCT) {
+        return -1;
+    }
+
+    xmlrpc_struct_find_value(env, result, "state", &value);
+    xmlrpc_abort_on_fault(env);
+
+    if (value != NULL) {
+        if (xmlrpc_value_type(value) == XMLRPC_TYPE_INT) {
+            xmlrpc_decompose_value(env, value, "i", &state);
+            xmlrpc_abort_on_fault(env);
+        }
+
+        xmlrpc_DECREF(value);
+    }
+
+    return state;
+}
+
+/*
+ * One multiCall request made by koji_multicall().  calls holds the
+ * indexes in to the results array of the calls in this request.
+ */
+struct multicall {
+    const size_t *calls;
+    size_t ncalls;
+    xmlrpc_value **results;
+    char *fault;
+};
+
+/*
+ * Response handler for a multiCall request.  Each result is either
+ * a one element array holding the return value of the call or a
+ * fault struct.
+ */
+static void multicall_done(__attribute__((unused)) const char *url, __attribute__((unused)) const char *method, __attribute__((unused)) xmlrpc_value *params, void *data, xmlrpc_env *fault, xmlrpc_value *result)
+{
+    size_t i = 0;
+    char *s = NULL;
+    xmlrpc_env env;
+    xmlrpc_value *item = NULL;
+    struct multicall *mc = data;
+
+    assert(mc != NULL);
+
+    if (fault->fault_occurred) {
+        xasprintf(&mc->fault, _("XML-RPC Fault: %s (%d)"), fault->fault_string, fault->fault_code);
+        return;
+    }
+
+    xmlrpc_env_init(&env);
+
+    if (xmlrpc_value_type(result) != XMLRPC_TYPE_ARRAY || (size_t) xmlrpc_array_size(&env, result) != mc->ncalls) {
+        xasprintf(&mc->fault, _("XML-RPC Fault: unexpected multiCall response"));
+        xmlrpc_env_clean(&env);
+        return;
+    }
+
+    for (i = 0; i < mc->ncalls && mc->fault == NULL; i++) {
+        xmlrpc_array_read_item(&env, result, i, &item);
+        xmlrpc_abort_on_fault(&env);
+
+        if (xmlrpc_value_type(item) == XMLRPC_TYPE_ARRAY && xmlrpc_array_size(&env, item) == 1) {
+            xmlrpc_array_read_item(&env, item, 0, &mc->results[mc->calls[i]]);
+            xmlrpc_abort_on_fault(&env);
+        } else {
+            xmlrpc_decompose_value(&env, item, "{s:s,*}", "faultString", &s);
+            xasprintf(&mc->fault, _("XML-RPC Fault: %s"), (env.fault_occurred || s == NULL) ? _("unexpected multiCall response") : s);
+            free(s);
+        }
+
+        xmlrpc_DECREF(item);
+    }
+
+    xmlrpc_env_clean(&env);
+    return;
+}
+
+/*
+ * Call method once for each of the ids on the Koji hub and return an
+ * array of the results in the same order.  The caller must DECREF
+ * each result and free the array.  The calls are batched in to
+ * multiCall requests of up to KOJI_MULTICALL_SIZE calls each, and all
+ * of the requests are sent at the same time.  When cached[i] is true
+ * the result of call i can never change, so it is looked up in and
+ * added to the metadata cache.
+ */
+static xmlrpc_value **koji_multicall(const struct rpminspect *ri, xmlrpc_env *env, const char *method, const int *ids, const bool *cached, const size_t n)
+{
+    size_t i = 0;
+    size_t j = 0;
+    size_t npending = 0;
+    size_t nbatches = 0;
+    size_t *pending = NULL;
+    char *arg = NULL;
+    xmlrpc_value **results = NULL;
+    xmlrpc_value **params = NULL;
+    xmlrpc_value *calls = NULL;
+    xmlrpc_value *call = NULL;
+    struct multicall *batches = NULL;
+
+    assert(ri != NULL);
+    assert(env != NULL);
+    assert(method != NULL);
+
+    results = calloc(n + 1, sizeof(*results));
+    assert(results != NULL);
+    pending = calloc(n + 1, sizeof(*pending));
+    assert(pending != NULL);
+
+    /* take what we can from the metadata cache */
+    for (i = 0; i < n; i++) {
+        if (cached[i]) {
+            xasprintf(&arg, "%d", ids[i]);
+            results[i] = get_cached_call(ri, method, arg);
+            free(arg);
+        }
+
+        if (results[i] == NULL) {
+            pending[npending++] = i;
+        }
+    }
+
+    /* send the rest in batches */
+    nbatches = (npending + KOJI_MULTICALL_SIZE - 1) / KOJI_MULTICALL_SIZE;
+    batches = calloc(nbatches + 1, sizeof(*batches));
+    assert(batches != NULL);
+    params = calloc(nbatches + 1, sizeof(*params));
+    assert(params != NULL);
+
+    for (i = 0; i < nbatches; i++) {
+        batches[i].calls = pending + (i * KOJI_MULTICALL_SIZE);
+        batches[i].ncalls = npending - (i * KOJI_MULTICALL_SIZE);
+        batches[i].results = results;
+
+        if (batches[i].ncalls > KOJI_MULTICALL_SIZE) {
+            batches[i].ncalls = KOJI_MULTICALL_SIZE;
+        }
+
+        calls = xmlrpc_array_new(env);
+        xmlrpc_abort_on_fault(env);
+
+        for (j = 0; j < batches[i].ncalls; j++) {
+            call = xmlrpc_build_value(env, "{s:s,s:(i)}", "methodName", method, "params", ids[batches[i].calls[j]]);
+            xmlrpc_abort_on_fault(env);
+            xmlrpc_array_append_item(env, calls, call);
+            xmlrpc_abort_on_fault(env);
+            xmlrpc_DECREF(call);
+        }
+
+        params[i] = xmlrpc_build_value(env, "(A)", calls);
+        xmlrpc_abort_on_fault(env);
+        xmlrpc_DECREF(calls);
+
+        xmlrpc_client_call_asynch_params(ri->kojihub, "multiCall", multicall_done, &batches[i], params[i]);
+    }
+
+    if (nbatches > 0) {
+        xmlrpc_client_event_loop_finish_asynch();
+    }
+
+    for (i = 0; i < nbatches; i++) {
+        if (batches[i].fault != NULL) {
+            errx(RI_PROGRAM_ERROR, "%s", batches[i].fault);
+        }
+
+        xmlrpc_DECREF(params[i]);
+    }
+
+    /* remember the results that will never change */
+    for (i = 0; i < npending; i++) {
+        j = pending[i];
+
+        if (results[j] == NULL) {
+            errx(RI_PROGRAM_ERROR, _("XML-RPC Fault: no result for %s(%d)"), method, ids[j]);
+        }
+
+        if (cached[j]) {
+            xasprintf(&arg, "%d", ids[j]);
+            put_cached_call(ri, method, arg, results[j]);
+            free(arg);
+        }
+    }
+
+    free(params);
+    free(batches);
+    free(pending);
+    return results;
+}
+
 /*
  * Initialize a koji_buildlist_t.
  */
@@ -263,6 +696,7 @@ void free_koji_rpmlist_entry(koji_rpmlist_entry_t *entry)
     free(entry->name);
     free(entry->version);
     free(entry->release);
+    free(entry->payloadhash);
     free(entry);
 
     return;
@@ -502,9 +936,11 @@ struct koji_build *get_koji_build(struct rpminspect *ri, const char *buildspec)
     xmlrpc_value *element = NULL;
     xmlrpc_value *k = NULL;
     xmlrpc_value *value = NULL;
+    xmlrpc_value **results = NULL;
     char *key = NULL;
+    int *ids = NULL;
+    bool *cached = NULL;
     koji_buildlist_entry_t *buildentry = NULL;
-    koji_rpmlist_entry_t *rpm = NULL;
 
     assert(ri != NULL);
 
@@ -528,17 +964,23 @@ struct koji_build *get_koji_build(struct rpminspect *ri, const char *buildspec)
     /* increase the message response size */
     xmlrpc_limit_set(XMLRPC_XML_SIZE_LIMIT_ID, INT_MAX);
 
-    /* call 'getBuild' on the koji hub */
-    result = xmlrpc_client_call(&env, ri->kojihub, "getBuild", "(s)", buildspec);
+    /* call 'getBuild' on the koji hub, completed builds never change */
+    if ((result = get_cached_call(ri, "getBuild", buildspec)) == NULL) {
+        result = xmlrpc_client_call(&env, ri->kojihub, "getBuild", "(s)", buildspec);
+
+        if (env.fault_occurred && env.fault_code >= 1000) {
+            /* server side error which means Koji protocol error */
+            xmlrpc_env_clean(&env);
+            xmlrpc_client_cleanup();
+            free_koji_build(build);
+            return NULL;
+        } else {
+            xmlrpc_abort_on_fault(&env);
+        }
 
-    if (env.fault_occurred && env.fault_code >= 1000) {
-        /* server side error which means Koji protocol error */
-        xmlrpc_env_clean(&env);
-        xmlrpc_client_cleanup();
-        free_koji_build(build);
-        return NULL;
-    } else {
-        xmlrpc_abort_on_fault(&env);
+        if (get_koji_state(&env, result) == KOJI_BUILD_COMPLETE) {
+            put_cached_call(ri, "getBuild", buildspec, result);
+        }
     }
 
     /* is this a valid build? */
@@ -867,91 +1309,37 @@ struct koji_build *get_koji_build(struct rpminspect *ri, const char *buildspec)
     }
 
     /* Call 'listBuildRPMs' on the koji hub for each build_id */
-    TAILQ_FOREACH(buildentry, build->builds, builditems) {
-        result = xmlrpc_client_call(&env, ri->kojihub, "listBuildRPMs", "(i)", buildentry->build_id);
-        xmlrpc_abort_on_fault(&env);
+    size = 0;
 
-        /* read the values from the result */
-        size = xmlrpc_array_size(&env, result);
-        xmlrpc_abort_on_fault(&env);
-
-        for (i = 0; i < size; i++) {
-            xmlrpc_array_read_item(&env, result, i, &element);
-            xmlrpc_abort_on_fault(&env);
-
-            /* each array element is a struct */
-            s_sz = xmlrpc_struct_size(&env, element);
-            xmlrpc_abort_on_fault(&env);
-
-            /* create a new rpm list entry */
-            rpm = calloc(1, sizeof(*rpm));
-            assert(rpm != NULL);
-
-            for (j = 0; j < s_sz; j++) {
-                xmlrpc_struct_read_member(&env, element, j, &k, &value);
-                xmlrpc_abort_on_fault(&env);
-
-                /* Get the key as a string */
-                xmlrpc_decompose_value(&env, k, "s", &key);
-                xmlrpc_abort_on_fault(&env);
-
-                /* Skip nil values */
-                if (xmlrpc_value_type(value) == XMLRPC_TYPE_NIL) {
-                    xmlrpc_DECREF(value);
-                    xmlrpc_DECREF(k);
-                    free(key);
-                    key = NULL;
-                    continue;
-                }
+    TAILQ_FOREACH(buildentry, build->builds, builditems) {
+        size++;
+    }
 
-                /* Grab the values we need */
-                if (!strcmp(key, "arch")) {
-                    xmlrpc_decompose_value(&env, value, "s", &rpm->arch);
-                    xmlrpc_abort_on_fault(&env);
-                } else if (!strcmp(key, "name")) {
-                    xmlrpc_decompose_value(&env, value, "s", &rpm->name);
-                    xmlrpc_abort_on_fault(&env);
-                } else if (!strcmp(key, "version")) {
-                    xmlrpc_decompose_value(&env, value, "s", &rpm->version);
-                    xmlrpc_abort_on_fault(&env);
-                } else if (!strcmp(key, "release")) {
-                    xmlrpc_decompose_value(&env, value, "s", &rpm->release);
-                    xmlrpc_abort_on_fault(&env);
-                } else if (!strcmp(key, "epoch")) {
-                    xmlrpc_decompose_value(&env, value, "i", &rpm->epoch);
-                } else if (!strcmp(key, "size")) {
-                    if (xmlrpc_value_type(value) == XMLRPC_TYPE_INT) {
-                        xmlrpc_decompose_value(&env, value, "i", &rpm->size);
-                    } else if (xmlrpc_value_type(value) == XMLRPC_TYPE_I8) {
-                        xmlrpc_decompose_value(&env, value, "I", &rpm->size);
-                    } else {
-                        /*
-                         * XXX: have no idea what we got back here, set it
-                         * negative for future debugging
-                         */
-                        rpm->size = -1;
-                    }
-                }
+    ids = calloc(size + 1, sizeof(*ids));
+    assert(ids != NULL);
+    cached = calloc(size + 1, sizeof(*cached));
+    assert(cached != NULL);
+    i = 0;
 
-                xmlrpc_DECREF(value);
-                xmlrpc_DECREF(k);
-                free(key);
-                key = NULL;
-            }
-
-            /* add this rpm to the list */
-            if (allowed_arch(ri, rpm->arch)) {
-                TAILQ_INSERT_TAIL(buildentry->rpms, rpm, items);
-            } else {
-                free_koji_rpmlist_entry(rpm);
-            }
+    TAILQ_FOREACH(buildentry, build->builds, builditems) {
+        ids[i] = buildentry->build_id;
+        cached[i] = (((ri->buildtype == KOJI_BUILD_MODULE) ? buildentry->state : build->state) == KOJI_BUILD_COMPLETE);
+        i++;
+    }
 
-            xmlrpc_DECREF(element);
-        }
+    results = koji_multicall(ri, &env, "listBuildRPMs", ids, cached, size);
+    i = 0;
 
-        xmlrpc_DECREF(result);
+    TAILQ_FOREACH(buildentry, build->builds, builditems) {
+        read_koji_build_rpms(ri, &env, results[i], buildentry);
+        xmlrpc_DECREF(results[i]);
+        i++;
     }
 
+    free(results);
+    free(cached);
+    free(ids);
+
     /* Cleanup */
     xmlrpc_env_clean(&env);
     xmlrpc_client_cleanup();
@@ -964,19 +1352,21 @@ struct koji_build *get_koji_build(struct rpminspect *ri, const char *buildspec)
  */
 struct koji_task *get_koji_task(struct rpminspect *ri, const char *taskspec)
 {
-    int i, j, k;
-    int size, dsize, rsize;
+    int i, j;
+    int size, dsize;
+    size_t n = 0;
+    size_t npending = 0;
     xmlrpc_env env;
     xmlrpc_value *result = NULL;
     xmlrpc_value *xk = NULL;
     xmlrpc_value *xv = NULL;
-    xmlrpc_value *tr_k = NULL;
-    xmlrpc_value *tr_v = NULL;
     xmlrpc_value *dstruct = NULL;
-    xmlrpc_value *dresult = NULL;
-    char *key = NULL;
+    xmlrpc_value **results = NULL;
+    int *ids = NULL;
+    bool *cached = NULL;
     struct koji_task *task = NULL;
     koji_task_entry_t *descendent = NULL;
+    koji_task_entry_t **pending = NULL;
 
     assert(ri != NULL);
 
@@ -1000,9 +1390,15 @@ struct koji_task *get_koji_task(struct rpminspect *ri, const char *taskspec)
     /* increase the message response size */
     xmlrpc_limit_set(XMLRPC_XML_SIZE_LIMIT_ID, INT_MAX);
 
-    /* call 'getTaskInfo' on the koji hub */
-    result = xmlrpc_client_call(&env, ri->kojihub, "getTaskInfo", "(s)", taskspec);
-    xmlrpc_abort_on_fault(&env);
+    /* call 'getTaskInfo' on the koji hub, closed tasks never change */
+    if ((result = get_cached_call(ri, "getTaskInfo", taskspec)) == NULL) {
+        result = xmlrpc_client_call(&env, ri->kojihub, "getTaskInfo", "(s)", taskspec);
+        xmlrpc_abort_on_fault(&env);
+
+        if (get_koji_state(&env, result) == KOJI_TASK_CLOSED) {
+            put_cached_call(ri, "getTaskInfo", taskspec, result);
+        }
+    }
 
     /* is this a valid build? */
     if (xmlrpc_value_type(result) == XMLRPC_TYPE_NIL) {
@@ -1016,8 +1412,14 @@ struct koji_task *get_koji_task(struct rpminspect *ri, const char *taskspec)
     xmlrpc_DECREF(result);
 
     /* call 'getTaskDescendents' on the task ID */
-    result = xmlrpc_client_call(&env, ri->kojihub, "getTaskDescendents", "(s)", taskspec);
-    xmlrpc_abort_on_fault(&env);
+    if (task->state != KOJI_TASK_CLOSED || (result = get_cached_call(ri, "getTaskDescendents", taskspec)) == NULL) {
+        result = xmlrpc_client_call(&env, ri->kojihub, "getTaskDescendents", "(s)", taskspec);
+        xmlrpc_abort_on_fault(&env);
+
+        if (task->state == KOJI_TASK_CLOSED) {
+            put_cached_call(ri, "getTaskDescendents", taskspec, result);
+        }
+    }
 
     /* read the values from the result */
     size = xmlrpc_struct_size(&env, result);
@@ -1050,52 +1452,48 @@ struct koji_task *get_koji_task(struct rpminspect *ri, const char *taskspec)
             init_koji_task_entry(descendent);
             read_koji_task_struct(&env, dstruct, descendent->task);
 
-            /* gather the task results */
-            dresult = xmlrpc_client_call(&env, ri->kojihub, "getTaskResult", "(i)", descendent->task->id);
-            xmlrpc_abort_on_fault(&env);
+            /* the task results are gathered below */
+            pending = realloc(pending, (npending + 1) * sizeof(*pending));
+            assert(pending != NULL);
+            pending[npending++] = descendent;
+        }
+    }
 
-            if (xmlrpc_value_type(dresult) == XMLRPC_TYPE_NIL) {
-                /* some task IDs may be nothing, so ignore */
-                xmlrpc_DECREF(dresult);
-                continue;
-            }
+    xmlrpc_DECREF(result);
 
-            rsize = xmlrpc_struct_size(&env, dresult);
+    /* gather the task results, results of closed tasks never change */
+    ids = calloc(npending + 1, sizeof(*ids));
+    assert(ids != NULL);
+    cached = calloc(npending + 1, sizeof(*cached));
+    assert(cached != NULL);
 
-            for (k = 0; k < rsize; k++) {
-                /* Read the result struct */
-                xmlrpc_struct_read_member(&env, dresult, k, &tr_k, &tr_v);
-                xmlrpc_abort_on_fault(&env);
+    for (n = 0; n < npending; n++) {
+        ids[n] = pending[n]->task->id;
+        cached[n] = (pending[n]->task->state == KOJI_TASK_CLOSED);
+    }
 
-                /* Get the key as a string */
-                xmlrpc_decompose_value(&env, tr_k, "s", &key);
-                xmlrpc_abort_on_fault(&env);
-                xmlrpc_DECREF(tr_k);
+    results = koji_multicall(ri, &env, "getTaskResult", ids, cached, npending);
 
-                /* Read the values */
-                if (!strcmp(key, "brootid")) {
-                    xmlrpc_decompose_value(&env, tr_v, "i", &descendent->brootid);
-                    xmlrpc_abort_on_fault(&env);
-                } else if (!strcmp(key, "srpms") && xmlrpc_value_type(tr_v) == XMLRPC_TYPE_ARRAY) {
-                    descendent->srpms = read_koji_descendent_results(&env, tr_v);
-                } else if (!strcmp(key, "rpms")) {
-                    descendent->rpms = read_koji_descendent_results(&env, tr_v);
-                } else if (!strcmp(key, "logs")) {
-                    descendent->logs = read_koji_descendent_results(&env, tr_v);
-                }
+    for (n = 0; n < npending; n++) {
+        descendent = pending[n];
 
-                xmlrpc_DECREF(tr_v);
-                free(key);
-            }
+        if (xmlrpc_value_type(results[n]) == XMLRPC_TYPE_NIL) {
+            /* some task IDs may be nothing, so ignore */
+            free_koji_task_entry(descendent);
+        } else {
+            read_koji_task_result(&env, results[n], descendent);
 
             /* save this descendent in the list */
             TAILQ_INSERT_TAIL(task->descendents, descendent, items);
-
-            xmlrpc_DECREF(dresult);
         }
+
+        xmlrpc_DECREF(results[n]);
     }
 
-    xmlrpc_DECREF(result);
+    free(results);
+    free(cached);
+    free(ids);
+    free(pending);
 
     /* Cleanup */
     xmlrpc_env_clean(&env);
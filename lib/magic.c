@@ -22,24 +22,54 @@
 #include <stdio.h>
 #include <string.h>
 #include <assert.h>
+#include <errno.h>
 #include <err.h>
+#include <pthread.h>
 #include <magic.h>
 
 #include "rpminspect.h"
 
 /*
- * Return the MIME type of the specified file by path.  The caller is
- * responsible for freeing the returned string.
+ * Each thread keeps its own libmagic cookie with the magic database
+ * loaded.  Cookies cannot be shared between threads, but loading the
+ * database is expensive so it is only done once per thread.  The
+ * cookie is closed when the thread exits or free_magic() is called.
  */
-char *mime_type(const char *path)
+static pthread_key_t cookie_key;
+static pthread_once_t cookie_once = PTHREAD_ONCE_INIT;
+
+static void close_cookie(void *cookie)
+{
+    magic_close(cookie);
+    return;
+}
+
+static void make_cookie_key(void)
+{
+    int r = 0;
+
+    if ((r = pthread_key_create(&cookie_key, close_cookie)) != 0) {
+        errno = r;
+        err(RI_PROGRAM_ERROR, "pthread_key_create");
+    }
+
+    return;
+}
+
+/*
+ * Return the libmagic cookie for the calling thread, opening it and
+ * loading the magic database the first time.  Returns NULL if
+ * libmagic cannot be initialized.
+ */
+static magic_t get_cookie(void)
 {
-    char *type = NULL;
-    char *pos = NULL;
-    const char *tmp = NULL;
     magic_t cookie;
 
-    if (path == NULL) {
-        return NULL;
+    pthread_once(&cookie_once, make_cookie_key);
+    cookie = pthread_getspecific(cookie_key);
+
+    if (cookie != NULL) {
+        return cookie;
     }
 
     cookie = magic_open(MAGIC_MIME | MAGIC_CHECK);
@@ -55,6 +85,48 @@ char *mime_type(const char *path)
         return NULL;
     }
 
+    pthread_setspecific(cookie_key, cookie);
+    return cookie;
+}
+
+/*
+ * Close the libmagic cookie held by the calling thread, if any.
+ * Cookies held by other threads are closed when those threads exit.
+ */
+void free_magic(void)
+{
+    magic_t cookie;
+
+    pthread_once(&cookie_once, make_cookie_key);
+    cookie = pthread_getspecific(cookie_key);
+
+    if (cookie != NULL) {
+        pthread_setspecific(cookie_key, NULL);
+        magic_close(cookie);
+    }
+
+    return;
+}
+
+/*
+ * Return the MIME type of the specified file by path.  The caller is
+ * responsible for freeing the returned string.
+ */
+char *mime_type(const char *path)
+{
+    char *type = NULL;
+    char *pos = NULL;
+    const char *tmp = NULL;
+    magic_t cookie;
+
+    if (path == NULL) {
+        return NULL;
+    }
+
+    if ((cookie = get_cookie()) == NULL) {
+        return NULL;
+    }
+
     if ((tmp = magic_file(cookie, path)) != NULL) {
         type = strdup(tmp);
 
@@ -68,10 +140,15 @@ char *mime_type(const char *path)
         }
     }
 
-    magic_close(cookie);
     return type;
 }
 
+/*
+ * Protects the cached MIME type in rpmfile_entry_t when inspections
+ * run concurrently.
+ */
+static pthread_mutex_t type_lock = PTHREAD_MUTEX_INITIALIZER;
+
 /*
  * Return the MIME type of the specified file.  The type is cached in the
  * rpmfile_entry_t.  If that is not NULL, this function returns that value.
@@ -80,18 +157,69 @@ char *mime_type(const char *path)
  */
 char *get_mime_type(rpmfile_entry_t *file)
 {
+    char *type = NULL;
+
     assert(file != NULL);
 
     /* MIME type is cached, return it */
-    if (file->type != NULL) {
-        return file->type;
+    pthread_mutex_lock(&type_lock);
+    type = file->type;
+    pthread_mutex_unlock(&type_lock);
+
+    if (type != NULL) {
+        return type;
     }
 
-    /* Get and cache MIME type */
+    /* Get and cache MIME type, keeping the first one stored */
     assert(file->fullpath != NULL);
-    file->type = mime_type(file->fullpath);
+    type = mime_type(file->fullpath);
+
+    pthread_mutex_lock(&type_lock);
+
+    if (file->type == NULL) {
+        file->type = type;
+    } else {
+        free(type);
+    }
+
+    type = file->type;
+    pthread_mutex_unlock(&type_lock);
 
-    return file->type;
+    return type;
+}
+
+/*
+ * run_parallel() task to get the MIME type of one file.
+ */
+static void mime_type_task(size_t n, void *data)
+{
+    rpmfile_entry_t **files = data;
+
+    assert(files != NULL);
+
+    if (files[n]->fullpath != NULL) {
+        (void) get_mime_type(files[n]);
+    }
+
+    return;
+}
+
+/*
+ * Get and cache the MIME type of every file in the array that was
+ * unpacked.  The files are split across up to ri->jobs threads, each
+ * using its own libmagic cookie, so the magic database is loaded at
+ * most once per thread rather than once per file.
+ */
+void get_mime_types(struct rpminspect *ri, rpmfile_entry_t **files, const size_t nfiles)
+{
+    assert(ri != NULL);
+
+    if (files == NULL || nfiles == 0) {
+        return;
+    }
+
+    run_parallel(ri->jobs, nfiles, mime_type_task, files);
+    return;
 }
 
 /* Return true if the named file is a text file according to libmagic */
@@ -101,6 +229,11 @@ bool is_text_file(rpmfile_entry_t *file)
     char *type = NULL;
 
     assert(file != NULL);
+
+    if (file->classified) {
+        return file->text;
+    }
+
     type = get_mime_type(file);
 
     if (strprefix(type, "text/")) {
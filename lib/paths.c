@@ -26,7 +26,9 @@
 #include <limits.h>
 #include <assert.h>
 #include <err.h>
-#include <glob.h>
+#include <errno.h>
+#include <fnmatch.h>
+#include <pthread.h>
 #include <rpm/header.h>
 #include <rpm/rpmtag.h>
 #include "queue.h"
@@ -175,124 +177,422 @@ bool usable_path(const char *path)
 }
 
 /*
- * Helper function for glob(7) matching given a path string and
- * (optional) root directory.
+ * Compiled ignore patterns, see compile_ignores().  Brace expressions
+ * are expanded once and the alternatives are matched against the
+ * localpath with fnmatch(3).  The decisions are remembered because
+ * most files are checked by several inspections.
  */
-bool match_path(const char *pattern, const char *root, const char *needle)
+struct _ignore_matcher_t {
+    string_list_t *ignores;                 /* global ignores */
+    string_list_map_t *inspection_ignores;  /* per-inspection ignores */
+    string_map_t *decisions;                /* "inspection path" -> "1" or "0" */
+    pthread_mutex_t lock;                   /* protects decisions */
+};
+
+/*
+ * Find the end of a brace expression alternative starting at cp,
+ * which is the ',' or '}' that ends it.  Returns NULL if the brace
+ * expression is not closed.  This follows glob(3) with GLOB_BRACE.
+ */
+static const char *next_brace_sub(const char *cp)
 {
-    bool match = false;
-    int r = 0;
-    int gflags = GLOB_NOSORT | GLOB_PERIOD;
-    char globpath[PATH_MAX + 1];
-    char *globsub = NULL;
-    char *gp = globpath;
-    glob_t found;
-    size_t len = 0;
-    size_t i = 0;
-    char *n = NULL;
+    size_t depth = 0;
 
-    assert(pattern != NULL);
-    assert(needle != NULL);
+    while (*cp != '\0') {
+        if (*cp == '\\') {
+            if (*++cp == '\0') {
+                break;
+            }
+
+            cp++;
+        } else {
+            if ((*cp == '}' && depth-- == 0) || (*cp == ',' && depth == 0)) {
+                break;
+            }
+
+            if (*cp++ == '{') {
+                depth++;
+            }
+        }
+    }
+
+    return (*cp != '\0') ? cp : NULL;
+}
+
+/*
+ * Expand the brace expressions in pattern the way glob(3) does with
+ * GLOB_BRACE and add each alternative to the list.  A pattern with an
+ * unterminated brace expression is added as is.
+ */
+static string_list_t *expand_braces(string_list_t *list, const char *pattern)
+{
+    const char *begin = NULL;
+    const char *next = NULL;
+    const char *rest = NULL;
+    const char *p = NULL;
+    char *alt = NULL;
 
-#ifdef GLOB_BRACE
-    /* this is a GNU extension, see glob(3) */
-    gflags |= GLOB_BRACE;
-#endif
+    assert(pattern != NULL);
 
-    n = strdup(needle);
-    assert(n != NULL);
+    /* find the first unescaped brace */
+    for (begin = pattern; *begin != '\0'; begin++) {
+        if (*begin == '\\' && begin[1] != '\0') {
+            begin++;
+        } else if (*begin == '{') {
+            break;
+        }
+    }
 
-    if (root != NULL) {
-        len = strlen(root);
+    if (*begin == '\0') {
+        return list_add(list, pattern);
     }
 
-    memset(globpath, 0, sizeof(globpath));
+    /* find the end of the whole brace expression */
+    next = next_brace_sub(begin + 1);
 
-    if (root != NULL) {
-        gp = stpcpy(gp, root);
+    if (next == NULL) {
+        return list_add(list, pattern);
     }
 
-    if (!strprefix(pattern, "/")) {
-        gp = stpcpy(gp, dirname(n));
+    rest = next;
+
+    while (*rest != '}') {
+        rest = next_brace_sub(rest + 1);
+
+        if (rest == NULL) {
+            return list_add(list, pattern);
+        }
     }
 
-    free(n);
+    rest++;
+
+    /* expand each alternative, which may contain more braces */
+    p = begin + 1;
+
+    while (true) {
+        xasprintf(&alt, "%.*s%.*s%s", (int) (begin - pattern), pattern, (int) (next - p), p, rest);
+        assert(alt != NULL);
+        list = expand_braces(list, alt);
+        free(alt);
 
-    if (!strsuffix(globpath, "/") && !strprefix(pattern, "/")) {
-        gp = stpcpy(gp, "/");
+        if (*next == '}') {
+            break;
+        }
+
+        p = next + 1;
+        next = next_brace_sub(p);
+        assert(next != NULL);
     }
 
-    gp = stpcpy(gp, pattern);
-    r = glob(globpath, gflags, NULL, &found);
+    return list;
+}
+
+/*
+ * Match one brace expanded pattern against a path.  Absolute patterns
+ * match the whole path.  Relative patterns are taken relative to the
+ * directory the path is in, so they match the last path component.
+ * Wildcards do not match a '/' but do match a leading '.'.
+ */
+static bool match_expanded_path(const char *pattern, const char *needle)
+{
+    const char *base = NULL;
+
+    assert(pattern != NULL);
+    assert(needle != NULL);
 
-    if (r == GLOB_NOSPACE || r == GLOB_ABORTED) {
-        warn("glob");
+    if (*pattern == '/') {
+        /* paths relative to the build root are matched from the root */
+        if (*needle != '/') {
+            return (*needle != '\0' && fnmatch(pattern + 1, needle, FNM_PATHNAME) == 0);
+        }
+
+        return (fnmatch(pattern, needle, FNM_PATHNAME) == 0);
     }
 
-    if (r != 0) {
+    if (strchr(pattern, '/') != NULL) {
         return false;
     }
 
-    for (i = 0; i < found.gl_pathc; i++) {
-        globsub = found.gl_pathv[i] + len;
+    base = strrchr(needle, '/');
+    base = (base == NULL) ? needle : base + 1;
 
-        if (!strcmp(globsub, needle)) {
-            match = true;
-            break;
+    return (*base != '\0' && fnmatch(pattern, base, 0) == 0);
+}
+
+/*
+ * Return true if any pattern in the brace expanded list matches.
+ */
+static bool match_expanded_paths(const string_list_t *patterns, const char *needle)
+{
+    string_entry_t *entry = NULL;
+
+    if (patterns == NULL) {
+        return false;
+    }
+
+    TAILQ_FOREACH(entry, patterns, items) {
+        if (match_expanded_path(entry->data, needle)) {
+            return true;
         }
     }
 
-    globfree(&found);
+    return false;
+}
+
+/**
+ * @brief Match a path against a glob(7) pattern.
+ *
+ * The pattern may use brace expressions as supported by glob(3) with
+ * GLOB_BRACE.  An absolute pattern has to match the entire path.  A
+ * relative pattern is taken relative to the directory containing the
+ * path.  Matching is done entirely in memory against the path string,
+ * so the path does not need to exist.
+ *
+ * @param pattern The glob(7) pattern.
+ * @param needle The path to match (i.e., localpath).
+ * @return True if the pattern matches the path, false otherwise.
+ */
+bool match_path(const char *pattern, const char *needle)
+{
+    bool match = false;
+    string_list_t *patterns = NULL;
+
+    assert(pattern != NULL);
+    assert(needle != NULL);
+
+    patterns = expand_braces(NULL, pattern);
+    match = match_expanded_paths(patterns, needle);
+    list_free(patterns, free);
 
     return match;
 }
 
 /**
- * @brief Given a path and struct rpminspect, determine if the path should be ignored or not.
+ * @brief Compile the global and per-inspection ignore lists.
+ *
+ * Called once the configuration files have been read.  Later calls
+ * to ignore_path() match paths against the compiled patterns.
  *
  * @param ri The struct rpminspect for the program.
- * @param inspection The name of the inspection currently running.
- * @param path The relative path to check (i.e., localpath).
- * @param root The root directory, optional (pass NULL to use '/').
- * @return True if path should be ignored, false otherwise.
  */
-bool ignore_path(const struct rpminspect *ri, const char *inspection, const char *path, const char *root)
+void compile_ignores(struct rpminspect *ri)
 {
-    bool match = false;
+    int r = 0;
+    ignore_matcher_t *matcher = NULL;
     string_entry_t *entry = NULL;
     string_list_map_t *mapentry = NULL;
+    string_list_map_t *tmp_mapentry = NULL;
+    string_list_map_t *compiled = NULL;
 
     assert(ri != NULL);
 
-    if (path == NULL) {
-        return true;
+    free_ignores(ri->ignore_matcher);
+    matcher = calloc(1, sizeof(*matcher));
+    assert(matcher != NULL);
+
+    if ((r = pthread_mutex_init(&matcher->lock, NULL)) != 0) {
+        errno = r;
+        err(RI_PROGRAM_ERROR, "pthread_mutex_init");
+    }
+
+    if (ri->ignores != NULL) {
+        TAILQ_FOREACH(entry, ri->ignores, items) {
+            matcher->ignores = expand_braces(matcher->ignores, entry->data);
+        }
+    }
+
+    HASH_ITER(hh, ri->inspection_ignores, mapentry, tmp_mapentry) {
+        compiled = calloc(1, sizeof(*compiled));
+        assert(compiled != NULL);
+        compiled->key = strdup(mapentry->key);
+        assert(compiled->key != NULL);
+
+        if (mapentry->value != NULL) {
+            TAILQ_FOREACH(entry, mapentry->value, items) {
+                compiled->value = expand_braces(compiled->value, entry->data);
+            }
+        }
+
+        HASH_ADD_KEYPTR(hh, matcher->inspection_ignores, compiled->key, strlen(compiled->key), compiled);
+    }
+
+    ri->ignore_matcher = matcher;
+    return;
+}
+
+/**
+ * @brief Free the compiled ignore lists.
+ *
+ * @param matcher The compiled ignore lists, may be NULL.
+ */
+void free_ignores(ignore_matcher_t *matcher)
+{
+    string_list_map_t *mapentry = NULL;
+    string_list_map_t *tmp_mapentry = NULL;
+
+    if (matcher == NULL) {
+        return;
+    }
+
+    list_free(matcher->ignores, free);
+
+    HASH_ITER(hh, matcher->inspection_ignores, mapentry, tmp_mapentry) {
+        HASH_DEL(matcher->inspection_ignores, mapentry);
+        list_free(mapentry->value, free);
+        free(mapentry->key);
+        free(mapentry);
+    }
+
+    free_string_map(matcher->decisions);
+    pthread_mutex_destroy(&matcher->lock);
+    free(matcher);
+
+    return;
+}
+
+/*
+ * Look up a remembered ignore_path() decision.  Returns -1 if there
+ * is none, otherwise 1 if the path is ignored and 0 if it is not.
+ */
+static int get_decision(ignore_matcher_t *matcher, const char *key)
+{
+    int decision = -1;
+    string_map_t *entry = NULL;
+
+    pthread_mutex_lock(&matcher->lock);
+    HASH_FIND_STR(matcher->decisions, key, entry);
+
+    if (entry != NULL) {
+        decision = !strcmp(entry->value, "1");
     }
 
+    pthread_mutex_unlock(&matcher->lock);
+    return decision;
+}
+
+/*
+ * Remember an ignore_path() decision.
+ */
+static void put_decision(ignore_matcher_t *matcher, const char *key, const bool ignore)
+{
+    string_map_t *entry = NULL;
+
+    pthread_mutex_lock(&matcher->lock);
+    HASH_FIND_STR(matcher->decisions, key, entry);
+
+    if (entry == NULL) {
+        entry = calloc(1, sizeof(*entry));
+        assert(entry != NULL);
+        entry->key = strdup(key);
+        assert(entry->key != NULL);
+        entry->value = strdup(ignore ? "1" : "0");
+        assert(entry->value != NULL);
+        HASH_ADD_KEYPTR(hh, matcher->decisions, entry->key, strlen(entry->key), entry);
+    }
+
+    pthread_mutex_unlock(&matcher->lock);
+    return;
+}
+
+/*
+ * ignore_path() for a struct rpminspect without compiled ignores.
+ */
+static bool ignore_path_uncompiled(const struct rpminspect *ri, const char *inspection, const char *path)
+{
+    string_entry_t *entry = NULL;
+    string_list_map_t *mapentry = NULL;
+
     /* first, handle the global ignores */
     if (ri->ignores != NULL && !TAILQ_EMPTY(ri->ignores)) {
         TAILQ_FOREACH(entry, ri->ignores, items) {
-            match = match_path(entry->data, root, path);
-
-            if (match) {
-                return match;
+            if (match_path(entry->data, path)) {
+                return true;
             }
         }
     }
 
     /* second, handle the per-inspection ignores */
-    if (ri->inspection_ignores != NULL) {
+    if (ri->inspection_ignores != NULL && inspection != NULL) {
         HASH_FIND_STR(ri->inspection_ignores, inspection, mapentry);
 
         if (mapentry != NULL && mapentry->value != NULL && !TAILQ_EMPTY(mapentry->value)) {
             TAILQ_FOREACH(entry, mapentry->value, items) {
-                match = match_path(entry->data, root, path);
-
-                if (match) {
-                    return match;
+                if (match_path(entry->data, path)) {
+                    return true;
                 }
             }
         }
     }
 
+    return false;
+}
+
+/**
+ * @brief Given a path and struct rpminspect, determine if the path should be ignored or not.
+ *
+ * @param ri The struct rpminspect for the program.
+ * @param inspection The name of the inspection currently running.
+ * @param path The relative path to check (i.e., localpath).
+ * @return True if path should be ignored, false otherwise.
+ */
+bool ignore_path(const struct rpminspect *ri, const char *inspection, const char *path)
+{
+    int decision = -1;
+    bool match = false;
+    char *key = NULL;
+    char *global_key = NULL;
+    ignore_matcher_t *matcher = NULL;
+    string_list_map_t *mapentry = NULL;
+
+    assert(ri != NULL);
+
+    if (path == NULL) {
+        return true;
+    }
+
+    matcher = ri->ignore_matcher;
+
+    if (matcher == NULL) {
+        return ignore_path_uncompiled(ri, inspection, path);
+    }
+
+    if (matcher->ignores == NULL && matcher->inspection_ignores == NULL) {
+        return false;
+    }
+
+    /* decisions are keyed by inspection, the global one has none */
+    xasprintf(&key, "%s %s", (inspection == NULL) ? "" : inspection, path);
+    assert(key != NULL);
+
+    if ((decision = get_decision(matcher, key)) != -1) {
+        free(key);
+        return decision;
+    }
+
+    /* first, handle the global ignores, shared by all inspections */
+    xasprintf(&global_key, " %s", path);
+    assert(global_key != NULL);
+
+    if ((decision = get_decision(matcher, global_key)) != -1) {
+        match = decision;
+    } else {
+        match = match_expanded_paths(matcher->ignores, path);
+        put_decision(matcher, global_key, match);
+    }
+
+    free(global_key);
+
+    /* second, handle the per-inspection ignores */
+    if (!match && inspection != NULL) {
+        HASH_FIND_STR(matcher->inspection_ignores, inspection, mapentry);
+
+        if (mapentry != NULL) {
+            match = match_expanded_paths(mapentry->value, path);
+        }
+    }
+
+    put_decision(matcher, key, match);
+    free(key);
+
     return match;
 }
@@ -21,8 +21,13 @@
  */
 
 #include <stdbool.h>
+#include <stdlib.h>
+#include <string.h>
 #include <assert.h>
+#include <errno.h>
 #include <err.h>
+#include <pthread.h>
+#include <sys/stat.h>
 
 #include "rpminspect.h"
 
@@ -61,6 +66,7 @@ void free_rpmpeer(rpmpeer_t *peers)
         free_files(entry->after_files);
         free_deprules(entry->before_deprules);
         free_deprules(entry->after_deprules);
+        free(entry->key);
         free(entry);
     }
 
@@ -70,62 +76,71 @@ void free_rpmpeer(rpmpeer_t *peers)
 }
 
 /*
- * Add the specified package as a peer in the list of packages.
+ * Add the specified package as a peer in the list of packages.  The
+ * payload is not extracted here, see extract_peers().
+ *
+ * A package is the peer of the first package from the other build
+ * with the same name and, for binary packages, the same arch.  The
+ * ri->before_peers and ri->after_peers tables map that key to the
+ * first peer carrying a package from each build so the list does not
+ * have to be searched.
  */
-void add_peer(rpmpeer_t **peers, int whichbuild, bool fetch_only, const char *pkg, Header hdr)
+void add_peer(struct rpminspect *ri, int whichbuild, bool fetch_only, const char *pkg, Header hdr)
 {
     rpmpeer_entry_t *peer = NULL;
+    rpmpeer_entry_t *existing = NULL;
     bool found = false;
-    const char *newname = NULL;
-    const char *newarch = NULL;
-    const char *existingname = NULL;
-    const char *existingarch = NULL;
-    bool existingsrc = false;
     bool newsrc = false;
+    char *key = NULL;
 
-    assert(peers != NULL);
+    assert(ri != NULL);
     assert(pkg != NULL);
     assert(hdr != NULL);
 
-    if (*peers == NULL) {
-        *peers = init_rpmpeer();
+    if (ri->peers == NULL) {
+        ri->peers = init_rpmpeer();
     }
 
     /* Get the package or subpackage name and arch */
-    newname = headerGetString(hdr, RPMTAG_NAME);
-    newarch = get_rpm_header_arch(hdr);
     newsrc = headerIsSource(hdr);
+    xasprintf(&key, "%s %s %d", headerGetString(hdr, RPMTAG_NAME), newsrc ? "" : get_rpm_header_arch(hdr), newsrc);
+    assert(key != NULL);
 
     /* If we don't have this peer, try to add it */
-    TAILQ_FOREACH(peer, *peers, items) {
-        if (whichbuild == BEFORE_BUILD && peer->after_rpm != NULL) {
-            existingname = headerGetString(peer->after_hdr, RPMTAG_NAME);
-            existingarch = get_rpm_header_arch(peer->after_hdr);
-            existingsrc = headerIsSource(peer->after_hdr);
-        } else if (whichbuild == AFTER_BUILD && peer->before_rpm != NULL) {
-            existingname = headerGetString(peer->before_hdr, RPMTAG_NAME);
-            existingarch = get_rpm_header_arch(peer->before_hdr);
-            existingsrc = headerIsSource(peer->before_hdr);
-        }
-
-        if (existingname == NULL) {
-            continue;
-        }
-
-        if ((existingsrc && newsrc && !strcmp(existingname, newname)) ||
-            (!existingsrc && !newsrc && !strcmp(existingname, newname) && !strcmp(existingarch, newarch))) {
-            /* found the existing peer */
-            found = true;
-            break;
-        }
+    if (whichbuild == BEFORE_BUILD) {
+        HASH_FIND(after_hh, ri->after_peers, key, strlen(key), peer);
+    } else if (whichbuild == AFTER_BUILD) {
+        HASH_FIND(before_hh, ri->before_peers, key, strlen(key), peer);
     }
 
+    found = (peer != NULL);
+
     /* Add the peer if it doesn't already exist, otherwise add it */
     if (!found) {
         if ((peer = calloc(1, sizeof(*peer))) == NULL) {
             warn("calloc");
+            free(key);
             return;
         }
+
+        peer->key = key;
+    } else {
+        free(key);
+    }
+
+    /* index the first peer with a package from this build */
+    if (whichbuild == BEFORE_BUILD && peer->before_rpm == NULL) {
+        HASH_FIND(before_hh, ri->before_peers, peer->key, strlen(peer->key), existing);
+
+        if (existing == NULL) {
+            HASH_ADD_KEYPTR(before_hh, ri->before_peers, peer->key, strlen(peer->key), peer);
+        }
+    } else if (whichbuild == AFTER_BUILD && peer->after_rpm == NULL) {
+        HASH_FIND(after_hh, ri->after_peers, peer->key, strlen(peer->key), existing);
+
+        if (existing == NULL) {
+            HASH_ADD_KEYPTR(after_hh, ri->after_peers, peer->key, strlen(peer->key), peer);
+        }
     }
 
     if (whichbuild == BEFORE_BUILD) {
@@ -136,7 +151,6 @@ void add_peer(rpmpeer_t **peers, int whichbuild, bool fetch_only, const char *pk
             peer->before_files = NULL;
             peer->after_root = NULL;
         } else {
-            peer->before_files = extract_rpm(pkg, hdr, &peer->before_root);
             peer->before_deprules = gather_deprules(hdr);
         }
     } else if (whichbuild == AFTER_BUILD) {
@@ -147,17 +161,12 @@ void add_peer(rpmpeer_t **peers, int whichbuild, bool fetch_only, const char *pk
             peer->after_files = NULL;
             peer->after_root = NULL;
         } else {
-            peer->after_files = extract_rpm(pkg, hdr, &peer->after_root);
             peer->after_deprules = gather_deprules(hdr);
         }
     }
 
     if (!found) {
-        TAILQ_INSERT_TAIL(*peers, peer, items);
-    }
-
-    if (peer->before_files && peer->after_files) {
-        find_file_peers(peer->before_files, peer->after_files);
+        TAILQ_INSERT_TAIL(ri->peers, peer, items);
     }
 
     if (peer->before_deprules && peer->after_deprules) {
@@ -166,3 +175,377 @@ void add_peer(rpmpeer_t **peers, int whichbuild, bool fetch_only, const char *pk
 
     return;
 }
+
+/*
+ * One package to extract in extract_peers().
+ */
+struct extract_job {
+    const char *pkg;
+    Header hdr;
+    rpmfile_t **files;
+    char **root;
+    unsigned int file_classes;
+    const char *object_dir;
+    bool failed;
+};
+
+/*
+ * run_parallel() task to extract one package.
+ */
+static void extract_task(size_t n, void *data)
+{
+    struct extract_job *jobs = data;
+    struct extract_job *job = NULL;
+
+    assert(jobs != NULL);
+    job = &jobs[n];
+
+    *job->files = extract_rpm(job->pkg, job->hdr, job->root, job->file_classes, job->object_dir);
+
+    /* packages without files have no list, anything else is an error */
+    if (*job->files == NULL && headerIsEntry(job->hdr, RPMTAG_BASENAMES)) {
+        job->failed = true;
+    }
+
+    return;
+}
+
+/*
+ * A package handed to start_extract() while the rest of the builds
+ * are still downloading.  The job points at the files and root here
+ * and at a copy of the header that only the worker reads, since the
+ * main thread keeps reading the original while downloads continue.
+ */
+struct early_extract {
+    char *pkg;
+    rpmfile_t *files;
+    char *root;
+    struct extract_job job;
+};
+
+/*
+ * Worker threads extracting the packages given to start_extract().
+ * Workers take the next package until closing is set and there are
+ * none left.
+ */
+static struct {
+    pthread_mutex_t lock;
+    pthread_cond_t cond;
+    pthread_t *threads;
+    size_t nthreads;
+    struct early_extract **pkgs;
+    size_t npkgs;
+    size_t next;
+    bool closing;
+    bool failed;
+    char *object_dir;
+} early = { PTHREAD_MUTEX_INITIALIZER, PTHREAD_COND_INITIALIZER, NULL, 0, NULL, 0, 0, false, false, NULL };
+
+/*
+ * Return the directory holding payload files shared between the
+ * extracted packages, creating it if necessary.  Returns NULL if
+ * payloads are not shared.
+ */
+static char *get_object_dir(const struct rpminspect *ri)
+{
+    char *object_dir = NULL;
+
+    if (!ri->dedup_payloads || ri->worksubdir == NULL) {
+        return NULL;
+    }
+
+    xasprintf(&object_dir, "%s/%s", ri->worksubdir, PAYLOAD_OBJECTS_DIR);
+    assert(object_dir != NULL);
+
+    if (mkdirp(object_dir, S_IRWXU | S_IRGRP | S_IXGRP | S_IROTH | S_IXOTH)) {
+        warn("mkdirp");
+        free(object_dir);
+        return NULL;
+    }
+
+    return object_dir;
+}
+
+/*
+ * Worker thread for start_extract().
+ */
+static void *early_worker(__attribute__((unused)) void *arg)
+{
+    struct early_extract *e = NULL;
+
+    while (true) {
+        pthread_mutex_lock(&early.lock);
+
+        while (early.next == early.npkgs && !early.closing) {
+            pthread_cond_wait(&early.cond, &early.lock);
+        }
+
+        if (early.next == early.npkgs) {
+            pthread_mutex_unlock(&early.lock);
+            break;
+        }
+
+        e = early.pkgs[early.next++];
+        pthread_mutex_unlock(&early.lock);
+
+        extract_task(0, &e->job);
+    }
+
+    return NULL;
+}
+
+/**
+ * @brief Start extracting a package that has finished downloading.
+ *
+ * The package is extracted by a pool of up to ri->jobs worker
+ * threads while the rest of the builds download.  extract_peers()
+ * waits for these and uses them rather than extracting the package
+ * again.  The workers extract from a copy of the header, so the
+ * caller may go on using hdr.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @param pkg Path to the downloaded package.
+ * @param hdr The package header.
+ * @param file_classes FILE_CLASS_* payload files to write to disk.
+ */
+void start_extract(struct rpminspect *ri, const char *pkg, Header hdr, const unsigned int file_classes)
+{
+    int r = 0;
+    struct early_extract *e = NULL;
+
+    assert(ri != NULL);
+    assert(pkg != NULL);
+    assert(hdr != NULL);
+
+    e = calloc(1, sizeof(*e));
+    assert(e != NULL);
+    e->pkg = strdup(pkg);
+    assert(e->pkg != NULL);
+    e->job.pkg = e->pkg;
+    e->job.hdr = headerCopy(hdr);
+    assert(e->job.hdr != NULL);
+    e->job.files = &e->files;
+    e->job.root = &e->root;
+    e->job.file_classes = file_classes;
+
+    pthread_mutex_lock(&early.lock);
+
+    if (early.threads == NULL) {
+        early.object_dir = get_object_dir(ri);
+        early.nthreads = (ri->jobs > 1) ? ri->jobs : 1;
+        early.threads = calloc(early.nthreads, sizeof(*early.threads));
+        assert(early.threads != NULL);
+
+        for (r = 0; (size_t) r < early.nthreads; r++) {
+            if ((errno = pthread_create(&early.threads[r], NULL, early_worker, NULL)) != 0) {
+                err(RI_PROGRAM_ERROR, "pthread_create");
+            }
+        }
+    }
+
+    e->job.object_dir = early.object_dir;
+    early.pkgs = realloc(early.pkgs, (early.npkgs + 1) * sizeof(*early.pkgs));
+    assert(early.pkgs != NULL);
+    early.pkgs[early.npkgs++] = e;
+
+    pthread_cond_signal(&early.cond);
+    pthread_mutex_unlock(&early.lock);
+
+    return;
+}
+
+/*
+ * Wait for the packages given to start_extract() to finish.
+ */
+static void finish_early_extracts(void)
+{
+    size_t n = 0;
+
+    if (early.threads == NULL) {
+        return;
+    }
+
+    pthread_mutex_lock(&early.lock);
+    early.closing = true;
+    pthread_cond_broadcast(&early.cond);
+    pthread_mutex_unlock(&early.lock);
+
+    for (n = 0; n < early.nthreads; n++) {
+        if ((errno = pthread_join(early.threads[n], NULL)) != 0) {
+            err(RI_PROGRAM_ERROR, "pthread_join");
+        }
+    }
+
+    free(early.threads);
+    early.threads = NULL;
+    early.nthreads = 0;
+
+    return;
+}
+
+/*
+ * Hand an already extracted package over to its peer.  The files are
+ * pointed at the peer's header and the worker's copy is freed.
+ * Returns false if pkg was not given to start_extract().
+ */
+static bool take_early_extract(const char *pkg, Header hdr, rpmfile_t **files, char **root, bool *failed)
+{
+    size_t n = 0;
+    struct early_extract *e = NULL;
+    rpmfile_entry_t *file = NULL;
+
+    for (n = 0; n < early.npkgs; n++) {
+        e = early.pkgs[n];
+
+        if (e->pkg != NULL && !strcmp(e->pkg, pkg)) {
+            if (e->files != NULL) {
+                TAILQ_FOREACH(file, e->files, items) {
+                    file->rpm_header = hdr;
+                }
+            }
+
+            e->job.hdr = headerFree(e->job.hdr);
+            *files = e->files;
+            *root = e->root;
+            *failed = e->job.failed;
+            e->files = NULL;
+            e->root = NULL;
+            free(e->pkg);
+            e->pkg = NULL;
+            return true;
+        }
+    }
+
+    return false;
+}
+
+/*
+ * Free whatever start_extract() produced that no peer took.
+ */
+static void free_early_extracts(void)
+{
+    size_t n = 0;
+
+    for (n = 0; n < early.npkgs; n++) {
+        free(early.pkgs[n]->pkg);
+        free(early.pkgs[n]->root);
+        free_files(early.pkgs[n]->files);
+        headerFree(early.pkgs[n]->job.hdr);
+        free(early.pkgs[n]);
+    }
+
+    free(early.pkgs);
+    free(early.object_dir);
+    early.pkgs = NULL;
+    early.npkgs = 0;
+    early.next = 0;
+    early.closing = false;
+    early.failed = false;
+    early.object_dir = NULL;
+
+    return;
+}
+
+/*
+ * Add a package to the array of packages to extract, unless it was
+ * already extracted after being downloaded.
+ */
+static void add_extract_job(struct extract_job **jobs, size_t *njobs, const char *pkg, Header hdr, rpmfile_t **files, char **root, const unsigned int file_classes, const char *object_dir)
+{
+    bool failed = false;
+
+    if (pkg == NULL) {
+        return;
+    }
+
+    if (take_early_extract(pkg, hdr, files, root, &failed)) {
+        if (failed) {
+            warnx(_("*** unable to extract %s"), pkg);
+            early.failed = true;
+        }
+
+        return;
+    }
+
+    *jobs = realloc(*jobs, (*njobs + 1) * sizeof(**jobs));
+    assert(*jobs != NULL);
+    (*jobs)[*njobs].pkg = pkg;
+    (*jobs)[*njobs].hdr = hdr;
+    (*jobs)[*njobs].files = files;
+    (*jobs)[*njobs].root = root;
+    (*jobs)[*njobs].file_classes = file_classes;
+    (*jobs)[*njobs].object_dir = object_dir;
+    (*jobs)[*njobs].failed = false;
+    (*njobs)++;
+
+    return;
+}
+
+/*
+ * Extract the payloads of every before and after package in the peer
+ * list and then match up the files between each pair of peers.  The
+ * packages are independent, so up to ri->jobs of them are extracted
+ * at the same time.  Only payload files in the FILE_CLASS_*
+ * file_classes are written to disk.  With ri->dedup_payloads set,
+ * payload files with the same contents are stored once in the work
+ * directory and shared between packages.  Returns true if every
+ * package was extracted, false if any of them failed.  Packages given
+ * to start_extract() are waited for rather than extracted again.
+ */
+bool extract_peers(struct rpminspect *ri, const unsigned int file_classes)
+{
+    bool result = true;
+    size_t n = 0;
+    size_t njobs = 0;
+    char *object_dir = NULL;
+    struct extract_job *jobs = NULL;
+    rpmpeer_entry_t *peer = NULL;
+
+    assert(ri != NULL);
+
+    /* wait for the packages extracted while downloading */
+    finish_early_extracts();
+
+    if (ri->peers == NULL) {
+        free_early_extracts();
+        return true;
+    }
+
+    /* shared payload files live next to the extracted packages */
+    object_dir = get_object_dir(ri);
+
+    TAILQ_FOREACH(peer, ri->peers, items) {
+        add_extract_job(&jobs, &njobs, peer->before_rpm, peer->before_hdr, &peer->before_files, &peer->before_root, file_classes, object_dir);
+        add_extract_job(&jobs, &njobs, peer->after_rpm, peer->after_hdr, &peer->after_files, &peer->after_root, file_classes, object_dir);
+    }
+
+    if (early.failed) {
+        result = false;
+    }
+
+    free_early_extracts();
+
+    run_parallel(ri->jobs, njobs, extract_task, jobs);
+    free(object_dir);
+
+    for (n = 0; n < njobs; n++) {
+        if (jobs[n].failed) {
+            warnx(_("*** unable to extract %s"), jobs[n].pkg);
+            result = false;
+        }
+    }
+
+    free(jobs);
+
+    if (!result) {
+        return false;
+    }
+
+    TAILQ_FOREACH(peer, ri->peers, items) {
+        if (peer->before_files && peer->after_files) {
+            find_file_peers(peer->before_files, peer->after_files);
+        }
+    }
+
+    return true;
+}
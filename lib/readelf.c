@@ -31,6 +31,7 @@
 #include <unistd.h>
 #include <errno.h>
 #include <err.h>
+#include <pthread.h>
 
 #include <dlfcn.h>
 #include <link.h>
@@ -40,6 +41,7 @@
 #include <ar.h>
 
 #include "queue.h"
+#include "uthash.h"
 #include "readelf.h"
 #include "rpminspect.h"
 
@@ -178,22 +180,45 @@ GElf_Half get_elf_machine(Elf *elf)
     return _get_elf_helper(elf, ELF_MACHINE, EM_NONE);
 }
 
-static Elf *get_elf_with_kind(const char *fullpath, int *out_fd, Elf_Kind kind)
+/*
+ * libelf needs its version set once before any other calls.
+ */
+static pthread_once_t elf_version_once = PTHREAD_ONCE_INIT;
+static bool elf_version_ok = false;
+
+static void check_elf_version(void)
+{
+    if (elf_version(EV_CURRENT) == EV_NONE) {
+        warnx(_("libelf version mismatch"));
+        return;
+    }
+
+    elf_version_ok = true;
+    return;
+}
+
+/*
+ * Open the given path with libelf.  Returns the Elf object of
+ * whatever kind libelf finds, or NULL if the path is not a regular
+ * file or cannot be read.  On success the file descriptor is written
+ * to out_fd.
+ */
+static Elf *open_elf(const char *fullpath, int *out_fd)
 {
     int fd;
     Elf *elf = NULL;
     struct stat sbuf;
 
-    static bool initialized = false;
+    /* payload files that were not extracted */
+    if (fullpath == NULL) {
+        return NULL;
+    }
 
     /* library version check */
-    if (!initialized) {
-        if (elf_version(EV_CURRENT) == EV_NONE) {
-            warnx(_("libelf version mismatch"));
-            return NULL;
-        }
+    pthread_once(&elf_version_once, check_elf_version);
 
-        initialized = true;
+    if (!elf_version_ok) {
+        return NULL;
     }
 
     /* make sure this is a regular file */
@@ -206,12 +231,28 @@ static Elf *get_elf_with_kind(const char *fullpath, int *out_fd, Elf_Kind kind)
         return NULL;
     }
 
-    /* verify we can access the file and it's an ELF object */
+    /* verify we can access the file */
     if ((fd = open(fullpath, O_RDONLY)) == -1) {
         return NULL;
     }
 
-    elf = elf_begin(fd, ELF_C_READ_MMAP_PRIVATE, NULL);
+    if ((elf = elf_begin(fd, ELF_C_READ_MMAP_PRIVATE, NULL)) == NULL) {
+        close(fd);
+        return NULL;
+    }
+
+    *out_fd = fd;
+    return elf;
+}
+
+static Elf *get_elf_with_kind(const char *fullpath, int *out_fd, Elf_Kind kind)
+{
+    int fd;
+    Elf *elf = NULL;
+
+    if ((elf = open_elf(fullpath, &fd)) == NULL) {
+        return NULL;
+    }
 
     if (elf_kind(elf) == kind) {
         *out_fd = fd;
@@ -238,6 +279,253 @@ Elf * get_elf_archive(const char *fullpath, int *out_fd)
     return get_elf_with_kind(fullpath, out_fd, ELF_K_AR);
 }
 
+/*
+ * Cache of open Elf handles.  Several inspections open the same ELF
+ * objects, so rather than each of them opening, mapping, and parsing
+ * the file again they borrow a handle from this cache with
+ * borrow_elf() and give it back with return_elf().  A handle is only
+ * lent to one caller at a time because libelf objects may not be used
+ * from more than one thread at once.  At most elf_cache_size handles
+ * are kept open; when that is exceeded the least recently used handle
+ * that is not on loan is closed.  Paths that are not ELF objects are
+ * remembered too so they are not opened again.  Files are opened
+ * outside elf_cache_lock so one slow open does not hold up every
+ * other thread borrowing a handle.
+ */
+typedef struct _elf_cache_entry_t {
+    char *path;
+    Elf_Kind kind;
+    Elf *elf;
+    int fd;
+    bool borrowed;
+    bool opening;               /* borrow_elf() is opening the path */
+    TAILQ_ENTRY(_elf_cache_entry_t) items;
+    UT_hash_handle hh;          /* keyed by path */
+    UT_hash_handle hh_elf;      /* keyed by elf */
+} elf_cache_entry_t;
+
+static pthread_mutex_t elf_cache_lock = PTHREAD_MUTEX_INITIALIZER;
+static size_t elf_cache_size = DEFAULT_ELF_CACHE_SIZE;
+static size_t elf_cache_open = 0;
+static elf_cache_entry_t *elf_cache = NULL;
+static elf_cache_entry_t *elf_cache_by_elf = NULL;
+static TAILQ_HEAD(elf_cache_lru_s, _elf_cache_entry_t) elf_cache_lru = TAILQ_HEAD_INITIALIZER(elf_cache_lru);
+
+/*
+ * Close the least recently used handles that are not on loan until
+ * the cache is within its budget.  Call with elf_cache_lock held.
+ */
+static void evict_elf_cache(void)
+{
+    elf_cache_entry_t *entry = NULL;
+    elf_cache_entry_t *next = NULL;
+
+    entry = TAILQ_FIRST(&elf_cache_lru);
+
+    while (entry != NULL && elf_cache_open > elf_cache_size) {
+        next = TAILQ_NEXT(entry, items);
+
+        if (!entry->borrowed) {
+            TAILQ_REMOVE(&elf_cache_lru, entry, items);
+            HASH_DELETE(hh_elf, elf_cache_by_elf, entry);
+            HASH_DELETE(hh, elf_cache, entry);
+            elf_end(entry->elf);
+            close(entry->fd);
+            free(entry->path);
+            free(entry);
+            elf_cache_open--;
+        }
+
+        entry = next;
+    }
+
+    return;
+}
+
+/*
+ * Set the maximum number of Elf handles, and therefore open file
+ * descriptors and mappings, kept by the cache.  A size of 0 disables
+ * caching and borrow_elf() opens a new handle every time.
+ */
+void set_elf_cache_size(const size_t size)
+{
+    pthread_mutex_lock(&elf_cache_lock);
+    elf_cache_size = size;
+    evict_elf_cache();
+    pthread_mutex_unlock(&elf_cache_lock);
+    return;
+}
+
+/*
+ * Borrow an Elf handle of the given kind (ELF_K_ELF or ELF_K_AR) for
+ * the specified path.  Returns NULL if the path is not that kind of
+ * file or is NULL because the file was not extracted.  On success the
+ * file descriptor is written to out_fd.  The caller must not
+ * elf_end() or close() the handle, it must be passed to return_elf()
+ * when the caller is done with it.
+ *
+ * The file is opened without holding the cache lock.  The path is
+ * added to the cache first so other callers asking for it while it
+ * is being opened get their own handle rather than opening it for
+ * the cache a second time.
+ */
+Elf *borrow_elf(const char *fullpath, const Elf_Kind kind, int *out_fd)
+{
+    int fd = -1;
+    Elf *elf = NULL;
+    Elf_Kind found = ELF_K_NONE;
+    elf_cache_entry_t *entry = NULL;
+
+    assert(out_fd != NULL);
+
+    if (fullpath == NULL) {
+        return NULL;
+    }
+
+    pthread_mutex_lock(&elf_cache_lock);
+    HASH_FIND_STR(elf_cache, fullpath, entry);
+
+    if (entry != NULL) {
+        if (entry->opening) {
+            /* another thread is opening it, give this caller its own handle */
+            pthread_mutex_unlock(&elf_cache_lock);
+            return get_elf_with_kind(fullpath, out_fd, kind);
+        }
+
+        if (entry->kind != kind) {
+            pthread_mutex_unlock(&elf_cache_lock);
+            return NULL;
+        }
+
+        if (!entry->borrowed) {
+            entry->borrowed = true;
+            TAILQ_REMOVE(&elf_cache_lru, entry, items);
+            TAILQ_INSERT_TAIL(&elf_cache_lru, entry, items);
+            *out_fd = entry->fd;
+            elf = entry->elf;
+            pthread_mutex_unlock(&elf_cache_lock);
+            return elf;
+        }
+
+        /* on loan to someone else, give this caller its own handle */
+        pthread_mutex_unlock(&elf_cache_lock);
+        return get_elf_with_kind(fullpath, out_fd, kind);
+    }
+
+    if (elf_cache_size == 0) {
+        pthread_mutex_unlock(&elf_cache_lock);
+        return get_elf_with_kind(fullpath, out_fd, kind);
+    }
+
+    /* placeholder until the file is opened */
+    entry = calloc(1, sizeof(*entry));
+    assert(entry != NULL);
+    entry->path = strdup(fullpath);
+    assert(entry->path != NULL);
+    entry->kind = ELF_K_NONE;
+    entry->fd = -1;
+    entry->opening = true;
+    HASH_ADD_KEYPTR(hh, elf_cache, entry->path, strlen(entry->path), entry);
+    pthread_mutex_unlock(&elf_cache_lock);
+
+    if ((elf = open_elf(fullpath, &fd)) != NULL) {
+        found = elf_kind(elf);
+
+        if (found != ELF_K_ELF && found != ELF_K_AR) {
+            found = ELF_K_NONE;
+            elf_end(elf);
+            close(fd);
+            elf = NULL;
+            fd = -1;
+        }
+    }
+
+    /* publish the handle */
+    pthread_mutex_lock(&elf_cache_lock);
+    entry->opening = false;
+    entry->kind = found;
+
+    if (elf == NULL) {
+        pthread_mutex_unlock(&elf_cache_lock);
+        return NULL;
+    }
+
+    entry->elf = elf;
+    entry->fd = fd;
+    HASH_ADD(hh_elf, elf_cache_by_elf, elf, sizeof(entry->elf), entry);
+    TAILQ_INSERT_TAIL(&elf_cache_lru, entry, items);
+    elf_cache_open++;
+    elf = NULL;
+
+    if (entry->kind == kind) {
+        entry->borrowed = true;
+        *out_fd = entry->fd;
+        elf = entry->elf;
+    }
+
+    evict_elf_cache();
+    pthread_mutex_unlock(&elf_cache_lock);
+    return elf;
+}
+
+/*
+ * Give back an Elf handle from borrow_elf().  Handles that were
+ * opened just for the caller are closed.
+ */
+void return_elf(Elf *elf, const int fd)
+{
+    elf_cache_entry_t *entry = NULL;
+
+    if (elf == NULL) {
+        return;
+    }
+
+    pthread_mutex_lock(&elf_cache_lock);
+    HASH_FIND(hh_elf, elf_cache_by_elf, &elf, sizeof(elf), entry);
+
+    if (entry != NULL && entry->borrowed) {
+        entry->borrowed = false;
+        evict_elf_cache();
+        pthread_mutex_unlock(&elf_cache_lock);
+        return;
+    }
+
+    pthread_mutex_unlock(&elf_cache_lock);
+    elf_end(elf);
+    close(fd);
+    return;
+}
+
+/*
+ * Close every handle in the cache and forget every path.  Nothing
+ * may be on loan when this is called.
+ */
+void free_elf_cache(void)
+{
+    elf_cache_entry_t *entry = NULL;
+    elf_cache_entry_t *tmp_entry = NULL;
+
+    pthread_mutex_lock(&elf_cache_lock);
+    HASH_CLEAR(hh_elf, elf_cache_by_elf);
+
+    HASH_ITER(hh, elf_cache, entry, tmp_entry) {
+        HASH_DELETE(hh, elf_cache, entry);
+
+        if (entry->elf != NULL) {
+            elf_end(entry->elf);
+            close(entry->fd);
+        }
+
+        free(entry->path);
+        free(entry);
+    }
+
+    TAILQ_INIT(&elf_cache_lru);
+    elf_cache_open = 0;
+    pthread_mutex_unlock(&elf_cache_lock);
+    return;
+}
+
 /*
  * Return true if a specified file is ELF, false otherwise.
  */
@@ -274,6 +562,59 @@ bool is_elf(const char *fullpath) {
     return false;
 }
 
+/*
+ * Determine what kind of ELF file, if any, the specified path is with
+ * a single open.  Returns ELF_K_ELF, ELF_K_AR, or ELF_K_NONE.  For
+ * ELF objects the class and type are returned through elf_class and
+ * elf_type if they are not NULL.
+ */
+Elf_Kind get_elf_kind(const char *fullpath, int *elf_class, GElf_Half *elf_type)
+{
+    int fd = 0;
+    Elf *elf = NULL;
+    Elf_Kind kind = ELF_K_NONE;
+
+    if ((elf = open_elf(fullpath, &fd)) == NULL) {
+        return ELF_K_NONE;
+    }
+
+    kind = elf_kind(elf);
+
+    if (kind != ELF_K_ELF && kind != ELF_K_AR) {
+        kind = ELF_K_NONE;
+    }
+
+    if (kind == ELF_K_ELF) {
+        if (elf_class) {
+            *elf_class = gelf_getclass(elf);
+        }
+
+        if (elf_type) {
+            *elf_type = get_elf_type(elf);
+        }
+    }
+
+    elf_end(elf);
+    close(fd);
+    return kind;
+}
+
+/*
+ * Return true if the specified payload file is ELF, false otherwise.
+ * Uses the result of classify_file() when it is available rather than
+ * opening the file again.
+ */
+bool is_elf_file(const rpmfile_entry_t *file)
+{
+    assert(file != NULL);
+
+    if (file->classified) {
+        return (file->elf_kind == ELF_K_ELF || file->elf_kind == ELF_K_AR);
+    }
+
+    return is_elf(file->fullpath);
+}
+
 /*
  * Return true if a specified file is an ELF shared library file, that
  * is, of type ET_DYN.
@@ -707,3 +1048,270 @@ void elf_archive_iterate(int fd, Elf *archive, elf_ar_action action, string_list
     /* Rewind the archive */
     elf_rand(archive, SARMAG);
 }
+
+/*
+ * Protects the cached summary in rpmfile_entry_t when inspections run
+ * concurrently.
+ */
+static pthread_mutex_t summary_lock = PTHREAD_MUTEX_INITIALIZER;
+
+/*
+ * Add the name of every symbol in the given symbol table section to
+ * the list.
+ */
+static string_list_t *summarize_symbols(Elf *elf, Elf_Scn *scn, const GElf_Shdr *shdr, string_list_t *list)
+{
+    Elf_Data *data = NULL;
+    GElf_Sym sym;
+    size_t nentries = 0;
+    size_t i = 0;
+
+    if (shdr->sh_entsize == 0 || (data = elf_getdata(scn, NULL)) == NULL) {
+        return list;
+    }
+
+    nentries = shdr->sh_size / shdr->sh_entsize;
+
+    for (i = 0; i < nentries; i++) {
+        if (gelf_getsym(data, i, &sym) == NULL) {
+            continue;
+        }
+
+        list = list_add(list, elf_strptr(elf, shdr->sh_link, sym.st_name));
+    }
+
+    return list;
+}
+
+/*
+ * Collect the dynamic section entries the inspections use.
+ */
+static void summarize_dynamic(Elf *elf, Elf_Scn *scn, const GElf_Shdr *shdr, elf_summary_t *summary)
+{
+    Elf_Data *data = NULL;
+    GElf_Dyn dyn;
+    size_t entry_size = 0;
+    size_t nsoname = 0;
+    size_t i = 0;
+    const char *s = NULL;
+
+    while ((data = elf_getdata(scn, data)) != NULL) {
+        if ((entry_size = gelf_fsize(elf, data->d_type, 1, EV_CURRENT)) == 0) {
+            continue;
+        }
+
+        for (i = 0; i < (shdr->sh_size / entry_size); i++) {
+            if (gelf_getdyn(data, i, &dyn) == NULL) {
+                continue;
+            }
+
+            switch (dyn.d_tag) {
+                case DT_NEEDED:
+                    s = elf_strptr(elf, shdr->sh_link, (size_t) dyn.d_un.d_ptr);
+                    summary->needed = list_add(summary->needed, s);
+                    break;
+                case DT_RPATH:
+                    s = elf_strptr(elf, shdr->sh_link, (size_t) dyn.d_un.d_ptr);
+                    summary->rpath = list_add(summary->rpath, s);
+                    break;
+                case DT_RUNPATH:
+                    s = elf_strptr(elf, shdr->sh_link, (size_t) dyn.d_un.d_ptr);
+                    summary->runpath = list_add(summary->runpath, s);
+                    break;
+                case DT_SONAME:
+                    s = elf_strptr(elf, shdr->sh_link, (size_t) dyn.d_un.d_ptr);
+
+                    if (nsoname++ == 0 && s != NULL) {
+                        summary->soname = strdup(s);
+                    }
+
+                    break;
+                case DT_FLAGS:
+                    summary->flags |= dyn.d_un.d_val;
+                    break;
+                case DT_FLAGS_1:
+                    summary->flags_1 |= dyn.d_un.d_val;
+                    break;
+                case DT_TEXTREL:
+                    summary->textrel = true;
+                    break;
+                case DT_BIND_NOW:
+                    summary->bind_now = true;
+                    break;
+                default:
+                    break;
+            }
+        }
+    }
+
+    /* expect exactly one SONAME, same as get_elf_soname() */
+    if (nsoname > 1) {
+        free(summary->soname);
+        summary->soname = NULL;
+    }
+
+    if (summary->flags & DF_TEXTREL) {
+        summary->textrel = true;
+    }
+
+    if (summary->flags & DF_BIND_NOW) {
+        summary->bind_now = true;
+    }
+
+    return;
+}
+
+/*
+ * Build the summary of an ELF object.  Section headers are walked
+ * once and the dynamic section and symbol tables are read as they are
+ * found, then the program headers are walked once.
+ */
+static elf_summary_t *build_elf_summary(Elf *elf)
+{
+    size_t shstrndx = 0;
+    size_t phnum = 0;
+    size_t i = 0;
+    bool have_names = false;
+    bool have_dynamic = false;
+    bool have_dynsym = false;
+    bool have_symtab = false;
+    const char *name = NULL;
+    Elf_Scn *scn = NULL;
+    GElf_Shdr shdr;
+    GElf_Phdr phdr;
+    elf_summary_t *summary = NULL;
+
+    assert(elf != NULL);
+
+    summary = calloc(1, sizeof(*summary));
+    assert(summary != NULL);
+    summary->type = get_elf_type(elf);
+    summary->machine = get_elf_machine(elf);
+    have_names = (elf_getshdrstrndx(elf, &shstrndx) == 0);
+
+    while ((scn = elf_nextscn(elf, scn)) != NULL) {
+        if (gelf_getshdr(scn, &shdr) != &shdr) {
+            continue;
+        }
+
+        name = have_names ? elf_strptr(elf, shstrndx, shdr.sh_name) : NULL;
+        summary->sections = list_add(summary->sections, name);
+
+        if (name == NULL) {
+            continue;
+        }
+
+        if (shdr.sh_type == SHT_PROGBITS) {
+            if (shdr.sh_flags & SHF_EXECINSTR) {
+                summary->executable = true;
+            }
+
+            if (summary->type == ET_REL && !summary->execstack && !strcmp(name, ".note.GNU-stack")) {
+                summary->execstack = true;
+                summary->execstack_flags = shdr.sh_flags;
+            }
+        } else if (shdr.sh_type == SHT_DYNAMIC && !have_dynamic && !strcmp(name, ".dynamic")) {
+            summarize_dynamic(elf, scn, &shdr, summary);
+            have_dynamic = true;
+        } else if (shdr.sh_type == SHT_DYNSYM && !have_dynsym && !strcmp(name, ".dynsym")) {
+            summary->imported = summarize_symbols(elf, scn, &shdr, summary->imported);
+            have_dynsym = true;
+        } else if (shdr.sh_type == SHT_SYMTAB && !have_symtab && !strcmp(name, ".symtab")) {
+            summary->exported = summarize_symbols(elf, scn, &shdr, summary->exported);
+            have_symtab = true;
+        }
+    }
+
+    if (elf_getphdrnum(elf, &phnum) == 0) {
+        for (i = 0; i < phnum; i++) {
+            if (gelf_getphdr(elf, i, &phdr) != &phdr) {
+                continue;
+            }
+
+            if (phdr.p_type == PT_GNU_STACK && !summary->execstack &&
+                (summary->type == ET_EXEC || summary->type == ET_DYN)) {
+                summary->execstack = true;
+                summary->execstack_flags = phdr.p_flags;
+            } else if (phdr.p_type == PT_GNU_RELRO) {
+                summary->relro = true;
+            }
+        }
+    }
+
+    return summary;
+}
+
+/*
+ * Return the elf_summary_t for the given file, building it from elf
+ * the first time and caching it in the rpmfile_entry_t after that.
+ * If elf is NULL a handle is borrowed from the ELF cache.  Returns
+ * NULL if the file is not an ELF object.  The caller must not free
+ * the returned summary.
+ */
+elf_summary_t *get_elf_summary(rpmfile_entry_t *file, Elf *elf)
+{
+    int fd = -1;
+    Elf *borrowed = NULL;
+    elf_summary_t *summary = NULL;
+
+    assert(file != NULL);
+
+    pthread_mutex_lock(&summary_lock);
+    summary = file->elf_summary;
+    pthread_mutex_unlock(&summary_lock);
+
+    if (summary != NULL) {
+        return summary;
+    }
+
+    if (elf == NULL) {
+        if (file->fullpath == NULL) {
+            return NULL;
+        }
+
+        if ((borrowed = borrow_elf(file->fullpath, ELF_K_ELF, &fd)) == NULL) {
+            return NULL;
+        }
+
+        elf = borrowed;
+    } else if (elf_kind(elf) != ELF_K_ELF) {
+        return NULL;
+    }
+
+    summary = build_elf_summary(elf);
+    return_elf(borrowed, fd);
+
+    /* another inspection may have cached one while we were working */
+    pthread_mutex_lock(&summary_lock);
+
+    if (file->elf_summary == NULL) {
+        file->elf_summary = summary;
+    } else {
+        free_elf_summary(summary);
+    }
+
+    summary = file->elf_summary;
+    pthread_mutex_unlock(&summary_lock);
+
+    return summary;
+}
+
+/*
+ * Free an elf_summary_t.
+ */
+void free_elf_summary(elf_summary_t *summary)
+{
+    if (summary == NULL) {
+        return;
+    }
+
+    list_free(summary->sections, free);
+    list_free(summary->needed, free);
+    list_free(summary->rpath, free);
+    list_free(summary->runpath, free);
+    list_free(summary->imported, free);
+    list_free(summary->exported, free);
+    free(summary->soname);
+    free(summary);
+    return;
+}
@@ -23,6 +23,12 @@
 #include "queue.h"
 #include "rpminspect.h"
 
+/*
+ * When inspections run concurrently, each worker thread collects its
+ * results in a private list that is merged in to ri->results later.
+ */
+static __thread results_t **captured_results = NULL;
+
 /*
  * Initialize a struct result_params.
  */
@@ -157,6 +163,12 @@ void add_result(struct rpminspect *ri, struct result_params *params)
     assert(params != NULL);
     assert(params->severity >= 0);
 
+    /* worst_result is updated when captured results are merged */
+    if (captured_results != NULL) {
+        add_result_entry(captured_results, params);
+        return;
+    }
+
     if (params->severity > ri->worst_result) {
         ri->worst_result = params->severity;
     }
@@ -164,3 +176,56 @@ void add_result(struct rpminspect *ri, struct result_params *params)
     add_result_entry(&ri->results, params);
     return;
 }
+
+/*
+ * Move all of the entries in the given results_t to the end of the
+ * results for the program, updating the worst result seen.  The
+ * results_t passed in is left empty, the caller still needs to free
+ * it.
+ */
+void append_results(struct rpminspect *ri, results_t *results)
+{
+    results_entry_t *entry = NULL;
+
+    assert(ri != NULL);
+
+    if (results == NULL || TAILQ_EMPTY(results)) {
+        return;
+    }
+
+    if (captured_results != NULL) {
+        if (*captured_results == NULL) {
+            *captured_results = init_results();
+        }
+
+        TAILQ_CONCAT(*captured_results, results, items);
+        return;
+    }
+
+    TAILQ_FOREACH(entry, results, items) {
+        if (entry->severity > ri->worst_result) {
+            ri->worst_result = entry->severity;
+        }
+    }
+
+    if (ri->results == NULL) {
+        ri->results = init_results();
+    }
+
+    TAILQ_CONCAT(ri->results, results, items);
+    return;
+}
+
+/*
+ * Direct add_result() and append_results() calls made by the calling
+ * thread to the given list rather than ri->results.  Pass NULL to
+ * stop capturing results.  Returns the list results were going to
+ * before, so a caller can capture for a while and then restore it.
+ */
+results_t **capture_results(results_t **results)
+{
+    results_t **previous = captured_results;
+
+    captured_results = results;
+    return previous;
+}
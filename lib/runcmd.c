@@ -69,26 +69,10 @@ char *run_cmd_vpe(int *exitcode, const char *workdir, char **argv)
     char *tail = NULL;
     size_t n = BUFSIZ;
     char *buf = NULL;
-    char cwd[PATH_MAX + 1];
 
     assert(argv != NULL);
     assert(argv[0] != NULL);
 
-    /* use working directory if given one */
-    if (workdir) {
-        /* save current directory */
-        memset(cwd, '\0', sizeof(cwd));
-
-        if (getcwd(cwd, PATH_MAX) == NULL) {
-            err(RI_PROGRAM_ERROR, "getcwd");
-        }
-
-        /* power through if it fails */
-        if (chdir(workdir) == -1) {
-            warn("chdir");
-        }
-    }
-
     /* create pipes to interact with the child */
     if (pipe(pfd) == -1) {
         if (exitcode) {
@@ -103,6 +87,16 @@ char *run_cmd_vpe(int *exitcode, const char *workdir, char **argv)
     proc = fork();
 
     if (proc == 0) {
+        /*
+         * Use working directory if given one.  This happens in the
+         * child so the parent's working directory never changes
+         * underneath other running inspections.  Power through if
+         * it fails.
+         */
+        if (workdir && chdir(workdir) == -1) {
+            warn("chdir");
+        }
+
         /* connect the output */
         if (dup2(pfd[WR], STDOUT_FILENO) == -1 || dup2(pfd[WR], STDERR_FILENO) == -1) {
             warn("dup2");
@@ -213,11 +207,6 @@ char *run_cmd_vpe(int *exitcode, const char *workdir, char **argv)
         }
     }
 
-    /* go back to where we started */
-    if (workdir && chdir(cwd) == -1) {
-        warn("chdir");
-    }
-
     return output;
 }
 
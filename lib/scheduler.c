@@ -0,0 +1,435 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public License
+ * as published by the Free Software Foundation, either version 3 of
+ * the License, or (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this program.  If not, see
+ * <https://www.gnu.org/licenses/>.
+ *
+ * SPDX-License-Identifier: LGPL-3.0-or-later
+ */
+
+/**
+ * @file scheduler.c
+ * @author David Cantrell &lt;dcantrell@redhat.com&gt;
+ * @date 2021
+ * @brief Run the selected inspections, optionally in parallel.
+ * @copyright LGPL-3.0-or-later
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <string.h>
+#include <assert.h>
+#include <errno.h>
+#include <err.h>
+#include <pthread.h>
+#include <libxml/parser.h>
+#include "queue.h"
+#include "rpminspect.h"
+
+/*
+ * One selected inspection and what it produced.
+ */
+struct job {
+    struct rpminspect *ri;
+    const struct inspect *inspection;
+    results_t *results;
+    bool result;
+};
+
+/*
+ * One call to run_parallel() waiting in the pool's queue.  Threads
+ * take the next task index until there are none left.
+ */
+struct batch {
+    size_t ntasks;
+    size_t next;
+    size_t done;
+    void (*task)(size_t, void *);
+    void *data;
+    TAILQ_ENTRY(batch) items;
+};
+
+TAILQ_HEAD(batch_queue, batch);
+
+/*
+ * The worker threads started by a run_parallel() call and the queue
+ * of batches they work on.  run_parallel() called from one of the
+ * workers adds its tasks to the same queue, so the number of threads
+ * stays at the number given to the outer call.
+ */
+struct pool {
+    struct batch *top;
+    struct batch_queue queue;
+    pthread_mutex_t lock;
+    pthread_cond_t cond;
+};
+
+/*
+ * The pool of the worker thread this is, NULL in other threads.
+ */
+static __thread struct pool *current_pool = NULL;
+
+/*
+ * Run a single job, collecting its results in the job rather than
+ * in ri->results.
+ */
+static void run_job(struct rpminspect *ri, struct job *job)
+{
+    results_t **captured = NULL;
+
+    assert(ri != NULL);
+    assert(job != NULL);
+
+    captured = capture_results(&job->results);
+    job->result = job->inspection->driver(ri);
+    capture_results(captured);
+
+    return;
+}
+
+/*
+ * Take the next task index from a batch and run it.  Called and
+ * returns with the pool locked.
+ */
+static void run_batch_task(struct pool *pool, struct batch *batch)
+{
+    size_t n = 0;
+
+    assert(pool != NULL);
+    assert(batch != NULL);
+    assert(batch->next < batch->ntasks);
+
+    n = batch->next++;
+
+    if (batch->next == batch->ntasks) {
+        TAILQ_REMOVE(&pool->queue, batch, items);
+    }
+
+    pthread_mutex_unlock(&pool->lock);
+    batch->task(n, batch->data);
+    pthread_mutex_lock(&pool->lock);
+
+    if (++batch->done == batch->ntasks) {
+        pthread_cond_broadcast(&pool->cond);
+    }
+
+    return;
+}
+
+/*
+ * Worker thread.  Runs tasks from the newest batch in the queue, so
+ * the tasks of a nested run_parallel() call are finished before more
+ * outer tasks are started.  Returns when the outer batch is done.
+ */
+static void *worker(void *arg)
+{
+    struct pool *pool = arg;
+
+    assert(pool != NULL);
+    current_pool = pool;
+    pthread_mutex_lock(&pool->lock);
+
+    while (pool->top->done < pool->top->ntasks) {
+        if (TAILQ_EMPTY(&pool->queue)) {
+            pthread_cond_wait(&pool->cond, &pool->lock);
+        } else {
+            run_batch_task(pool, TAILQ_LAST(&pool->queue, batch_queue));
+        }
+    }
+
+    pthread_mutex_unlock(&pool->lock);
+    return NULL;
+}
+
+/*
+ * run_parallel() from a worker thread.  The tasks are queued for all
+ * of the pool's workers and this thread works on them as well until
+ * every one has finished.
+ */
+static void run_nested(struct pool *pool, const size_t ntasks, void (*task)(size_t, void *), void *data)
+{
+    struct batch batch;
+
+    assert(pool != NULL);
+
+    memset(&batch, 0, sizeof(batch));
+    batch.ntasks = ntasks;
+    batch.task = task;
+    batch.data = data;
+
+    pthread_mutex_lock(&pool->lock);
+    TAILQ_INSERT_TAIL(&pool->queue, &batch, items);
+    pthread_cond_broadcast(&pool->cond);
+
+    while (batch.next < batch.ntasks) {
+        run_batch_task(pool, &batch);
+    }
+
+    while (batch.done < batch.ntasks) {
+        pthread_cond_wait(&pool->cond, &pool->lock);
+    }
+
+    pthread_mutex_unlock(&pool->lock);
+    return;
+}
+
+/**
+ * @brief Run a set of independent tasks on a pool of threads.
+ *
+ * Calls task(i, data) once for each i from 0 to ntasks - 1 using up
+ * to nthreads worker threads and returns when all of them have
+ * finished.  Tasks are started in index order but may finish in any
+ * order, so anything a task produces should be stored by index and
+ * consumed by the caller afterwards.  With nthreads of 1 or fewer
+ * the tasks are run in the calling thread.  A task may call
+ * run_parallel() itself; the inner tasks are then shared out among
+ * the same worker threads, so there are never more than nthreads of
+ * them.
+ *
+ * @param nthreads Maximum number of worker threads.
+ * @param ntasks Number of tasks to run.
+ * @param task Function to run for each task index.
+ * @param data Pointer passed to each task.
+ */
+void run_parallel(const unsigned int nthreads, const size_t ntasks, void (*task)(size_t, void *), void *data)
+{
+    int r = 0;
+    size_t n = 0;
+    pthread_t *threads = NULL;
+    struct batch batch;
+    struct pool pool;
+
+    assert(task != NULL);
+
+    if (ntasks == 0) {
+        return;
+    }
+
+    if (current_pool != NULL && ntasks > 1) {
+        run_nested(current_pool, ntasks, task, data);
+        return;
+    }
+
+    if (nthreads <= 1 || ntasks == 1 || current_pool != NULL) {
+        for (n = 0; n < ntasks; n++) {
+            task(n, data);
+        }
+
+        return;
+    }
+
+    memset(&batch, 0, sizeof(batch));
+    batch.ntasks = ntasks;
+    batch.task = task;
+    batch.data = data;
+
+    memset(&pool, 0, sizeof(pool));
+    pool.top = &batch;
+    TAILQ_INIT(&pool.queue);
+    TAILQ_INSERT_TAIL(&pool.queue, &batch, items);
+
+    if ((r = pthread_mutex_init(&pool.lock, NULL)) != 0) {
+        errno = r;
+        err(RI_PROGRAM_ERROR, "pthread_mutex_init");
+    }
+
+    if ((r = pthread_cond_init(&pool.cond, NULL)) != 0) {
+        errno = r;
+        err(RI_PROGRAM_ERROR, "pthread_cond_init");
+    }
+
+    /* nested calls may have more tasks than this one, use every thread */
+    threads = calloc(nthreads, sizeof(*threads));
+    assert(threads != NULL);
+
+    for (n = 0; n < nthreads; n++) {
+        if ((r = pthread_create(&threads[n], NULL, worker, &pool)) != 0) {
+            errno = r;
+            err(RI_PROGRAM_ERROR, "pthread_create");
+        }
+    }
+
+    for (n = 0; n < nthreads; n++) {
+        if ((r = pthread_join(threads[n], NULL)) != 0) {
+            errno = r;
+            err(RI_PROGRAM_ERROR, "pthread_join");
+        }
+    }
+
+    free(threads);
+    pthread_cond_destroy(&pool.cond);
+    pthread_mutex_destroy(&pool.lock);
+
+    return;
+}
+
+/*
+ * run_parallel() task for the concurrent inspections.
+ */
+static void concurrent_job(size_t n, void *data)
+{
+    struct job **jobs = data;
+
+    assert(jobs != NULL);
+    run_job(jobs[n]->ri, jobs[n]);
+    return;
+}
+
+/*
+ * Print the verbose status line for an inspection.
+ */
+static void print_status(const char *name, const bool result)
+{
+    char *r = NULL;
+
+    xasprintf(&r, _("Running %s inspection..."), name);
+    assert(r != NULL);
+    printf("%-36s%5s\n", r, result ? _("pass") : _("FAIL"));
+    free(r);
+
+    return;
+}
+
+/**
+ * @brief Run all of the inspections selected in the struct rpminspect.
+ *
+ * With ri->jobs set to 1 the inspections run one after another in
+ * the order they appear in inspections[].  With more jobs, the
+ * inspections that can run concurrently are run by a pool of up to
+ * ri->jobs worker threads and the rest are run afterwards in the
+ * calling thread.  Results from each inspection are collected
+ * separately and appended to ri->results in inspections[] order, so
+ * the output is the same no matter how many jobs are used.
+ *
+ * @param ri Pointer to the struct rpminspect for the program.
+ * @return True if all inspections passed, false otherwise.
+ */
+bool run_inspections(struct rpminspect *ri)
+{
+    int i = 0;
+    size_t n = 0;
+    size_t njobs = 0;
+    size_t nconcurrent = 0;
+    bool result = true;
+    bool ires = true;
+    char *msg = NULL;
+    struct job *jobs = NULL;
+    struct job **concurrent = NULL;
+
+    assert(ri != NULL);
+
+    /* collect the selected inspections */
+    for (i = 0; inspections[i].name != NULL; i++) {
+        /* test not selected by user */
+        if (!(ri->tests & inspections[i].flag)) {
+            continue;
+        }
+
+        /* inspection requires before/after builds and we have one */
+        if (ri->before == NULL && !inspections[i].single_build) {
+            continue;
+        }
+
+        jobs = realloc(jobs, (njobs + 1) * sizeof(*jobs));
+        assert(jobs != NULL);
+        jobs[njobs].ri = ri;
+        jobs[njobs].inspection = &inspections[i];
+        jobs[njobs].results = NULL;
+        jobs[njobs].result = true;
+
+        if (inspections[i].concurrent) {
+            nconcurrent++;
+        }
+
+        njobs++;
+    }
+
+    /* examine each payload file once for all of the inspections */
+    if (njobs > 0 && inspection_file_classes(ri) != FILE_CLASS_NONE) {
+        classify_files(ri);
+    }
+
+    /* ELF objects opened by the inspections are shared through this */
+    set_elf_cache_size(ri->elf_cache_size);
+
+    /* the serial path, report progress as each inspection runs */
+    if (ri->jobs <= 1 || nconcurrent <= 1) {
+        for (n = 0; n < njobs; n++) {
+            if (ri->verbose) {
+                xasprintf(&msg, _("Running %s inspection..."), jobs[n].inspection->name);
+                assert(msg != NULL);
+                printf("%-36s", msg);
+                free(msg);
+            }
+
+            ires = jobs[n].inspection->driver(ri);
+
+            if (ri->verbose) {
+                printf("%5s\n", ires ? _("pass") : _("FAIL"));
+            }
+
+            if (!ires) {
+                result = false;
+            }
+        }
+
+        free(jobs);
+        free_elf_cache();
+        return result;
+    }
+
+    /* libxml2 must be initialized before threads use it */
+    xmlInitParser();
+
+    /* run the concurrent inspections on the worker pool */
+    concurrent = calloc(nconcurrent, sizeof(*concurrent));
+    assert(concurrent != NULL);
+    nconcurrent = 0;
+
+    for (n = 0; n < njobs; n++) {
+        if (jobs[n].inspection->concurrent) {
+            concurrent[nconcurrent++] = &jobs[n];
+        }
+    }
+
+    run_parallel(ri->jobs, nconcurrent, concurrent_job, concurrent);
+    free(concurrent);
+
+    /* inspections that cannot share the process run by themselves */
+    for (n = 0; n < njobs; n++) {
+        if (!jobs[n].inspection->concurrent) {
+            run_job(ri, &jobs[n]);
+        }
+    }
+
+    /* merge results in inspection order */
+    for (n = 0; n < njobs; n++) {
+        if (ri->verbose) {
+            print_status(jobs[n].inspection->name, jobs[n].result);
+        }
+
+        if (!jobs[n].result) {
+            result = false;
+        }
+
+        append_results(ri, jobs[n].results);
+        free_results(jobs[n].results);
+    }
+
+    free(jobs);
+    free_elf_cache();
+    return result;
+}
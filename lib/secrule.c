@@ -22,36 +22,105 @@
 #include <assert.h>
 #include <err.h>
 #include <fnmatch.h>
+#include <pthread.h>
 #include "rpminspect.h"
 
+/* protects the per-file secrule memo */
+static pthread_mutex_t secrule_lock = PTHREAD_MUTEX_INITIALIZER;
+
+/*
+ * Look for a matching entry in an index table entry.  Entries are in
+ * line order and only entries before the best match so far are
+ * considered, so the first matching line wins.
+ */
+static security_entry_t *find_secrule(const security_index_t *ientry, const rpmfile_entry_t *file, const char *name, const char *version, const char *release, security_entry_t *best)
+{
+    size_t i = 0;
+    security_entry_t *sentry = NULL;
+    int flags = FNM_NOESCAPE | FNM_PATHNAME;
+
+    if (ientry == NULL) {
+        return best;
+    }
+
+    for (i = 0; i < ientry->count; i++) {
+        sentry = ientry->entries[i];
+
+        if (best != NULL && sentry->order >= best->order) {
+            break;
+        }
+
+        if (!fnmatch(sentry->path, file->localpath, flags) &&
+            !fnmatch(sentry->pkg, name, flags) &&
+            !fnmatch(sentry->ver, version, flags) &&
+            !fnmatch(sentry->rel, release, flags)) {
+            return sentry;
+        }
+    }
+
+    return best;
+}
+
+/*
+ * Look for a matching entry among the entries for one package name
+ * key.  Only the entries whose path starts in one of the directories
+ * of the file's path can match.
+ */
+static security_entry_t *find_package_secrule(const security_index_t *pkgentry, const rpmfile_entry_t *file, const char *name, const char *version, const char *release, security_entry_t *best)
+{
+    const char *p = NULL;
+    security_index_t *ientry = NULL;
+
+    if (pkgentry == NULL) {
+        return best;
+    }
+
+    HASH_FIND(hh, pkgentry->paths, file->localpath, 0, ientry);
+    best = find_secrule(ientry, file, name, version, release, best);
+
+    for (p = strchr(file->localpath, '/'); p != NULL; p = strchr(p + 1, '/')) {
+        HASH_FIND(hh, pkgentry->paths, file->localpath, (size_t) (p - file->localpath) + 1, ientry);
+        best = find_secrule(ientry, file, name, version, release, best);
+    }
+
+    return best;
+}
+
 /*
  * Returns NULL if the path is not matched, which means the result
  * should be reported per default rules.  If it is found, the
  * security_entry_t for the match is returned and the caller can take
- * appropriate reporting action.
+ * appropriate reporting action.  The result is remembered in the
+ * file so the inspections asking about the same file do not repeat
+ * the search.
  */
-static security_entry_t *get_secrule_by_path(struct rpminspect *ri, const rpmfile_entry_t *file)
+static security_entry_t *get_secrule_by_path(struct rpminspect *ri, rpmfile_entry_t *file)
 {
     const char *name = NULL;
     const char *version = NULL;
     const char *release = NULL;
     security_entry_t *sentry = NULL;
-    int flags = FNM_NOESCAPE | FNM_PATHNAME;
-    int w = 0;
-    int x = 0;
-    int y = 0;
-    int z = 0;
+    security_index_t *pkgentry = NULL;
 
     assert(ri != NULL);
     assert(file != NULL);
     assert(file->rpm_header != NULL);
     assert(file->localpath != NULL);
 
-    /* initialize the security table */
-    if (!ri->security_initialized) {
-        if (!init_security(ri)) {
-            return NULL;
-        }
+    /* already looked up */
+    pthread_mutex_lock(&secrule_lock);
+
+    if (file->secrule_resolved) {
+        sentry = file->secrule;
+        pthread_mutex_unlock(&secrule_lock);
+        return sentry;
+    }
+
+    pthread_mutex_unlock(&secrule_lock);
+
+    /* initialize the security table, init_security() checks under its lock */
+    if (!init_security(ri)) {
+        return NULL;
     }
 
     /* get NVR which will be used in the matching loop */
@@ -59,21 +128,19 @@ static security_entry_t *get_secrule_by_path(struct rpminspect *ri, const rpmfil
     version = headerGetString(file->rpm_header, RPMTAG_VERSION);
     release = headerGetString(file->rpm_header, RPMTAG_RELEASE);
 
-    /* try to find a secrule */
-    TAILQ_FOREACH(sentry, ri->security, items) {
-        w = fnmatch(sentry->path, file->localpath, flags);
-        x = fnmatch(sentry->pkg, name, flags);
-        y = fnmatch(sentry->ver, version, flags);
-        z = fnmatch(sentry->rel, release, flags);
+    /* try to find a secrule for this package and for any package */
+    HASH_FIND_STR(ri->security_index, name, pkgentry);
+    sentry = find_package_secrule(pkgentry, file, name, version, release, NULL);
 
-        if (w == 0 && x == 0 && y == 0 && z == 0) {
-            /* match found */
-            return sentry;
-        }
-    }
+    HASH_FIND(hh, ri->security_index, "", 0, pkgentry);
+    sentry = find_package_secrule(pkgentry, file, name, version, release, sentry);
+
+    pthread_mutex_lock(&secrule_lock);
+    file->secrule = sentry;
+    file->secrule_resolved = true;
+    pthread_mutex_unlock(&secrule_lock);
 
-    /* no match found */
-    return NULL;
+    return sentry;
 }
 
 /*
@@ -81,7 +148,7 @@ static security_entry_t *get_secrule_by_path(struct rpminspect *ri, const rpmfil
  * distinct from the severity_t types in order to give the secrule
  * workflow more flexibility.
  */
-severity_t get_secrule_result_severity(struct rpminspect *ri, const rpmfile_entry_t *file, const int type)
+severity_t get_secrule_result_severity(struct rpminspect *ri, rpmfile_entry_t *file, const int type)
 {
     security_entry_t *sentry = NULL;
     secrule_t *srule = NULL;
@@ -69,9 +69,15 @@ static void usage(void)
     printf(_("                             (default: text)\n"));
     printf(_("  -t TAG, --threshold=TAG  Result threshold triggering exit\n"));
     printf(_("                           failure (default: VERIFY)\n"));
+    printf(_("  -j N, --jobs=N           Run up to N inspections at once\n"));
+    printf(_("                             (default: 1)\n"));
+    printf(_("  -J N, --download-jobs=N  Download up to N packages at once\n"));
+    printf(_("                             (default: %d)\n"), DEFAULT_DOWNLOAD_JOBS);
     printf(_("  -l, --list               List available tests and formats\n"));
     printf(_("  -w PATH, --workdir=PATH  Temporary directory to use\n"));
     printf(_("                             (default: %s)\n"), DEFAULT_WORKDIR);
+    printf(_("  -C PATH, --cache-dir=PATH\n"));
+    printf(_("                           Cache results and downloads in PATH\n"));
     printf(_("  -f, --fetch-only         Fetch builds only, do not perform inspections\n"));
     printf(_("                             (implies -k)\n"));
     printf(_("  -k, --keep               Do not remove the comparison working files\n"));
@@ -302,7 +308,7 @@ int main(int argc, char **argv)
     int idx = 0;
     int ret = RI_INSPECTION_SUCCESS;
     glob_t expand;
-    char *short_options = "c:p:T:E:a:r:no:F:lw:t:fkdDv\?V";
+    char *short_options = "c:p:T:E:a:r:no:F:lw:C:t:j:J:fkdDv\?V";
     struct option long_options[] = {
         { "config", required_argument, 0, 'c' },
         { "profile", required_argument, 0, 'p' },
@@ -315,7 +321,10 @@ int main(int argc, char **argv)
         { "output", required_argument, 0, 'o' },
         { "format", required_argument, 0, 'F' },
         { "workdir", required_argument, 0, 'w' },
+        { "cache-dir", required_argument, 0, 'C' },
         { "threshold", required_argument, 0, 't' },
+        { "jobs", required_argument, 0, 'j' },
+        { "download-jobs", required_argument, 0, 'J' },
         { "fetch-only", no_argument, 0, 'f' },
         { "keep", no_argument, 0, 'k' },
         { "debug", no_argument, 0, 'd' },
@@ -333,12 +342,16 @@ int main(int argc, char **argv)
     char *walk = NULL;
     char *token = NULL;
     char *workdir = NULL;
+    char *cachedir = NULL;
     char cwd[PATH_MAX];
     char *r = NULL;
     char *output = NULL;
     char *release = NULL;
     bool rebase_detection = true;
     char *threshold = NULL;
+    long int jobs = 1;
+    long int download_jobs = DEFAULT_DOWNLOAD_JOBS;
+    char *end = NULL;
     int formatidx = -1;
     bool fetch_only = false;
     bool keep = false;
@@ -363,7 +376,6 @@ int main(int argc, char **argv)
     struct result_params params;
     size_t cmdlen = 0;
     char *tail = NULL;
-    bool ires = false;
     string_list_t *diags = NULL;
     struct rpminspect *ri = NULL;
 
@@ -464,9 +476,30 @@ int main(int argc, char **argv)
                     workdir = realpath(optarg, NULL);
                 }
 
+                break;
+            case 'C':
+                cachedir = strdup(optarg);
                 break;
             case 't':
                 threshold = strdup(optarg);
+                break;
+            case 'j':
+                errno = 0;
+                jobs = strtol(optarg, &end, 10);
+
+                if (errno != 0 || *end != '\0' || jobs < 1 || jobs > INT_MAX) {
+                    errx(RI_PROGRAM_ERROR, _("*** Invalid number of jobs: `%s`."), optarg);
+                }
+
+                break;
+            case 'J':
+                errno = 0;
+                download_jobs = strtol(optarg, &end, 10);
+
+                if (errno != 0 || *end != '\0' || download_jobs < 1 || download_jobs > INT_MAX) {
+                    errx(RI_PROGRAM_ERROR, _("*** Invalid number of download jobs: `%s`."), optarg);
+                }
+
                 break;
             case 'f':
                 fetch_only = true;        /* -f implies -k */
@@ -586,6 +619,8 @@ int main(int argc, char **argv)
     /* various options from the command line or elsewhere */
     ri->progname = strdup(argv[0]);
     ri->verbose = verbose;
+    ri->jobs = jobs;
+    ri->download_jobs = download_jobs;
     ri->product_release = release;
     ri->threshold = getseverity(threshold);
     ri->rebase_detection = rebase_detection;
@@ -627,6 +662,12 @@ int main(int argc, char **argv)
         ri->workdir = strdup(r);
     }
 
+    /* Handle user-specified cache directory */
+    if (cachedir != NULL) {
+        free(ri->cache_dir);
+        ri->cache_dir = cachedir;
+    }
+
     /* Display the configuration settings for this run */
     if (dump_config) {
         dump_cfg(ri);
@@ -792,6 +833,14 @@ int main(int argc, char **argv)
     add_result_entry(&ri->results, &params);
     free(params.msg);
     free(params.details);
+    params.details = NULL;
+
+    /* report remote packages the selected inspections did not need */
+    if (ri->skipped_packages > 0) {
+        xasprintf(&params.msg, ngettext("Skipped downloading %zu package (%lld bytes) not needed by the selected inspections.", "Skipped downloading %zu packages (%lld bytes) not needed by the selected inspections.", ri->skipped_packages), ri->skipped_packages, ri->skipped_bytes);
+        add_result_entry(&ri->results, &params);
+        free(params.msg);
+    }
 
     /* make sure the worst result is set before running inspections */
     ri->worst_result = params.severity;
@@ -839,30 +888,7 @@ int main(int argc, char **argv)
             }
         }
 
-        for (i = 0; inspections[i].name != NULL; i++) {
-            /* test not selected by user */
-            if (!(ri->tests & inspections[i].flag)) {
-                continue;
-            }
-
-            /* inspection requires before/after builds and we have one */
-            if (ri->before == NULL && !inspections[i].single_build) {
-                continue;
-            }
-
-            if (verbose) {
-                xasprintf(&r, _("Running %s inspection..."), inspections[i].name);
-                assert(r != NULL);
-                printf("%-36s", r);
-                free(r);
-            }
-
-            ires = inspections[i].driver(ri);
-
-            if (verbose) {
-                printf("%5s\n", ires ? _("pass") : _("FAIL"));
-            }
-        }
+        (void) run_inspections(ri);
 
         /* output the results */
         if (formatidx == -1) {
@@ -891,6 +917,7 @@ int main(int argc, char **argv)
         }
     }
 
+    close_cache(ri);
     free_rpminspect(ri);
     rpmFreeMacros(NULL);
     rpmFreeRpmrc();
@@ -0,0 +1,150 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <https://www.gnu.org/licenses/>.
+ */
+
+/*
+ * Benchmark for the bad words scanner.  Scans the same set of package
+ * strings with bad word lists of increasing size and reports the time
+ * taken to compile each list and scan the strings, next to the time
+ * a strcasestr(3) call per bad word takes.  The scan time should stay
+ * about the same as the list grows while the strcasestr(3) time grows
+ * with the list.  Compile time grows linearly with the list.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include "rpminspect.h"
+
+#define NUM_STRINGS 2000
+#define STRING_LEN 240
+#define MIN_WORDS 1000
+#define MAX_WORDS 32000
+
+/* milliseconds since the start time */
+static double elapsed(const struct timespec *start)
+{
+    struct timespec now;
+
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return ((now.tv_sec - start->tv_sec) * 1000.0) + ((now.tv_nsec - start->tv_nsec) / 1000000.0);
+}
+
+/* random lower case word of 4 to 10 letters */
+static void random_word(char *word)
+{
+    int i = 0;
+    int len = 4 + (rand() % 7);
+
+    for (i = 0; i < len; i++) {
+        word[i] = 'a' + (rand() % 26);
+    }
+
+    word[len] = '\0';
+    return;
+}
+
+/* the baseline, one strcasestr(3) per bad word */
+static bool strcasestr_scan(const char *s, const string_list_t *badwords)
+{
+    string_entry_t *badword = NULL;
+
+    TAILQ_FOREACH(badword, badwords, items) {
+        if (strcasestr(s, badword->data) != NULL) {
+            return true;
+        }
+    }
+
+    return false;
+}
+
+int main(void)
+{
+    int i = 0;
+    int j = 0;
+    size_t nwords = 0;
+    size_t found = 0;
+    char word[16];
+    char **strings = NULL;
+    string_list_t *badwords = NULL;
+    badwords_t *bw = NULL;
+    struct timespec start;
+    double compile_ms = 0;
+    double scan_ms = 0;
+    double baseline_ms = 0;
+
+    srand(1);
+
+    /* package strings made of words that are not in the lists */
+    strings = calloc(NUM_STRINGS, sizeof(*strings));
+
+    for (i = 0; i < NUM_STRINGS; i++) {
+        strings[i] = calloc(1, STRING_LEN + 16);
+
+        while (strlen(strings[i]) < STRING_LEN) {
+            random_word(word);
+            word[0] = 'A' + (rand() % 26);
+            strcat(strings[i], word);
+            strcat(strings[i], " ");
+        }
+    }
+
+    printf("%8s %12s %12s %15s %8s\n", "words", "compile ms", "scan ms", "strcasestr ms", "matches");
+
+    for (nwords = MIN_WORDS; nwords <= MAX_WORDS; nwords *= 2) {
+        /* the bad words, long enough to rarely appear by chance */
+        for (j = list_len(badwords); (size_t) j < nwords; j++) {
+            random_word(word);
+            strcat(word, "zq");
+            badwords = list_add(badwords, word);
+        }
+
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        bw = compile_badwords(badwords);
+        compile_ms = elapsed(&start);
+
+        found = 0;
+        clock_gettime(CLOCK_MONOTONIC, &start);
+
+        for (i = 0; i < NUM_STRINGS; i++) {
+            found += scan_bad_words(strings[i], bw);
+        }
+
+        scan_ms = elapsed(&start);
+
+        clock_gettime(CLOCK_MONOTONIC, &start);
+
+        for (i = 0; i < NUM_STRINGS; i++) {
+            (void) strcasestr_scan(strings[i], badwords);
+        }
+
+        baseline_ms = elapsed(&start);
+
+        printf("%8zu %12.2f %12.2f %15.2f %8zu\n", nwords, compile_ms, scan_ms, baseline_ms, found);
+        free_badwords(bw);
+    }
+
+    list_free(badwords, free);
+
+    for (i = 0; i < NUM_STRINGS; i++) {
+        free(strings[i]);
+    }
+
+    free(strings);
+    return EXIT_SUCCESS;
+}
@@ -90,6 +90,31 @@ void test_has_bad_word(void) {
     RI_ASSERT(has_bad_word("bebazzled", forbidden_words) == false);
 }
 
+void test_scan_bad_words(void) {
+    badwords_t *bw = NULL;
+
+    bw = compile_badwords(forbidden_words);
+    RI_ASSERT(bw != NULL);
+
+    RI_ASSERT(scan_bad_words("FOO", bw) == true);
+    RI_ASSERT(scan_bad_words("the Qux package", bw) == true);
+    RI_ASSERT(scan_bad_words("bazzing", bw) == true);
+    RI_ASSERT(scan_bad_words("motherbaz", bw) == true);
+    RI_ASSERT(scan_bad_words("bebazzled", bw) == false);
+    RI_ASSERT(scan_bad_words("supermonkeyball", bw) == false);
+    RI_ASSERT(scan_bad_words("", bw) == false);
+
+    /* only the first occurrence of a bad word is checked */
+    RI_ASSERT(scan_bad_words("bebazzled bazzing", bw) == false);
+
+    free_badwords(bw);
+
+    /* an empty list matches nothing */
+    bw = compile_badwords(NULL);
+    RI_ASSERT(scan_bad_words("foo", bw) == false);
+    free_badwords(bw);
+}
+
 CU_pSuite get_suite(void) {
     CU_pSuite pSuite = NULL;
 
@@ -104,5 +129,9 @@ CU_pSuite get_suite(void) {
         return NULL;
     }
 
+    if (CU_add_test(pSuite, "test scan_bad_words()", test_scan_bad_words) == NULL) {
+        return NULL;
+    }
+
     return pSuite;
 }
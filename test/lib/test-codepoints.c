@@ -0,0 +1,239 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <https://www.gnu.org/licenses/>.
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <CUnit/Basic.h>
+#include "rpminspect.h"
+
+#include "test-main.h"
+
+/* U+202E RIGHT-TO-LEFT OVERRIDE and U+200B ZERO WIDTH SPACE */
+#define RLO "\xe2\x80\xae"
+#define ZWSP "\xe2\x80\x8b"
+
+/* the forbidden code points found by the last scan */
+#define MAX_HITS 8
+
+struct hit {
+    UChar32 c;
+    long int linenum;
+    long int colnum;
+};
+
+static struct hit hits[MAX_HITS];
+static size_t nhits = 0;
+
+codepoints_t *codepoints = NULL;
+
+static void collect_hit(const UChar32 c, const long int linenum, const long int colnum, __attribute__((unused)) void *cbdata)
+{
+    if (nhits < MAX_HITS) {
+        hits[nhits].c = c;
+        hits[nhits].linenum = linenum;
+        hits[nhits].colnum = colnum;
+    }
+
+    nhits++;
+    return;
+}
+
+static bool scan(const char *s, const size_t len)
+{
+    nhits = 0;
+    memset(hits, 0, sizeof(hits));
+    return scan_codepoints(codepoints, (const unsigned char *) s, len, collect_hit, NULL);
+}
+
+int init_test_codepoints(void) {
+    UChar32_list_t *forbidden = NULL;
+    UChar32_entry_t *entry = NULL;
+
+    if ((forbidden = malloc(sizeof(*forbidden))) == NULL) {
+        return -1;
+    }
+
+    TAILQ_INIT(forbidden);
+
+    if ((entry = calloc(1, sizeof(*entry))) == NULL) {
+        return -1;
+    }
+
+    entry->data = 0x202E;
+    TAILQ_INSERT_TAIL(forbidden, entry, items);
+
+    if ((entry = calloc(1, sizeof(*entry))) == NULL) {
+        return -1;
+    }
+
+    entry->data = 0x200B;
+    TAILQ_INSERT_TAIL(forbidden, entry, items);
+
+    codepoints = compile_codepoints(forbidden);
+
+    while (!TAILQ_EMPTY(forbidden)) {
+        entry = TAILQ_FIRST(forbidden);
+        TAILQ_REMOVE(forbidden, entry, items);
+        free(entry);
+    }
+
+    free(forbidden);
+    return 0;
+}
+
+int clean_test_codepoints(void) {
+    free_codepoints(codepoints);
+    return 0;
+}
+
+void test_scan_codepoints(void) {
+    const char *s = NULL;
+
+    /* clean text */
+    s = "int main(void) {\n    return 0;\n}\n";
+    RI_ASSERT(scan(s, strlen(s)) == true);
+    RI_ASSERT(nhits == 0);
+
+    /* one forbidden code point */
+    s = "abc" RLO "def\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].c == 0x202E);
+    RI_ASSERT(hits[0].linenum == 1);
+    RI_ASSERT(hits[0].colnum == 3);
+
+    /* reported in list order at the first occurrence on the line */
+    s = ZWSP "a" RLO "b" ZWSP "\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 2);
+    RI_ASSERT(hits[0].c == 0x202E);
+    RI_ASSERT(hits[0].colnum == 2);
+    RI_ASSERT(hits[1].c == 0x200B);
+    RI_ASSERT(hits[1].colnum == 0);
+}
+
+void test_scan_codepoints_line_endings(void) {
+    const char *s = NULL;
+
+    /* CR LF is a single line ending */
+    s = "one\r\ntwo\r\nab" RLO "\r\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].linenum == 3);
+    RI_ASSERT(hits[0].colnum == 2);
+
+    /* a lone CR ends a line */
+    s = "one\rtwo\r" RLO;
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].linenum == 3);
+    RI_ASSERT(hits[0].colnum == 0);
+
+    /* U+2028 LINE SEPARATOR and U+0085 NEXT LINE end a line */
+    s = "one\xe2\x80\xa8two\xc2\x85x" RLO;
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].linenum == 3);
+    RI_ASSERT(hits[0].colnum == 1);
+
+    /* the same code point on two lines is reported twice */
+    s = RLO "\n" RLO;
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 2);
+    RI_ASSERT(hits[0].linenum == 1);
+    RI_ASSERT(hits[1].linenum == 2);
+}
+
+void test_scan_codepoints_columns(void) {
+    const char *s = NULL;
+
+    /* U+1F600 is two UTF-16 code units */
+    s = "a\xf0\x9f\x98\x80" RLO "\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].colnum == 3);
+
+    /* U+00E9 is one UTF-16 code unit but two bytes */
+    s = "\xc3\xa9" RLO "\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].colnum == 1);
+}
+
+void test_scan_codepoints_invalid_utf8(void) {
+    const char *s = NULL;
+
+    /* an invalid byte is one U+FFFD and does not hide what follows */
+    s = "a\xff" RLO "\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].colnum == 2);
+
+    /* a truncated sequence is one U+FFFD up to the byte that does not fit */
+    s = "\xe2\x80" RLO "\n";
+    RI_ASSERT(scan(s, strlen(s)) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].colnum == 1);
+
+    /* a truncated sequence at the end of the data */
+    s = "abc\xe2\x80";
+    RI_ASSERT(scan(s, strlen(s)) == true);
+}
+
+void test_scan_codepoints_nul(void) {
+    /* a NUL byte is an ordinary character on the line */
+    const char s[] = "a\0b" RLO "\n";
+
+    RI_ASSERT(scan(s, sizeof(s) - 1) == false);
+    RI_ASSERT(nhits == 1);
+    RI_ASSERT(hits[0].linenum == 1);
+    RI_ASSERT(hits[0].colnum == 3);
+}
+
+CU_pSuite get_suite(void) {
+    CU_pSuite pSuite = NULL;
+
+    /* add a suite to the registry */
+    pSuite = CU_add_suite("codepoints", init_test_codepoints, clean_test_codepoints);
+    if (pSuite == NULL) {
+        return NULL;
+    }
+
+    /* add tests to the suite */
+    if (CU_add_test(pSuite, "test scan_codepoints()", test_scan_codepoints) == NULL) {
+        return NULL;
+    }
+
+    if (CU_add_test(pSuite, "test scan_codepoints() line endings", test_scan_codepoints_line_endings) == NULL) {
+        return NULL;
+    }
+
+    if (CU_add_test(pSuite, "test scan_codepoints() columns", test_scan_codepoints_columns) == NULL) {
+        return NULL;
+    }
+
+    if (CU_add_test(pSuite, "test scan_codepoints() invalid UTF-8", test_scan_codepoints_invalid_utf8) == NULL) {
+        return NULL;
+    }
+
+    if (CU_add_test(pSuite, "test scan_codepoints() NUL", test_scan_codepoints_nul) == NULL) {
+        return NULL;
+    }
+
+    return pSuite;
+}
@@ -0,0 +1,185 @@
+/*
+ * Copyright © 2021 Red Hat, Inc.
+ * Author(s): David Cantrell <dcantrell@redhat.com>
+ *
+ * This program is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this program.  If not, see <https://www.gnu.org/licenses/>.
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+#include <fcntl.h>
+#include <unistd.h>
+#include <CUnit/Basic.h>
+#include "rpminspect.h"
+
+#include "test-main.h"
+
+/* two ELF objects built for test-inspect_elf */
+#define ELF_A _BUILDDIR_"/execstack"
+#define ELF_B _BUILDDIR_"/noexecstack"
+
+/* a file that is not an ELF object */
+static char text[] = "/tmp/test-elfcache.XXXXXX";
+
+/* true if fd is an open file descriptor */
+static bool fd_open(const int fd)
+{
+    return fcntl(fd, F_GETFD) != -1 || errno != EBADF;
+}
+
+int init_test_elfcache(void) {
+    int fd = -1;
+
+    if ((fd = mkstemp(text)) == -1) {
+        return -1;
+    }
+
+    if (write(fd, "not an ELF object\n", 18) != 18) {
+        close(fd);
+        return -1;
+    }
+
+    close(fd);
+    return 0;
+}
+
+int clean_test_elfcache(void) {
+    free_elf_cache();
+    unlink(text);
+    return 0;
+}
+
+void test_borrow_elf(void) {
+    int fd = -1;
+    int again_fd = -1;
+    Elf *elf = NULL;
+    Elf *again = NULL;
+
+    set_elf_cache_size(DEFAULT_ELF_CACHE_SIZE);
+
+    /* not extracted, not ELF, or not the kind asked for */
+    RI_ASSERT_PTR_NULL(borrow_elf(NULL, ELF_K_ELF, &fd));
+    RI_ASSERT_PTR_NULL(borrow_elf(text, ELF_K_ELF, &fd));
+    RI_ASSERT_PTR_NULL(borrow_elf(text, ELF_K_ELF, &fd));
+    RI_ASSERT_PTR_NULL(borrow_elf(ELF_A, ELF_K_AR, &fd));
+
+    /* the handle stays open and is lent again once it is returned */
+    elf = borrow_elf(ELF_A, ELF_K_ELF, &fd);
+    RI_ASSERT_PTR_NOT_NULL(elf);
+    RI_ASSERT_EQUAL(elf_kind(elf), ELF_K_ELF);
+    return_elf(elf, fd);
+    RI_ASSERT_TRUE(fd_open(fd));
+
+    again = borrow_elf(ELF_A, ELF_K_ELF, &again_fd);
+    RI_ASSERT_PTR_NOT_NULL(again);
+    RI_ASSERT_TRUE(again == elf);
+    RI_ASSERT_EQUAL(again_fd, fd);
+    return_elf(again, again_fd);
+
+    free_elf_cache();
+    return;
+}
+
+void test_borrow_elf_on_loan(void) {
+    int fd = -1;
+    int own_fd = -1;
+    Elf *elf = NULL;
+    Elf *own = NULL;
+
+    set_elf_cache_size(DEFAULT_ELF_CACHE_SIZE);
+
+    /* a second borrower gets its own handle */
+    elf = borrow_elf(ELF_A, ELF_K_ELF, &fd);
+    RI_ASSERT_PTR_NOT_NULL(elf);
+    own = borrow_elf(ELF_A, ELF_K_ELF, &own_fd);
+    RI_ASSERT_PTR_NOT_NULL(own);
+    RI_ASSERT_TRUE(own != elf);
+    RI_ASSERT_NOT_EQUAL(own_fd, fd);
+
+    /* which is closed when it is returned, the cached one is not */
+    return_elf(own, own_fd);
+    RI_ASSERT_FALSE(fd_open(own_fd));
+    return_elf(elf, fd);
+    RI_ASSERT_TRUE(fd_open(fd));
+
+    free_elf_cache();
+    RI_ASSERT_FALSE(fd_open(fd));
+    return;
+}
+
+void test_set_elf_cache_size(void) {
+    int a_fd = -1;
+    int b_fd = -1;
+    Elf *a = NULL;
+    Elf *b = NULL;
+
+    set_elf_cache_size(2);
+
+    a = borrow_elf(ELF_A, ELF_K_ELF, &a_fd);
+    RI_ASSERT_PTR_NOT_NULL(a);
+    return_elf(a, a_fd);
+    b = borrow_elf(ELF_B, ELF_K_ELF, &b_fd);
+    RI_ASSERT_PTR_NOT_NULL(b);
+    return_elf(b, b_fd);
+    RI_ASSERT_TRUE(fd_open(a_fd));
+    RI_ASSERT_TRUE(fd_open(b_fd));
+
+    /* the least recently used handle is closed first */
+    set_elf_cache_size(1);
+    RI_ASSERT_FALSE(fd_open(a_fd));
+    RI_ASSERT_TRUE(fd_open(b_fd));
+
+    /* a handle on loan is closed when it comes back */
+    b = borrow_elf(ELF_B, ELF_K_ELF, &b_fd);
+    RI_ASSERT_PTR_NOT_NULL(b);
+    set_elf_cache_size(0);
+    RI_ASSERT_TRUE(fd_open(b_fd));
+    return_elf(b, b_fd);
+    RI_ASSERT_FALSE(fd_open(b_fd));
+
+    /* with no cache every borrower gets its own handle */
+    a = borrow_elf(ELF_A, ELF_K_ELF, &a_fd);
+    RI_ASSERT_PTR_NOT_NULL(a);
+    return_elf(a, a_fd);
+    RI_ASSERT_FALSE(fd_open(a_fd));
+
+    free_elf_cache();
+    return;
+}
+
+CU_pSuite get_suite(void) {
+    CU_pSuite pSuite = NULL;
+
+    /* add a suite to the registry */
+    pSuite = CU_add_suite("elfcache", init_test_elfcache, clean_test_elfcache);
+    if (pSuite == NULL) {
+        return NULL;
+    }
+
+    /* add tests to the suite */
+    if (CU_add_test(pSuite, "test borrow_elf()", test_borrow_elf) == NULL) {
+        return NULL;
+    }
+
+    if (CU_add_test(pSuite, "test borrow_elf() on loan", test_borrow_elf_on_loan) == NULL) {
+        return NULL;
+    }
+
+    if (CU_add_test(pSuite, "test set_elf_cache_size()", test_set_elf_cache_size) == NULL) {
+        return NULL;
+    }
+
+    return pSuite;
+}
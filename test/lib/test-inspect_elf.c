@@ -233,6 +233,45 @@ void test_has_bind_now(void) {
     return;
 }
 
+void test_get_elf_summary(void) {
+    int fd;
+    Elf *elf;
+    rpmfile_entry_t *file;
+    elf_summary_t *summary;
+
+    file = calloc(1, sizeof(*file));
+    RI_ASSERT_PTR_NOT_NULL(file);
+
+    fd = open(_BUILDDIR_"/execstack", O_RDONLY);
+    RI_ASSERT_NOT_EQUAL(fd, -1);
+
+    elf = elf_begin(fd, ELF_C_READ_MMAP_PRIVATE, NULL);
+    RI_ASSERT_PTR_NOT_NULL(elf);
+
+    /* the summary should agree with the individual checks */
+    summary = get_elf_summary(file, elf);
+    RI_ASSERT_PTR_NOT_NULL(summary);
+    RI_ASSERT_EQUAL(summary->type, get_elf_type(elf));
+    RI_ASSERT_EQUAL(summary->execstack, is_execstack_present(elf));
+    RI_ASSERT_EQUAL(summary->execstack_flags, get_execstack_flags(elf));
+    RI_ASSERT_EQUAL(summary->executable, has_executable_program(elf));
+    RI_ASSERT_EQUAL(summary->textrel, has_textrel(elf));
+    RI_ASSERT_EQUAL(summary->relro, has_relro(elf));
+    RI_ASSERT_EQUAL(summary->bind_now, has_bind_now(elf));
+    RI_ASSERT_PTR_NOT_NULL(summary->sections);
+
+    /* the summary is cached in the file entry */
+    RI_ASSERT(get_elf_summary(file, elf) == summary);
+
+    RI_ASSERT_EQUAL(elf_end(elf), 0);
+    RI_ASSERT_EQUAL(close(fd), 0);
+
+    free_elf_summary(file->elf_summary);
+    free(file);
+
+    return;
+}
+
 void test_get_fortified_symbols(void) {
     /* XXX */
     return;
@@ -283,6 +322,7 @@ CU_pSuite get_suite(void) {
         CU_add_test(pSuite, "test has_textrel()", test_has_textrel) == NULL ||
         CU_add_test(pSuite, "test has_relro()", test_has_relro) == NULL ||
         CU_add_test(pSuite, "test has_bind_now()", test_has_bind_now) == NULL ||
+        CU_add_test(pSuite, "test get_elf_summary()", test_get_elf_summary) == NULL ||
         CU_add_test(pSuite, "test get_fortified_symbols()", test_get_fortified_symbols) == NULL ||
         CU_add_test(pSuite, "test get_fortifiable_symbols()", test_get_fortifiable_symbols) == NULL ||
         CU_add_test(pSuite, "test is_pic_ok()", test_is_pic_ok) == NULL) {
@@ -0,0 +1,113 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import subprocess
+import tempfile
+
+import rpmfluff
+
+from baseclass import TestCompareRPMs
+
+invalid_xml = """<?xml version='1.0'?>
+<greeting>Hello world</greeting>
+<nonClosingElement variable="value">
+"""
+
+
+# Run the xml inspection twice with a cache directory and verify the
+# second run replays the same results the first run recorded.
+class CompareRPMsCachedResults(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_installed_file(
+                "/usr/share/data/invalid.xml",
+                rpmfluff.SourceFile("invalid.xml", invalid_xml),
+            )
+
+    def run_cached(self, arch, cachedir):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-T",
+            "xml",
+            "-o",
+            self.outputfile,
+            "-C",
+            cachedir,
+            self.before_rpm.get_built_rpm(arch),
+            self.after_rpm.get_built_rpm(arch),
+        ]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        with open(self.outputfile) as f:
+            results = json.loads(f.read().encode("utf-8"))
+
+        return (self.p.returncode, results["xml"])
+
+    # Change the message of every recorded result so a replayed entry
+    # can be told apart from a fresh run of the inspection.
+    def edit_entries(self, cachedir, message):
+        edited = 0
+
+        for d, s, fs in os.walk(os.path.join(cachedir, "results")):
+            for f in fs:
+                path = os.path.join(d, f)
+
+                with open(path) as entry:
+                    data = json.load(entry)
+
+                for r in data["results"]:
+                    r["msg"] = message
+                    edited += 1
+
+                with open(path, "w") as entry:
+                    json.dump(data, entry)
+
+        return edited
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        with tempfile.TemporaryDirectory() as cachedir:
+            for a in self.before_rpm.get_build_archs():
+                first = self.run_cached(a, cachedir)
+                entries = [f for (d, s, fs) in os.walk(cachedir) for f in fs]
+                self.assertNotEqual(entries, [])
+
+                second = self.run_cached(a, cachedir)
+                self.assertEqual(first, second)
+                self.assertEqual(first[1][0]["result"], "BAD")
+
+                # the third run has to report what the cache holds
+                self.assertGreater(self.edit_entries(cachedir, "replayed"), 0)
+                third = self.run_cached(a, cachedir)
+                self.assertEqual(third[0], first[0])
+                self.assertIn("replayed", [r.get("message") for r in third[1]])
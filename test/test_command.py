@@ -52,3 +52,18 @@ class RpminspectSegv(RequiresRpminspect):
         )
         p.communicate()
         self.assertNotEqual(p.returncode, 139)
+
+
+# Verify invalid --jobs values are rejected
+class RpminspectInvalidJobs(RequiresRpminspect):
+    def runTest(self):
+        RequiresRpminspect.configFile(self)
+
+        for jobs in ["0", "-2", "four"]:
+            p = subprocess.Popen(
+                [self.rpminspect, "-j", jobs, "42"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            p.communicate()
+            self.assertEqual(p.returncode, 2)
@@ -0,0 +1,150 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import shutil
+import subprocess
+
+import rpmfluff
+
+from baseclass import TestCompareRPMs
+
+# the shared file, its contents are easy to find in an uncompressed
+# payload and the replacement is the same length
+DATA_PATH = "/usr/share/vaporware/data.txt"
+DATA = "vaporware " + "A" * 64 + "\n"
+OTHER_DATA = "vaporware " + "B" * 64 + "\n"
+
+
+# Base class for the payload sharing tests.  Both builds ship the same
+# file and rpminspect keeps its working directory so the extracted
+# files can be examined.
+class DedupTestCase(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+        self.workdir = None
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            # an uncompressed payload so the test can edit file contents
+            pkg.header += "\n%define _binary_payload w0.ufdio\n"
+            pkg.add_installed_file(DATA_PATH, rpmfluff.SourceFile("data.txt", DATA))
+
+    def run_inspect(self, arch, tests):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-T",
+            tests,
+            "-k",
+            "-o",
+            self.outputfile,
+            self.before_rpm.get_built_rpm(arch),
+            self.after_rpm.get_built_rpm(arch),
+        ]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        for line in self.out.decode("utf-8").splitlines():
+            if line.startswith("Keeping working directory: "):
+                self.workdir = line.split(": ", 1)[1].strip()
+
+        with open(self.outputfile) as f:
+            return json.loads(f.read().encode("utf-8"))
+
+    # Return the extracted copies of DATA_PATH, before build first.
+    def extracted_files(self):
+        found = []
+
+        for (dirpath, dirnames, filenames) in os.walk(self.workdir):
+            path = os.path.join(dirpath, os.path.basename(DATA_PATH))
+
+            if path.endswith(DATA_PATH) and os.path.isfile(path):
+                found.append(path)
+
+        found.sort(key=lambda p: "/after/" in p[len(self.workdir) :])
+        self.assertEqual(len(found), 2)
+        return found
+
+    def tearDown(self):
+        if self.workdir is not None:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        super().tearDown()
+
+
+# An identical file in both builds is kept once on disk and is not
+# reported as changed.
+class IdenticalFileSharedCompareRPMs(DedupTestCase):
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            results = self.run_inspect(a, "changedfiles")
+            self.assertEqual(self.p.returncode, 0)
+            self.assertEqual(
+                [r["result"] for r in results["changedfiles"]], ["OK"]
+            )
+
+            (before, after) = self.extracted_files()
+            self.assertEqual(os.stat(before).st_ino, os.stat(after).st_ino)
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
+
+
+# The after build's header digest says the file is the same as the
+# before build's, but the payload has different contents.  Each build
+# must keep its own contents.
+class MismatchedDigestNotSharedCompareRPMs(DedupTestCase):
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            pkg = self.after_rpm.get_built_rpm(a)
+
+            with open(pkg, "rb") as f:
+                data = f.read()
+
+            self.assertEqual(data.count(DATA.encode("utf-8")), 1)
+
+            with open(pkg, "wb") as f:
+                f.write(data.replace(DATA.encode("utf-8"), OTHER_DATA.encode("utf-8")))
+
+            self.run_inspect(a, "changedfiles")
+
+            (before, after) = self.extracted_files()
+            self.assertNotEqual(os.stat(before).st_ino, os.stat(after).st_ino)
+
+            with open(before) as f:
+                self.assertEqual(f.read(), DATA)
+
+            with open(after) as f:
+                self.assertEqual(f.read(), OTHER_DATA)
+
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
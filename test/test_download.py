@@ -0,0 +1,190 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import functools
+import http.server
+import json
+import os
+import re
+import struct
+import subprocess
+import threading
+
+import rpmfluff
+
+from baseclass import TestCompareRPMs
+
+# size of the RPM lead and of the intro to each header structure
+RPM_LEAD_SIZE = 96
+RPM_HEADER_INTRO_SIZE = 16
+
+
+# Return the offset where the payload starts in an RPM package, which
+# is how much of it a header-only download needs.
+def header_end(pkg):
+    with open(pkg, "rb") as f:
+        data = f.read()
+
+    offset = RPM_LEAD_SIZE
+
+    for sig in [True, False]:
+        (il, dl) = struct.unpack(">II", data[offset + 8 : offset + 16])
+        size = RPM_HEADER_INTRO_SIZE + (il * 16) + dl
+
+        # the signature header is padded to an 8 byte boundary
+        if sig:
+            size += (8 - (size % 8)) % 8
+
+        offset += size
+
+    return offset
+
+
+# SimpleHTTPRequestHandler always sends the whole file.  This one
+# answers a Range request with just the bytes asked for and records
+# the size of every response in the server's transferred list.
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        m = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+
+        if not os.path.isfile(path):
+            return super().do_GET()
+
+        if not m:
+            self.server.transferred.append(os.path.getsize(path))
+            return super().do_GET()
+
+        with open(path, "rb") as f:
+            data = f.read()
+
+        first = int(m.group(1))
+        last = len(data) - 1
+
+        if m.group(2):
+            last = min(int(m.group(2)), last)
+
+        if first > last:
+            self.send_error(416)
+            return
+
+        body = data[first : last + 1]
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", "bytes %d-%d/%d" % (first, last, len(data)))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.transferred.append(len(body))
+
+
+# Serve the before and after packages over HTTP and verify inspecting
+# them by URL with several download jobs gives the same results as
+# inspecting the local files.  Inspections that need only the package
+# headers must not transfer any of the payload.
+class CompareRPMsDownloadSameResults(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_installed_file(
+                "/usr/share/vaporware/data.xml",
+                rpmfluff.SourceFile("data.xml", "<data><item/></data>\n"),
+            )
+
+    def run_inspect(self, before, after, tests):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-T",
+            tests,
+            "-o",
+            self.outputfile,
+            "-J",
+            "2",
+            before,
+            after,
+        ]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        with open(self.outputfile) as f:
+            results = json.loads(f.read().encode("utf-8"))
+
+        # the command line is reported in the diagnostics
+        results.pop("diagnostics", None)
+        return (self.p.returncode, list(results.items()))
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            before = self.before_rpm.get_built_rpm(a)
+            after = self.after_rpm.get_built_rpm(a)
+
+            # the packages have the same file name, so serve each
+            # from its own build directory
+            servers = []
+            urls = []
+
+            for pkg in [before, after]:
+                handler = functools.partial(
+                    RangeRequestHandler,
+                    directory=os.path.dirname(pkg),
+                )
+                server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+                server.transferred = []
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                servers.append(server)
+                urls.append(
+                    "http://127.0.0.1:%d/%s"
+                    % (server.server_address[1], os.path.basename(pkg))
+                )
+
+            try:
+                # xml reads the payload, license needs only the header
+                for tests in ["xml", "license"]:
+                    for server in servers:
+                        server.transferred = []
+
+                    local = self.run_inspect(before, after, tests)
+                    remote = self.run_inspect(urls[0], urls[1], tests)
+                    self.assertEqual(local, remote)
+
+                    for (server, pkg) in zip(servers, [before, after]):
+                        if tests == "xml":
+                            expected = os.path.getsize(pkg)
+                        else:
+                            expected = header_end(pkg)
+                            self.assertLess(expected, os.path.getsize(pkg))
+
+                        # the largest response is the whole package or
+                        # just the headers
+                        self.assertEqual(max(server.transferred), expected)
+            finally:
+                for server in servers:
+                    server.shutdown()
+                    server.server_close()
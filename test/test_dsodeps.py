@@ -0,0 +1,109 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from baseclass import TestCompareRPMs, TestCompareKoji
+
+# library installed by rpmfluff's add_simple_library()
+LIBRARY = "libfoo.so"
+
+
+#############################################################
+# Same DT_NEEDED entries in the before and after build (OK) #
+#############################################################
+class SameDTNeededCompareRPMs(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_simple_library()
+            pkg.section_build += "patchelf --add-needed libm.so.6 %s\n" % LIBRARY
+
+        self.inspection = "dsodeps"
+        self.result = "OK"
+        self.waiver_auth = "Not Waivable"
+
+
+class SameDTNeededCompareKoji(TestCompareKoji):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_simple_library()
+            pkg.section_build += "patchelf --add-needed libm.so.6 %s\n" % LIBRARY
+
+        self.inspection = "dsodeps"
+        self.result = "OK"
+        self.waiver_auth = "Not Waivable"
+
+
+#####################################################
+# DT_NEEDED entry added in the after build (VERIFY) #
+#####################################################
+class AddedDTNeededCompareRPMs(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        self.before_rpm.add_simple_library()
+        self.after_rpm.add_simple_library()
+        self.after_rpm.section_build += "patchelf --add-needed libm.so.6 %s\n" % LIBRARY
+
+        self.inspection = "dsodeps"
+        self.result = "VERIFY"
+        self.waiver_auth = "Anyone"
+
+
+class AddedDTNeededCompareKoji(TestCompareKoji):
+    def setUp(self):
+        super().setUp()
+
+        self.before_rpm.add_simple_library()
+        self.after_rpm.add_simple_library()
+        self.after_rpm.section_build += "patchelf --add-needed libm.so.6 %s\n" % LIBRARY
+
+        self.inspection = "dsodeps"
+        self.result = "VERIFY"
+        self.waiver_auth = "Anyone"
+
+
+#######################################################
+# DT_NEEDED entry removed in the after build (VERIFY) #
+#######################################################
+class RemovedDTNeededCompareRPMs(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        self.before_rpm.add_simple_library()
+        self.before_rpm.section_build += "patchelf --add-needed libm.so.6 %s\n" % LIBRARY
+        self.after_rpm.add_simple_library()
+
+        self.inspection = "dsodeps"
+        self.result = "VERIFY"
+        self.waiver_auth = "Anyone"
+
+
+class RemovedDTNeededCompareKoji(TestCompareKoji):
+    def setUp(self):
+        super().setUp()
+
+        self.before_rpm.add_simple_library()
+        self.before_rpm.section_build += "patchelf --add-needed libm.so.6 %s\n" % LIBRARY
+        self.after_rpm.add_simple_library()
+
+        self.inspection = "dsodeps"
+        self.result = "VERIFY"
+        self.waiver_auth = "Anyone"
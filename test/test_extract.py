@@ -0,0 +1,127 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import json
+import os
+import shutil
+import subprocess
+
+import rpmfluff
+
+from baseclass import TestCompareRPMs
+
+PROGRAM = "/usr/bin/vaporware"
+DATA_PATH = "/usr/share/vaporware/data.txt"
+ADDED_PATH = "/usr/share/vaporware/added.txt"
+
+
+# Inspections that only read ELF objects extract only the ELF objects
+# from the payload, but every file is still listed and the results are
+# the same as when everything is extracted.
+class ElfOnlyExtractCompareRPMs(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+        self.workdir = None
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_simple_compilation(installPath=PROGRAM[1:])
+            pkg.add_installed_file(DATA_PATH, rpmfluff.SourceFile("data.txt", "before\n"))
+
+        self.after_rpm.add_installed_file(ADDED_PATH, rpmfluff.SourceFile("added.txt", "added\n"))
+
+    def run_inspect(self, arch, tests):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-T",
+            tests,
+            "-k",
+            "-o",
+            self.outputfile,
+            self.before_rpm.get_built_rpm(arch),
+            self.after_rpm.get_built_rpm(arch),
+        ]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        for line in self.out.decode("utf-8").splitlines():
+            if line.startswith("Keeping working directory: "):
+                self.workdir = line.split(": ", 1)[1].strip()
+
+        with open(self.outputfile) as f:
+            results = json.loads(f.read().encode("utf-8"))
+
+        # the command line is reported in the diagnostics
+        results.pop("diagnostics", None)
+        return results
+
+    # Return the extracted copies of path in the working directory.
+    def extracted(self, path):
+        found = []
+
+        for (dirpath, dirnames, filenames) in os.walk(self.workdir):
+            candidate = os.path.join(dirpath, os.path.basename(path))
+
+            if candidate.endswith(path) and os.path.isfile(candidate):
+                found.append(candidate)
+
+        return found
+
+    def remove_workdir(self):
+        if self.workdir is not None:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+        self.workdir = None
+
+    def tearDown(self):
+        self.remove_workdir()
+        super().tearDown()
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            # only the ELF objects are written to disk
+            selected = self.run_inspect(a, "elf,addedfiles")
+            self.assertEqual(len(self.extracted(PROGRAM)), 2)
+            self.assertEqual(self.extracted(DATA_PATH), [])
+            self.assertEqual(self.extracted(ADDED_PATH), [])
+
+            # files that were not written are still listed
+            self.assertIn(
+                ADDED_PATH,
+                " ".join(r.get("message") or "" for r in selected["addedfiles"]),
+            )
+            self.remove_workdir()
+
+            # changedfiles reads every file so everything is written
+            full = self.run_inspect(a, "elf,addedfiles,changedfiles")
+            self.assertEqual(len(self.extracted(DATA_PATH)), 2)
+            self.assertEqual(len(self.extracted(ADDED_PATH)), 1)
+            self.remove_workdir()
+
+            for inspection in ["elf", "addedfiles"]:
+                self.assertEqual(selected[inspection], full[inspection])
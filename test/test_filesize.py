@@ -172,3 +172,22 @@ class FileSizeShrinksToEmpty(TestCompareRPMs):
         self.result = "VERIFY"
         self.waiver_auth = "Anyone"
         self.message = f"/some/file became an empty file on {platform.machine()}"
+
+
+class FileSizeGrowsVersionedLibrary(TestCompareRPMs):
+    """Assert a library whose version suffix changed is compared with its peer and VERIFY result occurs."""
+
+    def setUp(self):
+        super().setUp()
+
+        # Tests have threshold configuration of 20%
+        self.before_rpm.add_installed_file(
+            "/usr/lib/libvaporware.so.1.2", rpmfluff.SourceFile("lib", "a" * 5)
+        )
+        self.after_rpm.add_installed_file(
+            "/usr/lib/libvaporware.so.1.3", rpmfluff.SourceFile("lib", "a" * 10)
+        )
+
+        self.inspection = "filesize"
+        self.result = "VERIFY"
+        self.waiver_auth = "Anyone"
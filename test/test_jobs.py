@@ -0,0 +1,163 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import json
+import re
+import subprocess
+
+import rpmfluff
+
+from baseclass import TestCompareRPMs
+
+
+# Run all inspections serially and then with several jobs and verify
+# the results come out the same and in the same order.
+class CompareRPMsJobsSameResults(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_simple_compilation(installPath="usr/bin/vaporware")
+            pkg.add_installed_file(
+                "/usr/share/vaporware/data.xml",
+                rpmfluff.SourceFile("data.xml", "<data><item/></data>\n"),
+            )
+            pkg.add_installed_file(
+                "/usr/share/vaporware/setup.sh",
+                rpmfluff.SourceFile("setup.sh", "#!/bin/sh\necho setup\n"),
+                mode="0755",
+            )
+
+        self.after_rpm.add_installed_file(
+            "/usr/share/vaporware/README",
+            rpmfluff.SourceFile("README", "This is vaporware.\n"),
+        )
+
+    def run_jobs(self, arch, jobs):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-o",
+            self.outputfile,
+            "-j",
+            str(jobs),
+            self.before_rpm.get_built_rpm(arch),
+            self.after_rpm.get_built_rpm(arch),
+        ]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        with open(self.outputfile) as f:
+            results = json.loads(f.read().encode("utf-8"))
+
+        # the command line is reported in the diagnostics
+        results.pop("diagnostics", None)
+        return (self.p.returncode, list(results.items()))
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            serial = self.run_jobs(a, 1)
+            parallel = self.run_jobs(a, 4)
+            self.assertEqual(serial, parallel)
+
+
+
+# Return the JSON output with the diagnostics removed, leaving the
+# rest of the text exactly as rpminspect wrote it.  The diagnostics
+# report the command line, which differs between runs.
+def strip_diagnostics(text):
+    start = text.index('"diagnostics"')
+    (_, end) = json.JSONDecoder().raw_decode(text, text.index("[", start))
+    end += re.match(r"\s*,?\s*", text[end:]).end()
+    return text[:start] + text[end:]
+
+
+# Inspections that check their files in parallel report the results
+# for each file in the same order no matter how many jobs are used,
+# both when run by themselves and when run alongside other
+# inspections on the same worker threads.
+class CompareRPMsManyFilesJobsSameOutput(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            for i in range(48):
+                if i % 3 == 0:
+                    xml = "<data><item></data>\n"
+                    sh = "#!/bin/sh\nif true; then\n"
+                else:
+                    xml = "<data><item>%d</item></data>\n" % i
+                    sh = "#!/bin/sh\necho %d\n" % i
+
+                pkg.add_installed_file(
+                    "/usr/share/vaporware/data%02d.xml" % i,
+                    rpmfluff.SourceFile("data%02d.xml" % i, xml),
+                )
+                pkg.add_installed_file(
+                    "/usr/share/vaporware/script%02d.sh" % i,
+                    rpmfluff.SourceFile("script%02d.sh" % i, sh),
+                    mode="0755",
+                )
+
+    def run_jobs(self, arch, jobs, tests):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-T",
+            tests,
+            "-o",
+            self.outputfile,
+            "-j",
+            str(jobs),
+            self.before_rpm.get_built_rpm(arch),
+            self.after_rpm.get_built_rpm(arch),
+        ]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        with open(self.outputfile) as f:
+            output = strip_diagnostics(f.read())
+
+        return (self.p.returncode, output)
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            for tests in ["xml", "xml,shellsyntax,permissions"]:
+                serial = self.run_jobs(a, 1, tests)
+                parallel = self.run_jobs(a, 8, tests)
+                self.assertEqual(serial, parallel)
@@ -0,0 +1,327 @@
+#
+# Copyright © 2021 Red Hat, Inc.
+# Author(s): David Cantrell <dcantrell@redhat.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import functools
+import http.server
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import xmlrpc.server
+
+import rpmfluff
+import yaml
+
+from baseclass import TestCompareRPMs
+
+# Koji task states
+TASK_CLOSED = 2
+
+
+class HubRequestHandler(xmlrpc.server.SimpleXMLRPCRequestHandler):
+    rpc_paths = ("/kojihub",)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FileRequestHandler(http.server.SimpleHTTPRequestHandler):
+    def __init__(self, *args, requests=None, **kwargs):
+        self.requests = requests
+        super().__init__(*args, **kwargs)
+
+    def send_head(self):
+        self.requests.append(self.path)
+        return super().send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+# A stand-in Koji hub serving a parent task with one buildArch child
+# task for each of the given packages.  Every call made to the hub is
+# counted in calls and every file requested is listed in requests.
+class StandInHub:
+    def __init__(self, topdir):
+        self.topdir = topdir
+        self.tasks = {}
+        self.children = {}
+        self.results = {}
+        self.calls = {}
+        self.requests = []
+
+        self.files = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0),
+            functools.partial(FileRequestHandler, directory=topdir, requests=self.requests),
+        )
+        self.hub = xmlrpc.server.SimpleXMLRPCServer(
+            ("127.0.0.1", 0),
+            requestHandler=HubRequestHandler,
+            allow_none=True,
+            logRequests=False,
+        )
+
+        for method in ["getTaskInfo", "getTaskDescendents", "getTaskResult"]:
+            self.hub.register_function(self.counted(method), method)
+
+        self.hub.register_function(self.counted("multiCall", self.hub.system_multicall), "multiCall")
+
+        for server in [self.files, self.hub]:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def counted(self, method, func=None):
+        if func is None:
+            func = getattr(self, method)
+
+        def call(*args):
+            self.calls[method] = self.calls.get(method, 0) + 1
+            return func(*args)
+
+        return call
+
+    def url(self, server, path):
+        return "http://127.0.0.1:%d/%s" % (server.server_address[1], path)
+
+    def add_task(self, task_id, arch, pkgs, names=None):
+        child_id = task_id + 1
+        rpms = []
+
+        for (i, pkg) in enumerate(pkgs):
+            name = names[i] if names else os.path.basename(pkg)
+            rpm = "tasks/%d/%d/%s" % (child_id % 10000, child_id, name)
+            os.makedirs(os.path.join(self.topdir, "work", os.path.dirname(rpm)), exist_ok=True)
+            shutil.copy(pkg, os.path.join(self.topdir, "work", rpm))
+            rpms.append(rpm)
+
+        for (tid, method, parent) in [(task_id, "build", None), (child_id, "buildArch", task_id)]:
+            self.tasks[tid] = {
+                "id": tid,
+                "method": method,
+                "arch": arch if method == "buildArch" else "noarch",
+                "state": TASK_CLOSED,
+                "parent": parent,
+                "label": None,
+            }
+
+        self.children[task_id] = [child_id]
+        self.children[child_id] = []
+        self.results[child_id] = {"brootid": 1, "rpms": rpms, "srpms": [], "logs": []}
+
+    def getTaskInfo(self, task_id):
+        return self.tasks.get(int(task_id))
+
+    def getTaskDescendents(self, task_id):
+        task_id = int(task_id)
+        family = {}
+        pending = [task_id]
+
+        while pending:
+            tid = pending.pop()
+            family[str(tid)] = [self.tasks[c] for c in self.children[tid]]
+            pending += self.children[tid]
+
+        return family
+
+    def getTaskResult(self, task_id):
+        return self.results[int(task_id)]
+
+    def shutdown(self):
+        for server in [self.files, self.hub]:
+            server.shutdown()
+            server.server_close()
+
+
+# Inspect the before and after packages as Koji scratch builds served
+# by a stand-in hub and verify the results match inspecting the local
+# packages.  Task results are fetched with multiCall and, once in the
+# cache directory, are not fetched from the hub again.
+class CompareRPMsKojiTasks(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            pkg.add_installed_file(
+                "/usr/share/vaporware/data.xml",
+                rpmfluff.SourceFile("data.xml", "<data><item/></data>\n"),
+            )
+
+    def run_inspect(self, before, after, extra=None, tests="xml"):
+        args = [
+            self.rpminspect,
+            "-c",
+            self.conffile,
+            "-F",
+            "json",
+            "-r",
+            "GENERIC",
+            "-T",
+            tests,
+            "-o",
+            self.outputfile,
+        ]
+        args += extra or []
+        args += [before, after]
+
+        self.p = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        (self.out, self.err) = self.p.communicate()
+
+        with open(self.outputfile) as f:
+            results = json.loads(f.read().encode("utf-8"))
+
+        # the command line is reported in the diagnostics
+        self.diagnostics = results.pop("diagnostics", None)
+        return (self.p.returncode, list(results.items()))
+
+    def use_hub(self, hub):
+        with open(self.conffile) as f:
+            cfg = yaml.full_load(f)
+
+        cfg["koji"]["hub"] = hub.url(hub.hub, "kojihub")
+        cfg["koji"]["download_ursine"] = hub.url(hub.files, "")[:-1]
+
+        with open(self.conffile, "w") as f:
+            f.write(yaml.dump(cfg).replace("- ", "  - "))
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            before = self.before_rpm.get_built_rpm(a)
+            after = self.after_rpm.get_built_rpm(a)
+            local = self.run_inspect(before, after)
+
+            with tempfile.TemporaryDirectory() as topdir, tempfile.TemporaryDirectory() as cachedir:
+                hub = StandInHub(topdir)
+
+                try:
+                    hub.add_task(10001, a, [before])
+                    hub.add_task(20001, a, [after])
+                    self.use_hub(hub)
+                    koji = self.run_inspect("10001", "20001", ["-C", cachedir])
+                    self.assertEqual(local, koji)
+                    self.assertEqual(hub.calls.get("getTaskResult", 0), 2)
+                    self.assertEqual(hub.calls.get("multiCall", 0), 2)
+
+                    # closed tasks come from the cache the second time
+                    hub.calls.clear()
+                    cached = self.run_inspect("10001", "20001", ["-C", cachedir])
+                    self.assertEqual(local, cached)
+                    self.assertEqual(hub.calls, {})
+                finally:
+                    hub.shutdown()
+
+
+# Inspect scratch builds that include a debuginfo package with an
+# inspection that does not look at debuginfo packages and verify the
+# debuginfo package is not downloaded.
+class CompareRPMsKojiTasksSkipDebuginfo(CompareRPMsKojiTasks):
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+
+        for a in self.before_rpm.get_build_archs():
+            before = self.before_rpm.get_built_rpm(a)
+            after = self.after_rpm.get_built_rpm(a)
+            local = self.run_inspect(before, after, tests="config")
+            debuginfo = "vaporware-debuginfo-0.1-2.%s.rpm" % a
+
+            with tempfile.TemporaryDirectory() as topdir:
+                hub = StandInHub(topdir)
+
+                try:
+                    hub.add_task(10001, a, [before])
+                    hub.add_task(20001, a, [after, after], [os.path.basename(after), debuginfo])
+                    self.use_hub(hub)
+
+                    koji = self.run_inspect("10001", "20001", tests="config")
+                    self.assertEqual(local, koji)
+                    self.assertEqual([r for r in hub.requests if r.endswith(debuginfo)], [])
+                    self.assertIn(
+                        "Skipped downloading 1 package",
+                        " ".join(d["message"] for d in self.diagnostics),
+                    )
+                finally:
+                    hub.shutdown()
+
+
+# Inspect scratch builds with several packages each, downloaded two at
+# a time so packages are extracted while others are still downloading,
+# and verify the results match inspecting the same packages locally.
+class CompareRPMsKojiTasksStreamExtract(CompareRPMsKojiTasks):
+    def setUp(self):
+        super().setUp()
+
+        for pkg in [self.before_rpm, self.after_rpm]:
+            for sub in ["one", "two", "three"]:
+                pkg.add_subpackage(sub)
+                pkg.add_installed_file(
+                    "/usr/share/vaporware/%s.xml" % sub,
+                    rpmfluff.SourceFile("%s.xml" % sub, "<%s><item/></%s>\n" % (sub, sub)),
+                    subpackageSuffix=sub,
+                )
+
+        # a broken file in one of the after packages
+        self.after_rpm.add_installed_file(
+            "/usr/share/vaporware/broken.xml",
+            rpmfluff.SourceFile("broken.xml", "<broken><item></broken>\n"),
+            subpackageSuffix="two",
+        )
+
+    def runTest(self):
+        self.configFile()
+        self.before_rpm.do_make()
+        self.after_rpm.do_make()
+        tests = "xml,addedfiles,changedfiles"
+
+        for a in self.before_rpm.get_build_archs():
+            before = [self.before_rpm.get_built_rpm(a, sp) for sp in self.before_rpm.get_subpackage_names()]
+            after = [self.after_rpm.get_built_rpm(a, sp) for sp in self.after_rpm.get_subpackage_names()]
+
+            with tempfile.TemporaryDirectory() as builddir, tempfile.TemporaryDirectory() as topdir:
+                # the same packages as local builds
+                for (name, pkgs) in [("before", before), ("after", after)]:
+                    adir = os.path.join(builddir, name, a)
+                    os.makedirs(adir)
+
+                    for pkg in pkgs:
+                        shutil.copy(pkg, adir)
+
+                local = self.run_inspect(
+                    os.path.join(builddir, "before"),
+                    os.path.join(builddir, "after"),
+                    ["-j", "4"],
+                    tests=tests,
+                )
+                self.assertNotEqual(local[0], 0)
+
+                hub = StandInHub(topdir)
+
+                try:
+                    hub.add_task(10001, a, before)
+                    hub.add_task(20001, a, after)
+                    self.use_hub(hub)
+
+                    koji = self.run_inspect("10001", "20001", ["-J", "2", "-j", "4"], tests=tests)
+                    self.assertEqual(local, koji)
+                finally:
+                    hub.shutdown()
@@ -194,3 +194,33 @@ class ForbiddenPoliticallySensitiveFileCompareKoji(TestCompareKoji):
         self.inspection = "politics"
         self.result = "BAD"
         self.waiver_auth = "Not Waivable"
+
+
+# package contains a file listed by its full path (BAD)
+class ForbiddenPoliticallySensitivePathRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+
+        self.rpm.add_installed_file(
+            "/usr/share/liberland/flag.txt",
+            rpmfluff.SourceFile("flag.txt", "yellow and black"),
+        )
+
+        self.inspection = "politics"
+        self.result = "BAD"
+        self.waiver_auth = "Not Waivable"
+
+
+# package contains a file matching a wildcard within a directory (BAD)
+class ForbiddenPoliticallySensitiveDirectoryRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+
+        self.rpm.add_installed_file(
+            "/usr/share/liberland/coat-of-arms.svg",
+            rpmfluff.SourceFile("coat-of-arms.svg", "<svg/>"),
+        )
+
+        self.inspection = "politics"
+        self.result = "BAD"
+        self.waiver_auth = "Not Waivable"
@@ -18,7 +18,13 @@
 
 import rpmfluff
 
-from baseclass import TestRPMs, TestKoji, TestCompareRPMs, TestCompareKoji
+from baseclass import (
+    TestRPMs,
+    TestKoji,
+    TestCompareRPMs,
+    TestCompareKoji,
+    check_results,
+)
 
 contents = """
 # Open things up
@@ -364,3 +370,89 @@ class SecurityFAILFileRemovedFromSecurityPathCompareKoji(TestCompareKoji):
         self.inspection = "addedfiles"
         self.result = "BAD"
         self.waiver_auth = "Security"
+
+
+######################################################
+# Security rules found through the security index    #
+######################################################
+
+
+# the package is a pattern, so the rule is only found among the rules
+# for any package
+class SecurityPackagePatternRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+        self.rpm.add_installed_file(
+            "/etc/sudoers.d/anypkg", rpmfluff.SourceFile("wheel", contents)
+        )
+        self.inspection = "addedfiles"
+        self.result = "INFO"
+        self.waiver_auth = "Security"
+
+
+# the earlier rule for any package wins over the later rule for this
+# package name
+class SecurityFirstLineWinsRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+        self.rpm.add_installed_file(
+            "/etc/sudoers.d/first", rpmfluff.SourceFile("wheel", contents)
+        )
+        self.inspection = "addedfiles"
+        self.result = "OK"
+        self.waiver_auth = "Not Waivable"
+
+
+class SecurityFirstLineWinsCompareRPMs(TestCompareRPMs):
+    def setUp(self):
+        super().setUp()
+        self.after_rpm.add_installed_file(
+            "/etc/sudoers.d/first", rpmfluff.SourceFile("wheel", contents)
+        )
+        self.inspection = "addedfiles"
+        self.result = "OK"
+        self.waiver_auth = "Not Waivable"
+
+
+# the path pattern has a wildcard in the file name
+class SecurityPathPatternRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+        self.rpm.add_installed_file(
+            "/etc/sudoers.d/prefixed", rpmfluff.SourceFile("wheel", contents)
+        )
+        self.inspection = "addedfiles"
+        self.result = "INFO"
+        self.waiver_auth = "Security"
+
+
+# the path pattern has a wildcard in a parent directory
+class SecurityDirectoryPatternRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+        self.rpm.add_installed_file(
+            "/etc/sudoers.d/dirglob", rpmfluff.SourceFile("wheel", contents)
+        )
+        self.inspection = "addedfiles"
+        self.result = "VERIFY"
+        self.waiver_auth = "Security"
+
+
+# two inspections get their own rule from the one entry remembered
+# for the file
+class SecurityRuleRememberedRPMs(TestRPMs):
+    def setUp(self):
+        super().setUp()
+        self.rpm.add_installed_file(
+            "/etc/sudoers.d/memo",
+            rpmfluff.SourceFile("wheel", contents),
+            mode="0666",
+        )
+        self.inspection = "addedfiles,permissions"
+        self.result_inspection = "permissions"
+        self.result = "VERIFY"
+        self.waiver_auth = "Security"
+
+    def runTest(self):
+        super().runTest()
+        check_results(self.results, "addedfiles", "INFO", "Security")
@@ -17,6 +17,7 @@
 #
 
 import rpmfluff
+import yaml
 
 from baseclass import TestRPMs, TestKoji, TestCompareRPMs, TestCompareKoji
 
@@ -144,3 +145,31 @@ class XMLMalformedCompareKoji(TestCompareKoji):
         self.inspection = "xml"
         self.result = "VERIFY"
         self.waiver_auth = "Anyone"
+
+
+# Malformed XML file matched by a brace expression in the xml ignore
+# list in compare RPMs (OK)
+class XMLMalformedIgnoredCompareRPMs(TestCompareRPMs):
+    def setUp(self):
+        TestCompareRPMs.setUp(self)
+        self.before_rpm.add_installed_file(
+            "/usr/share/data/invalid.xml",
+            rpmfluff.SourceFile("invalid.xml", invalid_xml),
+        )
+        self.after_rpm.add_installed_file(
+            "/usr/share/data/invalid.xml",
+            rpmfluff.SourceFile("invalid.xml", invalid_xml),
+        )
+        self.inspection = "xml"
+        self.result = "OK"
+
+    def configFile(self):
+        super().configFile()
+
+        with open(self.conffile) as f:
+            cfg = yaml.full_load(f)
+
+        cfg["xml"]["ignore"] = ["/usr/share/{doc,data}/*.xml"]
+
+        with open(self.conffile, "w") as f:
+            f.write(yaml.dump(cfg).replace("- ", "  - "))